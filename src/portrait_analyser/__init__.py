@@ -1,84 +1,288 @@
-from .depth_sampling import (
-    bilinear_sample,
-    measure_filtered_surface_length,
-    median_filter_depthmap,
-    sample_filtered_depth,
-    sample_points_along_line,
-)
-from .exceptions import (
-    ExifValidationFailed,
-    MultipleFacesDetected,
-    NoDepthMapFound,
-    NoFacesDetected,
-    UnknownExtension,
-)
-from .face import (
-    Eye,
-    Face,
-    IncisorMeasurement,
-    Rectangle,
-    detect_eyes,
-    estimate_neck_search_zone,
-    find_bounding_box_teeth,
-    find_incisor_centroids,
-    find_incisor_distance_teeth,
-    find_neck_measurement_point,
-    find_neck_narrowest_row,
-    get_face_parameters,
-)
-from .incisor import (
-    compute_incisor_distance_3d,
-    depth_raw_to_distance_cm,
-    pixel_to_mm,
-    vector_length_3d,
-)
-from .ios import IOSPortrait, load_image
-from .local_surface import (
-    LocalSurfaceScores,
-    SurfaceFeature,
-    score_local_surface_feature,
-)
-from .mouth import MouthMeasurement, compute_mouth_measurement_from_facemesh
-from .neck import (
-    NeckMeasurement,
-    compute_neck_circumference,
-    estimate_face_from_skinmap,
-    find_stable_depth_x_from_edge,
-    neck_search_bounds_from_face_landmarks,
-)
-from .pose import (
-    FaceMeshDebug,
-    MediaPipeDebug,
-    NeckMidpoint,
-    PortraitPose,
-    detect_neck_midpoint,
-)
-from .extended_neck import (
-    SegmentationDebug,
-    detect_neck_midpoint_from_dual_mask,
-    detect_neck_midpoint_from_segmentation,
-)
+"""Depth-based facial and neck measurements from iOS Portrait Mode photos.
+
+The public names below are imported lazily, on first access: ``import
+portrait_analyser`` loads no submodule, and ``from portrait_analyser import
+load_image`` loads only what :func:`~portrait_analyser.ios.load_image`
+needs, not MediaPipe's detectors, the batch runner or the uncertainty
+models. Short-lived workers and the CLI start faster for it.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .batch import BatchManifest, BatchOptions, find_portraits, run_batch
+    from .cache import ResultCache
+    from .detector_store import DetectorOutputStore
+    from .depth_sampling import (
+        bilinear_sample,
+        measure_filtered_surface_length,
+        median_filter_depthmap,
+        sample_filtered_depth,
+        sample_points_along_line,
+    )
+    from .diagnostics import DetectionDiagnostics
+    from .exceptions import (
+        ExifValidationFailed,
+        ModelChecksumMismatch,
+        ModelNotAvailable,
+        MultipleFacesDetected,
+        NoDepthMapFound,
+        NoFacesDetected,
+        UnknownExtension,
+    )
+    from .face import (
+        Eye,
+        Face,
+        IncisorMeasurement,
+        Rectangle,
+        detect_eyes,
+        estimate_neck_search_zone,
+        find_bounding_box_teeth,
+        find_incisor_centroids,
+        find_incisor_distance_teeth,
+        find_neck_measurement_point,
+        find_neck_narrowest_row,
+        get_face_parameters,
+    )
+    from .incisor import (
+        compute_incisor_distance_3d,
+        depth_raw_to_distance_cm,
+        pixel_to_mm,
+        vector_length_3d,
+    )
+    from .frame import AnalysisFrame
+    from .instrumentation import (
+        ChromeTraceRecorder,
+        StageSummary,
+        StageTiming,
+        StageTimingAggregator,
+        chrome_trace,
+        stage_hooks,
+    )
+    from .ios import IOSPortrait, load_image
+    from .landmarks import Landmarks
+    from .local_surface import (
+        LocalSurfaceScores,
+        SurfaceFeature,
+        score_local_surface_feature,
+    )
+    from .models import available_models, model_directory, preload_models
+    from .mouth import MouthMeasurement, compute_mouth_measurement_from_facemesh
+    from .neck import (
+        NeckMeasurement,
+        compute_neck_circumference,
+        estimate_face_from_skinmap,
+        find_stable_depth_x_from_edge,
+        neck_search_bounds_from_face_landmarks,
+        neck_search_kwargs_from_detection,
+    )
+    from .neck_session import NeckMeasurementSession
+    from .pipeline import AnalysisReport, analyse_portrait
+    from .pose import (
+        FaceMeshDebug,
+        MediaPipeDebug,
+        NeckMidpoint,
+        PoseModelVariant,
+        PortraitPose,
+        detect_neck_midpoint,
+    )
+    from .extended_neck import (
+        SegmentationDebug,
+        detect_neck_midpoint_from_dual_mask,
+        detect_neck_midpoint_from_segmentation,
+    )
+    from .presets import ANALYSIS_PRESETS, AnalysisPreset, get_analysis_preset
+    from .routing import (
+        NeckDetectorRouter,
+        NeckRoute,
+        RouteAttempt,
+        route_neck_midpoint,
+    )
+    from .sequence import NeckMidpointTracker, detect_neck_midpoint_sequence
+    from .session import PortraitInferenceSession
+    from .synthetic import (
+        SyntheticGeometry,
+        SyntheticSubject,
+        generate_synthetic_portrait,
+    )
+    from .uncertainty import (
+        NoiseModel,
+        UncertaintyEstimate,
+        estimate_incisor_uncertainty,
+        estimate_neck_circumference_uncertainty,
+        estimate_tmd_uncertainty,
+    )
+
+# Public name -> defining submodule.
+_EXPORTS = {
+    ".batch": (
+        "BatchManifest",
+        "BatchOptions",
+        "find_portraits",
+        "run_batch",
+    ),
+    ".cache": ("ResultCache",),
+    ".detector_store": ("DetectorOutputStore",),
+    ".depth_sampling": (
+        "bilinear_sample",
+        "measure_filtered_surface_length",
+        "median_filter_depthmap",
+        "sample_filtered_depth",
+        "sample_points_along_line",
+    ),
+    ".diagnostics": ("DetectionDiagnostics",),
+    ".exceptions": (
+        "ExifValidationFailed",
+        "ModelChecksumMismatch",
+        "ModelNotAvailable",
+        "MultipleFacesDetected",
+        "NoDepthMapFound",
+        "NoFacesDetected",
+        "UnknownExtension",
+    ),
+    ".face": (
+        "Eye",
+        "Face",
+        "IncisorMeasurement",
+        "Rectangle",
+        "detect_eyes",
+        "estimate_neck_search_zone",
+        "find_bounding_box_teeth",
+        "find_incisor_centroids",
+        "find_incisor_distance_teeth",
+        "find_neck_measurement_point",
+        "find_neck_narrowest_row",
+        "get_face_parameters",
+    ),
+    ".incisor": (
+        "compute_incisor_distance_3d",
+        "depth_raw_to_distance_cm",
+        "pixel_to_mm",
+        "vector_length_3d",
+    ),
+    ".frame": ("AnalysisFrame",),
+    ".instrumentation": (
+        "ChromeTraceRecorder",
+        "StageSummary",
+        "StageTiming",
+        "StageTimingAggregator",
+        "chrome_trace",
+        "stage_hooks",
+    ),
+    ".ios": ("IOSPortrait", "load_image",),
+    ".landmarks": ("Landmarks",),
+    ".local_surface": (
+        "LocalSurfaceScores",
+        "SurfaceFeature",
+        "score_local_surface_feature",
+    ),
+    ".models": (
+        "available_models",
+        "model_directory",
+        "preload_models",
+    ),
+    ".mouth": ("MouthMeasurement", "compute_mouth_measurement_from_facemesh",),
+    ".neck": (
+        "NeckMeasurement",
+        "compute_neck_circumference",
+        "estimate_face_from_skinmap",
+        "find_stable_depth_x_from_edge",
+        "neck_search_bounds_from_face_landmarks",
+        "neck_search_kwargs_from_detection",
+    ),
+    ".neck_session": ("NeckMeasurementSession",),
+    ".pipeline": ("AnalysisReport", "analyse_portrait"),
+    ".pose": (
+        "FaceMeshDebug",
+        "MediaPipeDebug",
+        "NeckMidpoint",
+        "PoseModelVariant",
+        "PortraitPose",
+        "detect_neck_midpoint",
+    ),
+    ".extended_neck": (
+        "SegmentationDebug",
+        "detect_neck_midpoint_from_dual_mask",
+        "detect_neck_midpoint_from_segmentation",
+    ),
+    ".presets": (
+        "ANALYSIS_PRESETS",
+        "AnalysisPreset",
+        "get_analysis_preset",
+    ),
+    ".routing": (
+        "NeckDetectorRouter",
+        "NeckRoute",
+        "RouteAttempt",
+        "route_neck_midpoint",
+    ),
+    ".sequence": ("NeckMidpointTracker", "detect_neck_midpoint_sequence",),
+    ".session": ("PortraitInferenceSession",),
+    ".synthetic": (
+        "SyntheticGeometry",
+        "SyntheticSubject",
+        "generate_synthetic_portrait",
+    ),
+    ".uncertainty": (
+        "NoiseModel",
+        "UncertaintyEstimate",
+        "estimate_incisor_uncertainty",
+        "estimate_neck_circumference_uncertainty",
+        "estimate_tmd_uncertainty",
+    ),
+}
+_LAZY_NAMES = {
+    name: module for module, names in _EXPORTS.items() for name in names
+}
 
 __all__ = [
+    "BatchManifest",
+    "BatchOptions",
+    "ChromeTraceRecorder",
+    "DetectionDiagnostics",
+    "DetectorOutputStore",
+    "ANALYSIS_PRESETS",
+    "AnalysisFrame",
+    "AnalysisPreset",
+    "AnalysisReport",
     "ExifValidationFailed",
     "Eye",
     "Face",
     "FaceMeshDebug",
     "IOSPortrait",
     "IncisorMeasurement",
+    "Landmarks",
+    "ModelChecksumMismatch",
+    "ModelNotAvailable",
     "MouthMeasurement",
     "LocalSurfaceScores",
     "MultipleFacesDetected",
     "NeckMeasurement",
+    "NeckMeasurementSession",
     "MediaPipeDebug",
     "NeckMidpoint",
+    "NeckDetectorRouter",
+    "NeckMidpointTracker",
+    "NeckRoute",
     "NoDepthMapFound",
+    "NoiseModel",
+    "PortraitInferenceSession",
     "PortraitPose",
+    "PoseModelVariant",
     "SurfaceFeature",
+    "SyntheticGeometry",
+    "SyntheticSubject",
     "NoFacesDetected",
     "Rectangle",
+    "ResultCache",
+    "RouteAttempt",
+    "UncertaintyEstimate",
     "UnknownExtension",
+    "analyse_portrait",
+    "available_models",
     "bilinear_sample",
+    "chrome_trace",
     "compute_incisor_distance_3d",
     "compute_mouth_measurement_from_facemesh",
     "compute_neck_circumference",
@@ -86,24 +290,61 @@ __all__ = [
     "detect_neck_midpoint",
     "detect_neck_midpoint_from_dual_mask",
     "detect_neck_midpoint_from_segmentation",
+    "detect_neck_midpoint_sequence",
     "estimate_face_from_skinmap",
+    "estimate_incisor_uncertainty",
+    "estimate_neck_circumference_uncertainty",
+    "estimate_tmd_uncertainty",
     "SegmentationDebug",
+    "StageSummary",
+    "StageTiming",
+    "StageTimingAggregator",
     "estimate_neck_search_zone",
     "depth_raw_to_distance_cm",
     "find_bounding_box_teeth",
     "find_incisor_centroids",
+    "find_portraits",
     "find_incisor_distance_teeth",
     "find_neck_measurement_point",
     "find_neck_narrowest_row",
     "find_stable_depth_x_from_edge",
     "neck_search_bounds_from_face_landmarks",
+    "neck_search_kwargs_from_detection",
+    "generate_synthetic_portrait",
+    "get_analysis_preset",
     "get_face_parameters",
     "load_image",
     "measure_filtered_surface_length",
     "median_filter_depthmap",
+    "model_directory",
     "pixel_to_mm",
+    "preload_models",
+    "route_neck_midpoint",
+    "run_batch",
     "sample_filtered_depth",
     "sample_points_along_line",
     "score_local_surface_feature",
+    "stage_hooks",
     "vector_length_3d",
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_NAMES.get(name)
+    if module_name is None:
+        # Submodules are importable as attributes, as with eager imports.
+        try:
+            return importlib.import_module(f".{name}", __name__)
+        except ModuleNotFoundError as e:
+            if e.name != f"{__name__}.{name}":
+                raise
+            raise AttributeError(
+                f"module {__name__!r} has no attribute {name!r}"
+            ) from None
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
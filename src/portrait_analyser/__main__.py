@@ -2,17 +2,21 @@
 
 Usage:
     python -m portrait_analyser <path>
-    analyse-portrait <path>
+    analyse-portrait <path> [--skip-exif] [--trace TRACE_JSON] [--no-decode]
+    analyse-portrait batch <dir|glob|file>... [-o OUTPUT] [--format FORMAT]
+        [--measurements NAME...] [--workers N] [--preset NAME] [--skip-exif]
+        [--manifest MANIFEST_JSONL] [--detector-store DIR]
+    analyse-portrait models fetch [NAME...] [--dir DIR]
+    analyse-portrait models list [--dir DIR]
 """
 
 import argparse
-import xml.etree.ElementTree as ET
+import sys
+from contextlib import nullcontext
+from pathlib import Path
 
-import piexif
-import pyheif
-
-from .exceptions import ExifValidationFailed, NoDepthMapFound, UnknownExtension
-from .ios import load_image
+# The subcommands import what they need when they run, so that
+# ``--help`` and each subcommand load only their own dependencies.
 
 
 def _print_header(title):
@@ -25,32 +29,46 @@ def _print_section(title):
     print(f"\n--- {title} ---")
 
 
-def _inspect_raw_container(path):
-    """Inspect the raw HEIF container before any processing."""
-    _print_header("RAW HEIF CONTAINER INSPECTION")
+def _print_plane(image, indent="  "):
+    """Header facts of a pyheif image, plus its data length once decoded."""
+    print(f"{indent}Mode: {image.mode}")
+    print(f"{indent}Size: {image.size[0]} x {image.size[1]}")
+    print(f"{indent}Bit depth: {image.bit_depth}")
+    if image.data is not None:
+        print(f"{indent}Data length: {len(image.data)} bytes")
+    else:
+        print(f"{indent}Data length: (not decoded)")
+
 
-    with open(path, "rb") as f:
-        container = pyheif.open_container(f)
+def _inspect_raw_container(container):
+    """Inspect the raw HEIF container before any processing.
+
+    Everything but the data lengths comes from the image headers; planes
+    are never decoded here, only reported when the processed inspection
+    already decoded them.
+    """
+    import xml.etree.ElementTree as ET
+
+    import piexif
+
+    _print_header("RAW HEIF CONTAINER INSPECTION")
 
     primary = container.primary_image
 
     # Primary image info
     _print_section("Primary Image")
-    loaded = primary.image.load()
-    print(f"  Mode: {loaded.mode}")
-    print(f"  Size: {loaded.size[0]} x {loaded.size[1]}")
-    print(f"  Data length: {len(loaded.data)} bytes")
-    metadata_count = len(loaded.metadata) if loaded.metadata else 0
-    print(f"  Metadata entries: {metadata_count}")
+    _print_plane(primary.image)
+    metadata = primary.image.metadata or []
+    print(f"  Metadata entries: {len(metadata)}")
 
     # EXIF data
     _print_section("EXIF Data")
     exif_found = False
-    for metadata in loaded.metadata or []:
-        if metadata.get("type", "") == "Exif":
+    for meta in metadata:
+        if meta.get("type", "") == "Exif":
             exif_found = True
             try:
-                exif = piexif.load(metadata["data"])
+                exif = piexif.load(meta["data"])
                 ifd_0th = exif.get("0th", {})
                 ifd_exif = exif.get("Exif", {})
 
@@ -83,15 +101,13 @@ def _inspect_raw_container(path):
     # Depth image
     _print_section("Depth Image")
     if primary.depth_image is not None:
-        depth_loaded = primary.depth_image.image.load()
+        depth = primary.depth_image.image
         print("  Present: YES")
-        print(f"  Mode: {depth_loaded.mode}")
-        print(f"  Size: {depth_loaded.size[0]} x {depth_loaded.size[1]}")
-        print(f"  Data length: {len(depth_loaded.data)} bytes")
+        _print_plane(depth)
 
         # Parse depth metadata for float min/max
-        if depth_loaded.metadata:
-            for meta in depth_loaded.metadata:
+        if depth.metadata:
+            for meta in depth.metadata:
                 if meta.get("type", "") == "mime":
                     try:
                         root = ET.fromstring(meta.get("data"))
@@ -111,29 +127,43 @@ def _inspect_raw_container(path):
         for i, aux in enumerate(aux_images):
             aux_type = getattr(aux, "type", "(no type)")
             print(f"  [{i}] Type: {aux_type}")
-            try:
-                aux_loaded = aux.image.load()
-                print(f"       Mode: {aux_loaded.mode}")
-                print(f"       Size: {aux_loaded.size[0]} x {aux_loaded.size[1]}")
-                print(f"       Data length: {len(aux_loaded.data)} bytes")
-            except Exception as e:
-                print(f"       Error loading: {e}")
+            _print_plane(aux.image, indent="       ")
     else:
         print("  Count: 0 (no auxiliary images)")
 
 
-def _inspect_processed(path, skip_exif):
-    """Run load_image() and inspect the processed result."""
-    _print_header("PROCESSED INSPECTION (via load_image)")
+def _process(path, container, skip_exif):
+    """load_image() on the shared container; returns (portrait, error).
+
+    Without a *container* (the CLI could not open one) load_image() opens
+    the file itself, to report the error it raises.
+    """
+    from .instrumentation import stage
+    from .ios import _check_extension, _load_portrait
 
     try:
-        result = load_image(path, use_exif=not skip_exif)
-    except (ExifValidationFailed, NoDepthMapFound, UnknownExtension) as e:
-        print(f"\n  load_image() raised {type(e).__name__}: {e}")
+        _check_extension(path)
+        with stage("load_image"):
+            portrait = _load_portrait(
+                path, use_exif=not skip_exif, heif_container=container
+            )
+    except Exception as e:
+        return None, e
+    return portrait, None
+
+
+def _inspect_processed(result, error):
+    """Inspect the load_image() result computed by _process()."""
+    from .exceptions import ExifValidationFailed, NoDepthMapFound, UnknownExtension
+
+    _print_header("PROCESSED INSPECTION (via load_image)")
+
+    if isinstance(error, (ExifValidationFailed, NoDepthMapFound, UnknownExtension)):
+        print(f"\n  load_image() raised {type(error).__name__}: {error}")
         print("  Try --skip-exif if this is an EXIF validation issue.")
         return
-    except Exception as e:
-        print(f"\n  load_image() raised unexpected {type(e).__name__}: {e}")
+    if error is not None:
+        print(f"\n  load_image() raised unexpected {type(error).__name__}: {error}")
         return
 
     if result is None:
@@ -188,11 +218,162 @@ def _inspect_processed(path, skip_exif):
         print("  Present: NO")
 
 
-def main():
+def _batch_main(argv):
+    from .batch import MEASUREMENTS, OUTPUT_FORMATS, find_portraits, run_batch
+    from .presets import ANALYSIS_PRESETS
+
+    parser = argparse.ArgumentParser(
+        prog="analyse-portrait batch",
+        description="Measure many Portrait Mode files on a process pool and "
+        "write one row per file. Throughput and ETA are reported on stderr.",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Directories (searched recursively for .heic/.heif), glob "
+        "patterns or files",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="Result file; '-' (default) writes to stdout",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        help="Output format (default: from the output extension, else csv)",
+    )
+    parser.add_argument(
+        "--measurements",
+        nargs="+",
+        choices=MEASUREMENTS,
+        default=list(MEASUREMENTS),
+        metavar="NAME",
+        help=f"Measurements to run: {', '.join(MEASUREMENTS)} (default: all)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes (default: CPU count; 1 runs in-process)",
+    )
+    parser.add_argument(
+        "--preset",
+        choices=list(ANALYSIS_PRESETS),
+        help="Speed/accuracy preset for the pose model and neck arc",
+    )
+    parser.add_argument(
+        "--skip-exif",
+        action="store_true",
+        help="Skip EXIF TrueDepth validation",
+    )
+    parser.add_argument(
+        "--manifest",
+        metavar="MANIFEST_JSONL",
+        help="Resumable run: record finished files here and skip files already "
+        "measured with the same content, library version and parameters",
+    )
+    parser.add_argument(
+        "--detector-store",
+        metavar="DIR",
+        help="Keep MediaPipe outputs in this directory and reuse them for "
+        "files already seen with the same models and options",
+    )
+    parser.add_argument(
+        "--quiet", action="store_true", help="Do not report progress on stderr"
+    )
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    paths = find_portraits(args.inputs)
+    if not paths:
+        parser.error("no files found")
+    try:
+        counts = run_batch(
+            paths,
+            args.output,
+            measurements=args.measurements,
+            workers=args.workers,
+            output_format=args.format,
+            use_exif=not args.skip_exif,
+            preset=args.preset,
+            progress=not args.quiet,
+            manifest=args.manifest,
+            detector_store=args.detector_store,
+        )
+    except (ImportError, ValueError) as e:
+        parser.error(str(e))
+    if not args.quiet:
+        print(
+            f"{counts['ok']} ok, {counts['error']} failed, "
+            f"{counts['skipped']} skipped",
+            file=sys.stderr,
+        )
+    return 0
+
+
+def _models_main(argv):
+    from .models import (
+        MODEL_DIR_ENV,
+        OFFLINE_ENV,
+        available_models,
+        model_directory,
+        preload_models,
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="analyse-portrait models",
+        description="Download and verify the MediaPipe models ahead of time, "
+        f"e.g. before starting workers with {OFFLINE_ENV}=1. The model "
+        f"directory is ${MODEL_DIR_ENV} or ~/.cache/portrait-analyser.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    fetch = commands.add_parser("fetch", help="Download and verify models")
+    listing = commands.add_parser("list", help="Show models and their status")
+    names = list(available_models())
+    fetch.add_argument(
+        "names",
+        nargs="*",
+        metavar="NAME",
+        help=f"Models to fetch: {', '.join(names)} (default: all)",
+    )
+    for command in (fetch, listing):
+        command.add_argument("--dir", help="Model directory (default: as above)")
+    args = parser.parse_args(argv)
+
+    if args.command == "fetch":
+        try:
+            paths = preload_models(args.names or None, directory=args.dir)
+        except ValueError as e:
+            parser.error(str(e))
+        except Exception as e:
+            print(f"error: {type(e).__name__}: {e}", file=sys.stderr)
+            return 1
+        for name, path in paths.items():
+            print(f"{name:<24} {path}")
+        return 0
+
+    directory = Path(args.dir) if args.dir else model_directory()
+    for name, spec in available_models().items():
+        path = directory / spec.filename
+        print(f"{name:<24} {'present' if path.exists() else 'missing':<8} {path}")
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["batch"]:
+        return _batch_main(argv[1:])
+    if argv[:1] == ["models"]:
+        return _models_main(argv[1:])
+
     parser = argparse.ArgumentParser(
         prog="analyse-portrait",
         description="Diagnostic tool for inspecting iOS Portrait Mode HEIC files. "
         "Shows both raw HEIF container contents and processed library output.",
+        epilog="Run 'analyse-portrait batch --help' to measure many files at once "
+        "and 'analyse-portrait models --help' to fetch the models ahead of time.",
     )
     parser.add_argument("path", help="Path to a .heic or .heif file")
     parser.add_argument(
@@ -200,16 +381,51 @@ def main():
         action="store_true",
         help="Skip EXIF TrueDepth validation (useful for non-TrueDepth files)",
     )
+    parser.add_argument(
+        "--trace",
+        metavar="TRACE_JSON",
+        help="Write a Chrome trace-event JSON of the processing stages "
+        "(open in chrome://tracing or https://ui.perfetto.dev)",
+    )
+    parser.add_argument(
+        "--no-decode",
+        action="store_true",
+        help="Only print container facts read from the image headers; skip "
+        "decoding and the processed inspection",
+    )
+
+    args = parser.parse_args(argv)
+
+    import pyheif
 
-    args = parser.parse_args()
+    from .instrumentation import chrome_trace
 
     print(f"File: {args.path}")
 
-    _inspect_raw_container(args.path)
-    _inspect_processed(args.path, skip_exif=args.skip_exif)
+    # One container for both sections. The processed inspection runs first
+    # so the raw section can report the planes it decoded without decoding
+    # anything itself.
+    try:
+        with open(args.path, "rb") as f:
+            container = pyheif.open_container(f)
+    except Exception as e:
+        # Not a readable HEIF file. _process() still reports why load_image()
+        # fails on it (e.g. UnknownExtension) instead of a pyheif traceback.
+        container, open_error = None, e
+    if not args.no_decode:
+        with chrome_trace(args.trace) if args.trace else nullcontext():
+            result, error = _process(args.path, container, args.skip_exif)
+
+    if container is not None:
+        _inspect_raw_container(container)
+    else:
+        _print_header("RAW HEIF CONTAINER INSPECTION")
+        print(f"\n  Cannot open container: {type(open_error).__name__}: {open_error}")
+    if not args.no_decode:
+        _inspect_processed(result, error)
 
     print()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,707 @@
+"""Batch analysis of Portrait Mode files for nightly cohort runs.
+
+:func:`run_batch` loads every file found by :func:`find_portraits`, runs the
+selected measurements on a process pool and writes one row per file::
+
+    paths = find_portraits(["cohort/", "extra/*.HEIC"])
+    run_batch(paths, "results.csv", measurements=["incisor", "neck"], workers=8)
+
+The same is available as ``analyse-portrait batch``. Measurements:
+
+- ``incisor`` -- the teeth matte measurement :func:`~portrait_analyser.ios.load_image`
+  already performs,
+- ``neck`` -- :func:`~portrait_analyser.neck.compute_neck_circumference`,
+  searching below the MediaPipe face when one is found,
+- ``tmd`` -- :func:`~portrait_analyser.tmd.compute_tmd_3d` between the
+  detected chin and neck midpoint,
+- ``mouth`` -- :func:`~portrait_analyser.mouth.compute_mouth_measurement_from_facemesh`.
+
+Every file is measured with :func:`~portrait_analyser.pipeline.analyse_portrait`,
+so ``neck``, ``tmd`` and ``mouth`` share one
+:func:`~portrait_analyser.pose.detect_neck_midpoint` call per file, and each
+worker process keeps one :class:`~portrait_analyser.session.PortraitInferenceSession`
+so the models load once per worker; the model files themselves are fetched
+with :func:`~portrait_analyser.models.preload_models` before the workers
+start. Failures never stop the batch: the row
+gets ``status = "error"`` and the stage, exception type and message of the
+first failure, and the remaining measurements still run. A worker process
+that dies (a native crash in a detector, say) is replaced; the file that
+killed it gets an error row with ``error_stage = "worker"``.
+
+With a :class:`BatchManifest` (``--manifest`` on the command line) a batch
+is resumable: every finished file is appended to the manifest with its
+content hash, the library version and the parameter fingerprint, and a
+re-run restores the rows of files already measured with the same content,
+version and parameters instead of analysing them again. Failed files are
+always retried.
+
+A detector store directory (``--detector-store``) keeps the MediaPipe
+outputs of every file in a
+:class:`~portrait_analyser.detector_store.DetectorOutputStore`, so a re-run
+with changed measurement code or parameters skips inference.
+"""
+
+from __future__ import annotations
+
+import csv
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterable, Sequence
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+from .const import package_version
+from .detector_store import DetectorOutputStore
+from .ios import load_image
+from .models import preload_models
+from .pipeline import analyse_portrait
+from .pose import PoseModelVariant
+from .presets import AnalysisPreset, get_analysis_preset
+from .session import PortraitInferenceSession
+
+logger = logging.getLogger(__name__)
+
+PORTRAIT_EXTENSIONS = (".heic", ".heif")
+
+# Output columns per measurement, in output order.
+MEASUREMENT_COLUMNS = {
+    "incisor": (
+        "incisor_distance_3d_mm",
+        "incisor_pixel_distance_y",
+        "incisor_upper_distance_cm",
+        "incisor_lower_distance_cm",
+    ),
+    "neck": (
+        "neck_circumference_mm",
+        "neck_front_arc_length_mm",
+        "neck_front_chord_length_mm",
+        "neck_row_y",
+    ),
+    "tmd": (
+        "tmd_mm",
+        "chin_x",
+        "chin_y",
+        "neck_midpoint_x",
+        "neck_midpoint_y",
+    ),
+    "mouth": ("mouth_distance_3d_mm",),
+}
+MEASUREMENTS = tuple(MEASUREMENT_COLUMNS)
+BASE_COLUMNS = (
+    "path",
+    "status",
+    "error_stage",
+    "error_type",
+    "error_message",
+    "elapsed_s",
+    "photo_width",
+    "photo_height",
+)
+OUTPUT_FORMATS = ("csv", "jsonl", "parquet")
+_EXTENSION_FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".parquet": "parquet",
+}
+_LANDMARK_MEASUREMENTS = frozenset({"neck", "tmd", "mouth"})
+# Parquet column types; every other column is float64.
+_TEXT_COLUMNS = frozenset(
+    {"path", "status", "error_stage", "error_type", "error_message"}
+)
+_INTEGER_COLUMNS = frozenset({"photo_width", "photo_height", "neck_row_y"})
+
+
+@dataclass(frozen=True)
+class BatchOptions:
+    """What to measure for every file of a batch."""
+
+    measurements: tuple[str, ...] = MEASUREMENTS
+    use_exif: bool = True
+    # None keeps the library defaults of every entry point.
+    preset: AnalysisPreset | None = None
+
+    def __post_init__(self):
+        measurements = tuple(dict.fromkeys(self.measurements))
+        unknown = set(measurements) - set(MEASUREMENTS)
+        if unknown:
+            raise ValueError(
+                f"Unknown measurement(s) {', '.join(sorted(unknown))}; "
+                f"expected some of {', '.join(MEASUREMENTS)}"
+            )
+        if not measurements:
+            raise ValueError("at least one measurement is required")
+        object.__setattr__(self, "measurements", measurements)
+        if self.preset is not None:
+            object.__setattr__(self, "preset", get_analysis_preset(self.preset))
+
+    @property
+    def fingerprint(self) -> str:
+        """Short hash of everything that affects the measured values."""
+        params = {
+            "measurements": sorted(self.measurements),
+            "use_exif": self.use_exif,
+            "preset": None if self.preset is None else asdict(self.preset),
+        }
+        encoded = json.dumps(params, sort_keys=True, default=_json_default)
+        return hashlib.sha256(encoded.encode()).hexdigest()[:16]
+
+    @property
+    def models(self) -> tuple[str, ...]:
+        """Names of the models the measurements load, for :func:`preload_models`."""
+        if not _LANDMARK_MEASUREMENTS.intersection(self.measurements):
+            return ()
+        variant = (
+            PoseModelVariant.HEAVY
+            if self.preset is None
+            else self.preset.pose_model_variant
+        )
+        return ("face_landmarker", f"pose_landmarker_{variant.value}")
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        """Output columns of every row, in order."""
+        columns = BASE_COLUMNS
+        for name in self.measurements:
+            columns += MEASUREMENT_COLUMNS[name]
+        return columns
+
+
+def _json_default(value):
+    # Enum members of presets, e.g. PoseModelVariant.
+    return value.value
+
+
+def find_portraits(
+    inputs: str | os.PathLike | Iterable[str | os.PathLike],
+) -> list[str]:
+    """Expand files, directories and glob patterns into sorted file paths.
+
+    Directories are searched recursively for ``.heic``/``.heif`` files (any
+    case); glob patterns (``**`` included) keep every file they match; plain
+    paths are kept as given. Duplicates are dropped.
+    """
+    if isinstance(inputs, (str, os.PathLike)):
+        inputs = [inputs]
+    paths = set()
+    for item in map(os.fspath, inputs):
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.update(
+                    os.path.join(root, name)
+                    for name in files
+                    if name.lower().endswith(PORTRAIT_EXTENSIONS)
+                )
+        elif glob.has_magic(item):
+            matches = glob.glob(item, recursive=True)
+            paths.update(p for p in matches if os.path.isfile(p))
+        else:
+            paths.add(item)
+    return sorted(paths)
+
+
+def _record_error(row: dict, stage: str, error: Exception) -> None:
+    """Mark *row* failed; only the first failure is kept."""
+    if row["status"] == "ok":
+        row.update(
+            status="error",
+            error_stage=stage,
+            error_type=type(error).__name__,
+            error_message=str(error),
+        )
+
+
+def analyse_file(
+    path: str,
+    options: BatchOptions | None = None,
+    session: PortraitInferenceSession | None = None,
+) -> dict:
+    """Load and measure one file; returns its output row.
+
+    Never raises for a bad file: errors end up in the row's error columns.
+    """
+    options = options or BatchOptions()
+    started = time.perf_counter()
+    row = dict.fromkeys(options.columns)
+    row.update(path=path, status="ok")
+    try:
+        _measure(row, path, options, session)
+    finally:
+        row["elapsed_s"] = time.perf_counter() - started
+    return row
+
+
+def _measure(row, path, options, session):
+    try:
+        portrait = load_image(path, use_exif=options.use_exif)
+    except Exception as e:
+        _record_error(row, "load", e)
+        return
+    width, height = portrait.photo.size
+    row.update(photo_width=width, photo_height=height)
+
+    measurements = options.measurements
+    if "tmd" in measurements:
+        # For the chin and neck midpoint columns.
+        measurements += ("neck_midpoint",)
+    # Workers are processes already: run the stages on this one's thread.
+    report = analyse_portrait(
+        portrait,
+        measurements,
+        preset=options.preset,
+        session=session,
+        max_workers=1,
+    )
+    for stage, error in report.errors.items():
+        _record_error(row, stage, error)
+
+    if report.incisor is not None:
+        m = report.incisor
+        row.update(
+            incisor_distance_3d_mm=m.distance_3d_mm,
+            incisor_pixel_distance_y=m.pixel_distance_y,
+            incisor_upper_distance_cm=m.upper_distance_cm,
+            incisor_lower_distance_cm=m.lower_distance_cm,
+        )
+    if report.neck is not None:
+        row.update(
+            neck_circumference_mm=report.neck.circumference_mm,
+            neck_front_arc_length_mm=report.neck.front_arc_length_mm,
+            neck_front_chord_length_mm=report.neck.front_chord_length_mm,
+            neck_row_y=report.neck.neck_y,
+        )
+    neck_midpoint = report.neck_midpoint
+    if neck_midpoint is not None:
+        row.update(chin_x=neck_midpoint.chin[0], chin_y=neck_midpoint.chin[1])
+        if neck_midpoint.x is not None:
+            row.update(
+                neck_midpoint_x=neck_midpoint.x, neck_midpoint_y=neck_midpoint.y
+            )
+    if report.tmd_mm is not None:
+        row["tmd_mm"] = report.tmd_mm
+    if report.mouth is not None:
+        row["mouth_distance_3d_mm"] = report.mouth.distance_3d_mm
+
+
+# One session per worker process, created by the pool initializer.
+_worker_session: PortraitInferenceSession | None = None
+
+
+def _init_worker(detector_store=None):
+    global _worker_session
+    _worker_session = _new_session(detector_store)
+
+
+def _new_session(detector_store):
+    if detector_store is None:
+        return PortraitInferenceSession()
+    return PortraitInferenceSession(DetectorOutputStore(detector_store))
+
+
+def _analyse_in_worker(path: str, options: BatchOptions) -> dict:
+    return analyse_file(path, options, session=_worker_session)
+
+
+class _CsvWriter:
+    def __init__(self, stream, columns):
+        self._writer = csv.DictWriter(stream, fieldnames=columns)
+        self._writer.writeheader()
+
+    def write(self, row):
+        self._writer.writerow(row)
+
+
+class _JsonLinesWriter:
+    def __init__(self, stream, columns):
+        self._stream = stream
+
+    def write(self, row):
+        self._stream.write(json.dumps(row) + "\n")
+
+
+class _ParquetWriter:
+    """Buffers rows and writes one Parquet table on close."""
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "Parquet output needs pyarrow: pip install 'portrait-analyser[parquet]'"
+            ) from None
+        self._path = path
+        self._columns = columns
+        self._rows = []
+
+    def write(self, row):
+        self._rows.append(row)
+
+    def close(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        types = {name: pa.string() for name in _TEXT_COLUMNS}
+        types.update((name, pa.int64()) for name in _INTEGER_COLUMNS)
+        schema = pa.schema(
+            [(name, types.get(name, pa.float64())) for name in self._columns]
+        )
+        pq.write_table(pa.Table.from_pylist(self._rows, schema=schema), self._path)
+
+
+class BatchManifest:
+    """Append-only JSON Lines record of finished files, for resumable batches.
+
+    One line per analysed file holds its path, size, modification time,
+    SHA-256, the library version, the :attr:`BatchOptions.fingerprint`, the
+    row status and the row itself. Each line is appended with a single
+    ``O_APPEND`` write and fsync'd, so a crash loses at most the line in
+    flight; a torn last line is ignored on load. Later lines supersede
+    earlier ones for the same content.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        # (sha256, version, fingerprint) -> latest record.
+        self._results: dict[tuple[str, str, str], dict] = {}
+        # path -> (size, mtime_ns, sha256) of its latest record.
+        self._hashes: dict[str, tuple[int, int, str]] = {}
+        self._fd = None
+        # A crash can leave a torn line without its newline; the next
+        # record must not be glued onto it.
+        self._torn = False
+        if os.path.exists(self.path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                self._torn = not line.endswith("\n")
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._remember(record)
+
+    def _remember(self, record):
+        key = (record["sha256"], record["version"], record["params"])
+        self._results[key] = record
+        self._hashes[record["path"]] = (
+            record["size"],
+            record["mtime_ns"],
+            record["sha256"],
+        )
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def file_hash(self, path: str) -> str:
+        """SHA-256 of *path*, reusing the manifest's when size and mtime match."""
+        stat = os.stat(path)
+        known = self._hashes.get(path)
+        if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return known[2]
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+    def completed_row(self, sha256: str, options: BatchOptions) -> dict | None:
+        """Row of a successful earlier run with this content and parameters."""
+        record = self._results.get((sha256, package_version(), options.fingerprint))
+        if record is None or record["status"] != "ok":
+            return None
+        return record["row"]
+
+    def record(self, path: str, sha256: str, options: BatchOptions, row: dict) -> None:
+        """Append the outcome of analysing *path*."""
+        stat = os.stat(path)
+        record = {
+            "path": path,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+            "version": package_version(),
+            "params": options.fingerprint,
+            "status": row["status"],
+            "recorded_at": time.time(),
+            "row": row,
+        }
+        if self._fd is None:
+            self._fd = os.open(
+                self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+            )
+        line = json.dumps(record) + "\n"
+        if self._torn:
+            line = "\n" + line
+            self._torn = False
+        os.write(self._fd, line.encode())
+        os.fsync(self._fd)
+        self._remember(record)
+
+
+def output_format_for_path(path: str) -> str:
+    """Output format implied by *path*'s extension; CSV when unknown."""
+    return _EXTENSION_FORMATS.get(os.path.splitext(path)[1].lower(), "csv")
+
+
+class _Progress:
+    """Files/s and ETA on stderr, redrawn in place on a terminal."""
+
+    def __init__(self, total, stream=None, interval_s=None):
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self._stream = stream or sys.stderr
+        self._tty = self._stream.isatty()
+        if interval_s is None:
+            interval_s = 0.5 if self._tty else 10.0
+        self._interval_s = interval_s
+        self._started = self._last = time.perf_counter()
+
+    def update(self, row):
+        self.done += 1
+        self.errors += row["status"] != "ok"
+        now = time.perf_counter()
+        if now - self._last >= self._interval_s or self.done == self.total:
+            self._last = now
+            self._draw(now)
+
+    def _draw(self, now):
+        elapsed = now - self._started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / rate if rate else float("inf")
+        line = (
+            f"{self.done}/{self.total} files  {rate:.2f} files/s  "
+            f"ETA {_format_duration(remaining)}  errors {self.errors}"
+        )
+        if self._tty:
+            end = "\n" if self.done == self.total else ""
+            self._stream.write(f"\r{line}\x1b[K{end}")
+        else:
+            self._stream.write(line + "\n")
+        self._stream.flush()
+
+
+def _format_duration(seconds):
+    if seconds == float("inf"):
+        return "--:--"
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def run_batch(
+    paths: Sequence[str],
+    output,
+    measurements: Iterable[str] = MEASUREMENTS,
+    workers: int | None = None,
+    output_format: str | None = None,
+    use_exif: bool = True,
+    preset: AnalysisPreset | str | None = None,
+    progress: bool = True,
+    manifest: BatchManifest | str | os.PathLike | None = None,
+    detector_store: str | os.PathLike | None = None,
+) -> dict[str, int]:
+    """Analyse *paths* and write one row per file to *output*.
+
+    Args:
+        paths: Files to analyse, e.g. from :func:`find_portraits`.
+        output: Path of the result file; ``"-"`` writes CSV or JSON Lines
+            to stdout.
+        measurements: Any of ``"incisor"``, ``"neck"``, ``"tmd"`` and
+            ``"mouth"``.
+        workers: Worker processes; defaults to the CPU count. ``1``
+            analyses in the calling process.
+        output_format: ``"csv"``, ``"jsonl"`` or ``"parquet"``; inferred
+            from the *output* extension when omitted.
+        use_exif: Validate TrueDepth EXIF data, as in :func:`load_image`.
+        preset: :class:`AnalysisPreset` or preset name for the pose model
+            and neck arc parameters.
+        progress: Report throughput and ETA on stderr.
+        manifest: :class:`BatchManifest` or manifest path that makes the
+            batch resumable; files it records as measured with the same
+            content, library version and parameters are not analysed again.
+        detector_store: Directory of a :class:`DetectorOutputStore` shared
+            by the workers; files whose detector outputs it holds skip
+            MediaPipe inference.
+
+    Rows are written in completion order, rows restored from the manifest
+    first. Returns counts of ``"ok"`` and ``"error"`` rows analysed in this
+    run and of ``"skipped"`` rows restored from the manifest.
+    """
+    options = BatchOptions(tuple(measurements), use_exif=use_exif, preset=preset)
+    output = os.fspath(output)
+    if output_format is None:
+        output_format = "csv" if output == "-" else output_format_for_path(output)
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format {output_format!r}; "
+            f"expected one of {', '.join(OUTPUT_FORMATS)}"
+        )
+    if output_format == "parquet" and output == "-":
+        raise ValueError("Parquet output needs a file path")
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    if manifest is not None and not isinstance(manifest, BatchManifest):
+        manifest = BatchManifest(manifest)
+
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    with _open_output(output, output_format, options.columns) as writer:
+        hashes = {}
+        todo = paths
+        if manifest is not None:
+            todo = []
+            for path in paths:
+                try:
+                    hashes[path] = manifest.file_hash(path)
+                except OSError:
+                    # Unreadable: analyse it anyway to report the error.
+                    todo.append(path)
+                    continue
+                row = manifest.completed_row(hashes[path], options)
+                if row is None:
+                    todo.append(path)
+                else:
+                    writer.write({**row, "path": path})
+                    counts["skipped"] += 1
+            if counts["skipped"] and progress:
+                print(
+                    f"{counts['skipped']} files already measured, skipped",
+                    file=sys.stderr,
+                )
+
+        reporter = _Progress(len(todo)) if progress and todo else None
+        try:
+            for row in _iter_rows(todo, options, workers, detector_store):
+                writer.write(row)
+                counts[row["status"]] += 1
+                if row["path"] in hashes:
+                    manifest.record(row["path"], hashes[row["path"]], options, row)
+                if reporter is not None:
+                    reporter.update(row)
+        finally:
+            if manifest is not None:
+                manifest.close()
+    return counts
+
+
+def _iter_rows(paths, options, workers, detector_store=None):
+    if detector_store is not None:
+        detector_store = os.fspath(detector_store)
+    if workers == 1 or len(paths) <= 1:
+        with _new_session(detector_store) as session:
+            for path in paths:
+                yield analyse_file(path, options, session=session)
+        return
+    # Fetch the models once here rather than in every worker. A failure is
+    # left for the workers to report per file.
+    try:
+        preload_models(options.models)
+    except Exception as e:
+        logger.warning("Could not preload models: %s", e)
+    queue = deque(paths)
+    suspects = deque()
+    while queue or suspects:
+        if suspects:
+            # A worker died and took the pool down with every file in
+            # flight. Rerun those one at a time, so that only a file that
+            # kills its worker on its own gets an error row.
+            broken = yield from _pool_rows(suspects, options, 1, detector_store)
+            for path, error in broken:
+                yield _worker_error_row(path, options, error)
+        else:
+            broken = yield from _pool_rows(
+                queue, options, min(workers, len(queue)), detector_store
+            )
+            suspects.extend(path for path, _ in broken)
+
+
+def _pool_rows(queue, options, workers, detector_store):
+    """Yield the rows of the paths taken from *queue* by one process pool.
+
+    At most *workers* files are in flight. If a worker process dies the
+    pool is unusable: the generator stops taking files and returns the
+    ``(path, error)`` pairs of the files that were lost with it. Any other
+    failure to get a row from a worker becomes an error row.
+    """
+    broken = []
+    dead = False
+    # MediaPipe starts threads of its own; forking a process that holds
+    # them is unsafe, so workers are spawned.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(detector_store,),
+    ) as executor:
+        running = {}
+        while True:
+            while not dead and queue and len(running) < workers:
+                path = queue.popleft()
+                try:
+                    future = executor.submit(_analyse_in_worker, path, options)
+                except BrokenProcessPool:
+                    queue.appendleft(path)
+                    dead = True
+                    break
+                running[future] = path
+            if not running:
+                return broken
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = running.pop(future)
+                try:
+                    row = future.result()
+                except BrokenProcessPool as e:
+                    broken.append((path, e))
+                    dead = True
+                    continue
+                except Exception as e:
+                    row = _worker_error_row(path, options, e)
+                yield row
+
+
+def _worker_error_row(path, options, error):
+    row = dict.fromkeys(options.columns)
+    row.update(path=path, status="ok")
+    _record_error(row, "worker", error)
+    return row
+
+
+@contextmanager
+def _open_output(output, output_format, columns):
+    if output_format == "parquet":
+        writer = _ParquetWriter(output, columns)
+        try:
+            yield writer
+        finally:
+            writer.close()
+        return
+    writer_class = _CsvWriter if output_format == "csv" else _JsonLinesWriter
+    if output == "-":
+        yield writer_class(sys.stdout, columns)
+        return
+    with open(output, "w", newline="") as stream:
+        yield writer_class(stream, columns)
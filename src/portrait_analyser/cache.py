@@ -0,0 +1,358 @@
+"""Opt-in cache of deterministic measurement and detection results.
+
+:func:`~portrait_analyser.neck.compute_neck_circumference`,
+:func:`~portrait_analyser.pose.detect_neck_midpoint`, the segmentation
+detectors and the other measurements return the same result for the same
+images and arguments. :class:`ResultCache` memoises them across calls — in
+an in-memory LRU and, optionally, in a directory shared between processes
+and restarts::
+
+    cache = ResultCache(directory="~/.cache/portrait-analyser/results")
+    measurement = cache.call(
+        compute_neck_circumference, skinmap, depthmap, w, h, fmin, fmax
+    )
+    detect = cache.wrap(detect_neck_midpoint)  # same signature, cached
+
+A key combines the function, its arguments bound to the signature with
+defaults applied (so positional and keyword spellings share an entry), the
+content hash of every image or array argument and the package version.
+Arguments that do not affect the result (``session``, ``executor``,
+``concurrent``) are left out. Calls with a ``diagnostics`` collector, or
+with an argument the cache cannot hash, bypass the cache so their side
+effects still happen.
+
+Results are stored as zlib-compressed JSON: dataclasses such as
+:class:`~portrait_analyser.neck.NeckMeasurement`,
+:class:`~portrait_analyser.pose.NeckMidpoint` and
+:class:`~portrait_analyser.face.IncisorMeasurement` by field, arrays as raw
+bytes (boolean masks bit-packed) and landmarks as float32 blocks. Every hit
+decodes a fresh copy, so callers may modify what they get back.
+"""
+
+from __future__ import annotations
+
+import base64
+import dataclasses
+import enum
+import functools
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable
+
+import numpy as np
+from PIL import Image
+
+from .const import package_version
+from .extended_neck import SegmentationDebug
+from .face import Face, IncisorMeasurement, Rectangle
+from .frame import AnalysisFrame
+from .landmarks import Landmarks
+from .mouth import MouthMeasurement
+from .neck import NeckMeasurement
+from .pose import (
+    FaceMeshDebug,
+    MediaPipeDebug,
+    NeckMidpoint,
+    PortraitPose,
+    PoseModelVariant,
+)
+
+# Arguments that change how a result is computed, not what it is.
+IGNORED_ARGUMENTS = frozenset({"session", "executor", "concurrent"})
+# Arguments whose side effects a cached result would skip.
+BYPASS_ARGUMENTS = frozenset({"diagnostics"})
+
+# Types a cached result may contain, by name. Decoding only ever
+# instantiates these.
+_TYPES = {
+    cls.__name__: cls
+    for cls in (
+        FaceMeshDebug,
+        IncisorMeasurement,
+        MediaPipeDebug,
+        MouthMeasurement,
+        NeckMeasurement,
+        NeckMidpoint,
+        PortraitPose,
+        PoseModelVariant,
+        SegmentationDebug,
+    )
+}
+_MISSING = object()
+
+
+class _Uncacheable(TypeError):
+    pass
+
+
+def content_digest(value) -> str:
+    """SHA-256 of an image's or array's pixels, shape and type."""
+    digest = hashlib.sha256()
+    if isinstance(value, Image.Image):
+        digest.update(f"image:{value.mode}:{value.size}".encode())
+        digest.update(value.tobytes())
+    else:
+        array = np.ascontiguousarray(value)
+        digest.update(f"array:{array.dtype.str}:{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _normalise(value):
+    """JSON-ready, order-stable stand-in for an argument value."""
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, enum.Enum):
+        return [type(value).__name__, _normalise(value.value)]
+    if isinstance(value, (Image.Image, np.ndarray)):
+        return ["content", content_digest(value)]
+    if isinstance(value, np.generic):
+        return _normalise(value.item())
+    if isinstance(value, Landmarks):
+        return ["landmarks", _normalise(value.xy), _normalise(value.z)]
+    if isinstance(value, Rectangle):
+        # Face and Eye boxes; a Face also carries its image and eyes.
+        box = [type(value).__name__, value.x, value.y, value.width, value.height]
+        if isinstance(value, Face):
+            box += [content_digest(value.image), _normalise(value.eyes)]
+        return _normalise(box)
+    if isinstance(value, AnalysisFrame):
+        return [
+            "frame",
+            content_digest(value.rgb),
+            value.photo_width,
+            value.photo_height,
+        ]
+    if isinstance(value, (tuple, list)):
+        return [_normalise(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _normalise(v) for k, v in sorted(value.items())}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return [
+            type(value).__name__,
+            {
+                f.name: _normalise(getattr(value, f.name))
+                for f in dataclasses.fields(value)
+                if f.init
+            },
+        ]
+    raise _Uncacheable(type(value).__name__)
+
+
+def _encode(value):
+    """Compact JSON form of a result."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, enum.Enum):
+        return {"~enum": type(value).__name__, "value": value.value}
+    if isinstance(value, Landmarks):
+        return {
+            "~landmarks": _encode(value.xy),
+            "z": _encode(value.z),
+            "visibility": _encode(value.visibility),
+        }
+    if isinstance(value, np.ndarray):
+        if value.dtype == bool:
+            data = np.packbits(value, axis=None).tobytes()
+        else:
+            data = np.ascontiguousarray(value).tobytes()
+        return {
+            "~array": value.dtype.str,
+            "shape": list(value.shape),
+            "data": base64.b64encode(data).decode("ascii"),
+        }
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return {"~tuple": [_encode(v) for v in value]}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if dataclasses.is_dataclass(value) and type(value).__name__ in _TYPES:
+        return {
+            "~dataclass": type(value).__name__,
+            "fields": {
+                f.name: _encode(getattr(value, f.name))
+                for f in dataclasses.fields(value)
+                if f.init
+            },
+        }
+    raise _Uncacheable(type(value).__name__)
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "~tuple" in value:
+        return tuple(_decode(v) for v in value["~tuple"])
+    if "~array" in value:
+        dtype = np.dtype(value["~array"])
+        shape = tuple(value["shape"])
+        data = base64.b64decode(value["data"])
+        if dtype == bool:
+            bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+            return bits[: int(np.prod(shape))].astype(bool).reshape(shape)
+        return np.frombuffer(data, dtype=dtype).reshape(shape).copy()
+    if "~landmarks" in value:
+        return Landmarks(
+            _decode(value["~landmarks"]),
+            z=_decode(value["z"]),
+            visibility=_decode(value["visibility"]),
+        )
+    if "~enum" in value:
+        return _TYPES[value["~enum"]](value["value"])
+    if "~dataclass" in value:
+        fields = {k: _decode(v) for k, v in value["fields"].items()}
+        return _TYPES[value["~dataclass"]](**fields)
+    raise ValueError("malformed cache entry")
+
+
+def serialise_result(value) -> bytes:
+    """zlib-compressed JSON bytes of a cacheable result."""
+    return zlib.compress(json.dumps(_encode(value)).encode(), 6)
+
+
+def deserialise_result(data: bytes):
+    """Inverse of :func:`serialise_result`."""
+    return _decode(json.loads(zlib.decompress(data)))
+
+
+class ResultCache:
+    """Memoises deterministic results in memory and, optionally, on disk.
+
+    Args:
+        max_entries: Results kept in the in-memory LRU; ``0`` disables it.
+        directory: Directory of the disk tier, shared safely between
+            processes (entries are written atomically); ``None`` keeps the
+            cache in memory only.
+
+    Thread-safe. :attr:`stats` counts memory hits, disk hits and misses.
+    """
+
+    def __init__(self, max_entries: int = 256, directory=None):
+        if max_entries < 0:
+            raise ValueError("max_entries must not be negative")
+        self.max_entries = max_entries
+        self.directory = (
+            None if directory is None else os.path.expanduser(os.fspath(directory))
+        )
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0}
+
+    def key(self, function: Callable, *args, **kwargs) -> str | None:
+        """Cache key of ``function(*args, **kwargs)``; None if uncacheable."""
+        bound = inspect.signature(function).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = {}
+        for name, value in bound.arguments.items():
+            if name in IGNORED_ARGUMENTS:
+                continue
+            if name in BYPASS_ARGUMENTS and value is not None:
+                return None
+            try:
+                arguments[name] = _normalise(value)
+            except _Uncacheable:
+                return None
+        identity = {
+            "function": f"{function.__module__}.{function.__qualname__}",
+            "version": package_version(),
+            "arguments": arguments,
+        }
+        encoded = json.dumps(identity, sort_keys=True)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def call(self, function: Callable, *args, **kwargs):
+        """``function(*args, **kwargs)``, served from the cache when possible."""
+        key = self.key(function, *args, **kwargs)
+        if key is None:
+            with self._lock:
+                self.stats["bypassed"] += 1
+            return function(*args, **kwargs)
+
+        data = self._get(key)
+        if data is not _MISSING:
+            try:
+                return deserialise_result(data)
+            except (ValueError, KeyError, TypeError, zlib.error):
+                pass  # A corrupt or foreign disk entry: recompute it.
+
+        result = function(*args, **kwargs)
+        try:
+            data = serialise_result(result)
+        except _Uncacheable:
+            return result
+        self._put(key, data)
+        return result
+
+    def wrap(self, function: Callable) -> Callable:
+        """Cached version of *function* with the same signature."""
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            return self.call(function, *args, **kwargs)
+
+        return wrapper
+
+    def clear(self) -> None:
+        """Empty the memory tier; the disk tier is left alone."""
+        with self._lock:
+            self._memory.clear()
+
+    def _get(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return data
+        if self.directory is not None:
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                pass
+            else:
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                self._remember(key, data)
+                return data
+        with self._lock:
+            self.stats["misses"] += 1
+        return _MISSING
+
+    def _put(self, key, data):
+        self._remember(key, data)
+        if self.directory is None:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _remember(self, key, data):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + ".json.z")
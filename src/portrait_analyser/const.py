@@ -1 +1,13 @@
+import functools
+import importlib.metadata
+
 TRUEDEPTH_EXIF_ID = "front TrueDepth"
+
+
+@functools.cache
+def package_version() -> str:
+    """Installed portrait-analyser version; ``"unknown"`` from a bare checkout."""
+    try:
+        return importlib.metadata.version("portrait-analyser")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
@@ -0,0 +1,316 @@
+"""Content-addressed on-disk store of MediaPipe detector outputs.
+
+The MediaPipe models dominate per-image latency, yet their outputs never
+change for a given input image, model file and option set. A
+:class:`DetectorOutputStore` persists them so that re-running the
+measurement logic — after tuning
+:func:`~portrait_analyser.neck.neck_search_bounds_from_face_landmarks`, say
+— skips both model loading and inference::
+
+    store = DetectorOutputStore("~/.cache/portrait-analyser/detections")
+    with PortraitInferenceSession(detector_store=store) as session:
+        detect_neck_midpoint(portrait.photo, session=session)
+
+A session with a store hands out stand-ins for its BlazeFace detector,
+FaceLandmarker and PoseLandmarker whose ``detect()`` looks the result up by
+the SHA-256 of the exact pixels given to the model, the SHA-256 of the
+model file and the detector options; the real detector is only created on
+a miss. The photo-resolution selfie mask of
+:func:`~portrait_analyser.extended_neck.detect_neck_midpoint_from_segmentation`
+is stored the same way, keyed additionally by its threshold.
+
+Entries are zlib-compressed ``.npz`` files: landmarks as float32 blocks
+(the precision MediaPipe computes them in, so a hit reproduces the
+measurement exactly) and masks bit-packed. Entries are written atomically,
+so one directory may be shared by concurrent processes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from collections.abc import Callable, Sequence
+from types import SimpleNamespace
+from typing import NamedTuple
+
+import numpy as np
+
+# Bumped whenever the stored layout changes; part of every key.
+_FORMAT_VERSION = 1
+
+
+class StoredLandmark(NamedTuple):
+    """A normalised landmark read back from the store.
+
+    Mirrors the attributes of MediaPipe's ``NormalizedLandmark`` that the
+    analysis uses; ``z`` and ``visibility`` are None when the model did not
+    provide them.
+    """
+
+    x: float
+    y: float
+    z: float | None = None
+    visibility: float | None = None
+
+
+def _optional(value) -> float:
+    return np.nan if value is None else value
+
+
+def _landmark_block(landmark_lists) -> np.ndarray:
+    """``(lists, points, 4)`` float32 x/y/z/visibility, NaN where missing."""
+    block = np.array(
+        [
+            [
+                (
+                    lm.x,
+                    lm.y,
+                    _optional(getattr(lm, "z", None)),
+                    _optional(getattr(lm, "visibility", None)),
+                )
+                for lm in landmarks
+            ]
+            for landmarks in landmark_lists
+        ],
+        dtype=np.float32,
+    )
+    return block.reshape(len(landmark_lists), -1, 4)
+
+
+def _landmark_lists(block: np.ndarray) -> list[list[StoredLandmark]]:
+    return [
+        [
+            StoredLandmark(
+                x,
+                y,
+                None if np.isnan(z) else z,
+                None if np.isnan(visibility) else visibility,
+            )
+            for x, y, z, visibility in landmarks.tolist()
+        ]
+        for landmarks in block
+    ]
+
+
+def _encode_detections(result) -> dict[str, np.ndarray]:
+    detections = list(result.detections)
+    boxes = np.array(
+        [
+            (
+                d.bounding_box.origin_x,
+                d.bounding_box.origin_y,
+                d.bounding_box.width,
+                d.bounding_box.height,
+            )
+            for d in detections
+        ],
+        dtype=np.int64,
+    ).reshape(-1, 4)
+    scores = np.array(
+        [d.categories[0].score if d.categories else np.nan for d in detections],
+        dtype=np.float32,
+    )
+    keypoints = np.array(
+        [[(kp.x, kp.y) for kp in d.keypoints or ()] for d in detections],
+        dtype=np.float32,
+    ).reshape(len(detections), -1, 2)
+    return {"boxes": boxes, "scores": scores, "keypoints": keypoints}
+
+
+def _decode_detections(arrays) -> SimpleNamespace:
+    detections = []
+    for box, score, keypoints in zip(
+        arrays["boxes"].tolist(),
+        arrays["scores"].tolist(),
+        arrays["keypoints"].tolist(),
+    ):
+        origin_x, origin_y, width, height = box
+        detections.append(
+            SimpleNamespace(
+                bounding_box=SimpleNamespace(
+                    origin_x=origin_x, origin_y=origin_y, width=width, height=height
+                ),
+                categories=[] if np.isnan(score) else [SimpleNamespace(score=score)],
+                keypoints=[SimpleNamespace(x=x, y=y) for x, y in keypoints],
+            )
+        )
+    return SimpleNamespace(detections=detections)
+
+
+def _landmark_codec(attribute):
+    def encode(result):
+        return {attribute: _landmark_block(getattr(result, attribute))}
+
+    def decode(arrays):
+        return SimpleNamespace(**{attribute: _landmark_lists(arrays[attribute])})
+
+    return encode, decode
+
+
+# How each stored detector's result is reduced to arrays and rebuilt. Only
+# what the analysis reads survives the round trip.
+_CODECS = {
+    "face_detector": (_encode_detections, _decode_detections),
+    "face_landmarker": _landmark_codec("face_landmarks"),
+    "pose_landmarker": _landmark_codec("pose_landmarks"),
+}
+
+
+def _image_pixels(mp_image) -> np.ndarray:
+    return np.asarray(mp_image.numpy_view())
+
+
+def _option_value(value):
+    value = getattr(value, "value", value)  # Enums by value.
+    return repr(value) if isinstance(value, float) else value
+
+
+class DetectorOutputStore:
+    """Directory of detector outputs, addressed by what produced them.
+
+    Args:
+        directory: Where entries are kept; created on first write.
+
+    Thread-safe. :attr:`stats` counts hits and misses.
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.expanduser(os.fspath(directory))
+        self._model_digests = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def model_digest(self, path) -> str:
+        """SHA-256 of a model file, remembered while its size and mtime hold."""
+        path = os.fspath(path)
+        st = os.stat(path)
+        signature = (path, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            digest = self._model_digests.get(signature)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            with self._lock:
+                self._model_digests[signature] = digest
+        return digest
+
+    def key(
+        self,
+        detector: str,
+        pixels: np.ndarray,
+        model_paths: Sequence,
+        options: Sequence = (),
+    ) -> str:
+        """Content address of *detector*'s output for *pixels*."""
+        from .cache import content_digest
+
+        identity = {
+            "format": _FORMAT_VERSION,
+            "detector": detector,
+            "image": content_digest(pixels),
+            "models": [self.model_digest(path) for path in model_paths],
+            "options": [_option_value(option) for option in options],
+        }
+        encoded = json.dumps(identity, sort_keys=True)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def load(self, key: str) -> dict[str, np.ndarray] | None:
+        """Arrays stored under *key*, or None (also for corrupt entries)."""
+        try:
+            with np.load(self._path(key), allow_pickle=False) as entry:
+                arrays = {name: entry[name] for name in entry.files}
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            arrays = None
+        with self._lock:
+            self.stats["hits" if arrays is not None else "misses"] += 1
+        return arrays
+
+    def save(self, key: str, arrays: dict[str, np.ndarray]) -> None:
+        """Store *arrays* under *key*, atomically."""
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load_mask(self, key: str) -> np.ndarray | None:
+        """Boolean mask stored with :meth:`save_mask`, or None."""
+        arrays = self.load(key)
+        if arrays is None:
+            return None
+        shape = tuple(arrays["shape"].tolist())
+        bits = np.unpackbits(arrays["bits"], count=int(np.prod(shape)))
+        return bits.astype(bool).reshape(shape)
+
+    def save_mask(self, key: str, mask: np.ndarray) -> None:
+        """Store a boolean mask bit-packed, one bit per pixel."""
+        self.save(
+            key,
+            {
+                "bits": np.packbits(mask, axis=None),
+                "shape": np.array(mask.shape, dtype=np.int64),
+            },
+        )
+
+    def detector(
+        self,
+        kind: str,
+        options: Sequence,
+        model_paths: Sequence,
+        create: Callable,
+    ) -> StoredDetector:
+        """Stand-in for a *kind* detector that consults the store first.
+
+        *create* returns the real detector and is only called on a miss.
+        """
+        return StoredDetector(self, kind, tuple(options), tuple(model_paths), create)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + ".npz")
+
+
+class StoredDetector:
+    """``detect()`` of a MediaPipe detector, served from a store when possible.
+
+    Hits return a lightweight result with the attributes the analysis reads
+    (``detections``, ``face_landmarks`` or ``pose_landmarks``).
+    """
+
+    def __init__(self, store, kind, options, model_paths, create):
+        if kind not in _CODECS:
+            raise ValueError(f"Detector outputs of {kind!r} cannot be stored")
+        self.store = store
+        self.kind = kind
+        self.options = options
+        self.model_paths = model_paths
+        self._create = create
+
+    def detect(self, mp_image):
+        encode, decode = _CODECS[self.kind]
+        key = self.store.key(
+            self.kind, _image_pixels(mp_image), self.model_paths, self.options
+        )
+        arrays = self.store.load(key)
+        if arrays is not None:
+            try:
+                return decode(arrays)
+            except (KeyError, ValueError):
+                pass  # A foreign entry: detect again and replace it.
+        result = self._create().detect(mp_image)
+        self.store.save(key, encode(result))
+        return result
@@ -0,0 +1,68 @@
+"""Structured per-call diagnostics for the detection pipeline.
+
+Detectors report intermediate values (face flatness ratio, inter-pupillary
+distance, shoulder visibilities, dual-mask rows, ...) through
+:func:`_emit` instead of printing them. Each value is
+
+- appended to a :class:`DetectionDiagnostics` record when the caller passed
+  one as ``diagnostics=``, and
+- logged at DEBUG level on the detector's module logger (for example
+  ``portrait_analyser.pose``) when that level is enabled.
+
+With neither enabled an emit is a single function call: nothing is formatted
+and nothing is written. To see the old console output::
+
+    logging.basicConfig()
+    logging.getLogger("portrait_analyser").setLevel(logging.DEBUG)
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class DetectionDiagnostics:
+    """Events and values recorded during one detection call.
+
+    ``events`` keeps every ``(event, values)`` pair in order; ``values``
+    holds the latest value per key for direct lookup, e.g.
+    ``diagnostics.values["face_flatness_ratio"]``.
+    """
+
+    events: list[tuple[str, dict[str, Any]]] = field(default_factory=list)
+    values: dict[str, Any] = field(default_factory=dict)
+
+    def record(self, event: str, **values) -> None:
+        self.events.append((event, values))
+        self.values.update(values)
+
+    def has_event(self, event: str) -> bool:
+        return any(name == event for name, _ in self.events)
+
+
+def _emit(
+    logger: logging.Logger,
+    diagnostics: DetectionDiagnostics | None,
+    event: str,
+    **values,
+) -> None:
+    """Record *event* with *values* and log it at DEBUG level if enabled."""
+    if diagnostics is not None:
+        diagnostics.record(event, **values)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "%s: %s",
+            event,
+            ", ".join(f"{key}={_format_value(value)}" for key, value in values.items()),
+        )
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    if isinstance(value, tuple) and all(isinstance(item, float) for item in value):
+        return "(" + ", ".join(f"{item:.1f}" for item in value) + ")"
+    return repr(value) if isinstance(value, str) else str(value)
@@ -16,3 +16,11 @@ class NoFacesDetected(Exception):
 
 class MultipleFacesDetected(Exception):
     pass
+
+
+class ModelNotAvailable(Exception):
+    pass
+
+
+class ModelChecksumMismatch(Exception):
+    pass
@@ -7,16 +7,23 @@ width profile.
 
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 import numpy as np
 
+from .diagnostics import DetectionDiagnostics, _emit
+from .frame import AnalysisFrame, _resolve_frame
+from .instrumentation import _traced, stage
 from .pose import NeckMidpoint, PortraitPose, _download_model
+from .session import PortraitInferenceSession, _session_scope
 
 if TYPE_CHECKING:
     from PIL import Image
 
+logger = logging.getLogger(__name__)
+
 _SELFIE_SEGMENTER_URL = (
     "https://storage.googleapis.com/mediapipe-models/"
     "image_segmenter/selfie_segmenter/float16/latest/"
@@ -68,24 +75,61 @@ def _compute_width_profile(
 ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """Compute the width, left edge, and right edge for each row.
 
+    The first and last true columns are found with ``argmax`` on each row
+    and on the column-reversed mask, so the whole profile is a handful of
+    array operations regardless of image height.
+
     Returns:
         widths: array of widths per row (0 if no pixels in that row)
         lefts: array of leftmost x per row
         rights: array of rightmost x per row
     """
+    mask = np.asarray(mask, dtype=bool)
     h = mask.shape[0]
-    widths = np.zeros(h, dtype=np.float64)
-    lefts = np.zeros(h, dtype=np.float64)
-    rights = np.zeros(h, dtype=np.float64)
+    if mask.shape[1] == 0:
+        empty = np.zeros(h, dtype=np.float64)
+        return empty, empty.copy(), empty.copy()
+
+    has_pixels = mask.any(axis=1)
+    lefts = np.argmax(mask, axis=1).astype(np.float64)
+    rights = (mask.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)).astype(
+        np.float64
+    )
+    lefts[~has_pixels] = 0
+    rights[~has_pixels] = 0
+    widths = rights - lefts
+    return widths, lefts, rights
 
-    for y in range(h):
-        row_pixels = np.where(mask[y])[0]
-        if len(row_pixels) > 0:
-            lefts[y] = row_pixels[0]
-            rights[y] = row_pixels[-1]
-            widths[y] = rights[y] - lefts[y]
 
-    return widths, lefts, rights
+class _WidthProfileCache:
+    """Memoise full-mask width profiles for the duration of one detection call.
+
+    Profiles are keyed by mask identity; the mask itself is retained so the
+    id cannot be recycled while the cache is alive. Cached arrays are
+    read-only, and ROI profiles are taken as slices of the full-mask profile.
+    """
+
+    def __init__(self):
+        self._profiles = {}
+
+    def get(self, mask: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        entry = self._profiles.get(id(mask))
+        if entry is None or entry[0] is not mask:
+            profile = _compute_width_profile(mask)
+            for array in profile:
+                array.flags.writeable = False
+            entry = (mask, profile)
+            self._profiles[id(mask)] = entry
+        return entry[1]
+
+
+def _width_profile(
+    mask: np.ndarray,
+    profile_cache: _WidthProfileCache | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if profile_cache is None:
+        return _compute_width_profile(mask)
+    return profile_cache.get(mask)
 
 
 def _make_empty_debug(mask, roi_top=0, skin_mask=None):
@@ -101,11 +145,21 @@ def _make_empty_debug(mask, roi_top=0, skin_mask=None):
     )
 
 
+def _get_segmenter_model_path() -> str:
+    """Return path to the selfie segmenter .tflite model, downloading if needed."""
+    return _download_model(_SELFIE_SEGMENTER_URL, _SELFIE_SEGMENTER_FILENAME)
+
+
+@_traced("detect_neck_midpoint_from_segmentation")
 def detect_neck_midpoint_from_segmentation(
     image: Image.Image,
     threshold: float = 0.5,
     jaw_flare_fraction: float = 0.15,
     smoothing_window: int = 15,
+    session: PortraitInferenceSession | None = None,
+    max_dimension: int | None = None,
+    frame: AnalysisFrame | None = None,
+    diagnostics: DetectionDiagnostics | None = None,
 ) -> tuple[NeckMidpoint | None, SegmentationDebug | None]:
     """Detect neck midpoint and chin from the person silhouette.
 
@@ -118,79 +172,137 @@ def detect_neck_midpoint_from_segmentation(
         threshold: Segmentation confidence threshold (0-1).
         jaw_flare_fraction: Minimum width increase fraction to detect jaw flare.
         smoothing_window: Window size for smoothing the width profile.
+        session: Optional :class:`PortraitInferenceSession` whose warm
+            ImageSegmenter is reused.
+        max_dimension: If set, segment a copy downscaled so its longer side
+            is at most this many pixels; the mask is upsampled back.
+        frame: Optional shared :class:`AnalysisFrame` of ``image``.
+        diagnostics: Optional :class:`DetectionDiagnostics` record of the
+            detected rows, also logged at DEBUG level.
 
     Returns:
         2-tuple of (NeckMidpoint | None, SegmentationDebug | None).
     """
-    import mediapipe as mp
-
-    model_path = _download_model(_SELFIE_SEGMENTER_URL, _SELFIE_SEGMENTER_FILENAME)
-
-    image_array = np.array(image)
-    h, w = image_array.shape[:2]
-
-    # Ensure RGB (3-channel) input
-    if image_array.ndim == 2:
-        image_array = np.stack([image_array] * 3, axis=-1)
-    elif image_array.shape[2] == 4:
-        image_array = image_array[:, :, :3]
-
-    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_array)
-
-    # Run selfie segmentation using the Tasks API (ImageSegmenter)
-    options = mp.tasks.vision.ImageSegmenterOptions(
-        base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
-        output_confidence_masks=True,
-        output_category_mask=False,
+    binary_mask = _get_segmentation_mask(
+        image,
+        threshold,
+        session=session,
+        max_dimension=max_dimension,
+        frame=frame,
     )
-    with mp.tasks.vision.ImageSegmenter.create_from_options(options) as segmenter:
-        result = segmenter.segment(mp_image)
-
-    if not result.confidence_masks:
+    if binary_mask is None:
         return None, None
 
-    # confidence_masks[0] is the person mask; shape (H, W, 1), float32
-    raw_mask = result.confidence_masks[0].numpy_view()
-    if raw_mask.ndim == 3:
-        raw_mask = raw_mask[:, :, 0]
-    binary_mask = _clean_mask((raw_mask > threshold).astype(np.float64))
-
-    return _detect_from_mask(binary_mask, h, w, jaw_flare_fraction, smoothing_window)
+    h, w = binary_mask.shape[:2]
+    return _detect_from_mask(
+        binary_mask,
+        h,
+        w,
+        jaw_flare_fraction,
+        smoothing_window,
+        diagnostics=diagnostics,
+    )
 
 
 def _get_segmentation_mask(
-    image: Image.Image, threshold: float = 0.5
+    image: Image.Image,
+    threshold: float = 0.5,
+    session: PortraitInferenceSession | None = None,
+    max_dimension: int | None = None,
+    frame: AnalysisFrame | None = None,
+) -> np.ndarray | None:
+    """Run MediaPipe selfie segmentation and return cleaned binary mask.
+
+    The segmenter sees the analysis *frame* (built from *image* when not
+    given), further downscaled to *max_dimension* if set; its confidence
+    mask is bilinearly upsampled to the photo size before thresholding, so
+    callers always get a photo-resolution mask. A session with a detector
+    store keeps the cleaned mask, bit-packed, and reuses it for the same
+    frame, model and threshold.
+    """
+    frame = _resolve_frame(image, frame).with_max_dimension(max_dimension)
+    full_width, full_height = frame.photo_width, frame.photo_height
+
+    store = session.detector_store if session is not None else None
+    if store is None:
+        return _segment(frame, threshold, session)
+
+    key = store.key(
+        "selfie_mask",
+        frame.rgb,
+        [_get_segmenter_model_path()],
+        (threshold, full_width, full_height),
+    )
+    mask = store.load_mask(key)
+    if mask is None:
+        mask = _segment(frame, threshold, session)
+        if mask is not None:
+            store.save_mask(key, mask)
+    return mask
+
+
+def _segment(
+    frame: AnalysisFrame,
+    threshold: float,
+    session: PortraitInferenceSession | None,
 ) -> np.ndarray | None:
-    """Run MediaPipe selfie segmentation and return cleaned binary mask."""
-    import mediapipe as mp
+    """Segment *frame* and clean the thresholded, photo-resolution mask."""
+    full_width, full_height = frame.photo_width, frame.photo_height
 
-    model_path = _download_model(_SELFIE_SEGMENTER_URL, _SELFIE_SEGMENTER_FILENAME)
+    # Run selfie segmentation using the Tasks API (ImageSegmenter)
+    with _session_scope(session) as scope:
+        segmenter = scope.image_segmenter()
+        with stage("segmentation"):
+            result = segmenter.segment(frame.mp_image())
+
+        if not result.confidence_masks:
+            return None
+
+        # confidence_masks[0] is the person mask; shape (H, W, 1), float32
+        raw_mask = result.confidence_masks[0].numpy_view()
+        if raw_mask.ndim == 3:
+            raw_mask = raw_mask[:, :, 0]
+        if raw_mask.shape != (full_height, full_width):
+            import cv2
+
+            raw_mask = cv2.resize(
+                np.asarray(raw_mask, dtype=np.float32),
+                (full_width, full_height),
+                interpolation=cv2.INTER_LINEAR,
+            )
+        return _clean_mask((raw_mask > threshold).astype(np.float64))
 
-    image_array = np.array(image)
 
-    # Ensure RGB (3-channel) input
-    if image_array.ndim == 2:
-        image_array = np.stack([image_array] * 3, axis=-1)
-    elif image_array.shape[2] == 4:
-        image_array = image_array[:, :, :3]
+def _resize_to_depth(arr: np.ndarray, depth_shape: tuple[int, int]) -> np.ndarray:
+    """Area-downsample a photo-resolution matte to depth-map resolution.
 
-    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_array)
+    Boolean masks are returned as boolean by majority vote; uint8 mattes keep
+    their averaged values so callers can apply their usual threshold.
+    """
+    import cv2
 
-    options = mp.tasks.vision.ImageSegmenterOptions(
-        base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
-        output_confidence_masks=True,
-        output_category_mask=False,
-    )
-    with mp.tasks.vision.ImageSegmenter.create_from_options(options) as segmenter:
-        result = segmenter.segment(mp_image)
+    dh, dw = depth_shape
+    if arr.shape[:2] == (dh, dw):
+        return arr
+    if arr.dtype == bool:
+        resized = cv2.resize(
+            arr.astype(np.uint8) * 255, (dw, dh), interpolation=cv2.INTER_AREA
+        )
+        return resized >= 128
+    return cv2.resize(arr, (dw, dh), interpolation=cv2.INTER_AREA)
+
+
+def _depth_to_photo(coord: float, depth_size: int, photo_size: int) -> float:
+    """Map a depth-map row/column to photo space, matching image endpoints."""
+    if depth_size <= 1:
+        return 0.0
+    return coord * (photo_size - 1) / (depth_size - 1)
 
-    if not result.confidence_masks:
-        return None
 
-    raw_mask = result.confidence_masks[0].numpy_view()
-    if raw_mask.ndim == 3:
-        raw_mask = raw_mask[:, :, 0]
-    return _clean_mask((raw_mask > threshold).astype(np.float64))
+def _photo_to_depth(coord: float, photo_size: int, depth_size: int) -> float:
+    if photo_size <= 1:
+        return 0.0
+    return coord * (depth_size - 1) / (photo_size - 1)
 
 
 def _find_chin_from_depth(
@@ -203,54 +315,50 @@ def _find_chin_from_depth(
     to camera) within the skin area in the upper 2/3 of the image, restricted
     to the central 30% of width.
 
+    The search runs at the depth map's native resolution: the skin mask is
+    downsampled to the depth map rather than the depth map upsampled to the
+    photo, and the winning depth pixel is mapped back to photo space.
+
     Args:
         skin_binary: (H, W) boolean mask of skin pixels.
         depthmap_arr: (H_d, W_d) uint8 depth map — high values = close.
 
     Returns:
-        (chin_y, midline_x) or (None, None) if no valid pixel found.
+        (chin_y, midline_x) in photo (skin mask) coordinates, or
+        (None, None) if no valid pixel found.
     """
-    import cv2
-
     h, w = skin_binary.shape[:2]
-
-    # Resize depth map to match skin mask dimensions
-    if depthmap_arr.shape[:2] != (h, w):
-        depthmap_resized = cv2.resize(
-            depthmap_arr, (w, h), interpolation=cv2.INTER_LINEAR
-        )
-    else:
-        depthmap_resized = depthmap_arr
+    dh, dw = depthmap_arr.shape[:2]
+    skin_small = _resize_to_depth(skin_binary, (dh, dw))
 
     # Restrict to upper 2/3 of rows
-    max_row = int(h * 2 / 3)
+    max_row = int(dh * 2 / 3)
 
     # Restrict to middle 30% of width (35%–65%)
-    left_col = int(w * 0.35)
-    right_col = int(w * 0.65)
-
-    # Build a combined mask: skin AND within ROI
-    roi_mask = np.zeros((h, w), dtype=bool)
-    roi_mask[:max_row, left_col:right_col] = True
-    combined = skin_binary & roi_mask
+    left_col = int(dw * 0.35)
+    right_col = int(dw * 0.65)
 
+    # Skin AND within ROI; only the ROI window is ever materialised
+    combined = skin_small[:max_row, left_col:right_col]
     if not np.any(combined):
         return None, None
 
-    # Zero out depth where there's no skin in the ROI
-    masked_depth = depthmap_resized.astype(np.float64)
-    masked_depth[~combined] = -1
+    # Mask out depth where there's no skin in the ROI
+    masked_depth = np.where(
+        combined, depthmap_arr[:max_row, left_col:right_col].astype(np.int16), -1
+    )
 
     # Find pixel with maximum depth value (closest to camera)
     flat_idx = int(np.argmax(masked_depth))
-    chin_y, chin_x = divmod(flat_idx, w)
+    roi_y, roi_x = divmod(flat_idx, masked_depth.shape[1])
 
+    chin_y = round(_depth_to_photo(roi_y, dh, h))
+    chin_x = _depth_to_photo(left_col + roi_x, dw, w)
     return chin_y, float(chin_x)
 
 
 def _make_depth_body_mask(
     depthmap_arr: np.ndarray,
-    skin_binary: np.ndarray,
     hair_arr: np.ndarray | None = None,
     threshold_fraction: float = 0.15,
     hair_threshold: int = 100,
@@ -264,42 +372,27 @@ def _make_depth_body_mask(
 
     Args:
         depthmap_arr: (H_d, W_d) uint8 depth map — high values = close.
-        skin_binary: (H, W) boolean mask used only for target dimensions.
         hair_arr: (H_h, W_h) uint8 hair matte or None. High = hair.
+            Downsampled to the depth map resolution when sizes differ.
         threshold_fraction: Fraction of max depth value to use as threshold.
         hair_threshold: Minimum hair matte value to consider as hair.
 
     Returns:
-        Boolean mask (H, W) where True = body pixel (excluding hair).
+        Boolean mask (H_d, W_d) where True = body pixel (excluding hair).
     """
-    import cv2
-
-    h, w = skin_binary.shape[:2]
-
-    # Resize depth map to match skin mask dimensions
-    if depthmap_arr.shape[:2] != (h, w):
-        depthmap_resized = cv2.resize(
-            depthmap_arr, (w, h), interpolation=cv2.INTER_LINEAR
-        ).copy()
-    else:
-        depthmap_resized = depthmap_arr.copy()
+    dh, dw = depthmap_arr.shape[:2]
+    depth = depthmap_arr.copy()
 
     # Zero out hair pixels in the depth map
     if hair_arr is not None:
-        if hair_arr.shape[:2] != (h, w):
-            hair_resized = cv2.resize(
-                hair_arr, (w, h), interpolation=cv2.INTER_LINEAR
-            )
-        else:
-            hair_resized = hair_arr
-        depthmap_resized[hair_resized >= hair_threshold] = 0
+        depth[_resize_to_depth(hair_arr, (dh, dw)) >= hair_threshold] = 0
 
-    max_depth = float(np.max(depthmap_resized))
+    max_depth = float(np.max(depth)) if depth.size else 0.0
     if max_depth <= 0:
-        return np.zeros((h, w), dtype=bool)
+        return np.zeros((dh, dw), dtype=bool)
 
     threshold = max_depth * threshold_fraction
-    return depthmap_resized > threshold
+    return depth > threshold
 
 
 def _find_shoulders_from_segmentation(
@@ -307,6 +400,7 @@ def _find_shoulders_from_segmentation(
     below_y: int,
     width_increase_factor: float = 1.25,
     smoothing_window: int = 15,
+    profile_cache: _WidthProfileCache | None = None,
 ) -> int | None:
     """Find shoulder_y from the segmentation mask below a given row.
 
@@ -320,7 +414,7 @@ def _find_shoulders_from_segmentation(
     if below_y >= h - 10:
         return None
 
-    widths, _, _ = _compute_width_profile(seg_mask)
+    widths, _, _ = _width_profile(seg_mask, profile_cache)
 
     # Smooth
     if smoothing_window > 1 and len(widths) > smoothing_window:
@@ -443,6 +537,7 @@ def _detect_landmarks_from_depth_profile(
     chin_y: int,
     hair_arr: np.ndarray | None = None,
     smoothing_window: int = 15,
+    profile_cache: _WidthProfileCache | None = None,
 ) -> tuple[int | None, int | None, int | None, float | None, float | None]:
     """Detect ear, neck, and shoulder levels from depth map below chin.
 
@@ -453,20 +548,28 @@ def _detect_landmarks_from_depth_profile(
     4. Peak 2 — SHOULDERS: widest row after the valley
     5. neck_y = midpoint between the two peaks
 
+    The profile is built at depth-map resolution (``smoothing_window`` is
+    given in photo rows and scaled accordingly); ``skin_binary`` only
+    supplies the photo dimensions that ``chin_y`` and the results refer to.
+
     Returns:
-        (ear_y, neck_y, shoulder_y, neck_left_x, neck_right_x) — any may be None.
+        (ear_y, neck_y, shoulder_y, neck_left_x, neck_right_x) in photo
+        coordinates — any may be None.
     """
-    depth_mask = _make_depth_body_mask(depthmap_arr, skin_binary, hair_arr=hair_arr)
-    h = depth_mask.shape[0]
-
-    if chin_y >= h - 20:
+    photo_h, photo_w = skin_binary.shape[:2]
+    if chin_y >= photo_h - 20:
         return None, None, None, None, None
 
-    widths, lefts, rights = _compute_width_profile(depth_mask)
+    depth_mask = _make_depth_body_mask(depthmap_arr, hair_arr=hair_arr)
+    dh, dw = depth_mask.shape
+    chin_row = round(_photo_to_depth(chin_y, photo_h, dh))
+    window = max(1, round(smoothing_window * dh / photo_h))
+
+    widths, lefts, rights = _width_profile(depth_mask, profile_cache)
 
     # Smooth the entire profile
-    if smoothing_window > 1 and len(widths) > smoothing_window:
-        kernel = np.ones(smoothing_window) / smoothing_window
+    if window > 1 and len(widths) > window:
+        kernel = np.ones(window) / window
         widths_smooth = np.convolve(widths, kernel, mode="same")
     else:
         widths_smooth = widths.copy()
@@ -475,7 +578,7 @@ def _detect_landmarks_from_depth_profile(
     # Upper third: ears/jaw (widest point)
     # Middle third: neck region
     # Lower third: shoulders (widest point)
-    below_chin = widths_smooth[chin_y:]
+    below_chin = widths_smooth[chin_row:]
     n = len(below_chin)
     if n < 3 or not np.any(below_chin > 0):
         return None, None, None, None, None
@@ -484,35 +587,51 @@ def _detect_landmarks_from_depth_profile(
 
     # EARS — widest row in the upper third
     upper = below_chin[:third]
-    ear_y = None
+    ear_row = None
     if np.any(upper > 0):
-        ear_y = chin_y + int(np.argmax(upper))
+        ear_row = chin_row + int(np.argmax(upper))
 
     # SHOULDERS — widest row in the lower third
     lower = below_chin[2 * third :]
-    shoulder_y = None
+    shoulder_row = None
     if np.any(lower > 0):
-        shoulder_y = chin_y + 2 * third + int(np.argmax(lower))
+        shoulder_row = chin_row + 2 * third + int(np.argmax(lower))
 
-    # neck_y = midpoint between ears and shoulders
-    if ear_y is not None and shoulder_y is not None:
-        neck_y = (ear_y + shoulder_y) // 2
-    elif ear_y is not None:
+    # neck = midpoint between ears and shoulders
+    if ear_row is not None and shoulder_row is not None:
+        neck_row = (ear_row + shoulder_row) // 2
+    elif ear_row is not None:
         # No shoulders — use narrowest nonzero row below ears as fallback
-        after_ear = below_chin[ear_y - chin_y :]
+        after_ear = below_chin[ear_row - chin_row :]
         nz = after_ear > 0
         if np.any(nz):
             fallback = after_ear.copy()
             fallback[~nz] = np.inf
-            neck_y = (ear_y - chin_y) + int(np.argmin(fallback)) + chin_y
+            neck_row = ear_row + int(np.argmin(fallback))
         else:
-            neck_y = ear_y + third
+            neck_row = min(ear_row + third, dh - 1)
     else:
         return None, None, None, None, None
 
-    # Extract neck edge x-coordinates at neck_y
-    neck_left_x = float(lefts[neck_y]) if lefts[neck_y] > 0 else None
-    neck_right_x = float(rights[neck_y]) if rights[neck_y] > 0 else None
+    ear_y = round(_depth_to_photo(ear_row, dh, photo_h))
+    neck_y = round(_depth_to_photo(neck_row, dh, photo_h))
+    shoulder_y = (
+        round(_depth_to_photo(shoulder_row, dh, photo_h))
+        if shoulder_row is not None
+        else None
+    )
+
+    # Extract neck edge x-coordinates at the neck row
+    neck_left_x = (
+        _depth_to_photo(float(lefts[neck_row]), dw, photo_w)
+        if lefts[neck_row] > 0
+        else None
+    )
+    neck_right_x = (
+        _depth_to_photo(float(rights[neck_row]), dw, photo_w)
+        if rights[neck_row] > 0
+        else None
+    )
 
     return ear_y, neck_y, shoulder_y, neck_left_x, neck_right_x
 
@@ -522,6 +641,7 @@ def _find_neck_from_skin(
     search_top: int,
     search_bottom: int,
     smoothing_window: int = 11,
+    profile_cache: _WidthProfileCache | None = None,
 ) -> int | None:
     """Find the neck row as the narrowest skin row in a given range.
 
@@ -534,7 +654,7 @@ def _find_neck_from_skin(
     Returns:
         Row index of the narrowest skin point, or None if no skin found.
     """
-    widths, _, _ = _compute_width_profile(skin_binary)
+    widths, _, _ = _width_profile(skin_binary, profile_cache)
 
     # Extract the region
     region = widths[search_top:search_bottom]
@@ -559,6 +679,7 @@ def _find_neck_from_skin(
     return search_top + min_idx
 
 
+@_traced("detect_neck_midpoint_from_dual_mask")
 def detect_neck_midpoint_from_dual_mask(
     image: Image.Image,
     skinmap: Image.Image,
@@ -568,6 +689,10 @@ def detect_neck_midpoint_from_dual_mask(
     skin_threshold: int = 30,
     float_min: float | None = None,
     float_max: float | None = None,
+    session: PortraitInferenceSession | None = None,
+    max_dimension: int | None = None,
+    frame: AnalysisFrame | None = None,
+    diagnostics: DetectionDiagnostics | None = None,
 ) -> tuple[NeckMidpoint | None, SegmentationDebug | None]:
     """Detect neck midpoint using skin matte, depth map, and silhouette.
 
@@ -586,15 +711,58 @@ def detect_neck_midpoint_from_dual_mask(
         skin_threshold: Minimum pixel value in skinmap to count as skin.
         float_min: EXIF FloatMinValue for depth calibration, or None.
         float_max: EXIF FloatMaxValue for depth calibration, or None.
+        session: Optional :class:`PortraitInferenceSession` whose warm
+            ImageSegmenter is reused.
+        max_dimension: Longest side of the image passed to the segmenter;
+            None segments the analysis frame as is.
+        frame: Optional shared :class:`AnalysisFrame` of ``image``.
+        diagnostics: Optional :class:`DetectionDiagnostics` record of the
+            chin, depth-profile and neck-width values, also logged at DEBUG
+            level.
 
     Returns:
         2-tuple of (NeckMidpoint | None, SegmentationDebug | None).
     """
     # Get segmentation mask
-    seg_mask = _get_segmentation_mask(image, threshold)
+    seg_mask = _get_segmentation_mask(
+        image,
+        threshold,
+        session=session,
+        max_dimension=max_dimension,
+        frame=frame,
+    )
     if seg_mask is None:
         return None, None
 
+    return _detect_from_dual_mask(
+        seg_mask,
+        skinmap,
+        depthmap,
+        hairmap,
+        skin_threshold,
+        float_min,
+        float_max,
+        image.size,
+        diagnostics,
+    )
+
+
+def _detect_from_dual_mask(
+    seg_mask: np.ndarray,
+    skinmap: Image.Image,
+    depthmap: Image.Image,
+    hairmap: Image.Image | None,
+    skin_threshold: int,
+    float_min: float | None,
+    float_max: float | None,
+    photo_size: tuple[int, int],
+    diagnostics: DetectionDiagnostics | None = None,
+) -> tuple[NeckMidpoint | None, SegmentationDebug | None]:
+    """Dual-mask detection on an existing photo-resolution person mask.
+
+    Separated from ``detect_neck_midpoint_from_dual_mask`` so a mask
+    segmented once can be shared with the silhouette-only detector.
+    """
     h, w = seg_mask.shape[:2]
 
     # Convert skinmap to binary numpy mask
@@ -615,43 +783,72 @@ def detect_neck_midpoint_from_dual_mask(
         if hair_arr.ndim == 3:
             hair_arr = hair_arr[:, :, 0]
 
+    # Width profiles of seg_mask and skin_binary are needed by several
+    # steps below; compute each full-frame profile only once.
+    profile_cache = _WidthProfileCache()
+
     # Step 1: Find chin from depth map + skin mask
     chin_y, midline_x = _find_chin_from_depth(skin_binary, depthmap_arr)
     if chin_y is None or midline_x is None:
-        print("  Dual-mask: could not find chin from depth map, falling back")
-        return _detect_from_mask(seg_mask, h, w)
+        _emit(logger, diagnostics, "dual_mask_fallback", reason="no_depth_chin")
+        return _detect_from_mask(
+            seg_mask, h, w, profile_cache=profile_cache, diagnostics=diagnostics
+        )
 
-    print(f"  Dual-mask: chin_y={chin_y}, midline_x={midline_x:.1f}")
+    _emit(logger, diagnostics, "dual_mask_chin", chin_y=chin_y, midline_x=midline_x)
 
     # Step 2: Detect ear, neck, shoulder from depth profile below chin
     #         (hair removed from depth map so hanging hair doesn't inflate widths)
     ear_y, depth_neck_y, shoulder_y, neck_left_x, neck_right_x = (
         _detect_landmarks_from_depth_profile(
-            depthmap_arr, skin_binary, chin_y, hair_arr=hair_arr
+            depthmap_arr,
+            skin_binary,
+            chin_y,
+            hair_arr=hair_arr,
+            profile_cache=profile_cache,
         )
     )
-    print(
-        f"  Dual-mask depth profile: ear_y={ear_y},"
-        f" neck_y={depth_neck_y}, shoulder_y={shoulder_y},"
-        f" neck_left_x={neck_left_x}, neck_right_x={neck_right_x}"
+    _emit(
+        logger,
+        diagnostics,
+        "dual_mask_depth_profile",
+        ear_y=ear_y,
+        depth_neck_y=depth_neck_y,
+        shoulder_y=shoulder_y,
+        neck_left_x=neck_left_x,
+        neck_right_x=neck_right_x,
     )
 
     # Fallback: shoulders from segmentation if depth failed
     if shoulder_y is None:
-        shoulder_y = _find_shoulders_from_segmentation(seg_mask, chin_y)
+        shoulder_y = _find_shoulders_from_segmentation(
+            seg_mask, chin_y, profile_cache=profile_cache
+        )
         if shoulder_y is not None:
-            print(f"  Dual-mask: shoulder_y={shoulder_y} (seg fallback)")
+            _emit(
+                logger,
+                diagnostics,
+                "dual_mask_segmentation_shoulders",
+                shoulder_y=shoulder_y,
+            )
 
     if shoulder_y is None:
-        print("  Dual-mask: could not find shoulders, falling back")
-        return _detect_from_mask(seg_mask, h, w)
+        _emit(logger, diagnostics, "dual_mask_fallback", reason="no_shoulders")
+        return _detect_from_mask(
+            seg_mask, h, w, profile_cache=profile_cache, diagnostics=diagnostics
+        )
 
     # Use depth-based neck_y, or fall back to skin-based
     neck_y = depth_neck_y
     if neck_y is None:
         neck_search_top = ear_y if ear_y is not None else chin_y
         neck_search_top = max(neck_search_top, chin_y)
-        neck_y = _find_neck_from_skin(skin_binary, neck_search_top, shoulder_y)
+        neck_y = _find_neck_from_skin(
+            skin_binary,
+            neck_search_top,
+            shoulder_y,
+            profile_cache=profile_cache,
+        )
     if neck_y is None:
         neck_y = int((chin_y + shoulder_y) / 2)  # fallback
 
@@ -673,8 +870,7 @@ def detect_neck_midpoint_from_dual_mask(
     person_height = person_bottom - person_top
     roi_top = person_top
     roi_bottom = person_top + int(person_height * 0.75)
-    roi_mask = seg_mask[roi_top:roi_bottom]
-    widths, _, _ = _compute_width_profile(roi_mask)
+    widths = _width_profile(seg_mask, profile_cache)[0][roi_top:roi_bottom]
     kernel_w = 15
     if kernel_w > 1 and len(widths) > kernel_w:
         k = np.ones(kernel_w) / kernel_w
@@ -704,7 +900,7 @@ def detect_neck_midpoint_from_dual_mask(
     mouth_y = head_top + head_height * 0.80
 
     # Estimate mouth width from skin mask at mouth level
-    skin_widths, _, _ = _compute_width_profile(skin_binary)
+    skin_widths, _, _ = _width_profile(skin_binary, profile_cache)
     mouth_row_idx = int(mouth_y)
     if 0 <= mouth_row_idx < len(skin_widths):
         head_width_at_mouth = skin_widths[mouth_row_idx]
@@ -735,15 +931,18 @@ def detect_neck_midpoint_from_dual_mask(
             neck_y,
             neck_left_x,
             neck_right_x,
-            image.size[0],
-            image.size[1],
+            photo_size[0],
+            photo_size[1],
             float_min,
             float_max,
         )
         if neck_width_front_arc_mm is not None:
-            print(
-                f"  Neck width 3D: arc={neck_width_front_arc_mm:.1f} mm,"
-                f" straight={neck_width_straight_mm:.1f} mm"
+            _emit(
+                logger,
+                diagnostics,
+                "neck_width_3d",
+                neck_width_front_arc_mm=neck_width_front_arc_mm,
+                neck_width_straight_mm=neck_width_straight_mm,
             )
 
     debug = SegmentationDebug(
@@ -781,10 +980,15 @@ def detect_neck_midpoint_from_dual_mask(
         interpolation_ratio=None,
     )
 
-    print(
-        f"  Dual-mask result: neck_y={neck_y}, chin_y={chin_y},"
-        f" ear_y={ear_y}, shoulder_y={shoulder_y},"
-        f" midline_x={neck_midline_x:.1f}"
+    _emit(
+        logger,
+        diagnostics,
+        "dual_mask_result",
+        neck_y=neck_y,
+        chin_y=chin_y,
+        ear_y=ear_y,
+        shoulder_y=shoulder_y,
+        midline_x=neck_midline_x,
     )
 
     return neck_midpoint, debug
@@ -796,6 +1000,8 @@ def _detect_from_mask(
     w: int,
     jaw_flare_fraction: float = 0.15,
     smoothing_window: int = 15,
+    profile_cache: _WidthProfileCache | None = None,
+    diagnostics: DetectionDiagnostics | None = None,
 ) -> tuple[NeckMidpoint | None, SegmentationDebug | None]:
     """Core detection logic operating on a binary mask.
 
@@ -822,7 +1028,7 @@ def _detect_from_mask(
     roi_bottom = person_top + int(person_height * 0.75)
     roi_mask = binary_mask[roi_top:roi_bottom]
 
-    widths, lefts, rights = _compute_width_profile(roi_mask)
+    widths = _width_profile(binary_mask, profile_cache)[0][roi_top:roi_bottom]
 
     # Smooth the width profile
     if smoothing_window > 1 and len(widths) > smoothing_window:
@@ -941,9 +1147,13 @@ def _detect_from_mask(
         interpolation_ratio=None,
     )
 
-    print(
-        f"  Segmentation fallback: neck_y={neck_y_abs},"
-        f" chin_y={chin_y_abs}, midline_x={midline_x:.1f}"
+    _emit(
+        logger,
+        diagnostics,
+        "segmentation_result",
+        neck_y=neck_y_abs,
+        chin_y=chin_y_abs,
+        midline_x=midline_x,
     )
 
     return neck_midpoint, debug
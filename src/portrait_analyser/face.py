@@ -1,12 +1,13 @@
-import os
-import urllib.request
 from dataclasses import dataclass
-from pathlib import Path
 
 import numpy
 from PIL import Image
 
 from .exceptions import MultipleFacesDetected, NoFacesDetected
+from .frame import AnalysisFrame, _resolve_frame
+from .instrumentation import _traced
+from .models import fetch_model
+from .session import PortraitInferenceSession, _session_scope
 
 
 @dataclass
@@ -28,24 +29,12 @@ _FACE_MODEL_URL = (
     "face_detector/blaze_face_short_range/float16/1/"
     "blaze_face_short_range.tflite"
 )
-_CACHE_DIR = Path.home() / ".cache" / "portrait-analyser"
 _FACE_MODEL_FILENAME = "blaze_face_short_range.tflite"
 
 
 def _get_face_model_path() -> str:
     """Return path to the FaceDetector .tflite model, downloading if needed."""
-    model_path = _CACHE_DIR / _FACE_MODEL_FILENAME
-    if not model_path.exists():
-        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        tmp_path = model_path.with_suffix(".tmp")
-        try:
-            urllib.request.urlretrieve(_FACE_MODEL_URL, tmp_path)
-            os.replace(tmp_path, model_path)
-        except Exception:
-            if tmp_path.exists():
-                tmp_path.unlink()
-            raise
-    return str(model_path)
+    return str(fetch_model(_FACE_MODEL_URL, _FACE_MODEL_FILENAME))
 
 
 def translate_coordinates(
@@ -160,33 +149,32 @@ class Face(Rectangle):
         self.eyes = []
 
 
-def detect_eyes(image):
+@_traced("detect_eyes")
+def detect_eyes(
+    image,
+    session: PortraitInferenceSession | None = None,
+    frame: AnalysisFrame | None = None,
+):
     """Detect eyes in the full image without face detection.
 
     Returns list of Rectangle objects in image-absolute coordinates.
     Useful as a fallback when face detection fails (NoFacesDetected).
+    Pass a ``session`` to reuse its FaceDetector across calls and a
+    ``frame`` to reuse the portrait's downscaled analysis frame.
     """
-    import mediapipe as mp
-
-    model_path = _get_face_model_path()
-    image_array = numpy.array(image.convert("RGB"))
-    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_array)
-
-    options = mp.tasks.vision.FaceDetectorOptions(
-        base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
-        min_detection_confidence=0.5,
-    )
+    frame = _resolve_frame(image, frame)
+    mp_image = frame.mp_image()
 
-    with mp.tasks.vision.FaceDetector.create_from_options(options) as detector:
-        detection_result = detector.detect(mp_image)
+    with _session_scope(session) as scope:
+        detection_result = scope.face_detector(0.5).detect(mp_image)
 
-    img_w, img_h = image.size
+    img_w, img_h = frame.photo_width, frame.photo_height
     eyes = []
     for detection in detection_result.detections:
         keypoints = detection.keypoints
         if keypoints and len(keypoints) >= 2:
-            face_w = detection.bounding_box.width
-            face_h = detection.bounding_box.height
+            face_w = detection.bounding_box.width * frame.scale_x
+            face_h = detection.bounding_box.height * frame.scale_y
             for i in [0, 1]:  # left eye, right eye keypoints
                 kp = keypoints[i]
                 eye_x = kp.x * img_w
@@ -204,29 +192,31 @@ def detect_eyes(image):
     return eyes
 
 
-def get_face_parameters(input_image: Image.Image, raise_opencv_exceptions=False):
+@_traced("get_face_parameters")
+def get_face_parameters(
+    input_image: Image.Image,
+    raise_opencv_exceptions=False,
+    session: PortraitInferenceSession | None = None,
+    frame: AnalysisFrame | None = None,
+):
     """Get face position and size or return an exception in
-    case there's none."""
-    import mediapipe as mp
-
-    model_path = _get_face_model_path()
-
-    image_array = numpy.array(input_image.convert("RGB"))
-    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_array)
+    case there's none.
 
-    options = mp.tasks.vision.FaceDetectorOptions(
-        base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
-        min_detection_confidence=0.5,
-    )
+    Pass a ``session`` to reuse its FaceDetector across calls and a
+    ``frame`` to reuse the portrait's downscaled analysis frame."""
+    frame = _resolve_frame(input_image, frame)
+    mp_image = frame.mp_image()
 
-    try:
-        with mp.tasks.vision.FaceDetector.create_from_options(options) as detector:
+    with _session_scope(session) as scope:
+        # Model download/lookup errors propagate; only inference is guarded.
+        detector = scope.face_detector(0.5)
+        try:
             result = detector.detect(mp_image)
-        detections = result.detections
-    except Exception:
-        if raise_opencv_exceptions:
-            raise
-        detections = []
+            detections = result.detections
+        except Exception:
+            if raise_opencv_exceptions:
+                raise
+            detections = []
 
     if len(detections) == 0:
         raise NoFacesDetected()
@@ -235,12 +225,12 @@ def get_face_parameters(input_image: Image.Image, raise_opencv_exceptions=False)
         raise MultipleFacesDetected()
 
     detection = detections[0]
-    img_w, img_h = input_image.size
+    img_w, img_h = frame.photo_width, frame.photo_height
     bbox = detection.bounding_box
-    x = int(bbox.origin_x)
-    y = int(bbox.origin_y)
-    w = int(bbox.width)
-    h = int(bbox.height)
+    x = int(bbox.origin_x * frame.scale_x)
+    y = int(bbox.origin_y * frame.scale_y)
+    w = int(bbox.width * frame.scale_x)
+    h = int(bbox.height * frame.scale_y)
 
     # Extract eye keypoints from MediaPipe face detection
     # Keypoints: 0=left eye, 1=right eye, 2=nose tip, 3=mouth center,
@@ -0,0 +1,126 @@
+"""Downscaled RGB frame shared by the MediaPipe detectors.
+
+MediaPipe resizes every input to a few hundred pixels before inference, so
+handing it a full 12 MP photo only buys a 36 MB RGB copy per detector call.
+An :class:`AnalysisFrame` is built once per portrait — resized straight from
+the source image, then converted to RGB — and every detector accepts it as
+``frame=``::
+
+    frame = portrait.analysis_frame()
+    face = get_face_parameters(portrait.photo, frame=frame)
+    neck, _, _ = detect_neck_midpoint(portrait.photo, frame=frame)
+
+Detectors report results in photo space: normalised landmarks are scaled by
+the photo size and pixel outputs (bounding boxes, masks) are mapped back
+with :meth:`AnalysisFrame.to_photo` or upsampled. Without ``frame=`` each
+detector builds a temporary frame from its ``image`` argument.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import numpy as np
+from PIL import Image
+
+# Longest side of the analysis frame. Comfortably above the input size of
+# every MediaPipe model used here (BlazeFace 128, Face Mesh 256, Pose 256,
+# selfie segmenter 256), including when a face fills only part of the frame.
+DEFAULT_ANALYSIS_MAX_DIMENSION = 1024
+
+
+def _fit_size(width: int, height: int, max_dimension: int | None) -> tuple[int, int]:
+    if max_dimension is None or max(width, height) <= max_dimension:
+        return width, height
+    scale = max_dimension / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+@dataclass(frozen=True, eq=False)
+class AnalysisFrame:
+    """Read-only RGB array of a photo plus its mapping back to photo space."""
+
+    rgb: np.ndarray  # (height, width, 3) uint8, C-contiguous, read-only
+    photo_width: int
+    photo_height: int
+    _mp_image: list = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.rgb.ndim != 3 or self.rgb.shape[2] != 3 or self.rgb.dtype != np.uint8:
+            raise ValueError("rgb must be a (height, width, 3) uint8 array")
+        rgb = np.ascontiguousarray(self.rgb)
+        rgb.flags.writeable = False
+        object.__setattr__(self, "rgb", rgb)
+
+    @classmethod
+    def from_image(
+        cls,
+        image: Image.Image,
+        max_dimension: int | None = DEFAULT_ANALYSIS_MAX_DIMENSION,
+    ) -> AnalysisFrame:
+        """Resize *image* to fit *max_dimension*, then convert it to RGB.
+
+        Resizing first means the full-resolution photo is never copied;
+        ``max_dimension=None`` keeps the photo's own resolution.
+        """
+        photo_width, photo_height = image.size
+        size = _fit_size(photo_width, photo_height, max_dimension)
+        if size != image.size:
+            if image.mode not in ("RGB", "RGBA", "L"):
+                image = image.convert("RGB")
+            image = image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return cls(np.asarray(image), photo_width, photo_height)
+
+    @property
+    def width(self) -> int:
+        return self.rgb.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.rgb.shape[0]
+
+    @property
+    def scale_x(self) -> float:
+        """Photo pixels per frame pixel, horizontally."""
+        return self.photo_width / self.width
+
+    @property
+    def scale_y(self) -> float:
+        """Photo pixels per frame pixel, vertically."""
+        return self.photo_height / self.height
+
+    def to_photo(self, x: float, y: float) -> tuple[float, float]:
+        """Map a frame pixel coordinate to photo space."""
+        return x * self.scale_x, y * self.scale_y
+
+    def with_max_dimension(self, max_dimension: int | None) -> AnalysisFrame:
+        """Return this frame, or a smaller copy fitting *max_dimension*."""
+        size = _fit_size(self.width, self.height, max_dimension)
+        if size == (self.width, self.height):
+            return self
+        import cv2
+
+        return AnalysisFrame(
+            cv2.resize(self.rgb, size, interpolation=cv2.INTER_AREA),
+            self.photo_width,
+            self.photo_height,
+        )
+
+    def mp_image(self):
+        """The frame wrapped as a ``mediapipe.Image``, created once."""
+        if not self._mp_image:
+            import mediapipe as mp
+
+            self._mp_image.append(
+                mp.Image(image_format=mp.ImageFormat.SRGB, data=self.rgb)
+            )
+        return self._mp_image[0]
+
+
+def _resolve_frame(image: Image.Image, frame: AnalysisFrame | None) -> AnalysisFrame:
+    """Return *frame*, or a default frame built from *image*."""
+    if frame is not None:
+        return frame
+    return AnalysisFrame.from_image(image)
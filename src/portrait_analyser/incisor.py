@@ -53,7 +53,15 @@ def pixels_per_mm_at_distance(distance_cm):
     if not MIN_CALIBRATED_DISTANCE_CM <= distance_cm <= MAX_CALIBRATED_DISTANCE_CM:
         return None
 
-    d = distance_cm
+    return _calibration_polynomial(distance_cm)
+
+
+def _calibration_polynomial(d):
+    """Evaluate the pixels-per-mm fit without any range check.
+
+    Written with plain arithmetic so it accepts both floats and NumPy arrays;
+    callers are responsible for rejecting out-of-range distances.
+    """
     return (
         30.79912
         - 1.346418 * d
@@ -0,0 +1,371 @@
+"""Per-stage timing hooks for the analysis pipeline.
+
+The pipeline marks its expensive steps — HEIF decode, matte resize, teeth
+bounding box, incisor centroids, depth sampling, model load, FaceMesh, Pose,
+segmentation, skin preparation and arc integration — as named stages, nested
+inside one stage per public loader, detector and measurement (``load_image``,
+``detect_neck_midpoint``, ``compute_neck_circumference``, ...). A hook
+installed with :func:`stage_hooks` receives one :class:`StageTiming` per
+stage run, with its wall time, CPU time and (optionally) peak traced
+allocation::
+
+    aggregator = StageTimingAggregator()
+    with stage_hooks(aggregator, trace_memory=True):
+        for path in paths:
+            analyse(load_image(path))
+    print(aggregator.format_summary())
+
+:class:`ChromeTraceRecorder` turns the same stages into a Chrome trace-event
+file for ``chrome://tracing`` or https://ui.perfetto.dev::
+
+    with chrome_trace("portrait.trace.json"):
+        analyse(load_image(path))
+
+Hooks are context-local (a :class:`contextvars.ContextVar`), so concurrent
+batches in other threads or tasks do not see each other's stages. With no
+hook installed :func:`stage` returns a shared no-op context manager and
+nothing is measured.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import multiprocessing
+import os
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import numpy as np
+
+_hooks: ContextVar[tuple[Callable[[StageTiming], None], ...]] = ContextVar(
+    "portrait_analyser_stage_hooks", default=()
+)
+_active_stage: ContextVar[_Stage | None] = ContextVar(
+    "portrait_analyser_active_stage", default=None
+)
+_NO_STAGE = nullcontext()
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    """One completed run of a named pipeline stage."""
+
+    name: str
+    # perf_counter() value when the stage started.
+    start_s: float
+    wall_time_s: float
+    # Process CPU time, so it includes MediaPipe's own worker threads.
+    cpu_time_s: float
+    # Peak traced allocation above the stage's starting level; None unless
+    # tracemalloc was tracing.
+    peak_alloc_bytes: int | None
+    # Name of the enclosing stage, None at the top level.
+    parent: str | None
+    depth: int
+    thread_id: int
+    process_id: int
+
+
+class _Stage:
+    __slots__ = (
+        "name",
+        "hooks",
+        "parent",
+        "depth",
+        "peak",
+        "_token",
+        "_start",
+        "_cpu",
+        "_base_memory",
+    )
+
+    def __init__(self, name: str, hooks):
+        self.name = name
+        self.hooks = hooks
+        self.peak = 0
+
+    def __enter__(self):
+        parent = _active_stage.get()
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self._token = _active_stage.set(self)
+        self._base_memory = None
+        if tracemalloc.is_tracing():
+            # The interpreter keeps a single peak; fold it into the parent
+            # before resetting so nested stages do not hide outer peaks.
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent.peak = max(parent.peak, peak)
+            tracemalloc.reset_peak()
+            self._base_memory = self.peak = current
+        self._cpu = time.process_time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_time = time.perf_counter() - self._start
+        cpu_time = time.process_time() - self._cpu
+        _active_stage.reset(self._token)
+        peak_alloc = None
+        if self._base_memory is not None and tracemalloc.is_tracing():
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            if self.parent is not None:
+                self.parent.peak = max(self.parent.peak, peak)
+            peak_alloc = max(0, peak - self._base_memory)
+        timing = StageTiming(
+            name=self.name,
+            start_s=self._start,
+            wall_time_s=wall_time,
+            cpu_time_s=cpu_time,
+            peak_alloc_bytes=peak_alloc,
+            parent=None if self.parent is None else self.parent.name,
+            depth=self.depth,
+            thread_id=threading.get_ident(),
+            process_id=os.getpid(),
+        )
+        for hook in self.hooks:
+            hook(timing)
+        return False
+
+
+def stage(name: str):
+    """Context manager timing the enclosed block as stage *name*.
+
+    Returns a shared no-op context manager when no hook is installed.
+    """
+    hooks = _hooks.get()
+    if not hooks:
+        return _NO_STAGE
+    return _Stage(name, hooks)
+
+
+def _traced(name: str):
+    """Decorator running the whole function as stage *name*."""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def stage_hooks(*hooks: Callable[[StageTiming], None], trace_memory: bool = False):
+    """Send every stage completed inside the block to *hooks*.
+
+    Hooks nest: an inner ``stage_hooks`` adds to the hooks already installed
+    in this context. With *trace_memory*, :mod:`tracemalloc` is started for
+    the block (and stopped again if it was not already running) so timings
+    carry ``peak_alloc_bytes``; tracing allocations slows Python code down
+    noticeably, so leave it off for wall-time measurements.
+
+    Work submitted to thread pools only reports stages when it runs in a
+    copy of the caller's context, as the pipeline's own executors do.
+    """
+    token = _hooks.set(_hooks.get() + hooks)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        _hooks.reset(token)
+
+
+@dataclass(frozen=True)
+class StageSummary:
+    """Distribution of one stage's timings across a batch."""
+
+    name: str
+    count: int
+    total_wall_time_s: float
+    # Percentile -> seconds.
+    wall_time_s: dict[float, float]
+    cpu_time_s: dict[float, float]
+    max_peak_alloc_bytes: int | None
+
+
+class StageTimingAggregator:
+    """Stage hook collecting timings for percentile summaries.
+
+    Thread-safe, so one aggregator can be shared by concurrent detections.
+    """
+
+    def __init__(self):
+        self._timings: list[StageTiming] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, timing: StageTiming) -> None:
+        with self._lock:
+            self._timings.append(timing)
+
+    @property
+    def timings(self) -> list[StageTiming]:
+        """Copy of the collected timings in completion order."""
+        with self._lock:
+            return list(self._timings)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._timings.clear()
+
+    def summary(
+        self, percentiles: Iterable[float] = (50, 90, 99)
+    ) -> dict[str, StageSummary]:
+        """Per-stage summaries, in order of each stage's first completion."""
+        percentiles = tuple(percentiles)
+        by_name: dict[str, list[StageTiming]] = {}
+        for timing in self.timings:
+            by_name.setdefault(timing.name, []).append(timing)
+
+        summaries = {}
+        for name, timings in by_name.items():
+            wall = np.array([t.wall_time_s for t in timings])
+            cpu = np.array([t.cpu_time_s for t in timings])
+            peaks = [t.peak_alloc_bytes for t in timings if t.peak_alloc_bytes is not None]
+            summaries[name] = StageSummary(
+                name=name,
+                count=len(timings),
+                total_wall_time_s=float(wall.sum()),
+                wall_time_s=dict(
+                    zip(percentiles, np.percentile(wall, percentiles).tolist())
+                ),
+                cpu_time_s=dict(
+                    zip(percentiles, np.percentile(cpu, percentiles).tolist())
+                ),
+                max_peak_alloc_bytes=max(peaks) if peaks else None,
+            )
+        return summaries
+
+    def format_summary(self, percentiles: Iterable[float] = (50, 90, 99)) -> str:
+        """Plain-text table of :meth:`summary`, times in milliseconds."""
+        percentiles = tuple(percentiles)
+        summaries = self.summary(percentiles)
+        header = ["stage", "count", "total ms"]
+        header += [f"wall p{p:g}" for p in percentiles]
+        header += [f"cpu p{p:g}" for p in percentiles]
+        header.append("peak MiB")
+        rows = [header]
+        for s in summaries.values():
+            row = [s.name, str(s.count), f"{s.total_wall_time_s * 1000:.1f}"]
+            row += [f"{s.wall_time_s[p] * 1000:.1f}" for p in percentiles]
+            row += [f"{s.cpu_time_s[p] * 1000:.1f}" for p in percentiles]
+            row.append(
+                "-"
+                if s.max_peak_alloc_bytes is None
+                else f"{s.max_peak_alloc_bytes / 2**20:.1f}"
+            )
+            rows.append(row)
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        return "\n".join(
+            "  ".join(
+                cell.ljust(width) if i == 0 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths))
+            )
+            for row in rows
+        )
+
+
+class ChromeTraceRecorder:
+    """Stage hook collecting Chrome trace events.
+
+    Every stage becomes a complete (``"ph": "X"``) event on its process and
+    thread, so nested stages show as nested spans and stages run by worker
+    threads or processes land on their own tracks. Timestamps are
+    :func:`time.perf_counter` microseconds — a system-wide monotonic clock
+    on Linux and macOS — so events recorded in worker processes and merged
+    with :meth:`extend` line up with the parent's.
+    """
+
+    def __init__(self):
+        self._events: list[dict] = []
+        self._named_threads: set[tuple[int, int]] = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, timing: StageTiming) -> None:
+        args = {"cpu_time_ms": timing.cpu_time_s * 1000}
+        if timing.peak_alloc_bytes is not None:
+            args["peak_alloc_bytes"] = timing.peak_alloc_bytes
+        event = {
+            "name": timing.name,
+            "cat": "portrait_analyser",
+            "ph": "X",
+            "ts": timing.start_s * 1e6,
+            "dur": timing.wall_time_s * 1e6,
+            "pid": timing.process_id,
+            "tid": timing.thread_id,
+            "args": args,
+        }
+        with self._lock:
+            key = (timing.process_id, timing.thread_id)
+            if key not in self._named_threads:
+                # The hook runs on the stage's own thread and process.
+                self._named_threads.add(key)
+                self._events.append(
+                    _metadata_event(
+                        key, "process_name", multiprocessing.current_process().name
+                    )
+                )
+                self._events.append(
+                    _metadata_event(key, "thread_name", threading.current_thread().name)
+                )
+            self._events.append(event)
+
+    @property
+    def events(self) -> list[dict]:
+        """Copy of the recorded trace events, picklable for worker results."""
+        with self._lock:
+            return list(self._events)
+
+    def extend(self, events: Iterable[dict]) -> None:
+        """Merge events recorded elsewhere, e.g. by a worker process."""
+        events = list(events)
+        with self._lock:
+            known = set(self._named_threads)
+            for event in events:
+                key = (event["pid"], event["tid"])
+                if event["ph"] == "M" and key in known:
+                    continue
+                self._named_threads.add(key)
+                self._events.append(event)
+
+    def to_json(self) -> dict:
+        """The trace as a Chrome trace-event JSON object."""
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+    def write(self, path) -> None:
+        """Write the trace to *path*."""
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f)
+
+
+def _metadata_event(key: tuple[int, int], name: str, value: str) -> dict:
+    pid, tid = key
+    return {"name": name, "ph": "M", "pid": pid, "tid": tid, "args": {"name": value}}
+
+
+@contextmanager
+def chrome_trace(path, trace_memory: bool = False):
+    """Record the stages run inside the block and write them to *path*.
+
+    Yields the :class:`ChromeTraceRecorder`; the file is written when the
+    block exits, also after an exception.
+    """
+    recorder = ChromeTraceRecorder()
+    try:
+        with stage_hooks(recorder, trace_memory=trace_memory):
+            yield recorder
+    finally:
+        recorder.write(path)
@@ -14,7 +14,9 @@ from .face import (
     IncisorMeasurement,
     sample_depth_at_point,
 )
+from .frame import DEFAULT_ANALYSIS_MAX_DIMENSION, AnalysisFrame
 from .incisor import compute_incisor_distance_3d
+from .instrumentation import _traced, stage
 
 
 class IOSPortrait:
@@ -43,6 +45,19 @@ class IOSPortrait:
         self.incisor_measurement = incisor_measurement
         self.floatValueMin = float(floatValueMin) if floatValueMin is not None else None
         self.floatValueMax = float(floatValueMax) if floatValueMax is not None else None
+        self._analysis_frames = {}
+
+    def analysis_frame(self, max_dimension=DEFAULT_ANALYSIS_MAX_DIMENSION):
+        """Downscaled RGB frame of the photo, built once per size.
+
+        Pass it as ``frame=`` to the MediaPipe detectors so they share one
+        conversion instead of each copying the full-resolution photo.
+        """
+        frame = self._analysis_frames.get(max_dimension)
+        if frame is None:
+            frame = AnalysisFrame.from_image(self.photo, max_dimension)
+            self._analysis_frames[max_dimension] = frame
+        return frame
 
     def teeth_bbox_translated(self, max_wi, max_he):
         if self.teeth_bbox is None:
@@ -118,80 +133,44 @@ def _decode_semantic_map(raw_image):
         return None
 
 
-def load_image(fileName: str, use_exif=True) -> Union[IOSPortrait, None]:
-    """Load HEIC/HEIF with depth data, return an IOSPortrait instance."""
-    if not (fileName.lower().endswith("heic") or fileName.lower().endswith("heif")):
-        raise UnknownExtension(
-            "only supported extensions for filenames are: HEIF, HEIC"
-        )
-
-    with open(fileName, "rb") as f:
-        heif_container = pyheif.open_container(f)
-
-        primary_image = heif_container.primary_image
-        _validate_exif(primary_image, use_exif)
-
-        if primary_image.depth_image is None:
-            raise NoDepthMapFound(f"{fileName} has no depth data")
-
-        # Extract auxiliary semantic maps
-        teeth_raw = skin_raw = hair_raw = None
-        for aux in primary_image.auxiliary_images:
-            aux_type = getattr(aux, "type", "")
-            if aux_type == "urn:com:apple:photo:2019:aux:semanticteethmatte":
-                teeth_raw = aux.image
-            elif aux_type == "urn:com:apple:photo:2019:aux:semanticskinmatte":
-                skin_raw = aux.image
-            elif aux_type == "urn:com:apple:photo:2019:aux:semantichairmatte":
-                hair_raw = aux.image
-
-        # Decode depth map
-        depth_loaded = primary_image.depth_image.image.load()
-        float_min, float_max = _parse_depth_metadata(depth_loaded)
-        depth_image = Image.frombytes(
-            depth_loaded.mode, depth_loaded.size, depth_loaded.data
-        )
-
-        # Decode primary picture
-        picture_image = _decode_picture(primary_image.image.load())
-
-        # Decode semantic maps
-        teeth_image = _decode_semantic_map(teeth_raw) if teeth_raw else None
-        skin_image = _decode_semantic_map(skin_raw) if skin_raw else None
-        hair_image = _decode_semantic_map(hair_raw) if hair_raw else None
+def _analyse_teethmap(teeth_image, depth_image, float_min, float_max, photo_size):
+    """Teeth bounding box and incisor measurements from a photo-size teethmap.
 
-    # Process teeth map: resize and analyze
+    Paints a black border into *teeth_image* in place. Returns
+    ``(teeth_bbox, incisor_distance, incisor_distance_3d_mm,
+    incisor_measurement)``; entries that cannot be measured are None.
+    """
     teeth_bbox = None
     incisor_distance = None
     incisor_distance_3d_mm = None
     incisor_measurement = None
-    if teeth_image is not None:
-        teeth_image = teeth_image.resize(picture_image.size)
-
-        # Neutralise white/noisy borders that some teethmaps have — paint a
-        # 30-pixel black frame so edge pixels are never mistaken for teeth.
-        draw = ImageDraw.Draw(teeth_image)
-        border = 30
-        tw, th = teeth_image.size
-        draw.rectangle([0, 0, tw - 1, border - 1], fill=0)          # top
-        draw.rectangle([0, th - border, tw - 1, th - 1], fill=0)    # bottom
-        draw.rectangle([0, 0, border - 1, th - 1], fill=0)          # left
-        draw.rectangle([tw - border, 0, tw - 1, th - 1], fill=0)    # right
 
+    # Neutralise white/noisy borders that some teethmaps have — paint a
+    # 30-pixel black frame so edge pixels are never mistaken for teeth.
+    draw = ImageDraw.Draw(teeth_image)
+    border = 30
+    tw, th = teeth_image.size
+    draw.rectangle([0, 0, tw - 1, border - 1], fill=0)          # top
+    draw.rectangle([0, th - border, tw - 1, th - 1], fill=0)    # bottom
+    draw.rectangle([0, 0, border - 1, th - 1], fill=0)          # left
+    draw.rectangle([tw - border, 0, tw - 1, th - 1], fill=0)    # right
+
+    with stage("teeth_bbox"):
         teeth_bbox = find_bounding_box_teeth(teeth_image)
-        if teeth_bbox is not None:
-            incisor_distance = find_incisor_distance_teeth(teeth_image, teeth_bbox)
-
-            # 3D distance for legacy edge-of-gap points
-            if (
-                incisor_distance is not None
-                and depth_image is not None
-                and float_min is not None
-                and float_max is not None
-            ):
-                # Legacy format: (x, y1, x, y2)
-                lx1, ly1, lx2, ly2 = incisor_distance
-                photo_w, photo_h = picture_image.size
+    if teeth_bbox is not None:
+        incisor_distance = find_incisor_distance_teeth(teeth_image, teeth_bbox)
+
+        # 3D distance for legacy edge-of-gap points
+        if (
+            incisor_distance is not None
+            and depth_image is not None
+            and float_min is not None
+            and float_max is not None
+        ):
+            # Legacy format: (x, y1, x, y2)
+            lx1, ly1, lx2, ly2 = incisor_distance
+            photo_w, photo_h = photo_size
+            with stage("depth_sampling"):
                 ld_upper = sample_depth_at_point(
                     depth_image,
                     lx1,
@@ -210,34 +189,36 @@ def load_image(fileName: str, use_exif=True) -> Union[IOSPortrait, None]:
                     support_mask=teeth_image,
                     inward_y=1,
                 )
-                if ld_upper is not None and ld_lower is not None:
-                    legacy_3d = compute_incisor_distance_3d(
-                        (float(lx1), float(ly1)),
-                        (float(lx2), float(ly2)),
-                        ld_upper,
-                        ld_lower,
-                        float(float_min),
-                        float(float_max),
-                        photo_w,
-                        photo_h,
-                    )
-                    if legacy_3d is not None:
-                        incisor_distance_3d_mm = legacy_3d[0]
+            if ld_upper is not None and ld_lower is not None:
+                legacy_3d = compute_incisor_distance_3d(
+                    (float(lx1), float(ly1)),
+                    (float(lx2), float(ly2)),
+                    ld_upper,
+                    ld_lower,
+                    float(float_min),
+                    float(float_max),
+                    photo_w,
+                    photo_h,
+                )
+                if legacy_3d is not None:
+                    incisor_distance_3d_mm = legacy_3d[0]
 
-            # Centroid-based measurement with depth integration
+        # Centroid-based measurement with depth integration
+        with stage("incisor_centroids"):
             centroids = find_incisor_centroids(teeth_image, teeth_bbox)
-            if centroids is not None:
-                upper_c, lower_c = centroids
-                pixel_dist_y = abs(lower_c[1] - upper_c[1])
-
-                upper_depth_raw = None
-                lower_depth_raw = None
-                upper_distance_cm = None
-                lower_distance_cm = None
-                distance_3d_mm = None
-
-                if depth_image is not None:
-                    photo_w, photo_h = picture_image.size
+        if centroids is not None:
+            upper_c, lower_c = centroids
+            pixel_dist_y = abs(lower_c[1] - upper_c[1])
+
+            upper_depth_raw = None
+            lower_depth_raw = None
+            upper_distance_cm = None
+            lower_distance_cm = None
+            distance_3d_mm = None
+
+            if depth_image is not None:
+                photo_w, photo_h = photo_size
+                with stage("depth_sampling"):
                     upper_depth_raw = sample_depth_at_point(
                         depth_image,
                         upper_c[0],
@@ -257,45 +238,124 @@ def load_image(fileName: str, use_exif=True) -> Union[IOSPortrait, None]:
                         inward_y=1,
                     )
 
-                    if (
-                        upper_depth_raw is not None
-                        and lower_depth_raw is not None
-                        and float_min is not None
-                        and float_max is not None
-                    ):
-                        result_3d = compute_incisor_distance_3d(
-                            upper_c,
-                            lower_c,
-                            upper_depth_raw,
-                            lower_depth_raw,
-                            float(float_min),
-                            float(float_max),
-                            photo_w,
-                            photo_h,
+                if (
+                    upper_depth_raw is not None
+                    and lower_depth_raw is not None
+                    and float_min is not None
+                    and float_max is not None
+                ):
+                    result_3d = compute_incisor_distance_3d(
+                        upper_c,
+                        lower_c,
+                        upper_depth_raw,
+                        lower_depth_raw,
+                        float(float_min),
+                        float(float_max),
+                        photo_w,
+                        photo_h,
+                    )
+                    if result_3d is not None:
+                        distance_3d_mm, upper_distance_cm, lower_distance_cm = (
+                            result_3d
                         )
-                        if result_3d is not None:
-                            distance_3d_mm, upper_distance_cm, lower_distance_cm = (
-                                result_3d
-                            )
-
-                incisor_measurement = IncisorMeasurement(
-                    upper_centroid=upper_c,
-                    lower_centroid=lower_c,
-                    upper_depth_raw=upper_depth_raw,
-                    lower_depth_raw=lower_depth_raw,
-                    upper_distance_cm=upper_distance_cm,
-                    lower_distance_cm=lower_distance_cm,
-                    distance_3d_mm=distance_3d_mm,
-                    pixel_distance_y=pixel_dist_y,
-                )
 
-    # Process skin map: resize
-    if skin_image is not None:
-        skin_image = skin_image.resize(picture_image.size)
+            incisor_measurement = IncisorMeasurement(
+                upper_centroid=upper_c,
+                lower_centroid=lower_c,
+                upper_depth_raw=upper_depth_raw,
+                lower_depth_raw=lower_depth_raw,
+                upper_distance_cm=upper_distance_cm,
+                lower_distance_cm=lower_distance_cm,
+                distance_3d_mm=distance_3d_mm,
+                pixel_distance_y=pixel_dist_y,
+            )
+
+    return teeth_bbox, incisor_distance, incisor_distance_3d_mm, incisor_measurement
+
+
+@_traced("load_image")
+def load_image(fileName: str, use_exif=True) -> Union[IOSPortrait, None]:
+    """Load HEIC/HEIF with depth data, return an IOSPortrait instance."""
+    _check_extension(fileName)
+    return _load_portrait(fileName, use_exif)
+
+
+def _check_extension(fileName: str) -> None:
+    if not (fileName.lower().endswith("heic") or fileName.lower().endswith("heif")):
+        raise UnknownExtension(
+            "only supported extensions for filenames are: HEIF, HEIC"
+        )
+
+
+def _load_portrait(fileName: str, use_exif=True, heif_container=None):
+    """:func:`load_image`, optionally on an already open ``pyheif`` container.
+
+    pyheif images keep their planes once decoded, so a caller that opened
+    the container itself (the CLI inspector) shares both the container and
+    any planes it decoded with this call.
+    """
+    with stage("decode"):
+        if heif_container is None:
+            with open(fileName, "rb") as f:
+                heif_container = pyheif.open_container(f)
+
+        primary_image = heif_container.primary_image
+        _validate_exif(primary_image, use_exif)
+
+        if primary_image.depth_image is None:
+            raise NoDepthMapFound(f"{fileName} has no depth data")
+
+        # Extract auxiliary semantic maps
+        teeth_raw = skin_raw = hair_raw = None
+        for aux in primary_image.auxiliary_images:
+            aux_type = getattr(aux, "type", "")
+            if aux_type == "urn:com:apple:photo:2019:aux:semanticteethmatte":
+                teeth_raw = aux.image
+            elif aux_type == "urn:com:apple:photo:2019:aux:semanticskinmatte":
+                skin_raw = aux.image
+            elif aux_type == "urn:com:apple:photo:2019:aux:semantichairmatte":
+                hair_raw = aux.image
+
+        # Decode depth map
+        depth_loaded = primary_image.depth_image.image.load()
+        float_min, float_max = _parse_depth_metadata(depth_loaded)
+        depth_image = Image.frombytes(
+            depth_loaded.mode, depth_loaded.size, depth_loaded.data
+        )
+
+        # Decode primary picture
+        picture_image = _decode_picture(primary_image.image.load())
+
+        # Decode semantic maps
+        teeth_image = _decode_semantic_map(teeth_raw) if teeth_raw else None
+        skin_image = _decode_semantic_map(skin_raw) if skin_raw else None
+        hair_image = _decode_semantic_map(hair_raw) if hair_raw else None
+
+    # Process teeth map: resize and analyze
+    teeth_bbox = None
+    incisor_distance = None
+    incisor_distance_3d_mm = None
+    incisor_measurement = None
+    if teeth_image is not None:
+        with stage("matte_resize"):
+            teeth_image = teeth_image.resize(picture_image.size)
+        (
+            teeth_bbox,
+            incisor_distance,
+            incisor_distance_3d_mm,
+            incisor_measurement,
+        ) = _analyse_teethmap(
+            teeth_image, depth_image, float_min, float_max, picture_image.size
+        )
+
+    with stage("matte_resize"):
+        # Process skin map: resize
+        if skin_image is not None:
+            skin_image = skin_image.resize(picture_image.size)
 
-    # Process hair map: resize
-    if hair_image is not None:
-        hair_image = hair_image.resize(picture_image.size)
+        # Process hair map: resize
+        if hair_image is not None:
+            hair_image = hair_image.resize(picture_image.size)
 
     return IOSPortrait(
         photo=picture_image,
@@ -0,0 +1,117 @@
+"""Array-backed landmark containers.
+
+MediaPipe returns landmarks as lists of Python objects; converting every one
+of them to an ``(x, y)`` tuple allocates thousands of small objects per
+detection and forces landmark math into Python loops. :class:`Landmarks`
+stores them as read-only NumPy arrays instead:
+
+- ``xy``: ``(N, 2)`` float32 photo-space pixel coordinates,
+- ``z``: ``(N,)`` float32 relative depth, when the model provides it,
+- ``visibility``: ``(N,)`` float32, for PoseLandmarker output.
+
+It still behaves like the tuple of ``(x, y)`` tuples it replaces —
+``landmarks[152]`` is an ``(x, y)`` tuple of floats, ``len()`` and
+iteration work, and comparing with a tuple of tuples compares coordinates —
+while ``np.asarray(landmarks)`` returns ``xy`` without copying.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+
+
+def _read_only(values, shape) -> np.ndarray:
+    array = np.array(values, dtype=np.float32).reshape(shape)
+    array.flags.writeable = False
+    return array
+
+
+class Landmarks(Sequence):
+    """Read-only ``(N, 2)`` landmark coordinates with optional z/visibility."""
+
+    __slots__ = ("xy", "z", "visibility")
+
+    def __init__(self, xy, z=None, visibility=None):
+        xy = _read_only(xy, (-1, 2))
+        n = len(xy)
+        object.__setattr__(self, "xy", xy)
+        object.__setattr__(self, "z", None if z is None else _read_only(z, (n,)))
+        object.__setattr__(
+            self,
+            "visibility",
+            None if visibility is None else _read_only(visibility, (n,)),
+        )
+
+    @classmethod
+    def from_normalized(
+        cls,
+        landmarks,
+        width: float,
+        height: float,
+        offset: tuple[float, float] = (0.0, 0.0),
+    ) -> Landmarks:
+        """Scale MediaPipe normalised landmarks to pixels.
+
+        A landmark at ``(x, y)`` maps to ``offset + (x * width, y * height)``;
+        ``z`` and ``visibility`` are kept when the landmarks carry them.
+        """
+        landmarks = list(landmarks)
+        raw = np.array([(lm.x, lm.y) for lm in landmarks], dtype=np.float64)
+        raw = raw.reshape(-1, 2)
+        xy = raw * (width, height) + offset
+
+        z = visibility = None
+        if landmarks:
+            first = landmarks[0]
+            if getattr(first, "z", None) is not None:
+                z = [lm.z for lm in landmarks]
+            if getattr(first, "visibility", None) is not None:
+                visibility = [lm.visibility for lm in landmarks]
+        return cls(xy, z=z, visibility=visibility)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Landmarks is read-only")
+
+    def __len__(self) -> int:
+        return len(self.xy)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Landmarks(
+                self.xy[index],
+                z=None if self.z is None else self.z[index],
+                visibility=None if self.visibility is None else self.visibility[index],
+            )
+        x, y = self.xy[index]
+        return float(x), float(y)
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == self.xy.dtype:
+            return self.xy.copy() if copy else self.xy
+        return self.xy.astype(dtype)
+
+    def tolist(self) -> list[tuple[float, float]]:
+        """Coordinates as a list of ``(x, y)`` float tuples."""
+        return [(x, y) for x, y in self.xy.tolist()]
+
+    def __eq__(self, other):
+        if isinstance(other, Landmarks):
+            return np.array_equal(self.xy, other.xy)
+        if isinstance(other, (tuple, list)):
+            try:
+                other_xy = np.asarray(other, dtype=np.float32).reshape(-1, 2)
+            except (TypeError, ValueError):
+                return False
+            return np.array_equal(self.xy, other_xy)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.xy.tobytes())
+
+    def __repr__(self):
+        return f"Landmarks(n={len(self)})"
@@ -0,0 +1,290 @@
+"""Verified, concurrency-safe store of the MediaPipe model files.
+
+Every detector loads a ``.task`` / ``.tflite`` model from a shared cache
+directory, downloading it on first use. :func:`fetch_model` makes that
+safe when many processes start at once and checks what it hands out:
+
+- a per-model lock file serialises downloads, so one process fetches a
+  model while the others wait for it instead of racing on a shared
+  temporary file; downloads go to a unique temporary file and are moved
+  into place atomically,
+- the SHA-256 of every download is recorded next to the model
+  (``<model>.sha256``) — and checked against a pinned digest when the model
+  has one — and the file is re-verified, once per process, before use; a
+  corrupt or truncated file is downloaded again.
+
+The directory is ``$PORTRAIT_ANALYSER_MODEL_DIR`` when set, else
+``$XDG_CACHE_HOME/portrait-analyser`` (``~/.cache/portrait-analyser``).
+Deployments fetch everything up front with :func:`preload_models` or
+``analyse-portrait models fetch`` and may then set
+``PORTRAIT_ANALYSER_OFFLINE=1``: workers then never touch the network and
+a missing model raises :class:`~portrait_analyser.exceptions.ModelNotAvailable`
+instead of blocking the first image on a download.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Iterable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from .exceptions import ModelChecksumMismatch, ModelNotAvailable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR_ENV = "PORTRAIT_ANALYSER_MODEL_DIR"
+OFFLINE_ENV = "PORTRAIT_ANALYSER_OFFLINE"
+
+# Files verified by this process, by (path, size, mtime): re-hashing the
+# heavy pose model on every detector creation would cost ~0.1 s.
+_verified: set[tuple[str, int, int]] = set()
+_verified_lock = threading.Lock()
+
+# Pinned SHA-256 of the upstream model files, by file name. A pin is the
+# digest recorded in ``<model>.sha256`` after fetching the file from its
+# versioned upstream URL; files without one are trusted on first download.
+_PINNED_SHA256: dict[str, str] = {}
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """A downloadable model file."""
+
+    name: str
+    url: str
+    filename: str
+    # Expected SHA-256; None trusts the first complete download.
+    sha256: str | None = None
+
+
+def available_models() -> dict[str, ModelSpec]:
+    """Every model the library may load, by name."""
+    from .extended_neck import _SELFIE_SEGMENTER_FILENAME, _SELFIE_SEGMENTER_URL
+    from .face import _FACE_MODEL_FILENAME, _FACE_MODEL_URL
+    from .pose import (
+        _FACE_MESH_MODEL_FILENAME,
+        _FACE_MESH_MODEL_URL,
+        _MODEL_FILENAME_TEMPLATE,
+        _MODEL_URL_TEMPLATE,
+        PoseModelVariant,
+    )
+
+    models = [
+        ("face_detector", _FACE_MODEL_URL, _FACE_MODEL_FILENAME),
+        ("face_landmarker", _FACE_MESH_MODEL_URL, _FACE_MESH_MODEL_FILENAME),
+        *(
+            (
+                f"pose_landmarker_{variant.value}",
+                _MODEL_URL_TEMPLATE.format(variant=variant.value),
+                _MODEL_FILENAME_TEMPLATE.format(variant=variant.value),
+            )
+            for variant in PoseModelVariant
+        ),
+        ("selfie_segmenter", _SELFIE_SEGMENTER_URL, _SELFIE_SEGMENTER_FILENAME),
+    ]
+    return {
+        name: ModelSpec(name, url, filename, _PINNED_SHA256.get(filename))
+        for name, url, filename in models
+    }
+
+
+def model_directory() -> Path:
+    """Directory holding the model files (see the module docstring)."""
+    configured = os.environ.get(MODEL_DIR_ENV)
+    if configured:
+        return Path(configured).expanduser()
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home).expanduser() / "portrait-analyser"
+
+
+def _offline() -> bool:
+    return os.environ.get(OFFLINE_ENV, "").lower() in {"1", "true", "yes"}
+
+
+def _file_sha256(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _checksum_path(path: Path) -> Path:
+    return path.with_name(path.name + ".sha256")
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _is_verified(path: Path, sha256: str | None) -> bool:
+    """Whether *path* exists and matches its pinned or recorded digest.
+
+    A model without a recorded digest, e.g. fetched by an older release, is
+    adopted: its digest is recorded now.
+    """
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return False
+    signature = (str(path), st.st_size, st.st_mtime_ns)
+    with _verified_lock:
+        if signature in _verified:
+            return True
+
+    expected = sha256
+    if expected is None:
+        try:
+            expected = _checksum_path(path).read_text().split()[0]
+        except (FileNotFoundError, IndexError):
+            expected = None
+    actual = _file_sha256(path)
+    if expected is None:
+        _write_atomically(_checksum_path(path), f"{actual}  {path.name}\n".encode())
+    elif actual != expected:
+        logger.warning("%s does not match its SHA-256; fetching it again", path)
+        return False
+    with _verified_lock:
+        _verified.add(signature)
+    return True
+
+
+@contextmanager
+def _locked(path: Path):
+    """Exclusive inter-process lock held on the file *path*."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            return
+        # msvcrt.locking() gives up after ten seconds; keep waiting.
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                time.sleep(0.1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _download(url: str, path: Path, sha256: str | None) -> None:
+    import urllib.request
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".")
+    try:
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as f, urllib.request.urlopen(url) as response:
+            for block in iter(lambda: response.read(1 << 20), b""):
+                digest.update(block)
+                f.write(block)
+        actual = digest.hexdigest()
+        if sha256 is not None and actual != sha256:
+            raise ModelChecksumMismatch(
+                f"{url} has SHA-256 {actual}, expected {sha256}"
+            )
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    _write_atomically(_checksum_path(path), f"{actual}  {path.name}\n".encode())
+
+
+def fetch_model(
+    url: str,
+    filename: str,
+    sha256: str | None = None,
+    directory: str | os.PathLike | None = None,
+) -> Path:
+    """Path of the verified model *filename*, downloading it if needed.
+
+    Args:
+        url: Where to download the model from.
+        filename: File name inside the model directory.
+        sha256: Pinned digest the file must have; defaults to the digest
+            pinned for *filename*, if any.
+        directory: Model directory; defaults to :func:`model_directory`.
+
+    Raises:
+        ModelNotAvailable: The model is missing or corrupt and downloads
+            are disabled with ``PORTRAIT_ANALYSER_OFFLINE``.
+        ModelChecksumMismatch: The downloaded file does not match *sha256*.
+    """
+    if sha256 is None:
+        sha256 = _PINNED_SHA256.get(filename)
+    directory = model_directory() if directory is None else Path(directory)
+    path = directory / filename
+    if _is_verified(path, sha256):
+        return path
+
+    if _offline():
+        raise ModelNotAvailable(
+            f"{path} is missing or corrupt and {OFFLINE_ENV} is set; "
+            "run 'analyse-portrait models fetch' first"
+        )
+    directory.mkdir(parents=True, exist_ok=True)
+    with _locked(path.with_name(path.name + ".lock")):
+        # Another process may have fetched it while we waited for the lock.
+        if not _is_verified(path, sha256):
+            logger.info("Downloading %s to %s", url, path)
+            _download(url, path, sha256)
+    return path
+
+
+def preload_models(
+    names: Iterable[str] | None = None,
+    directory: str | os.PathLike | None = None,
+) -> dict[str, Path]:
+    """Download and verify models ahead of time.
+
+    Call it (or ``analyse-portrait models fetch``) before starting worker
+    processes so none of them waits on a download for its first image.
+
+    Args:
+        names: Model names from :func:`available_models`; default all.
+        directory: Model directory; defaults to :func:`model_directory`.
+
+    Returns:
+        The verified path of every requested model, by name.
+    """
+    specs = available_models()
+    names = list(specs) if names is None else list(names)
+    unknown = [name for name in names if name not in specs]
+    if unknown:
+        raise ValueError(
+            f"Unknown model(s) {', '.join(unknown)}; "
+            f"expected some of {', '.join(specs)}"
+        )
+    return {
+        name: fetch_model(
+            specs[name].url, specs[name].filename, specs[name].sha256, directory
+        )
+        for name in names
+    }
@@ -14,6 +14,7 @@ from dataclasses import dataclass
 
 from .face import sample_depth_at_point
 from .incisor import compute_incisor_distance_3d
+from .instrumentation import _traced
 
 
 @dataclass
@@ -34,6 +35,7 @@ _UPPER_LIP_OUTER = 0
 _LOWER_LIP_OUTER = 17
 
 
+@_traced("compute_mouth_measurement_from_facemesh")
 def compute_mouth_measurement_from_facemesh(
     landmarks,
     depthmap,
@@ -44,7 +46,7 @@ def compute_mouth_measurement_from_facemesh(
 ):
     """Compute mouth opening from FaceMesh landmarks using depth map.
 
-    :param landmarks: tuple of 478 (x, y) in photo-space pixels (FaceMeshDebug.landmarks)
+    :param landmarks: 478 (x, y) in photo-space pixels (FaceMeshDebug.landmarks)
     :param depthmap: PIL Image depth map
     :param photo_w: photo width in pixels
     :param photo_h: photo height in pixels
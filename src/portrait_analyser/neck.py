@@ -8,6 +8,8 @@ so that a GUI can paint the sampled arc.
 
 import math
 from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING
 
 import numpy as np
 from PIL import Image, ImageDraw, ImageFilter
@@ -15,6 +17,11 @@ from PIL import Image, ImageDraw, ImageFilter
 from .depth_sampling import median_filter_depthmap, sample_filtered_depth
 from .face import find_neck_measurement_point, sample_depth_at_point
 from .incisor import depth_raw_to_distance_cm, pixel_to_mm, vector_length_3d
+from .instrumentation import _traced, stage
+from .landmarks import Landmarks
+
+if TYPE_CHECKING:
+    from .pose import FaceMeshDebug, NeckMidpoint
 
 
 def _ellipse_circumference(a: float, b: float) -> float:
@@ -70,7 +77,7 @@ def neck_search_bounds_from_face_landmarks(
     chin: tuple[float, float],
     nose: tuple[float, float],
     image_height: int,
-    face_mesh_landmarks: tuple[tuple[float, float], ...] | None = None,
+    face_mesh_landmarks: Landmarks | tuple[tuple[float, float], ...] | None = None,
     pose_neck_y: float | None = None,
 ) -> tuple[int, int]:
     """Bound neck search to the anatomical band immediately below the face.
@@ -84,9 +91,9 @@ def neck_search_bounds_from_face_landmarks(
         raise ValueError("image_height must be at least 2")
 
     if face_mesh_landmarks:
-        landmark_ys = [point[1] for point in face_mesh_landmarks]
-        face_top = min(landmark_ys)
-        face_bottom = max(chin[1], max(landmark_ys))
+        landmark_ys = np.asarray(face_mesh_landmarks, dtype=np.float64)[:, 1]
+        face_top = float(landmark_ys.min())
+        face_bottom = max(chin[1], float(landmark_ys.max()))
         face_height = max(20.0, face_bottom - face_top)
     else:
         face_bottom = chin[1]
@@ -106,6 +113,48 @@ def neck_search_bounds_from_face_landmarks(
     return start, end
 
 
+def neck_search_kwargs_from_detection(
+    neck_midpoint: "NeckMidpoint | None",
+    face_mesh: "FaceMeshDebug | None",
+    image_height: int,
+) -> dict:
+    """:func:`compute_neck_circumference` keyword arguments from a detection.
+
+    Takes the ``(neck_midpoint, _, face_mesh)`` result of
+    :func:`~portrait_analyser.pose.detect_neck_midpoint` and returns the
+    search band of :func:`neck_search_bounds_from_face_landmarks`, the neck
+    midpoint row as arc centre and, with FaceMesh landmarks, the face box.
+    Without a neck midpoint it returns ``{}``: the search falls back to the
+    face estimated from the skin matte.
+    """
+    if neck_midpoint is None:
+        return {}
+    landmarks = face_mesh.landmarks if face_mesh is not None else None
+    scan_start_y, scan_end_y = neck_search_bounds_from_face_landmarks(
+        chin=neck_midpoint.chin,
+        nose=neck_midpoint.nose,
+        image_height=image_height,
+        face_mesh_landmarks=landmarks,
+        pose_neck_y=neck_midpoint.y,
+    )
+    kwargs = dict(
+        scan_start_y=scan_start_y,
+        scan_end_y=scan_end_y,
+        neck_midpoint_y=neck_midpoint.y,
+    )
+    if landmarks:
+        kwargs["face_location"] = _landmark_bounding_box(landmarks)
+    return kwargs
+
+
+def _landmark_bounding_box(landmarks) -> tuple[int, int, int, int]:
+    """``(x, y, w, h)`` of the landmarks, in whole pixels."""
+    xs = [x for x, _ in landmarks]
+    ys = [y for _, y in landmarks]
+    left, top = round(min(xs)), round(min(ys))
+    return left, top, round(max(xs)) - left, round(max(ys)) - top
+
+
 def _prepare_neck_skinmap(
     skinmap: Image.Image,
     skin_threshold: int,
@@ -403,6 +452,84 @@ def _find_best_sag(
     return best_sag
 
 
+def _median_depth_grid(depthmap) -> np.ndarray:
+    """:func:`sample_depth_at_point` (3x3 kernel) at every depth-map pixel.
+
+    Border pixels take the median of their in-bounds neighbours only, as
+    the per-point sampler does.
+    """
+    depth = np.asarray(depthmap)
+    if depth.ndim == 3:
+        depth = depth[..., 0]
+    height, width = depth.shape
+    padded = np.pad(depth.astype(np.float64), 1, constant_values=np.nan)
+    windows = np.sort(
+        np.stack(
+            [
+                padded[dy : dy + height, dx : dx + width]
+                for dy in range(3)
+                for dx in range(3)
+            ]
+        ),
+        axis=0,
+    )
+    # NaN sorts last, so the valid values of each window come first.
+    counts = np.count_nonzero(~np.isnan(windows), axis=0)
+    return np.take_along_axis(windows, (counts // 2)[np.newaxis], axis=0)[0]
+
+
+def _find_best_sag_on_grid(
+    depth_grid,
+    sample_xs,
+    neck_y,
+    x_left,
+    x_right,
+    photo_width,
+    photo_height,
+    max_sag_photo=300,
+    sag_step=5,
+) -> int:
+    """:func:`_find_best_sag` over a :func:`_median_depth_grid`.
+
+    Evaluates every candidate sag at once instead of sampling the depth map
+    point by point; the result is identical.
+    """
+    span = x_right - x_left
+    if span <= 0 or not sample_xs:
+        return 0
+    depth_height, depth_width = depth_grid.shape
+    sags = np.arange(0, max_sag_photo + 1, sag_step)
+    # math.sin, not np.sin, so the rounded offsets match the scalar sweep.
+    sines = np.array([math.sin(math.pi * ((sx - x_left) / span)) for sx in sample_xs])
+    xs = np.broadcast_to(np.asarray(sample_xs), (len(sags), len(sample_xs)))
+    ys = neck_y + np.round(sags[:, np.newaxis] * sines).astype(np.int64)
+
+    inside = (xs >= 0) & (xs <= photo_width - 1) & (ys >= 0) & (ys <= photo_height - 1)
+    depth_xs = (
+        np.zeros_like(xs)
+        if photo_width == 1
+        else np.round(xs * (depth_width - 1) / (photo_width - 1)).astype(np.int64)
+    )
+    depth_ys = (
+        np.zeros_like(ys)
+        if photo_height == 1
+        else np.round(ys * (depth_height - 1) / (photo_height - 1)).astype(np.int64)
+    )
+    raw = depth_grid[
+        np.clip(depth_ys, 0, depth_height - 1), np.clip(depth_xs, 0, depth_width - 1)
+    ]
+    valid = inside & (raw > 0)
+
+    usable = np.count_nonzero(valid, axis=1) >= 2
+    if not usable.any():
+        return 0
+    amplitudes = np.where(valid, raw, -np.inf).max(axis=1) - np.where(
+        valid, raw, np.inf
+    ).min(axis=1)
+    return int(sags[usable][np.argmin(amplitudes[usable])])
+
+
+@_traced("compute_neck_circumference")
 def compute_neck_circumference(
     skinmap,  # PIL Image "L" — skin segmentation, same size as photo
     depthmap,  # PIL Image — depth map (different resolution)
@@ -423,6 +550,7 @@ def compute_neck_circumference(
     neck_midpoint_y=None,  # float — MediaPipe neck midpoint Y for arc center
     hairmap=None,  # optional PIL hair matte, removed from the allowed neck surface
     hair_threshold=30,
+    sag_step=5,  # photo px between candidate sags in the auto-detect sweep
 ) -> NeckMeasurement | None:
     """Compute neck circumference by densely sampling the front arc.
 
@@ -436,14 +564,76 @@ def compute_neck_circumference(
     Returns NeckMeasurement with all data, or None if the neck cannot
     be located (e.g. no skin detected below the face).
     """
-    # Neutralise white borders that some skinmaps have — paint a
-    # 30-pixel black frame so border pixels are never mistaken for skin.
+    with stage("skin_preparation"):
+        skinmap = _prepare_bordered_skinmap(
+            skinmap, skin_threshold, hairmap, hair_threshold
+        )
+
+    # Auto-estimate face location from skin map when not provided
+    if face_location is None:
+        face_location = estimate_face_from_skinmap(skinmap, skin_threshold)
+        if face_location is None:
+            return None
+
+    neck_row = _find_neck_row(
+        skinmap,
+        face_location,
+        skin_threshold,
+        face,
+        eyes,
+        image_width,
+        scan_start_y,
+        scan_end_y,
+    )
+    if neck_row is None:
+        return None
+
+    filtered_depthmap = median_filter_depthmap(depthmap, size=3)
+    edges = _find_neck_edges(
+        skinmap,
+        filtered_depthmap,
+        neck_row,
+        neck_midpoint_y,
+        photo_width,
+        photo_height,
+    )
+    if edges is None:
+        return None
+
+    sample_xs = _sample_xs(edges, n_samples)
+    amplitude = _arc_amplitude(
+        edges, sample_xs, depthmap, arc_sag, sag_step, photo_width, photo_height
+    )
+    arc = _integrate_arc(
+        filtered_depthmap,
+        edges,
+        sample_xs,
+        amplitude,
+        photo_width,
+        photo_height,
+        float_min,
+        float_max,
+    )
+    if arc is None:
+        return None
+    return _neck_measurement(edges, arc, circumference_multiplier)
+
+
+def _prepare_bordered_skinmap(
+    skinmap: Image.Image,
+    skin_threshold: int,
+    hairmap: Image.Image | None,
+    hair_threshold: int,
+) -> Image.Image:
+    """:func:`_prepare_neck_skinmap` with a blanked 30-pixel frame."""
     skinmap = _prepare_neck_skinmap(
         skinmap,
         skin_threshold,
         hairmap=hairmap,
         hair_threshold=hair_threshold,
     )
+    # Neutralise white borders that some skinmaps have — paint a
+    # 30-pixel black frame so border pixels are never mistaken for skin.
     draw = ImageDraw.Draw(skinmap)
     border = 30
     w, h = skinmap.size
@@ -451,18 +641,24 @@ def compute_neck_circumference(
     draw.rectangle([0, h - border, w - 1, h - 1], fill=0)  # bottom
     draw.rectangle([0, 0, border - 1, h - 1], fill=0)  # left
     draw.rectangle([w - border, 0, w - 1, h - 1], fill=0)  # right
-
-    # Auto-estimate face location from skin map when not provided
-    if face_location is None:
-        face_location = estimate_face_from_skinmap(skinmap, skin_threshold)
-        if face_location is None:
-            return None
-
+    return skinmap
+
+
+def _find_neck_row(
+    skinmap,
+    face_location,
+    skin_threshold,
+    face,
+    eyes,
+    image_width,
+    scan_start_y,
+    scan_end_y,
+) -> tuple[int, int, int] | None:
+    """Skin edges ``(x_left, y, x_right)`` of the narrowest neck row."""
     # Auto-detect Face object passed as face_location (common in fidmaa-gui)
     if face is None and hasattr(face_location, "eyes"):
         face = face_location
 
-    # Step 1: Find the narrowest neck row.
     # find_neck_measurement_point returns (x_left, y, x_right, y) — the left
     # and right skin edges at the narrowest horizontal line below the face.
     try:
@@ -485,7 +681,31 @@ def compute_neck_circumference(
     # Sanity check: need at least a few pixels of skin width
     if x_right <= x_left:
         return None
+    return x_left, neck_y, x_right
+
 
+@dataclass(frozen=True)
+class _NeckEdges:
+    """Measurement row and depth-stable sampling edges of the neck arc."""
+
+    neck_y: int
+    # Sag down to the MediaPipe neck midpoint; None = from arc_sag / sweep.
+    amplitude: int | None
+    mask_left_x: int
+    mask_right_x: int
+    left_x: int
+    right_x: int
+
+
+def _find_neck_edges(
+    skinmap,
+    filtered_depthmap,
+    neck_row,
+    neck_midpoint_y,
+    photo_width,
+    photo_height,
+) -> _NeckEdges | None:
+    x_left, neck_y, x_right = neck_row
     initial_center_x = (x_left + x_right) / 2
     amplitude = None
     if neck_midpoint_y is not None:
@@ -513,10 +733,10 @@ def compute_neck_circumference(
     if neck_width <= 0:
         return None
 
-    # Median-filter once, then walk inward from both segmentation edges until
-    # the depth profile settles. This replaces the fixed 5% inset, which can
-    # stop either inside a broad silhouette wall or unnecessarily far inward.
-    filtered_depthmap = median_filter_depthmap(depthmap, size=3)
+    # Walk inward from both segmentation edges of the median-filtered depth
+    # map until the depth profile settles. This replaces the fixed 5% inset,
+    # which can stop either inside a broad silhouette wall or unnecessarily
+    # far inward.
     max_edge_search = max(6, round(neck_width * 0.12))
     stable_left = _find_stable_depth_x_from_edge(
         filtered_depthmap,
@@ -545,93 +765,133 @@ def compute_neck_circumference(
     x_right = stable_right if stable_right is not None else x_right - fallback_inset
     if x_right <= x_left:
         return None
+    return _NeckEdges(neck_y, amplitude, mask_left_x, mask_right_x, x_left, x_right)
 
-    # Step 2: Generate n_samples evenly-spaced x-coordinates from x_left to x_right.
-    step = (x_right - x_left) / max(n_samples - 1, 1)
-    sample_xs = [round(x_left + i * step) for i in range(n_samples)]
-
-    if amplitude is None:
-        if arc_sag is None:
-            amplitude = (
-                _find_best_sag(
-                    depthmap,
-                    sample_xs,
-                    neck_y,
-                    x_left,
-                    x_right,
-                    photo_width,
-                    photo_height,
-                )
-                // 2
-            )
-        else:
-            # Manual arc_sag is in depth-map pixels; scale to photo resolution.
-            amplitude = arc_sag * photo_height / depthmap.size[1]
-
-    # Step 3: For each sample point, compute Y via half-sine arc,
-    # read depth and convert to 3D coordinates.
-    #
-    # Depth is read from the same-size median-filtered copy of the depth map,
-    # bilinearly sampled at the (fractional) native-resolution coordinate.
-    # This smooths TrueDepth sensor noise before it can accumulate across
-    # the many points walked along the arc -- the same fix applied to
-    # fidmaa-gui's surface_vector_filtered() for straight-line measurements.
-    arc_points_3d = []
-    arc_points_photo = []
 
-    for sx in sample_xs:
-        # Half-sine arc: edges at neck_y, center dips by amplitude
-        t = (sx - x_left) / (x_right - x_left)
-        sample_y = neck_y + round(amplitude * math.sin(math.pi * t))
-
-        raw_depth = sample_filtered_depth(
-            filtered_depthmap,
-            sx,
-            sample_y,
+def _sample_xs(edges: _NeckEdges, n_samples: int) -> list[int]:
+    """*n_samples* evenly spaced x-coordinates from the left to the right edge."""
+    step = (edges.right_x - edges.left_x) / max(n_samples - 1, 1)
+    return [round(edges.left_x + i * step) for i in range(n_samples)]
+
+
+def _arc_amplitude(
+    edges,
+    sample_xs,
+    depthmap,
+    arc_sag,
+    sag_step,
+    photo_width,
+    photo_height,
+    depth_grid=None,
+):
+    """Sag of the arc centre below ``edges.neck_y``, in photo pixels.
+
+    With a *depth_grid* from :func:`_median_depth_grid` the automatic sag
+    sweep runs vectorised over it.
+    """
+    if edges.amplitude is not None:
+        return edges.amplitude
+    if arc_sag is not None:
+        # Manual arc_sag is in depth-map pixels; scale to photo resolution.
+        return arc_sag * photo_height / depthmap.size[1]
+    if depth_grid is not None:
+        find_best_sag = partial(_find_best_sag_on_grid, depth_grid)
+    else:
+        find_best_sag = partial(_find_best_sag, depthmap)
+    return (
+        find_best_sag(
+            sample_xs,
+            edges.neck_y,
+            edges.left_x,
+            edges.right_x,
             photo_width,
             photo_height,
+            sag_step=sag_step,
         )
-        if raw_depth is None:
-            # Skip points where depth data is missing or zero (invalid disparity)
-            continue
+        // 2
+    )
 
-        # Convert raw depth pixel value to physical distance in cm
-        z_cm = depth_raw_to_distance_cm(raw_depth, float_min, float_max)
-        if z_cm is None:
-            continue
 
-        # Convert pixel coordinates to physical mm at this depth
-        x_mm = pixel_to_mm(sx, z_cm, photo_width)
-        y_mm = pixel_to_mm(sample_y, z_cm, photo_height)
-        if x_mm is None or y_mm is None:
-            continue
+def _integrate_arc(
+    filtered_depthmap,
+    edges,
+    sample_xs,
+    amplitude,
+    photo_width,
+    photo_height,
+    float_min,
+    float_max,
+):
+    """3D and photo points of the arc and its length, or None.
 
-        # Z in mm for consistent units
-        z_mm = z_cm * 10.0
+    Depth is read from the same-size median-filtered copy of the depth map,
+    bilinearly sampled at the (fractional) native-resolution coordinate.
+    This smooths TrueDepth sensor noise before it can accumulate across
+    the many points walked along the arc -- the same fix applied to
+    fidmaa-gui's surface_vector_filtered() for straight-line measurements.
+    """
+    neck_y, x_left, x_right = edges.neck_y, edges.left_x, edges.right_x
+    with stage("arc_integration"):
+        arc_points_3d = []
+        arc_points_photo = []
 
-        arc_points_3d.append((x_mm, y_mm, z_mm))
-        arc_points_photo.append((sx, sample_y))
+        for sx in sample_xs:
+            # Half-sine arc: edges at neck_y, center dips by amplitude
+            t = (sx - x_left) / (x_right - x_left)
+            sample_y = neck_y + round(amplitude * math.sin(math.pi * t))
 
-    # Need at least 2 points to compute any arc length
-    if len(arc_points_3d) < 2:
-        return None
+            raw_depth = sample_filtered_depth(
+                filtered_depthmap,
+                sx,
+                sample_y,
+                photo_width,
+                photo_height,
+            )
+            if raw_depth is None:
+                # Skip points where depth data is missing or zero (invalid disparity)
+                continue
+
+            # Convert raw depth pixel value to physical distance in cm
+            z_cm = depth_raw_to_distance_cm(raw_depth, float_min, float_max)
+            if z_cm is None:
+                continue
+
+            # Convert pixel coordinates to physical mm at this depth
+            x_mm = pixel_to_mm(sx, z_cm, photo_width)
+            y_mm = pixel_to_mm(sample_y, z_cm, photo_height)
+            if x_mm is None or y_mm is None:
+                continue
+
+            # Z in mm for consistent units
+            z_mm = z_cm * 10.0
+
+            arc_points_3d.append((x_mm, y_mm, z_mm))
+            arc_points_photo.append((sx, sample_y))
+
+        # Need at least 2 points to compute any arc length
+        if len(arc_points_3d) < 2:
+            return None
+
+        # Sum Euclidean distances between consecutive 3D points.
+        # This gives the front arc length across the visible neck surface.
+        front_arc_length_mm = 0.0
+        for i in range(1, len(arc_points_3d)):
+            p0 = arc_points_3d[i - 1]
+            p1 = arc_points_3d[i]
+            front_arc_length_mm += vector_length_3d(
+                p0[0],
+                p0[1],
+                p0[2],
+                p1[0],
+                p1[1],
+                p1[2],
+            )
+    return arc_points_3d, arc_points_photo, front_arc_length_mm
 
-    # Step 4: Sum Euclidean distances between consecutive 3D points.
-    # This gives the front arc length across the visible neck surface.
-    front_arc_length_mm = 0.0
-    for i in range(1, len(arc_points_3d)):
-        p0 = arc_points_3d[i - 1]
-        p1 = arc_points_3d[i]
-        front_arc_length_mm += vector_length_3d(
-            p0[0],
-            p0[1],
-            p0[2],
-            p1[0],
-            p1[1],
-            p1[2],
-        )
 
-    # Step 5: Estimate full circumference via empirical multiplier.
+def _neck_measurement(edges, arc, circumference_multiplier) -> NeckMeasurement:
+    arc_points_3d, arc_points_photo, front_arc_length_mm = arc
+    # Estimate full circumference via empirical multiplier.
     # front_arc_mm * 3.0 ≈ circumference_mm (i.e. front_arc_mm * 0.3 = circumference_cm)
     circumference_mm = front_arc_length_mm * circumference_multiplier
     front_chord_length_mm = vector_length_3d(
@@ -640,15 +900,15 @@ def compute_neck_circumference(
     )
 
     return NeckMeasurement(
-        neck_y=neck_y,
-        left_x=x_left,
-        right_x=x_right,
+        neck_y=edges.neck_y,
+        left_x=edges.left_x,
+        right_x=edges.right_x,
         arc_points_3d=arc_points_3d,
         arc_points_photo=arc_points_photo,
         front_arc_length_mm=front_arc_length_mm,
         circumference_mm=circumference_mm,
         circumference_multiplier=circumference_multiplier,
-        mask_left_x=mask_left_x,
-        mask_right_x=mask_right_x,
+        mask_left_x=edges.mask_left_x,
+        mask_right_x=edges.mask_right_x,
         front_chord_length_mm=front_chord_length_mm,
     )
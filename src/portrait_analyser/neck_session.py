@@ -0,0 +1,304 @@
+"""Incremental neck re-measurement for interactive parameter tweaks.
+
+:func:`~portrait_analyser.neck.compute_neck_circumference` recomputes every
+intermediate on each call: the prepared skin matte, the auto-estimated face,
+the neck row, the median-filtered depth map, the stable arc edges, the sag
+sweep and the arc itself. When a user nudges one parameter and
+re-measures, most of that work is unchanged.
+
+:class:`NeckMeasurementSession` keeps those intermediates and records which
+parameters each one depends on. Changing a parameter recomputes only the
+stages downstream of it::
+
+    session = NeckMeasurementSession.from_portrait(portrait)
+    session.measure()                  # everything, once
+    session.measure(arc_sag=12)        # amplitude and arc only
+    session.measure(n_samples=41)      # sample points, amplitude and arc
+    session.measure(skin_threshold=60) # everything except the depth filter
+
+Each stage, upstream first, with the parameters it reads and the stages
+it is computed from (``face_location`` is estimated from the skin matte
+when no ``face_location`` parameter is given):
+
+- ``skinmap`` -- skin_threshold, hair_threshold
+- ``face_location`` -- face_location, skin_threshold; skinmap
+- ``filtered_depthmap`` -- computed once per session
+- ``neck_row`` -- face, eyes, image_width, scan_start_y, scan_end_y,
+  skin_threshold; skinmap, face_location
+- ``edges`` -- neck_midpoint_y; skinmap, filtered_depthmap, neck_row
+- ``sample_xs`` -- n_samples; edges
+- ``amplitude`` -- arc_sag, sag_step; edges, sample_xs
+- ``arc`` -- filtered_depthmap, edges, sample_xs, amplitude
+- ``measurement`` -- circumference_multiplier; edges, arc
+
+Results are identical to calling ``compute_neck_circumference()`` with the
+same arguments: both run the same step functions, except that the session
+runs the automatic sag sweep vectorised over a 3x3 median of the depth map,
+built on first use, instead of sampling the depth map point by point.
+
+A session holds no lock. Use one session from one thread, as with the
+other GUI state it belongs to.
+"""
+
+from __future__ import annotations
+
+import inspect
+from collections.abc import Mapping
+from typing import Any
+
+from .depth_sampling import median_filter_depthmap
+from .instrumentation import stage
+from .neck import (
+    NeckMeasurement,
+    _arc_amplitude,
+    _find_neck_edges,
+    _find_neck_row,
+    _integrate_arc,
+    _median_depth_grid,
+    _neck_measurement,
+    _prepare_bordered_skinmap,
+    _sample_xs,
+    compute_neck_circumference,
+    estimate_face_from_skinmap,
+)
+from .presets import AnalysisPreset, get_analysis_preset
+
+# Tunable compute_neck_circumference() keyword parameters and their defaults.
+_DEFAULTS = {
+    name: parameter.default
+    for name, parameter in inspect.signature(
+        compute_neck_circumference
+    ).parameters.items()
+    if parameter.default is not inspect.Parameter.empty and name != "hairmap"
+}
+
+# stage -> (parameters it reads, upstream stages it reads), upstream first.
+_STAGES = {
+    "skinmap": (("skin_threshold", "hair_threshold"), ()),
+    "face_location": (("face_location", "skin_threshold"), ("skinmap",)),
+    "filtered_depthmap": ((), ()),
+    "neck_row": (
+        (
+            "face",
+            "eyes",
+            "image_width",
+            "scan_start_y",
+            "scan_end_y",
+            "skin_threshold",
+        ),
+        ("skinmap", "face_location"),
+    ),
+    "edges": (("neck_midpoint_y",), ("skinmap", "filtered_depthmap", "neck_row")),
+    "sample_xs": (("n_samples",), ("edges",)),
+    "amplitude": (("arc_sag", "sag_step"), ("edges", "sample_xs")),
+    "arc": ((), ("filtered_depthmap", "edges", "sample_xs", "amplitude")),
+    "measurement": (("circumference_multiplier",), ("edges", "arc")),
+}
+
+
+def _unchanged(old, new) -> bool:
+    if old is new:
+        return True
+    try:
+        return bool(old == new)
+    except (TypeError, ValueError):
+        # e.g. an ambiguous numpy comparison: assume it changed.
+        return False
+
+
+class NeckMeasurementSession:
+    """Memoised ``compute_neck_circumference()`` for one portrait.
+
+    :param skinmap, depthmap, photo_width, photo_height, float_min, \
+float_max, hairmap: the inputs of
+        :func:`~portrait_analyser.neck.compute_neck_circumference`; they are
+        fixed for the lifetime of the session.
+    :param params: initial values of its tunable keyword parameters
+        (``n_samples``, ``skin_threshold``, ``arc_sag``, ``scan_start_y``,
+        ...). Parameters not given take the function's defaults.
+
+    After each :meth:`measure`, :attr:`recomputed` lists the stages that
+    had to run, upstream first.
+    """
+
+    def __init__(
+        self,
+        skinmap,
+        depthmap,
+        photo_width: int,
+        photo_height: int,
+        float_min: float,
+        float_max: float,
+        hairmap=None,
+        **params,
+    ) -> None:
+        self._skinmap = skinmap
+        self._depthmap = depthmap
+        self._photo_size = (photo_width, photo_height)
+        self._float_range = (float_min, float_max)
+        self._hairmap = hairmap
+        self._params = dict(_DEFAULTS)
+        self._check(params)
+        self._params.update(params)
+        self._cache: dict[str, Any] = {}
+        self._depth_grid = None
+        self.recomputed: tuple[str, ...] = ()
+
+    @classmethod
+    def from_portrait(
+        cls, portrait, preset: AnalysisPreset | str | None = None, **params
+    ) -> NeckMeasurementSession:
+        """Session over an :class:`~portrait_analyser.ios.IOSPortrait`.
+
+        *preset* (an :class:`~portrait_analyser.presets.AnalysisPreset` or
+        its name) supplies ``n_samples`` and ``sag_step``; explicit *params*
+        take precedence.
+        """
+        if preset is not None:
+            preset = get_analysis_preset(preset)
+            params = {**preset.neck_circumference_kwargs(), **params}
+        return cls(
+            portrait.skinmap,
+            portrait.depthmap,
+            *portrait.photo.size,
+            portrait.floatValueMin,
+            portrait.floatValueMax,
+            hairmap=portrait.hairmap,
+            **params,
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        """Current parameter values."""
+        return dict(self._params)
+
+    def update(self, **params) -> tuple[str, ...]:
+        """Change parameters; returns the stages this invalidated.
+
+        Setting a parameter to its current value invalidates nothing.
+        """
+        self._check(params)
+        changed = {
+            name
+            for name, value in params.items()
+            if not _unchanged(self._params[name], value)
+        }
+        self._params.update(params)
+
+        invalidated = []
+        for name, (reads, upstream) in _STAGES.items():
+            if changed.intersection(reads) or set(upstream).intersection(invalidated):
+                invalidated.append(name)
+                self._cache.pop(name, None)
+        return tuple(invalidated)
+
+    def invalidate(self) -> None:
+        """Drop every intermediate, e.g. after editing the maps in place."""
+        self._cache.clear()
+        self._depth_grid = None
+
+    def measure(self, **params) -> NeckMeasurement | None:
+        """Apply *params* (see :meth:`update`) and return the measurement.
+
+        Returns None when the neck cannot be located, as
+        ``compute_neck_circumference()`` does.
+        """
+        self.update(**params)
+        recomputed = []
+        for name, (_, upstream) in _STAGES.items():
+            if name in self._cache:
+                continue
+            inputs = [self._cache[dependency] for dependency in upstream]
+            if any(value is None for value in inputs):
+                value = None
+            else:
+                value = getattr(self, f"_compute_{name}")(*inputs)
+            self._cache[name] = value
+            recomputed.append(name)
+        self.recomputed = tuple(recomputed)
+        return self._cache["measurement"]
+
+    def _check(self, params: Mapping[str, Any]) -> None:
+        unknown = sorted(set(params) - set(_DEFAULTS))
+        if unknown:
+            raise TypeError(
+                f"unknown neck measurement parameter(s): {', '.join(unknown)}; "
+                f"expected one of {', '.join(_DEFAULTS)}"
+            )
+
+    def _compute_skinmap(self):
+        with stage("skin_preparation"):
+            return _prepare_bordered_skinmap(
+                self._skinmap,
+                self._params["skin_threshold"],
+                self._hairmap,
+                self._params["hair_threshold"],
+            )
+
+    def _compute_face_location(self, skinmap):
+        face_location = self._params["face_location"]
+        if face_location is None:
+            face_location = estimate_face_from_skinmap(
+                skinmap, self._params["skin_threshold"]
+            )
+        return face_location
+
+    def _compute_filtered_depthmap(self):
+        return median_filter_depthmap(self._depthmap, size=3)
+
+    def _compute_neck_row(self, skinmap, face_location):
+        p = self._params
+        return _find_neck_row(
+            skinmap,
+            face_location,
+            p["skin_threshold"],
+            p["face"],
+            p["eyes"],
+            p["image_width"],
+            p["scan_start_y"],
+            p["scan_end_y"],
+        )
+
+    def _compute_edges(self, skinmap, filtered_depthmap, neck_row):
+        return _find_neck_edges(
+            skinmap,
+            filtered_depthmap,
+            neck_row,
+            self._params["neck_midpoint_y"],
+            *self._photo_size,
+        )
+
+    def _compute_sample_xs(self, edges):
+        return _sample_xs(edges, self._params["n_samples"])
+
+    def _compute_amplitude(self, edges, sample_xs):
+        p = self._params
+        depth_grid = None
+        if edges.amplitude is None and p["arc_sag"] is None:
+            # The automatic sag sweep reruns on every n_samples or sag_step
+            # change; sample it from a median grid built once per session.
+            if self._depth_grid is None:
+                self._depth_grid = _median_depth_grid(self._depthmap)
+            depth_grid = self._depth_grid
+        return _arc_amplitude(
+            edges,
+            sample_xs,
+            self._depthmap,
+            p["arc_sag"],
+            p["sag_step"],
+            *self._photo_size,
+            depth_grid=depth_grid,
+        )
+
+    def _compute_arc(self, filtered_depthmap, edges, sample_xs, amplitude):
+        return _integrate_arc(
+            filtered_depthmap,
+            edges,
+            sample_xs,
+            amplitude,
+            *self._photo_size,
+            *self._float_range,
+        )
+
+    def _compute_measurement(self, edges, arc):
+        return _neck_measurement(edges, arc, self._params["circumference_multiplier"])
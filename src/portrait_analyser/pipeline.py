@@ -0,0 +1,460 @@
+"""One-call analysis of a portrait as a graph of shared stages.
+
+:func:`analyse_portrait` runs the requested measurements of an
+:class:`~portrait_analyser.ios.IOSPortrait` and returns them in one
+:class:`AnalysisReport`::
+
+    report = analyse_portrait(portrait, measurements=["incisor", "neck", "tmd"])
+    report.neck.circumference_mm, report.tmd_mm
+
+Measurements:
+
+- ``incisor`` -- the teeth matte measurement of
+  :func:`~portrait_analyser.ios.load_image`,
+- ``mouth`` -- :func:`~portrait_analyser.mouth.compute_mouth_measurement_from_facemesh`,
+  the fallback for patients without visible upper teeth,
+- ``neck_midpoint`` -- :func:`~portrait_analyser.pose.detect_neck_midpoint`
+  (Pose + FaceMesh),
+- ``segmentation_neck_midpoint`` and ``dual_mask_neck_midpoint`` -- the
+  silhouette and dual-mask detectors of :mod:`~portrait_analyser.extended_neck`,
+- ``neck_route`` -- the first of those three detectors that succeeds, in
+  the order of a :class:`~portrait_analyser.routing.NeckDetectorRouter`,
+  reusing the landmark and person-mask stages when other measurements
+  need them and running the detectors itself, on demand, otherwise,
+- ``neck`` -- :func:`~portrait_analyser.neck.compute_neck_circumference`,
+  searching below the FaceMesh face when one is found and below the face
+  estimated from the skin matte when the landmarks fail,
+- ``tmd`` -- :func:`~portrait_analyser.tmd.compute_tmd_3d` between the
+  detected chin and neck midpoint.
+
+Each measurement is a stage depending on intermediate stages — the
+analysis frame, the Pose/FaceMesh landmarks, the person mask — and only
+the stages the requested measurements need run, each exactly once: one
+landmark detection serves ``neck``, ``tmd`` and ``mouth``, one
+segmentation both mask-based neck detectors. Independent stages run
+concurrently on a thread pool, MediaPipe releasing the GIL during
+inference. A failing stage does not stop the others: its exception is
+reported and the stages depending on it are skipped.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import time
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from .extended_neck import (
+    _detect_from_dual_mask,
+    _detect_from_mask,
+    _get_segmentation_mask,
+)
+from .face import IncisorMeasurement, sample_depth_at_point
+from .instrumentation import _traced
+from .mouth import MouthMeasurement, compute_mouth_measurement_from_facemesh
+from .neck import (
+    NeckMeasurement,
+    compute_neck_circumference,
+    neck_search_kwargs_from_detection,
+)
+from .pose import NeckMidpoint, detect_neck_midpoint
+from .presets import AnalysisPreset, get_analysis_preset
+from .routing import _MISSING, NeckDetectorRouter, NeckRoute, route_neck_midpoint
+from .session import PortraitInferenceSession, _session_scope
+from .tmd import compute_tmd_3d
+
+if TYPE_CHECKING:
+    from .ios import IOSPortrait
+
+
+@dataclass(frozen=True)
+class AnalysisReport:
+    """Everything :func:`analyse_portrait` measured for one portrait.
+
+    Measurements that were not requested, found nothing or failed are None;
+    ``errors`` holds the exception of every failed stage and ``skipped``
+    the stages not run because one of their inputs failed.
+    """
+
+    measurements: tuple[str, ...]
+    photo_size: tuple[int, int]
+    incisor: IncisorMeasurement | None = None
+    mouth: MouthMeasurement | None = None
+    neck_midpoint: NeckMidpoint | None = None
+    segmentation_neck_midpoint: NeckMidpoint | None = None
+    dual_mask_neck_midpoint: NeckMidpoint | None = None
+    neck_route: NeckRoute | None = None
+    neck: NeckMeasurement | None = None
+    tmd_mm: float | None = None
+    errors: Mapping[str, Exception] = field(default_factory=dict)
+    skipped: tuple[str, ...] = ()
+    # Wall seconds of every stage that ran, in completion order.
+    stage_seconds: Mapping[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """Whether every stage ran without raising."""
+        return not self.errors and not self.skipped
+
+
+@dataclass(frozen=True)
+class _Stage:
+    name: str
+    requires: tuple[str, ...]
+    # Called with the _Context and the results of ``requires``, in order.
+    run: Callable[..., Any]
+    # Stages run for this one whose results are passed by keyword when they
+    # succeed; their failure does not skip it.
+    optional: tuple[str, ...] = ()
+    # Stages whose results are passed by keyword when the requested
+    # measurements need them anyway. They are waited for but never run for
+    # this stage alone, and their failure does not skip it.
+    reuses: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class _Context:
+    portrait: IOSPortrait
+    session: PortraitInferenceSession
+    preset: AnalysisPreset | None
+    router: NeckDetectorRouter | None
+
+    def kwargs(self, method: str) -> dict:
+        """The preset's keyword arguments for one entry point, if any."""
+        return {} if self.preset is None else getattr(self.preset, method)()
+
+
+def _landmarks(ctx, frame):
+    return detect_neck_midpoint(
+        ctx.portrait.photo,
+        session=ctx.session,
+        frame=frame,
+        **ctx.kwargs("neck_midpoint_kwargs"),
+    )
+
+
+def _person_mask(ctx, frame):
+    return _get_segmentation_mask(
+        ctx.portrait.photo,
+        session=ctx.session,
+        frame=frame,
+        **ctx.kwargs("segmentation_kwargs"),
+    )
+
+
+def _segmentation_neck_midpoint(ctx, mask):
+    if mask is None:
+        return None
+    h, w = mask.shape[:2]
+    return _detect_from_mask(mask, h, w)[0]
+
+
+def _dual_mask_neck_midpoint(ctx, mask):
+    portrait = ctx.portrait
+    if mask is None or portrait.skinmap is None or portrait.depthmap is None:
+        return None
+    return _detect_from_dual_mask(
+        mask,
+        portrait.skinmap,
+        portrait.depthmap,
+        portrait.hairmap,
+        skin_threshold=30,
+        float_min=portrait.floatValueMin,
+        float_max=portrait.floatValueMax,
+        photo_size=portrait.photo.size,
+    )[0]
+
+
+def _neck_route(ctx, frame, person_mask=_MISSING, landmarks=None):
+    # The router runs the detectors whose results were not passed in, and
+    # only when it gets to them: a portrait accepted by ``dual_mask`` never
+    # loads the pose model.
+    return route_neck_midpoint(
+        ctx.portrait,
+        ctx.router,
+        session=ctx.session,
+        preset=ctx.preset,
+        person_mask=person_mask,
+        pose_result=landmarks,
+    )
+
+
+def _mouth(ctx, landmarks):
+    face_mesh = landmarks[2]
+    if face_mesh is None:
+        return None
+    portrait = ctx.portrait
+    return compute_mouth_measurement_from_facemesh(
+        face_mesh.landmarks,
+        portrait.depthmap,
+        *portrait.photo.size,
+        portrait.floatValueMin,
+        portrait.floatValueMax,
+    )
+
+
+def _neck(ctx, landmarks=None):
+    portrait = ctx.portrait
+    if portrait.skinmap is None:
+        return None
+    width, height = portrait.photo.size
+    # Without landmarks the search falls back to the skin matte face.
+    neck_midpoint, _, face_mesh = landmarks or (None, None, None)
+    kwargs = {
+        **ctx.kwargs("neck_circumference_kwargs"),
+        **neck_search_kwargs_from_detection(neck_midpoint, face_mesh, height),
+    }
+    return compute_neck_circumference(
+        portrait.skinmap,
+        portrait.depthmap,
+        width,
+        height,
+        portrait.floatValueMin,
+        portrait.floatValueMax,
+        hairmap=portrait.hairmap,
+        **kwargs,
+    )
+
+
+def _tmd(ctx, neck_midpoint):
+    if neck_midpoint is None or neck_midpoint.x is None:
+        return None
+    portrait = ctx.portrait
+    width, height = portrait.photo.size
+    chin_depth = sample_depth_at_point(
+        portrait.depthmap, *neck_midpoint.chin, width, height
+    )
+    neck_depth = sample_depth_at_point(
+        portrait.depthmap, neck_midpoint.x, neck_midpoint.y, width, height
+    )
+    if chin_depth is None or neck_depth is None:
+        return None
+    result = compute_tmd_3d(
+        neck_midpoint.chin,
+        (neck_midpoint.x, neck_midpoint.y),
+        chin_depth,
+        neck_depth,
+        portrait.floatValueMin,
+        portrait.floatValueMax,
+        width,
+        height,
+    )
+    return None if result is None else result[0]
+
+
+_STAGES = {
+    stage.name: stage
+    for stage in (
+        _Stage("frame", (), lambda ctx: ctx.portrait.analysis_frame()),
+        _Stage("landmarks", ("frame",), _landmarks),
+        _Stage("person_mask", ("frame",), _person_mask),
+        _Stage("incisor", (), lambda ctx: ctx.portrait.incisor_measurement),
+        _Stage("mouth", ("landmarks",), _mouth),
+        _Stage("neck_midpoint", ("landmarks",), lambda ctx, landmarks: landmarks[0]),
+        _Stage(
+            "segmentation_neck_midpoint", ("person_mask",), _segmentation_neck_midpoint
+        ),
+        _Stage("dual_mask_neck_midpoint", ("person_mask",), _dual_mask_neck_midpoint),
+        _Stage(
+            "neck_route",
+            ("frame",),
+            _neck_route,
+            reuses=("person_mask", "landmarks"),
+        ),
+        _Stage("neck", (), _neck, optional=("landmarks",)),
+        _Stage("tmd", ("neck_midpoint",), _tmd),
+    )
+}
+# Report field -> stage producing it.
+_REPORT_FIELDS = {
+    "incisor": "incisor",
+    "mouth": "mouth",
+    "neck_midpoint": "neck_midpoint",
+    "segmentation_neck_midpoint": "segmentation_neck_midpoint",
+    "dual_mask_neck_midpoint": "dual_mask_neck_midpoint",
+    "neck_route": "neck_route",
+    "neck": "neck",
+    "tmd_mm": "tmd",
+}
+MEASUREMENTS = tuple(_REPORT_FIELDS.values())
+
+
+def _required_stages(measurements: Iterable[str]) -> list[str]:
+    """Every stage the measurements need, dependencies first.
+
+    Reused stages come before the stages reusing them when they are needed
+    at all.
+    """
+    needed = set()
+
+    def collect(name):
+        if name not in needed:
+            needed.add(name)
+            stage = _STAGES[name]
+            for dependency in stage.requires + stage.optional:
+                collect(dependency)
+
+    for name in measurements:
+        collect(name)
+
+    order = []
+
+    def visit(name):
+        if name not in order:
+            stage = _STAGES[name]
+            reused = tuple(name for name in stage.reuses if name in needed)
+            for dependency in stage.requires + stage.optional + reused:
+                visit(dependency)
+            order.append(name)
+
+    for name in measurements:
+        visit(name)
+    return order
+
+
+@_traced("analyse_portrait")
+def analyse_portrait(
+    portrait: IOSPortrait,
+    measurements: Iterable[str] = MEASUREMENTS,
+    preset: AnalysisPreset | str | None = None,
+    session: PortraitInferenceSession | None = None,
+    max_workers: int = 4,
+    router: NeckDetectorRouter | None = None,
+) -> AnalysisReport:
+    """Run the requested measurements on *portrait*, sharing intermediates.
+
+    Args:
+        portrait: The loaded portrait.
+        measurements: Names from :data:`MEASUREMENTS` (see the module
+            docstring); default all.
+        preset: Optional :class:`AnalysisPreset` (or its name) applied to
+            every stage.
+        session: Optional :class:`PortraitInferenceSession` whose warm
+            detectors are reused. Without one, each model is loaded once for
+            this call.
+        max_workers: Threads running independent stages; 1 runs the stages
+            one after another on the calling thread.
+        router: :class:`NeckDetectorRouter` ordering the detectors of
+            ``neck_route``; default a fresh one with the default priors.
+
+    Returns:
+        The :class:`AnalysisReport`. Stage failures are reported in it, not
+        raised.
+    """
+    measurements = tuple(dict.fromkeys(measurements))
+    unknown = set(measurements) - set(MEASUREMENTS)
+    if unknown:
+        raise ValueError(
+            f"Unknown measurement(s) {', '.join(sorted(unknown))}; "
+            f"expected some of {', '.join(MEASUREMENTS)}"
+        )
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    if preset is not None:
+        preset = get_analysis_preset(preset)
+
+    with _session_scope(session) as scope:
+        ctx = _Context(portrait, scope, preset, router)
+        stages = _required_stages(measurements)
+        if max_workers == 1:
+            results, errors, seconds = _run_sequentially(ctx, stages)
+        else:
+            results, errors, seconds = _run_concurrently(ctx, stages, max_workers)
+
+    return AnalysisReport(
+        measurements=measurements,
+        photo_size=portrait.photo.size,
+        **{
+            name: results.get(stage_name)
+            for name, stage_name in _REPORT_FIELDS.items()
+            if stage_name in measurements
+        },
+        errors=errors,
+        skipped=tuple(
+            name for name in stages if name not in results and name not in errors
+        ),
+        stage_seconds=seconds,
+    )
+
+
+def _run_stage(ctx, stage, results):
+    started = time.perf_counter()
+    try:
+        value = stage.run(
+            ctx,
+            *(results[name] for name in stage.requires),
+            **{
+                name: results[name]
+                for name in stage.optional + stage.reuses
+                if name in results
+            },
+        )
+    except Exception as e:
+        return None, e, time.perf_counter() - started
+    return value, None, time.perf_counter() - started
+
+
+def _runnable(stage, results, errors, skipped, stages):
+    """True if every input is ready, False if one failed, else None."""
+    if any(name in errors or name in skipped for name in stage.requires):
+        return False
+    if not all(name in results for name in stage.requires):
+        return None
+    finished = results.keys() | errors.keys() | skipped
+    if any(
+        name in stages and name not in finished
+        for name in stage.optional + stage.reuses
+    ):
+        return None
+    return True
+
+
+def _run_sequentially(ctx, stages):
+    results, errors, seconds, skipped = {}, {}, {}, set()
+    for name in stages:
+        stage = _STAGES[name]
+        if not _runnable(stage, results, errors, skipped, stages):
+            skipped.add(name)
+            continue
+        value, error, seconds[name] = _run_stage(ctx, stage, results)
+        if error is None:
+            results[name] = value
+        else:
+            errors[name] = error
+    return results, errors, seconds
+
+
+def _run_concurrently(ctx, stages, max_workers):
+    results, errors, seconds, skipped = {}, {}, {}, set()
+    waiting = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while waiting or running:
+            for name in list(waiting):
+                stage = _STAGES[name]
+                runnable = _runnable(stage, results, errors, skipped, stages)
+                if runnable is None:
+                    continue
+                waiting.remove(name)
+                if not runnable:
+                    skipped.add(name)
+                    continue
+                # Each stage runs in a copy of the caller's context so that
+                # its instrumentation stages nest under analyse_portrait.
+                future = executor.submit(
+                    contextvars.copy_context().run, _run_stage, ctx, stage, results
+                )
+                running[future] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                value, error, seconds[name] = future.result()
+                if error is None:
+                    results[name] = value
+                else:
+                    errors[name] = error
+    return results, errors, seconds
@@ -7,14 +7,22 @@ Requires the optional ``pose`` extra::
 
 from __future__ import annotations
 
-import os
-import urllib.request
+import contextvars
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from contextlib import ExitStack
 from dataclasses import dataclass
 from enum import Enum
-from pathlib import Path
 from typing import TYPE_CHECKING
 
-import numpy as np
+from .diagnostics import DetectionDiagnostics, _emit
+from .frame import AnalysisFrame, _resolve_frame
+from .instrumentation import _traced, stage
+from .landmarks import Landmarks
+from .models import fetch_model
+from .session import PortraitInferenceSession, _session_scope
+
+logger = logging.getLogger(__name__)
 
 
 class PortraitPose(Enum):
@@ -23,9 +31,18 @@ class PortraitPose(Enum):
     EXTENDED_NECK = "extended_neck"
 
 
+class PoseModelVariant(Enum):
+    """PoseLandmarker model size; lite and full are several times faster."""
+
+    LITE = "lite"
+    FULL = "full"
+    HEAVY = "heavy"
+
+
 MOUTH_OPEN_THRESHOLD = 0.25
 
 if TYPE_CHECKING:
+    import numpy as np
     from PIL import Image
 
 # Face-flattening detection: when the head tilts back (neck extension),
@@ -35,13 +52,14 @@ FACE_FLATNESS_THRESHOLD = 0.85
 FACE_FLATNESS_THRESHOLD_POSE = 1.2  # more lenient for Pose-only landmarks (less precise)
 MIN_IPD_PIXELS = 20
 
-_MODEL_URL = (
+_MODEL_URL_TEMPLATE = (
     "https://storage.googleapis.com/mediapipe-models/"
-    "pose_landmarker/pose_landmarker_heavy/float16/1/"
-    "pose_landmarker_heavy.task"
+    "pose_landmarker/pose_landmarker_{variant}/float16/1/"
+    "pose_landmarker_{variant}.task"
 )
-_CACHE_DIR = Path.home() / ".cache" / "portrait-analyser"
-_MODEL_FILENAME = "pose_landmarker_heavy.task"
+_MODEL_FILENAME_TEMPLATE = "pose_landmarker_{variant}.task"
+_MODEL_URL = _MODEL_URL_TEMPLATE.format(variant="heavy")
+_MODEL_FILENAME = _MODEL_FILENAME_TEMPLATE.format(variant="heavy")
 
 _FACE_MESH_MODEL_URL = (
     "https://storage.googleapis.com/mediapipe-models/"
@@ -50,20 +68,32 @@ _FACE_MESH_MODEL_URL = (
 )
 _FACE_MESH_MODEL_FILENAME = "face_landmarker.task"
 _FACE_MESH_CHIN_INDEX = 152
+# Face crop for two-stage Face Mesh: padding around the BlazeFace box (as a
+# fraction of its longer side, per edge) and FaceLandmarker's input size.
+_FACE_CROP_PADDING = 0.25
+_FACE_LANDMARKER_INPUT_SIZE = 256
 
 
 @dataclass(frozen=True)
 class MediaPipeDebug:
     """All raw MediaPipe pose landmarks for debug visualization."""
 
-    landmarks: tuple[tuple[float, float], ...]  # 33 (x, y) in photo pixels
+    landmarks: Landmarks  # 33 (x, y) in photo pixels, with z and visibility
+
+    def __post_init__(self):
+        if not isinstance(self.landmarks, Landmarks):
+            object.__setattr__(self, "landmarks", Landmarks(self.landmarks))
 
 
 @dataclass(frozen=True)
 class FaceMeshDebug:
     """All raw MediaPipe Face Mesh landmarks for debug visualization."""
 
-    landmarks: tuple[tuple[float, float], ...]  # 478 (x, y) in photo pixels
+    landmarks: Landmarks  # 478 (x, y) in photo pixels, with z
+
+    def __post_init__(self):
+        if not isinstance(self.landmarks, Landmarks):
+            object.__setattr__(self, "landmarks", Landmarks(self.landmarks))
 
 
 @dataclass(frozen=True)
@@ -108,23 +138,15 @@ class NeckMidpoint:
 
 
 def _download_model(url: str, filename: str) -> str:
-    """Return path to a cached model file, downloading if needed."""
-    model_path = _CACHE_DIR / filename
-    if not model_path.exists():
-        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        tmp_path = model_path.with_suffix(".tmp")
-        try:
-            urllib.request.urlretrieve(url, tmp_path)
-            os.replace(tmp_path, model_path)
-        except Exception:
-            if tmp_path.exists():
-                tmp_path.unlink()
-            raise
-    return str(model_path)
+    """Return path to a verified cached model file, downloading if needed."""
+    return str(fetch_model(url, filename))
 
 
-def _get_model_path() -> str:
+def _get_model_path(
+    model_variant: PoseModelVariant | str = PoseModelVariant.HEAVY,
+) -> str:
     """Return path to the PoseLandmarker .task model, downloading if needed."""
+    variant = PoseModelVariant(model_variant).value
     try:
         import mediapipe  # noqa: F401
     except ImportError:
@@ -132,7 +154,10 @@ def _get_model_path() -> str:
             "mediapipe is required for pose estimation. "
             "Install it with: pip install portrait-analyser[pose]"
         ) from None
-    return _download_model(_MODEL_URL, _MODEL_FILENAME)
+    return _download_model(
+        _MODEL_URL_TEMPLATE.format(variant=variant),
+        _MODEL_FILENAME_TEMPLATE.format(variant=variant),
+    )
 
 
 def _get_face_mesh_model_path() -> str:
@@ -140,98 +165,171 @@ def _get_face_mesh_model_path() -> str:
     return _download_model(_FACE_MESH_MODEL_URL, _FACE_MESH_MODEL_FILENAME)
 
 
+def _face_crop_box(
+    session: PortraitInferenceSession,
+    frame: AnalysisFrame,
+    min_detection_confidence: float,
+    padding: float = _FACE_CROP_PADDING,
+) -> tuple[int, int, int, int] | None:
+    """Padded square (x0, y0, x1, y1) around the BlazeFace face, frame pixels.
+
+    Near the frame edges the square extends past them rather than being
+    clipped, so the face keeps its aspect ratio; :func:`_square_crop` fills
+    the outside with black. Returns None when BlazeFace finds no face or
+    the square hardly overlaps the frame.
+    """
+    result = session.face_detector(min_detection_confidence).detect(frame.mp_image())
+    if not result.detections:
+        return None
+    bbox = result.detections[0].bounding_box
+    center_x = bbox.origin_x + bbox.width / 2
+    center_y = bbox.origin_y + bbox.height / 2
+    half_side = max(bbox.width, bbox.height) * (0.5 + padding)
+    side = int(round(2 * half_side))
+    x0 = int(round(center_x - half_side))
+    y0 = int(round(center_y - half_side))
+    x1, y1 = x0 + side, y0 + side
+    if min(x1, frame.width) - max(x0, 0) < 2 or min(y1, frame.height) - max(y0, 0) < 2:
+        return None
+    return x0, y0, x1, y1
+
+
+def _square_crop(rgb: np.ndarray, box: tuple[int, int, int, int]) -> np.ndarray:
+    """The *box* region of *rgb*, black where it extends past the image."""
+    import cv2
+
+    x0, y0, x1, y1 = box
+    height, width = rgb.shape[:2]
+    crop = rgb[max(y0, 0) : min(y1, height), max(x0, 0) : min(x1, width)]
+    return cv2.copyMakeBorder(
+        crop,
+        max(-y0, 0),
+        max(y1 - height, 0),
+        max(-x0, 0),
+        max(x1 - width, 0),
+        cv2.BORDER_CONSTANT,
+        value=0,
+    )
+
+
 def _detect_chin_via_face_mesh(
     mp_image,
     w: int,
     h: int,
     min_detection_confidence: float,
+    session: PortraitInferenceSession | None = None,
+    frame: AnalysisFrame | None = None,
+    face_crop: bool = False,
 ) -> FaceMeshAnalysis | None:
     """Detect chin (mentum) and mouth openness using MediaPipe Face Mesh.
 
+    With *face_crop* (requires *frame*), BlazeFace first locates the face
+    and FaceLandmarker runs on a padded square crop resized to its native
+    input size; the landmarks are mapped back to photo pixels. Falls back to
+    the whole image when BlazeFace finds no face.
+
     Returns FaceMeshAnalysis with chin coords, mouth_open_ratio, and debug data,
-    or None if detection fails.
+    or None if detection fails (including when the model is unavailable).
     """
-    import mediapipe as mp
-
     try:
-        model_path = _get_face_mesh_model_path()
-    except Exception:
-        return None
-
-    try:
-        options = mp.tasks.vision.FaceLandmarkerOptions(
-            base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
-            min_face_detection_confidence=min_detection_confidence,
-            num_faces=1,
-        )
-
-        with mp.tasks.vision.FaceLandmarker.create_from_options(options) as landmarker:
-            result = landmarker.detect(mp_image)
+        with _session_scope(session) as scope:
+            landmarker = scope.face_landmarker(min_detection_confidence)
+            crop = None
+            if face_crop and frame is not None:
+                with stage("face_detection"):
+                    crop = _face_crop_box(scope, frame, min_detection_confidence)
+
+            with stage("face_mesh"):
+                if crop is None:
+                    result = landmarker.detect(mp_image)
+                    offset_x, offset_y, span_x, span_y = 0.0, 0.0, w, h
+                else:
+                    import cv2
+                    import mediapipe as mp
+
+                    x0, y0, x1, y1 = crop
+                    crop_rgb = _square_crop(frame.rgb, crop)
+                    shrinks = min(crop_rgb.shape[:2]) > _FACE_LANDMARKER_INPUT_SIZE
+                    crop_rgb = cv2.resize(
+                        crop_rgb,
+                        (_FACE_LANDMARKER_INPUT_SIZE, _FACE_LANDMARKER_INPUT_SIZE),
+                        interpolation=cv2.INTER_AREA if shrinks else cv2.INTER_LINEAR,
+                    )
+                    result = landmarker.detect(
+                        mp.Image(image_format=mp.ImageFormat.SRGB, data=crop_rgb)
+                    )
+                    offset_x, offset_y = frame.to_photo(x0, y0)
+                    span_x = (x1 - x0) * frame.scale_x
+                    span_y = (y1 - y0) * frame.scale_y
 
         if not result.face_landmarks:
             return None
 
         face_landmarks = result.face_landmarks[0]
-        all_landmarks = tuple((lm.x * w, lm.y * h) for lm in face_landmarks)
-        face_mesh_debug = FaceMeshDebug(landmarks=all_landmarks)
-
-        chin = face_landmarks[_FACE_MESH_CHIN_INDEX]
-        chin_px = (chin.x * w, chin.y * h)
-
-        # Extract face landmarks from FaceMesh:
-        # 1 = nose tip, 133 = left eye inner, 362 = right eye inner
-        # 61 = mouth left corner, 291 = mouth right corner
-        nose_lm = face_landmarks[1]
-        nose_px = (nose_lm.x * w, nose_lm.y * h)
-        left_eye_lm = face_landmarks[133]
-        left_eye_px = (left_eye_lm.x * w, left_eye_lm.y * h)
-        right_eye_lm = face_landmarks[362]
-        right_eye_px = (right_eye_lm.x * w, right_eye_lm.y * h)
-        mouth_left_lm = face_landmarks[61]
-        mouth_left_px = (mouth_left_lm.x * w, mouth_left_lm.y * h)
-        mouth_right_lm = face_landmarks[291]
-        mouth_right_px = (mouth_right_lm.x * w, mouth_right_lm.y * h)
-
-        # Compute mouth-open ratio using FaceMesh landmarks:
-        # 13 = upper lip inner center, 14 = lower lip inner center
-        # 78 = left mouth corner, 308 = right mouth corner (for width)
-        upper_lip = face_landmarks[13]
-        lower_lip = face_landmarks[14]
-        mouth_l_corner = face_landmarks[78]
-        mouth_r_corner = face_landmarks[308]
-
-        upper_lip_px = (upper_lip.x * w, upper_lip.y * h)
-        lower_lip_px = (lower_lip.x * w, lower_lip.y * h)
-        mouth_l_px = (mouth_l_corner.x * w, mouth_l_corner.y * h)
-        mouth_r_px = (mouth_r_corner.x * w, mouth_r_corner.y * h)
-
-        vertical_opening = abs(lower_lip_px[1] - upper_lip_px[1])
-        mouth_width = abs(mouth_r_px[0] - mouth_l_px[0])
-
-        mouth_open_ratio: float | None = None
-        if mouth_width > 5:
-            mouth_open_ratio = vertical_opening / mouth_width
-            print(f"  Mouth open ratio: {mouth_open_ratio:.3f} (threshold: {MOUTH_OPEN_THRESHOLD})")
-
-        return FaceMeshAnalysis(
-            chin=chin_px,
-            mouth_open_ratio=mouth_open_ratio,
-            nose=nose_px,
-            left_eye=left_eye_px,
-            right_eye=right_eye_px,
-            mouth_left=mouth_left_px,
-            mouth_right=mouth_right_px,
-            debug=face_mesh_debug,
+        return _analyse_face_mesh_landmarks(
+            Landmarks.from_normalized(
+                face_landmarks, span_x, span_y, offset=(offset_x, offset_y)
+            )
         )
     except Exception:
         return None
 
 
+def _analyse_face_mesh_landmarks(all_landmarks: Landmarks) -> FaceMeshAnalysis:
+    """Chin, facial features and mouth openness from 478 photo-space points."""
+    face_mesh_debug = FaceMeshDebug(landmarks=all_landmarks)
+
+    chin_px = all_landmarks[_FACE_MESH_CHIN_INDEX]
+
+    # Extract face landmarks from FaceMesh:
+    # 1 = nose tip, 133 = left eye inner, 362 = right eye inner
+    # 61 = mouth left corner, 291 = mouth right corner
+    nose_px = all_landmarks[1]
+    left_eye_px = all_landmarks[133]
+    right_eye_px = all_landmarks[362]
+    mouth_left_px = all_landmarks[61]
+    mouth_right_px = all_landmarks[291]
+
+    # Compute mouth-open ratio using FaceMesh landmarks:
+    # 13 = upper lip inner center, 14 = lower lip inner center
+    # 78 = left mouth corner, 308 = right mouth corner (for width)
+    upper_lip_px = all_landmarks[13]
+    lower_lip_px = all_landmarks[14]
+    mouth_l_px = all_landmarks[78]
+    mouth_r_px = all_landmarks[308]
+
+    vertical_opening = abs(lower_lip_px[1] - upper_lip_px[1])
+    mouth_width = abs(mouth_r_px[0] - mouth_l_px[0])
+
+    mouth_open_ratio: float | None = None
+    if mouth_width > 5:
+        mouth_open_ratio = vertical_opening / mouth_width
+
+    return FaceMeshAnalysis(
+        chin=chin_px,
+        mouth_open_ratio=mouth_open_ratio,
+        nose=nose_px,
+        left_eye=left_eye_px,
+        right_eye=right_eye_px,
+        mouth_left=mouth_left_px,
+        mouth_right=mouth_right_px,
+        debug=face_mesh_debug,
+    )
+
+
+@_traced("detect_neck_midpoint")
 def detect_neck_midpoint(
     image: Image.Image,
     interpolation_ratio: float = 0.35,
     min_detection_confidence: float = 0.5,
     min_visibility: float = 0.5,
+    model_variant: PoseModelVariant | str = PoseModelVariant.HEAVY,
+    session: PortraitInferenceSession | None = None,
+    frame: AnalysisFrame | None = None,
+    concurrent: bool = False,
+    executor: Executor | None = None,
+    face_crop: bool = False,
+    diagnostics: DetectionDiagnostics | None = None,
 ) -> tuple[NeckMidpoint | None, MediaPipeDebug | None, FaceMeshDebug | None]:
     """Detect the neck midpoint from a portrait/bust photo.
 
@@ -248,6 +346,26 @@ def detect_neck_midpoint(
             0.0 = shoulder midpoint, 1.0 = nose. Default 0.35.
         min_detection_confidence: MediaPipe detection confidence threshold.
         min_visibility: Minimum landmark visibility to accept result.
+        model_variant: PoseLandmarker size (lite/full/heavy). Only the
+            shoulders come from Pose, so lite or full is often sufficient.
+        session: Optional :class:`PortraitInferenceSession` whose warm
+            FaceLandmarker and PoseLandmarker are reused. Without one, both
+            models are loaded for this call only.
+        frame: Optional :class:`AnalysisFrame` of ``image`` shared with
+            other detectors. Landmarks are always returned in ``image``
+            pixel coordinates.
+        concurrent: Run FaceMesh on a worker thread while Pose runs on the
+            calling thread. MediaPipe releases the GIL during inference, so
+            this roughly halves landmarking latency; results are identical
+            to the sequential path.
+        executor: Executor to submit FaceMesh to (implies ``concurrent``).
+            Without one, ``concurrent=True`` uses a single-thread pool
+            created for this call.
+        face_crop: Locate the face with BlazeFace first and run FaceMesh on
+            a padded face crop at the landmarker's input size.
+        diagnostics: Optional :class:`DetectionDiagnostics` that receives
+            the intermediate values (IPD, flatness ratio, visibilities, ...)
+            which are otherwise only logged at DEBUG level.
 
     Returns:
         3-tuple of (NeckMidpoint | None, MediaPipeDebug | None,
@@ -257,25 +375,109 @@ def detect_neck_midpoint(
     Raises:
         ImportError: If mediapipe is not installed.
     """
-    import mediapipe as mp
+    with ExitStack() as stack:
+        scope = stack.enter_context(_session_scope(session))
+        if concurrent and executor is None:
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=1))
+        return _detect_neck_midpoint(
+            image,
+            interpolation_ratio,
+            min_detection_confidence,
+            min_visibility,
+            PoseModelVariant(model_variant),
+            scope,
+            frame,
+            executor,
+            face_crop,
+            diagnostics,
+        )
+
 
-    model_path = _get_model_path()
+def _detect_neck_midpoint(
+    image: Image.Image,
+    interpolation_ratio: float,
+    min_detection_confidence: float,
+    min_visibility: float,
+    model_variant: PoseModelVariant,
+    session: PortraitInferenceSession,
+    frame: AnalysisFrame | None,
+    executor: Executor | None,
+    face_crop: bool,
+    diagnostics: DetectionDiagnostics | None,
+) -> tuple[NeckMidpoint | None, MediaPipeDebug | None, FaceMeshDebug | None]:
+    # Load the pose model up front so a missing mediapipe install fails fast.
+    pose_landmarker = session.pose_landmarker(
+        min_detection_confidence, model_variant=model_variant
+    )
 
-    image_array = np.array(image)
-    h, w = image_array.shape[:2]
+    # Landmarks are normalised, so scaling by the photo size maps them from
+    # the downscaled frame straight back to photo pixels.
+    frame = _resolve_frame(image, frame)
+    w, h = frame.photo_width, frame.photo_height
+    mp_image = frame.mp_image()
+
+    # Always attempt FaceMesh — it may succeed even when pose detection fails.
+    # The two landmarkers are independent, so with an executor FaceMesh runs
+    # on a worker thread while Pose runs here.
+    if executor is not None:
+        # Run in a copy of this context so stage hooks see the worker too.
+        face_mesh_future = executor.submit(
+            contextvars.copy_context().run,
+            _detect_chin_via_face_mesh,
+            mp_image,
+            w,
+            h,
+            min_detection_confidence,
+            session=session,
+            frame=frame,
+            face_crop=face_crop,
+        )
+        try:
+            with stage("pose"):
+                result = pose_landmarker.detect(mp_image)
+        finally:
+            # Even when Pose raises, FaceMesh must be done with the session
+            # before this returns: the executor may be the caller's.
+            wait([face_mesh_future])
+        face_mesh_result = face_mesh_future.result()
+    else:
+        face_mesh_result = _detect_chin_via_face_mesh(
+            mp_image,
+            w,
+            h,
+            min_detection_confidence,
+            session=session,
+            frame=frame,
+            face_crop=face_crop,
+        )
+        with stage("pose"):
+            result = pose_landmarker.detect(mp_image)
+
+    return _neck_midpoint_from_landmarks(
+        face_mesh_result,
+        result,
+        w,
+        h,
+        interpolation_ratio,
+        min_visibility,
+        diagnostics,
+    )
 
-    # Ensure RGB (3-channel) input
-    if image_array.ndim == 2:
-        image_array = np.stack([image_array] * 3, axis=-1)
-    elif image_array.shape[2] == 4:
-        image_array = image_array[:, :, :3]
 
-    mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=image_array)
+def _neck_midpoint_from_landmarks(
+    face_mesh_result: FaceMeshAnalysis | None,
+    result,
+    w: int,
+    h: int,
+    interpolation_ratio: float,
+    min_visibility: float,
+    diagnostics: DetectionDiagnostics | None = None,
+) -> tuple[NeckMidpoint | None, MediaPipeDebug | None, FaceMeshDebug | None]:
+    """Merge Face Mesh and PoseLandmarker output into a NeckMidpoint.
 
-    # Always attempt FaceMesh — it may succeed even when pose detection fails
-    face_mesh_result = _detect_chin_via_face_mesh(
-        mp_image, w, h, min_detection_confidence
-    )
+    *result* is a PoseLandmarker result from IMAGE or VIDEO running mode;
+    its normalised landmarks are scaled by the photo size *w* x *h*.
+    """
     face_mesh_debug: FaceMeshDebug | None = None
     face_mesh_chin: tuple[float, float] | None = None
     mouth_open_ratio: float | None = None
@@ -283,9 +485,16 @@ def detect_neck_midpoint(
         face_mesh_chin = face_mesh_result.chin
         mouth_open_ratio = face_mesh_result.mouth_open_ratio
         face_mesh_debug = face_mesh_result.debug
-        print(f"  Chin detected via Face Mesh at: ({face_mesh_chin[0]:.1f}, {face_mesh_chin[1]:.1f})")
+        _emit(
+            logger,
+            diagnostics,
+            "face_mesh_chin",
+            face_mesh_chin=face_mesh_chin,
+            mouth_open_ratio=mouth_open_ratio,
+            mouth_open_threshold=MOUTH_OPEN_THRESHOLD,
+        )
     else:
-        print("  Face Mesh chin detection failed")
+        _emit(logger, diagnostics, "face_mesh_failed")
 
     # Use FaceMesh landmarks for face analysis (eyes, nose, mouth)
     # when available; they are more reliable than Pose for facial features.
@@ -302,16 +511,7 @@ def detect_neck_midpoint(
         mouth_left_px = None
         mouth_right_px = None
 
-    # Attempt Pose detection for shoulders
-    options = mp.tasks.vision.PoseLandmarkerOptions(
-        base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
-        min_pose_detection_confidence=min_detection_confidence,
-        num_poses=1,
-    )
-
-    with mp.tasks.vision.PoseLandmarker.create_from_options(options) as landmarker:
-        result = landmarker.detect(mp_image)
-
+    # Pose detection result provides the shoulders
     pose_debug: MediaPipeDebug | None = None
     left_shoulder_px: tuple[float, float] | None = None
     right_shoulder_px: tuple[float, float] | None = None
@@ -333,7 +533,7 @@ def detect_neck_midpoint(
         RIGHT_SHOULDER = 12
 
         # Convert all 33 landmarks to absolute pixels for debug visualization
-        all_landmarks = tuple((lm.x * w, lm.y * h) for lm in landmarks)
+        all_landmarks = Landmarks.from_normalized(landmarks, w, h)
         pose_debug = MediaPipeDebug(landmarks=all_landmarks)
 
         nose_vis = landmarks[NOSE].visibility
@@ -358,14 +558,18 @@ def detect_neck_midpoint(
             left_shoulder_px = (left_shoulder.x * w, left_shoulder.y * h)
             right_shoulder_px = (right_shoulder.x * w, right_shoulder.y * h)
             has_shoulders = True
-        else:
-            print(
-                f"  Shoulder visibility too low"
-                f" (L={left_shoulder.visibility:.2f},"
-                f" R={right_shoulder.visibility:.2f})"
-            )
+        _emit(
+            logger,
+            diagnostics,
+            "pose_visibility",
+            nose_visibility=nose_vis,
+            left_shoulder_visibility=left_shoulder_vis,
+            right_shoulder_visibility=right_shoulder_vis,
+            min_visibility=min_visibility,
+            has_shoulders=has_shoulders,
+        )
     else:
-        print("  Pose landmarks not detected")
+        _emit(logger, diagnostics, "pose_not_detected")
 
     # If neither FaceMesh nor Pose detected a face, give up
     if nose_px is None:
@@ -379,12 +583,6 @@ def detect_neck_midpoint(
     flatness_threshold = (
         FACE_FLATNESS_THRESHOLD if using_facemesh_landmarks else FACE_FLATNESS_THRESHOLD_POSE
     )
-    print(
-        f"  Face-flattening landmarks source: "
-        f"{'FaceMesh' if using_facemesh_landmarks else 'Pose'}"
-        f" (threshold: {flatness_threshold})"
-    )
-
     mouth_center_x = (mouth_left_px[0] + mouth_right_px[0]) / 2
     mouth_center_y = (mouth_left_px[1] + mouth_right_px[1]) / 2
     nose_to_mouth = mouth_center_y - nose_px[1]
@@ -394,38 +592,51 @@ def detect_neck_midpoint(
     eye_to_mouth_vertical = mouth_center_y - eye_mid_y
     lateral_tilt = abs(left_eye_px[1] - right_eye_px[1])
 
-    print(
-        f"  Eye L=({left_eye_px[0]:.1f}, {left_eye_px[1]:.1f}),"
-        f" R=({right_eye_px[0]:.1f}, {right_eye_px[1]:.1f})"
-        f" | IPD={ipd:.1f}px"
-    )
-    print(
-        f"  Mouth L=({mouth_left_px[0]:.1f}, {mouth_left_px[1]:.1f}),"
-        f" R=({mouth_right_px[0]:.1f}, {mouth_right_px[1]:.1f})"
-        f" | center=({mouth_center_x:.1f}, {mouth_center_y:.1f})"
-    )
-    print(
-        f"  eye_mid_y={eye_mid_y:.1f}, eye_to_mouth_vertical={eye_to_mouth_vertical:.1f},"
-        f" lateral_tilt={lateral_tilt:.1f}"
+    _emit(
+        logger,
+        diagnostics,
+        "face_geometry",
+        landmark_source="FaceMesh" if using_facemesh_landmarks else "Pose",
+        left_eye=left_eye_px,
+        right_eye=right_eye_px,
+        ipd=ipd,
+        mouth_left=mouth_left_px,
+        mouth_right=mouth_right_px,
+        mouth_center=(mouth_center_x, mouth_center_y),
+        eye_mid_y=eye_mid_y,
+        eye_to_mouth_vertical=eye_to_mouth_vertical,
+        lateral_tilt=lateral_tilt,
     )
 
     neck_extended = False
     face_flatness_ratio: float | None = None
 
     if ipd < MIN_IPD_PIXELS:
-        print(f"  IPD too small ({ipd:.1f}px < {MIN_IPD_PIXELS}px), skipping face-flattening")
+        _emit(
+            logger,
+            diagnostics,
+            "face_flatness_skipped",
+            reason="ipd_too_small",
+            min_ipd=MIN_IPD_PIXELS,
+        )
     elif lateral_tilt > 0.3 * ipd:
-        print(
-            f"  Lateral head tilt detected ({lateral_tilt:.1f} > {0.3 * ipd:.1f}),"
-            " skipping face-flattening"
+        _emit(
+            logger,
+            diagnostics,
+            "face_flatness_skipped",
+            reason="lateral_tilt",
+            max_lateral_tilt=0.3 * ipd,
         )
     else:
         face_flatness_ratio = eye_to_mouth_vertical / ipd
         neck_extended = face_flatness_ratio < flatness_threshold
-        print(
-            f"  Face flatness ratio: {face_flatness_ratio:.3f}"
-            f" (threshold: {flatness_threshold},"
-            f" extended={neck_extended})"
+        _emit(
+            logger,
+            diagnostics,
+            "face_flatness",
+            face_flatness_ratio=face_flatness_ratio,
+            flatness_threshold=flatness_threshold,
+            neck_extended=neck_extended,
         )
 
     # Chin: prefer Face Mesh landmark 152, fall back to Pose estimation
@@ -436,7 +647,7 @@ def detect_neck_midpoint(
             chin_px = (mouth_center_x, mouth_center_y)
         else:
             chin_px = (mouth_center_x, mouth_center_y + 2.0 * nose_to_mouth)
-        print(f"  Chin estimated via Pose at: ({chin_px[0]:.1f}, {chin_px[1]:.1f})")
+        _emit(logger, diagnostics, "pose_chin_estimate", pose_chin=chin_px)
 
     # Compute neck midpoint position (requires shoulders)
     neck_x: float | None = None
@@ -455,10 +666,14 @@ def detect_neck_midpoint(
         pose = PortraitPose.EXTENDED_NECK
     else:
         pose = PortraitPose.NEUTRAL_NECK
-    print(
-        f"  Pose classification: {pose.value}"
-        f" (mouth_open_ratio={mouth_open_ratio}, neck_extended={neck_extended},"
-        f" has_shoulders={has_shoulders})"
+    _emit(
+        logger,
+        diagnostics,
+        "pose_classification",
+        pose=pose.value,
+        mouth_open_ratio=mouth_open_ratio,
+        neck_extended=neck_extended,
+        has_shoulders=has_shoulders,
     )
 
     neck_midpoint = NeckMidpoint(
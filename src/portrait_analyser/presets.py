@@ -0,0 +1,104 @@
+"""Named speed/accuracy trade-offs for the measurement pipeline.
+
+A preset bundles the knobs that dominate run time — PoseLandmarker model
+size, the number of neck arc samples, the sag sweep step and the resolution
+the person segmenter runs at — and hands them out as keyword arguments for
+the matching entry points::
+
+    preset = get_analysis_preset("fast")
+    neck, _, _ = detect_neck_midpoint(photo, **preset.neck_midpoint_kwargs())
+    measurement = compute_neck_circumference(
+        ..., **preset.neck_circumference_kwargs()
+    )
+
+``accurate`` reproduces the library defaults except for a denser arc and a
+finer sag sweep; ``balanced`` and ``fast`` trade precision for latency.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .pose import PoseModelVariant
+
+
+@dataclass(frozen=True)
+class AnalysisPreset:
+    """Pipeline parameters for one point on the speed/accuracy curve."""
+
+    name: str
+    pose_model_variant: PoseModelVariant = PoseModelVariant.HEAVY
+    # Points sampled across the neck front arc.
+    n_samples: int = 25
+    # Sag sweep of compute_neck_circumference(), in photo pixels.
+    sag_step: int = 5
+    # Longest image side fed to the person segmenter; None = the shared
+    # analysis frame as is.
+    segmentation_max_dimension: int | None = None
+
+    def __post_init__(self):
+        object.__setattr__(
+            self, "pose_model_variant", PoseModelVariant(self.pose_model_variant)
+        )
+        if self.n_samples < 2:
+            raise ValueError("n_samples must be at least 2")
+        if self.sag_step < 1:
+            raise ValueError("sag_step must be at least 1")
+        if (
+            self.segmentation_max_dimension is not None
+            and self.segmentation_max_dimension < 1
+        ):
+            raise ValueError("segmentation_max_dimension must be positive")
+
+    def neck_midpoint_kwargs(self) -> dict:
+        """Keyword arguments for :func:`~portrait_analyser.pose.detect_neck_midpoint`."""
+        return {"model_variant": self.pose_model_variant}
+
+    def neck_circumference_kwargs(self) -> dict:
+        """Keyword arguments for :func:`~portrait_analyser.neck.compute_neck_circumference`."""
+        return {"n_samples": self.n_samples, "sag_step": self.sag_step}
+
+    def segmentation_kwargs(self) -> dict:
+        """Keyword arguments for the ``detect_neck_midpoint_from_*`` mask detectors."""
+        return {"max_dimension": self.segmentation_max_dimension}
+
+
+ANALYSIS_PRESETS = {
+    preset.name: preset
+    for preset in (
+        AnalysisPreset(
+            name="fast",
+            pose_model_variant=PoseModelVariant.LITE,
+            n_samples=15,
+            sag_step=15,
+            segmentation_max_dimension=512,
+        ),
+        AnalysisPreset(
+            name="balanced",
+            pose_model_variant=PoseModelVariant.FULL,
+            n_samples=25,
+            sag_step=10,
+            segmentation_max_dimension=1024,
+        ),
+        AnalysisPreset(
+            name="accurate",
+            pose_model_variant=PoseModelVariant.HEAVY,
+            n_samples=41,
+            sag_step=2,
+            segmentation_max_dimension=None,
+        ),
+    )
+}
+
+
+def get_analysis_preset(preset: AnalysisPreset | str) -> AnalysisPreset:
+    """Return the named preset; an :class:`AnalysisPreset` passes through."""
+    if isinstance(preset, AnalysisPreset):
+        return preset
+    try:
+        return ANALYSIS_PRESETS[preset]
+    except KeyError:
+        raise ValueError(
+            f"Unknown analysis preset {preset!r}; "
+            f"expected one of {', '.join(ANALYSIS_PRESETS)}"
+        ) from None
@@ -0,0 +1,394 @@
+"""Cost-aware routing between the three neck midpoint detectors.
+
+The neck midpoint can be found three ways:
+
+- ``dual_mask`` -- :func:`~portrait_analyser.extended_neck.detect_neck_midpoint_from_dual_mask`,
+  from the TrueDepth skin and hair mattes, the depth map and the person mask,
+- ``segmentation`` -- :func:`~portrait_analyser.extended_neck.detect_neck_midpoint_from_segmentation`,
+  from the person mask alone,
+- ``pose`` -- :func:`~portrait_analyser.pose.detect_neck_midpoint`, running
+  FaceMesh and the (heavy by default) PoseLandmarker.
+
+Rather than always trying them in a fixed fallback order,
+:class:`NeckDetectorRouter` tries the applicable ones — ``dual_mask`` needs
+a skin matte and a depth map with enough valid pixels — in increasing
+order of expected cost per success, i.e. measured seconds divided by
+observed success rate, and stops at the first result passing its
+confidence checks. The person mask is computed once and shared by the two
+mask-based detectors, so after one of them the other is nearly free. The
+router learns: every attempt updates a moving average of its cost and its
+success count, so a long-lived router (one per worker, say) adapts to the
+cohort and the hardware. Costs and success rates start from priors under
+which a TrueDepth portrait with mattes goes to ``dual_mask`` first and
+usually never loads the pose model::
+
+    router = NeckDetectorRouter()
+    route = router.route(portrait, session=session)
+    route.neck_midpoint, route.strategy, route.path   # ..., "dual_mask", "dual_mask"
+
+A caller that already ran segmentation or Pose/FaceMesh on the portrait
+(:func:`~portrait_analyser.pipeline.analyse_portrait` does) passes the
+results as ``person_mask`` and ``pose_result``; the router reuses them
+instead of running the detectors again.
+
+A caller knowing the portrait's :class:`~portrait_analyser.pose.PortraitPose`
+(from a previous frame, say) passes it as ``pose_hint``: for an extended
+neck, where the landmark models tend to fail, ``pose`` is tried last.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .extended_neck import (
+    _detect_from_dual_mask,
+    _detect_from_mask,
+    _get_segmentation_mask,
+)
+from .instrumentation import _traced
+from .pose import NeckMidpoint, PoseModelVariant, PortraitPose, detect_neck_midpoint
+from .presets import AnalysisPreset, get_analysis_preset
+from .session import PortraitInferenceSession, _session_scope
+
+if TYPE_CHECKING:
+    from .ios import IOSPortrait
+
+STRATEGIES = ("dual_mask", "segmentation", "pose")
+
+# Cost components, in seconds, before anything was measured: the person
+# mask shared by the mask-based strategies, each strategy's own work on top
+# of it, and FaceMesh + Pose per PoseLandmarker variant.
+_DEFAULT_COSTS = {
+    "person_mask": 0.03,
+    "dual_mask": 0.02,
+    "segmentation": 0.005,
+    "pose_lite": 0.06,
+    "pose_full": 0.1,
+    "pose_heavy": 0.25,
+}
+_DEFAULT_SUCCESS_RATES = {"dual_mask": 0.85, "segmentation": 0.5, "pose": 0.9}
+# Pseudo-observations the prior success rates count as.
+_PRIOR_WEIGHT = 4
+# Success-rate factor for ``pose`` when the hint is an extended neck.
+_EXTENDED_NECK_POSE_FACTOR = 0.25
+# Fraction of depth-map pixels that must be valid (non-zero) for dual_mask.
+_MIN_VALID_DEPTH_FRACTION = 0.05
+_SKIN_THRESHOLD = 30
+# Default of the precomputed-intermediate arguments: compute it.
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class RouteAttempt:
+    """One detector the router ran."""
+
+    strategy: str
+    accepted: bool
+    # Why the result was rejected (e.g. "no_result", "neck_above_chin") or
+    # the exception raised; None when accepted.
+    reason: str | None
+    seconds: float
+
+
+@dataclass(frozen=True)
+class NeckRoute:
+    """Result of :meth:`NeckDetectorRouter.route` and the path taken."""
+
+    neck_midpoint: NeckMidpoint | None
+    # Strategy that produced neck_midpoint; None when every attempt failed.
+    strategy: str | None
+    attempts: tuple[RouteAttempt, ...]
+    # Applicable strategies in the order they were to be tried.
+    plan: tuple[str, ...]
+
+    @property
+    def path(self) -> str:
+        """The strategies tried, e.g. ``"dual_mask -> pose"``."""
+        return " -> ".join(attempt.strategy for attempt in self.attempts)
+
+
+class NeckDetectorRouter:
+    """Orders the neck detectors by expected cost per success and learns.
+
+    Args:
+        costs: Initial seconds per cost component, overriding the defaults
+            (keys ``person_mask``, ``dual_mask``, ``segmentation`` and
+            ``pose_<variant>``).
+        success_rates: Initial success rate per strategy.
+        smoothing: Weight of a new timing in the cost moving average.
+
+    A router may be shared between threads.
+    """
+
+    def __init__(
+        self,
+        costs: Mapping[str, float] | None = None,
+        success_rates: Mapping[str, float] | None = None,
+        smoothing: float = 0.2,
+    ):
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing must be in (0, 1]")
+        self.smoothing = smoothing
+        self._costs = {**_DEFAULT_COSTS, **(costs or {})}
+        rates = {**_DEFAULT_SUCCESS_RATES, **(success_rates or {})}
+        # strategy -> [successes, attempts], priors included.
+        self._outcomes = {
+            strategy: [rates[strategy] * _PRIOR_WEIGHT, _PRIOR_WEIGHT]
+            for strategy in STRATEGIES
+        }
+        self._lock = threading.Lock()
+
+    def cost(self, component: str) -> float:
+        """Current estimate of a cost component, in seconds."""
+        with self._lock:
+            return self._costs[component]
+
+    def success_rate(self, strategy: str) -> float:
+        """Fraction of attempts of *strategy* that were accepted."""
+        with self._lock:
+            successes, attempts = self._outcomes[strategy]
+        return successes / attempts
+
+    def plan(
+        self,
+        portrait: IOSPortrait,
+        preset: AnalysisPreset | str | None = None,
+        pose_hint: PortraitPose | None = None,
+    ) -> tuple[str, ...]:
+        """Applicable strategies for *portrait*, cheapest expected success first."""
+        variant = _pose_variant(preset)
+        candidates = [
+            s for s in STRATEGIES if s != "dual_mask" or _has_mattes(portrait)
+        ]
+        rates = {s: self.success_rate(s) for s in candidates}
+        if pose_hint == PortraitPose.EXTENDED_NECK:
+            rates["pose"] *= _EXTENDED_NECK_POSE_FACTOR
+
+        # Greedy on expected cost per success; a strategy after another
+        # mask-based one no longer pays for the person mask.
+        order, has_mask = [], False
+        while candidates:
+            best = min(
+                candidates,
+                key=lambda s: self._remaining_cost(s, variant, has_mask)
+                / max(rates[s], 1e-6),
+            )
+            candidates.remove(best)
+            order.append(best)
+            has_mask = has_mask or best != "pose"
+        return tuple(order)
+
+    def _remaining_cost(self, strategy, variant, has_mask):
+        if strategy == "pose":
+            return self.cost(f"pose_{variant.value}")
+        mask_cost = 0.0 if has_mask else self.cost("person_mask")
+        return mask_cost + self.cost(strategy)
+
+    def _observe(self, component: str, seconds: float) -> None:
+        with self._lock:
+            previous = self._costs[component]
+            self._costs[component] = previous + self.smoothing * (seconds - previous)
+
+    def _record(self, strategy: str, accepted: bool) -> None:
+        with self._lock:
+            self._outcomes[strategy][0] += accepted
+            self._outcomes[strategy][1] += 1
+
+    @_traced("route_neck_midpoint")
+    def route(
+        self,
+        portrait: IOSPortrait,
+        session: PortraitInferenceSession | None = None,
+        preset: AnalysisPreset | str | None = None,
+        pose_hint: PortraitPose | None = None,
+        person_mask=_MISSING,
+        pose_result: tuple | None = None,
+    ) -> NeckRoute:
+        """Run the planned detectors until one passes its confidence checks.
+
+        Args:
+            portrait: The loaded portrait.
+            session: Optional :class:`PortraitInferenceSession` whose warm
+                detectors are reused.
+            preset: Optional :class:`AnalysisPreset` (or its name) for the
+                pose model variant and segmentation resolution.
+            pose_hint: Expected :class:`PortraitPose` of the portrait.
+            person_mask: Person mask already computed for the portrait
+                (``None`` if segmentation found no person); by default the
+                router computes it when a mask-based strategy runs.
+            pose_result: :func:`~portrait_analyser.pose.detect_neck_midpoint`
+                result already computed for the portrait, used by the
+                ``pose`` strategy instead of running the models.
+
+        Returns:
+            The accepted neck midpoint, the strategy and every attempt.
+            Detector exceptions are recorded as rejected attempts.
+        """
+        if preset is not None:
+            preset = get_analysis_preset(preset)
+        plan = self.plan(portrait, preset, pose_hint)
+        attempts = []
+        with _session_scope(session) as scope:
+            run = _Attempt(self, portrait, scope, preset, person_mask, pose_result)
+            for strategy in plan:
+                started = time.perf_counter()
+                try:
+                    neck_midpoint, reason = run(strategy)
+                except Exception as e:
+                    neck_midpoint, reason = None, f"{type(e).__name__}: {e}"
+                accepted = reason is None
+                self._record(strategy, accepted)
+                attempts.append(
+                    RouteAttempt(
+                        strategy, accepted, reason, time.perf_counter() - started
+                    )
+                )
+                if accepted:
+                    return NeckRoute(neck_midpoint, strategy, tuple(attempts), plan)
+        return NeckRoute(None, None, tuple(attempts), plan)
+
+
+class _Attempt:
+    """Runs one strategy for :meth:`NeckDetectorRouter.route`.
+
+    Holds the person mask between the mask-based strategies and feeds the
+    measured cost components back to the router. Precomputed intermediates
+    are used as they are, and their (zero) cost is not observed.
+    """
+
+    def __init__(self, router, portrait, session, preset, mask, pose_result):
+        self.router = router
+        self.portrait = portrait
+        self.session = session
+        self.preset = preset
+        self._has_mask = mask is not _MISSING
+        self._mask = mask if self._has_mask else None
+        self._pose_result = pose_result
+
+    def _timed(self, component, function, *args, **kwargs):
+        started = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.router._observe(component, time.perf_counter() - started)
+        return result
+
+    def person_mask(self):
+        if not self._has_mask:
+            kwargs = {} if self.preset is None else self.preset.segmentation_kwargs()
+            self._mask = self._timed(
+                "person_mask",
+                _get_segmentation_mask,
+                self.portrait.photo,
+                session=self.session,
+                frame=self.portrait.analysis_frame(),
+                **kwargs,
+            )
+            self._has_mask = True
+        return self._mask
+
+    def __call__(self, strategy):
+        """(neck midpoint, rejection reason or None) of *strategy*."""
+        portrait = self.portrait
+        if strategy == "pose":
+            if self._pose_result is None:
+                variant = _pose_variant(self.preset)
+                self._pose_result = self._timed(
+                    f"pose_{variant.value}",
+                    detect_neck_midpoint,
+                    portrait.photo,
+                    model_variant=variant,
+                    session=self.session,
+                    frame=portrait.analysis_frame(),
+                )
+            neck_midpoint = self._pose_result[0]
+            return neck_midpoint, _check(neck_midpoint, None, portrait.photo.size)
+
+        mask = self.person_mask()
+        if mask is None:
+            return None, "no_person_mask"
+        if strategy == "segmentation":
+            h, w = mask.shape[:2]
+            neck_midpoint, debug = self._timed(
+                "segmentation", _detect_from_mask, mask, h, w
+            )
+        else:
+            neck_midpoint, debug = self._timed(
+                "dual_mask",
+                _detect_from_dual_mask,
+                mask,
+                portrait.skinmap,
+                portrait.depthmap,
+                portrait.hairmap,
+                _SKIN_THRESHOLD,
+                portrait.floatValueMin,
+                portrait.floatValueMax,
+                portrait.photo.size,
+            )
+        return neck_midpoint, _check(neck_midpoint, debug, portrait.photo.size)
+
+
+def _check(neck_midpoint, debug, photo_size) -> str | None:
+    """Why *neck_midpoint* fails the confidence checks, or None if it passes.
+
+    Pose results already passed the shoulder-visibility threshold of
+    :func:`~portrait_analyser.pose.detect_neck_midpoint`; a FaceMesh-only
+    result has no neck point and is rejected.
+    """
+    if neck_midpoint is None:
+        return "no_result"
+    if neck_midpoint.x is None or neck_midpoint.y is None:
+        return "no_neck_point"
+    width, height = photo_size
+    if not (0 <= neck_midpoint.x < width and 0 <= neck_midpoint.y < height):
+        return "outside_photo"
+    if neck_midpoint.y <= neck_midpoint.chin[1]:
+        return "neck_above_chin"
+    if debug is not None and debug.shoulder_y is not None:
+        if neck_midpoint.y >= debug.shoulder_y:
+            return "neck_below_shoulders"
+    return None
+
+
+def _has_mattes(portrait) -> bool:
+    """Whether *portrait* carries what the dual-mask detector needs."""
+    if portrait.skinmap is None or portrait.depthmap is None:
+        return False
+    depth = np.asarray(portrait.depthmap)
+    return bool(np.count_nonzero(depth) >= _MIN_VALID_DEPTH_FRACTION * depth.size)
+
+
+def _pose_variant(preset) -> PoseModelVariant:
+    if preset is None:
+        return PoseModelVariant.HEAVY
+    return get_analysis_preset(preset).pose_model_variant
+
+
+def route_neck_midpoint(
+    portrait: IOSPortrait,
+    router: NeckDetectorRouter | None = None,
+    session: PortraitInferenceSession | None = None,
+    preset: AnalysisPreset | str | None = None,
+    pose_hint: PortraitPose | None = None,
+    person_mask=_MISSING,
+    pose_result: tuple | None = None,
+) -> NeckRoute:
+    """Find the neck midpoint of *portrait* with a :class:`NeckDetectorRouter`.
+
+    Without a *router*, one with the default priors is used for this call
+    only, so the order depends on the portrait alone. *person_mask* and
+    *pose_result* are as for :meth:`NeckDetectorRouter.route`.
+    """
+    router = router if router is not None else NeckDetectorRouter()
+    return router.route(
+        portrait,
+        session=session,
+        preset=preset,
+        pose_hint=pose_hint,
+        person_mask=person_mask,
+        pose_result=pose_result,
+    )
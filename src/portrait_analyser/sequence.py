@@ -0,0 +1,209 @@
+"""Neck midpoint detection across burst / sequence captures.
+
+A capture session takes several consecutive portraits of one patient
+(neutral, open mouth, extended neck). Running :func:`detect_neck_midpoint`
+on each re-detects the face and body from scratch. Here FaceLandmarker and
+PoseLandmarker run in MediaPipe's VIDEO running mode instead: after the
+first frame they track the previous landmarks, which is much cheaper than a
+fresh detection::
+
+    with NeckMidpointTracker(model_variant="full") as tracker:
+        for timestamp_ms, photo in burst:
+            neck, pose_debug, face_mesh_debug = tracker.detect(photo, timestamp_ms)
+
+Each frame yields the same 3-tuple as :func:`detect_neck_midpoint`.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .diagnostics import DetectionDiagnostics
+from .frame import AnalysisFrame, _resolve_frame
+from .instrumentation import _traced, stage
+from .landmarks import Landmarks
+from .pose import (
+    FaceMeshAnalysis,
+    FaceMeshDebug,
+    MediaPipeDebug,
+    NeckMidpoint,
+    PoseModelVariant,
+    _analyse_face_mesh_landmarks,
+    _neck_midpoint_from_landmarks,
+)
+from .session import _create_face_landmarker, _create_pose_landmarker
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from PIL import Image
+
+# Spacing used when a sequence is given without capture timestamps.
+DEFAULT_FRAME_INTERVAL_MS = 100
+
+
+class NeckMidpointTracker:
+    """VIDEO-mode Face Mesh and Pose landmarkers for one capture session.
+
+    Frames must be passed in capture order with strictly increasing
+    timestamps. The tracker owns its landmarkers — VIDEO-mode tasks keep
+    per-stream state and cannot be shared with IMAGE-mode detection — so
+    close it (or use it as a context manager) when the session ends.
+    """
+
+    def __init__(
+        self,
+        interpolation_ratio: float = 0.35,
+        min_detection_confidence: float = 0.5,
+        min_visibility: float = 0.5,
+        min_tracking_confidence: float = 0.5,
+        model_variant: PoseModelVariant | str = PoseModelVariant.HEAVY,
+    ):
+        self.interpolation_ratio = interpolation_ratio
+        self.min_visibility = min_visibility
+        self._last_timestamp_ms: int | None = None
+        self._pose_landmarker = _create_pose_landmarker(
+            min_detection_confidence,
+            PoseModelVariant(model_variant),
+            video=True,
+            min_tracking_confidence=min_tracking_confidence,
+        )
+        # Face Mesh is optional, exactly as in detect_neck_midpoint().
+        try:
+            self._face_landmarker = _create_face_landmarker(
+                min_detection_confidence,
+                video=True,
+                min_tracking_confidence=min_tracking_confidence,
+            )
+        except Exception:
+            self._face_landmarker = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Release both landmarkers."""
+        for landmarker in (self._pose_landmarker, self._face_landmarker):
+            if landmarker is not None:
+                landmarker.close()
+        self._pose_landmarker = self._face_landmarker = None
+
+    def _detect_face_mesh(
+        self, mp_image, timestamp_ms: int, w: int, h: int
+    ) -> FaceMeshAnalysis | None:
+        if self._face_landmarker is None:
+            return None
+        try:
+            with stage("face_mesh"):
+                result = self._face_landmarker.detect_for_video(mp_image, timestamp_ms)
+            if not result.face_landmarks:
+                return None
+            return _analyse_face_mesh_landmarks(
+                Landmarks.from_normalized(result.face_landmarks[0], w, h)
+            )
+        except Exception:
+            return None
+
+    @_traced("neck_midpoint_tracker")
+    def detect(
+        self,
+        image: Image.Image,
+        timestamp_ms: int,
+        frame: AnalysisFrame | None = None,
+        diagnostics: DetectionDiagnostics | None = None,
+    ) -> tuple[NeckMidpoint | None, MediaPipeDebug | None, FaceMeshDebug | None]:
+        """Detect the neck midpoint in the next frame of the sequence.
+
+        Args:
+            image: PIL Image of the portrait.
+            timestamp_ms: Capture time in milliseconds; must be greater than
+                the previous frame's.
+            frame: Optional shared :class:`AnalysisFrame` of ``image``.
+            diagnostics: Optional :class:`DetectionDiagnostics` for this frame.
+
+        Returns:
+            3-tuple of (NeckMidpoint | None, MediaPipeDebug | None,
+            FaceMeshDebug | None), as from :func:`detect_neck_midpoint`.
+
+        Raises:
+            ValueError: If timestamps do not increase or the tracker is closed.
+        """
+        if self._pose_landmarker is None:
+            raise ValueError("NeckMidpointTracker is closed")
+        timestamp_ms = int(timestamp_ms)
+        if self._last_timestamp_ms is not None and timestamp_ms <= self._last_timestamp_ms:
+            raise ValueError(
+                f"timestamp_ms must increase: {timestamp_ms} <= {self._last_timestamp_ms}"
+            )
+        self._last_timestamp_ms = timestamp_ms
+
+        frame = _resolve_frame(image, frame)
+        w, h = frame.photo_width, frame.photo_height
+        mp_image = frame.mp_image()
+
+        face_mesh_result = self._detect_face_mesh(mp_image, timestamp_ms, w, h)
+        with stage("pose"):
+            result = self._pose_landmarker.detect_for_video(mp_image, timestamp_ms)
+        return _neck_midpoint_from_landmarks(
+            face_mesh_result,
+            result,
+            w,
+            h,
+            self.interpolation_ratio,
+            self.min_visibility,
+            diagnostics,
+        )
+
+
+def detect_neck_midpoint_sequence(
+    images: Iterable[Image.Image],
+    timestamps_ms: Sequence[int] | None = None,
+    interpolation_ratio: float = 0.35,
+    min_detection_confidence: float = 0.5,
+    min_visibility: float = 0.5,
+    min_tracking_confidence: float = 0.5,
+    model_variant: PoseModelVariant | str = PoseModelVariant.HEAVY,
+    frames: Sequence[AnalysisFrame] | None = None,
+) -> list[tuple[NeckMidpoint | None, MediaPipeDebug | None, FaceMeshDebug | None]]:
+    """Detect the neck midpoint in every frame of one capture sequence.
+
+    Args:
+        images: Consecutive portraits of one session, in capture order.
+        timestamps_ms: Capture times in milliseconds, strictly increasing.
+            Defaults to frames spaced ``DEFAULT_FRAME_INTERVAL_MS`` apart.
+        interpolation_ratio: See :func:`detect_neck_midpoint`.
+        min_detection_confidence: Detection threshold for the first frame
+            and for re-detection after tracking is lost.
+        min_visibility: Minimum shoulder visibility to accept a result.
+        min_tracking_confidence: Below this the landmarkers re-detect.
+        model_variant: PoseLandmarker size (lite/full/heavy).
+        frames: Optional analysis frames, one per image.
+
+    Returns:
+        One (NeckMidpoint | None, MediaPipeDebug | None, FaceMeshDebug | None)
+        tuple per image.
+    """
+    images = list(images)
+    if timestamps_ms is None:
+        timestamps_ms = [i * DEFAULT_FRAME_INTERVAL_MS for i in range(len(images))]
+    if len(timestamps_ms) != len(images):
+        raise ValueError("timestamps_ms must have one entry per image")
+    if frames is not None and len(frames) != len(images):
+        raise ValueError("frames must have one entry per image")
+
+    with NeckMidpointTracker(
+        interpolation_ratio=interpolation_ratio,
+        min_detection_confidence=min_detection_confidence,
+        min_visibility=min_visibility,
+        min_tracking_confidence=min_tracking_confidence,
+        model_variant=model_variant,
+    ) as tracker:
+        return [
+            tracker.detect(
+                image, timestamp_ms, frame=frames[i] if frames is not None else None
+            )
+            for i, (image, timestamp_ms) in enumerate(zip(images, timestamps_ms))
+        ]
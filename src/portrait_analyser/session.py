@@ -0,0 +1,212 @@
+"""Long-lived MediaPipe task instances shared across detection calls.
+
+Creating a MediaPipe task loads and initialises its model, which for the
+heavy PoseLandmarker alone costs hundreds of milliseconds. A
+:class:`PortraitInferenceSession` creates each detector lazily on first use
+and keeps it until :meth:`~PortraitInferenceSession.close`, so a worker
+process pays model load once instead of once per image::
+
+    with PortraitInferenceSession() as session:
+        for portrait in portraits:
+            detect_neck_midpoint(portrait.photo, session=session)
+
+Every detection function accepts ``session=None``; without one a temporary
+session is created and closed around the single call, as before.
+
+A session given a :class:`~portrait_analyser.detector_store.DetectorOutputStore`
+also reuses detector outputs across processes and runs: images it has
+already seen are answered from the store without loading any model.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+
+from .instrumentation import stage
+
+
+def _create_face_detector(min_detection_confidence: float):
+    import mediapipe as mp
+
+    from .face import _get_face_model_path
+
+    options = mp.tasks.vision.FaceDetectorOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=_get_face_model_path()),
+        min_detection_confidence=min_detection_confidence,
+    )
+    return mp.tasks.vision.FaceDetector.create_from_options(options)
+
+
+def _video_mode_options(mp, min_tracking_confidence):
+    """Extra landmarker options for VIDEO running mode (tracking)."""
+    return {
+        "running_mode": mp.tasks.vision.RunningMode.VIDEO,
+        "min_tracking_confidence": min_tracking_confidence,
+    }
+
+
+def _create_face_landmarker(
+    min_face_detection_confidence: float,
+    video: bool = False,
+    min_tracking_confidence: float = 0.5,
+):
+    import mediapipe as mp
+
+    from .pose import _get_face_mesh_model_path
+
+    options = mp.tasks.vision.FaceLandmarkerOptions(
+        base_options=mp.tasks.BaseOptions(
+            model_asset_path=_get_face_mesh_model_path()
+        ),
+        min_face_detection_confidence=min_face_detection_confidence,
+        num_faces=1,
+        **(_video_mode_options(mp, min_tracking_confidence) if video else {}),
+    )
+    return mp.tasks.vision.FaceLandmarker.create_from_options(options)
+
+
+def _create_pose_landmarker(
+    min_pose_detection_confidence: float,
+    model_variant,
+    video: bool = False,
+    min_tracking_confidence: float = 0.5,
+):
+    from .pose import _get_model_path
+
+    # Resolved first: it raises a helpful ImportError when mediapipe is missing.
+    model_path = _get_model_path(model_variant)
+
+    import mediapipe as mp
+
+    options = mp.tasks.vision.PoseLandmarkerOptions(
+        base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+        min_pose_detection_confidence=min_pose_detection_confidence,
+        num_poses=1,
+        **(_video_mode_options(mp, min_tracking_confidence) if video else {}),
+    )
+    return mp.tasks.vision.PoseLandmarker.create_from_options(options)
+
+
+def _create_image_segmenter():
+    import mediapipe as mp
+
+    from .extended_neck import _get_segmenter_model_path
+
+    options = mp.tasks.vision.ImageSegmenterOptions(
+        base_options=mp.tasks.BaseOptions(
+            model_asset_path=_get_segmenter_model_path()
+        ),
+        output_confidence_masks=True,
+        output_category_mask=False,
+    )
+    return mp.tasks.vision.ImageSegmenter.create_from_options(options)
+
+
+class PortraitInferenceSession:
+    """Owns lazily created, reusable MediaPipe detectors.
+
+    Detectors are cached per kind and option set, e.g. two different
+    ``min_detection_confidence`` values yield two PoseLandmarker instances.
+    Creation is serialised by a lock so the session may be shared between
+    threads; a single detector instance should still only be used by one
+    thread at a time.
+
+    With a *detector_store*, the FaceDetector, FaceLandmarker and
+    PoseLandmarker accessors return
+    :class:`~portrait_analyser.detector_store.StoredDetector` stand-ins
+    that only create the real detector when the store misses.
+    """
+
+    def __init__(self, detector_store=None):
+        self.detector_store = detector_store
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get(self, key, factory, *args):
+        with self._lock:
+            instance = self._instances.get(key)
+            if instance is None:
+                with stage("model_load"):
+                    instance = factory(*args)
+                self._instances[key] = instance
+        return instance
+
+    def _stored(self, key, model_paths, factory, *args):
+        """The detector for *key*, behind the detector store if there is one."""
+        if self.detector_store is None:
+            return self._get(key, factory, *args)
+        return self.detector_store.detector(
+            key[0], key[1:], model_paths(), lambda: self._get(key, factory, *args)
+        )
+
+    def face_detector(self, min_detection_confidence: float = 0.5):
+        """BlazeFace short-range FaceDetector."""
+        from .face import _get_face_model_path
+
+        return self._stored(
+            ("face_detector", min_detection_confidence),
+            lambda: [_get_face_model_path()],
+            _create_face_detector,
+            min_detection_confidence,
+        )
+
+    def face_landmarker(self, min_face_detection_confidence: float = 0.5):
+        """478-point FaceLandmarker (Face Mesh), single face."""
+        from .pose import _get_face_mesh_model_path
+
+        return self._stored(
+            ("face_landmarker", min_face_detection_confidence),
+            lambda: [_get_face_mesh_model_path()],
+            _create_face_landmarker,
+            min_face_detection_confidence,
+        )
+
+    def pose_landmarker(
+        self,
+        min_pose_detection_confidence: float = 0.5,
+        model_variant="heavy",
+    ):
+        """33-point PoseLandmarker, single pose.
+
+        ``model_variant`` is a :class:`~portrait_analyser.pose.PoseModelVariant`
+        or its value (``"lite"``, ``"full"`` or ``"heavy"``).
+        """
+        from .pose import PoseModelVariant, _get_model_path
+
+        variant = PoseModelVariant(model_variant)
+        return self._stored(
+            ("pose_landmarker", min_pose_detection_confidence, variant),
+            lambda: [_get_model_path(variant)],
+            _create_pose_landmarker,
+            min_pose_detection_confidence,
+            variant,
+        )
+
+    def image_segmenter(self):
+        """Selfie ImageSegmenter producing confidence masks."""
+        return self._get(("image_segmenter",), _create_image_segmenter)
+
+    def close(self):
+        """Close every detector created so far; the session stays usable."""
+        with self._lock:
+            instances = list(self._instances.values())
+            self._instances.clear()
+        for instance in instances:
+            instance.close()
+
+
+@contextmanager
+def _session_scope(session: PortraitInferenceSession | None):
+    """Yield ``session``, or a temporary one closed when the scope exits."""
+    if session is not None:
+        yield session
+        return
+    with PortraitInferenceSession() as temporary:
+        yield temporary
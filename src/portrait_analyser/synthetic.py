@@ -0,0 +1,389 @@
+"""Deterministic synthetic portraits with analytically known geometry.
+
+The bundled HEIC fixtures are too few, and too small, to benchmark scaling
+or to check accuracy against ground truth. :func:`generate_synthetic_portrait`
+ray-casts a simple scene at any resolution and returns it as an
+:class:`~portrait_analyser.ios.IOSPortrait` plus the exact geometry it was
+built from::
+
+    portrait, truth = generate_synthetic_portrait(megapixels=12)
+    truth.neck_circumference_mm  # 380.0
+    truth.incisal_gap_3d_mm      # exact 3D distance between incisal edges
+
+The scene, in camera millimetres (x right, y down, z away from the camera):
+
+- an ellipsoidal head with a hair cap above the hairline and, at the mouth,
+  upper and lower incisor bands separated by a known incisal gap,
+- a vertical cylindrical neck of known circumference,
+- an elliptic-cylinder torso below the shoulders, covered by clothing.
+
+The camera is a pinhole with the principal point at the image centre. Its
+focal length is taken from the library's TrueDepth calibration at the
+subject distance and scaled with the image height, so at
+``REFERENCE_PHOTO_SIZE`` :func:`~portrait_analyser.incisor.pixel_to_mm`
+recovers scene millimetres to within about 1%. At other resolutions the
+library's pixel thresholds and calibration (fitted at the reference size)
+apply unchanged, exactly as they would to a real photo of that size.
+
+The depth map stores disparity between ``FloatMinValue`` (background) and
+``FloatMaxValue`` (nearest point) as 8-bit values, like the iOS files that
+:func:`~portrait_analyser.ios.load_image` reads. Nothing is random: the same
+arguments always produce identical images.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+from .incisor import (
+    MAX_CALIBRATED_DISTANCE_CM,
+    MIN_CALIBRATED_DISTANCE_CM,
+    pixels_per_mm_at_distance,
+)
+from .ios import IOSPortrait, _analyse_teethmap
+
+# Photo size the depth calibration was fitted at (iPhone TrueDepth portrait).
+REFERENCE_PHOTO_SIZE = (2320, 3087)
+# Depth maps are 640 px on the long side regardless of the photo size.
+DEPTH_MAP_HEIGHT = 640
+
+# Rows rendered per pass, bounding peak memory at 48 MP.
+_CHUNK_ROWS = 256
+
+_BACKGROUND, _HEAD, _NECK, _TORSO = 0, 1, 2, 3
+_COLOURS = {
+    "background": (205, 205, 200),
+    "skin": (224, 172, 140),
+    "hair": (62, 44, 32),
+    "clothing": (40, 70, 140),
+    "teeth": (245, 243, 232),
+    "mouth": (96, 28, 36),
+}
+
+
+@dataclass(frozen=True)
+class SyntheticSubject:
+    """Scene geometry in millimetres; the defaults model an adult at 45 cm."""
+
+    # Camera to neck axis.
+    distance_mm: float = 450.0
+    # Head ellipsoid semi-axes (half width, half height, half depth).
+    head_semi_axes_mm: tuple[float, float, float] = (75.0, 110.0, 95.0)
+    head_center_y_mm: float = -120.0
+    # How far the head centre sits in front of the neck axis.
+    head_forward_mm: float = 10.0
+    neck_circumference_mm: float = 380.0
+    neck_top_y_mm: float = -60.0
+    shoulder_y_mm: float = 90.0
+    # Torso elliptic cylinder semi-axes (half width, half depth).
+    torso_semi_axes_mm: tuple[float, float] = (190.0, 110.0)
+    torso_behind_neck_mm: float = 30.0
+    # Head points above head_center_y - hairline_fraction * b are hair.
+    hairline_fraction: float = 0.4
+    mouth_y_mm: float = -54.0
+    incisal_gap_mm: float = 25.0
+    tooth_height_mm: float = 10.0
+    teeth_width_mm: float = 36.0
+    background_distance_mm: float = 2000.0
+
+    def __post_init__(self):
+        distance_cm = self.distance_mm / 10
+        if not MIN_CALIBRATED_DISTANCE_CM <= distance_cm <= MAX_CALIBRATED_DISTANCE_CM:
+            raise ValueError(
+                "distance_mm must be within the calibrated "
+                f"{MIN_CALIBRATED_DISTANCE_CM * 10:g}-{MAX_CALIBRATED_DISTANCE_CM * 10:g} mm"
+            )
+        sizes = (
+            *self.head_semi_axes_mm,
+            *self.torso_semi_axes_mm,
+            self.neck_circumference_mm,
+            self.tooth_height_mm,
+            self.teeth_width_mm,
+        )
+        if min(sizes) <= 0:
+            raise ValueError("sizes must be positive")
+        if self.incisal_gap_mm < 0:
+            raise ValueError("incisal_gap_mm must not be negative")
+        if self.background_distance_mm <= self.distance_mm + self.torso_behind_neck_mm:
+            raise ValueError("background_distance_mm must be behind the subject")
+
+    @property
+    def neck_radius_mm(self) -> float:
+        return self.neck_circumference_mm / (2 * math.pi)
+
+    @property
+    def head_center_mm(self) -> tuple[float, float, float]:
+        return (0.0, self.head_center_y_mm, self.distance_mm - self.head_forward_mm)
+
+    def head_front_z_mm(self, y_mm: float) -> float:
+        """Depth of the head's front surface on the midline at height *y_mm*."""
+        _, b, c = self.head_semi_axes_mm
+        _, yc, zc = self.head_center_mm
+        return zc - c * math.sqrt(max(0.0, 1 - ((y_mm - yc) / b) ** 2))
+
+
+@dataclass(frozen=True)
+class SyntheticGeometry:
+    """Ground truth of one generated portrait."""
+
+    subject: SyntheticSubject
+    photo_size: tuple[int, int]
+    depth_size: tuple[int, int]
+    focal_length_px: float
+    float_min: float
+    float_max: float
+    neck_circumference_mm: float
+    # Midline points on the facing incisal edges, camera mm and photo px.
+    upper_incisal_edge_mm: tuple[float, float, float]
+    lower_incisal_edge_mm: tuple[float, float, float]
+    upper_incisal_edge_px: tuple[float, float]
+    lower_incisal_edge_px: tuple[float, float]
+    incisal_gap_3d_mm: float
+
+    def project(self, point_mm: tuple[float, float, float]) -> tuple[float, float]:
+        """Photo pixel coordinates of a camera-space point."""
+        return _project(point_mm, self.photo_size, self.focal_length_px)
+
+    @property
+    def face_location(self) -> tuple[int, int, int, int]:
+        """Photo-space ``(x, y, w, h)`` bounding box of the head silhouette."""
+        a, b, c = self.subject.head_semi_axes_mm
+        _, yc, zc = self.subject.head_center_mm
+        # Slopes s of the planes x = s z and y = s z through the camera that
+        # touch the ellipsoid: (n . centre)^2 = sum((n_i * axis_i)^2).
+        k = zc**2 - c**2
+        half_width = a / math.sqrt(k)
+        root = math.sqrt((yc * zc) ** 2 - k * (yc**2 - b**2))
+        top, bottom = (yc * zc - root) / k, (yc * zc + root) / k
+        f = self.focal_length_px
+        width, height = self.photo_size
+        return (
+            round(width / 2 - f * half_width),
+            round(height / 2 + f * top),
+            round(2 * f * half_width),
+            round(f * (bottom - top)),
+        )
+
+    def encode_depth(self, z_mm):
+        """Raw 8-bit disparity value(s) for depth(s) *z_mm*, as in the map."""
+        disparity = 1000.0 / np.asarray(z_mm, dtype=np.float64)
+        raw = 255 * (disparity - self.float_min) / (self.float_max - self.float_min)
+        return np.clip(np.rint(raw), 0, 255).astype(np.uint8)
+
+
+def photo_size_for_megapixels(megapixels: float) -> tuple[int, int]:
+    """Portrait (3:4) photo size with roughly *megapixels* million pixels."""
+    if megapixels <= 0:
+        raise ValueError("megapixels must be positive")
+    width = round(math.sqrt(megapixels * 1e6 * 3 / 4))
+    return width, round(width * 4 / 3)
+
+
+def _project(point_mm, photo_size, focal_length_px):
+    x, y, z = point_mm
+    width, height = photo_size
+    return (width / 2 + focal_length_px * x / z, height / 2 + focal_length_px * y / z)
+
+
+def _front_hit(a, b, c):
+    """Nearest root of ``a t^2 - 2 b t + c = 0``; inf where the ray misses."""
+    disc = b * b - a * c
+    hit = disc >= 0
+    t = np.full(np.broadcast(a, b, c).shape, np.inf)
+    root = (b - np.sqrt(np.where(hit, disc, 0.0))) / a
+    t[hit] = np.broadcast_to(root, t.shape)[hit]
+    return t
+
+
+class _Scene:
+    def __init__(self, subject: SyntheticSubject, photo_size, focal_length_px):
+        self.subject = subject
+        self.cx = photo_size[0] / 2
+        self.cy = photo_size[1] / 2
+        self.f = focal_length_px
+
+    def cast(self, u, v):
+        """Depth (mm, inf for background), object label and head hit x/y.
+
+        *u* is a ``(1, W)`` array of photo columns and *v* an ``(H, 1)``
+        array of photo rows.
+        """
+        with np.errstate(invalid="ignore"):
+            return self._cast(u, v)
+
+    def _cast(self, u, v):
+        # Rays that miss carry t = inf, and 0 * inf is NaN: compare false.
+        s = self.subject
+        dx = (u - self.cx) / self.f
+        dy = (v - self.cy) / self.f
+
+        # Torso: (t dx / ax)^2 + ((t - zc) / az)^2 = 1, below the shoulders.
+        ax, az = s.torso_semi_axes_mm
+        zc = s.distance_mm + s.torso_behind_neck_mm
+        t_torso = _front_hit(
+            (dx / ax) ** 2 + 1 / az**2, zc / az**2, (zc / az) ** 2 - 1
+        )
+        t_torso = np.where(dy * t_torso >= s.shoulder_y_mm, t_torso, np.inf)
+
+        # Neck: circular cylinder around the vertical axis at distance_mm.
+        r = s.neck_radius_mm
+        zc = s.distance_mm
+        t_neck = _front_hit(dx**2 + 1, zc, zc**2 - r**2)
+        y_neck = dy * t_neck
+        t_neck = np.where(
+            (y_neck >= s.neck_top_y_mm) & (y_neck <= s.shoulder_y_mm + r),
+            t_neck,
+            np.inf,
+        )
+
+        # Head ellipsoid.
+        a, b, c = s.head_semi_axes_mm
+        _, yc, zc = s.head_center_mm
+        t_head = _front_hit(
+            (dx / a) ** 2 + (dy / b) ** 2 + 1 / c**2,
+            dy * yc / b**2 + zc / c**2,
+            (yc / b) ** 2 + (zc / c) ** 2 - 1,
+        )
+
+        depth = np.minimum(np.minimum(t_torso, t_neck), t_head)
+        label = np.full(depth.shape, _BACKGROUND, dtype=np.uint8)
+        label[np.isfinite(depth) & (depth == t_torso)] = _TORSO
+        label[np.isfinite(depth) & (depth == t_neck)] = _NECK
+        label[np.isfinite(depth) & (depth == t_head)] = _HEAD
+        head = label == _HEAD
+        head_x = np.where(head, dx * depth, np.nan)
+        head_y = np.where(head, dy * depth, np.nan)
+        return depth, label, head_x, head_y
+
+    def head_regions(self, head_x, head_y):
+        """Hair, upper/lower teeth and open-mouth masks on the head surface."""
+        s = self.subject
+        _, b, _ = s.head_semi_axes_mm
+        with np.errstate(invalid="ignore"):
+            hair = head_y < s.head_center_y_mm - s.hairline_fraction * b
+            in_mouth = np.abs(head_x) <= s.teeth_width_mm / 2
+            upper_edge = s.mouth_y_mm - s.incisal_gap_mm / 2
+            lower_edge = s.mouth_y_mm + s.incisal_gap_mm / 2
+            upper = in_mouth & (head_y >= upper_edge - s.tooth_height_mm)
+            upper &= head_y < upper_edge
+            lower = in_mouth & (head_y > lower_edge)
+            lower &= head_y <= lower_edge + s.tooth_height_mm
+            gap = in_mouth & (head_y >= upper_edge) & (head_y <= lower_edge)
+        return hair, upper | lower, gap
+
+
+def generate_synthetic_portrait(
+    megapixels: float = 12.0,
+    subject: SyntheticSubject | None = None,
+    photo_size: tuple[int, int] | None = None,
+    analyse_teeth: bool = False,
+) -> tuple[IOSPortrait, SyntheticGeometry]:
+    """Render a synthetic portrait and its ground truth.
+
+    Args:
+        megapixels: Photo resolution as a 3:4 portrait; ignored when
+            *photo_size* is given.
+        subject: Scene geometry; defaults to :class:`SyntheticSubject`.
+        photo_size: Explicit ``(width, height)`` of the photo.
+        analyse_teeth: Run the teeth bounding box and incisor measurement
+            that :func:`~portrait_analyser.ios.load_image` performs, filling
+            ``teeth_bbox`` and ``incisor_measurement``. Off by default: the
+            bounding box scan is slow at high resolutions.
+
+    Returns:
+        ``(IOSPortrait, SyntheticGeometry)``. The portrait holds an RGB
+        photo, an 8-bit disparity depth map and photo-size teeth, skin and
+        hair mattes (0 or 255).
+    """
+    subject = subject or SyntheticSubject()
+    width, height = photo_size or photo_size_for_megapixels(megapixels)
+    depth_width = max(2, round(DEPTH_MAP_HEIGHT * width / height))
+    depth_size = (depth_width, DEPTH_MAP_HEIGHT)
+
+    reference_focal = subject.distance_mm * pixels_per_mm_at_distance(
+        subject.distance_mm / 10
+    )
+    focal_length_px = reference_focal * height / REFERENCE_PHOTO_SIZE[1]
+    scene = _Scene(subject, (width, height), focal_length_px)
+
+    photo = np.empty((height, width, 3), dtype=np.uint8)
+    teeth = np.zeros((height, width), dtype=np.uint8)
+    skin = np.zeros((height, width), dtype=np.uint8)
+    hair = np.zeros((height, width), dtype=np.uint8)
+    u = np.arange(width, dtype=np.float64)[None, :]
+    for top in range(0, height, _CHUNK_ROWS):
+        rows = slice(top, min(top + _CHUNK_ROWS, height))
+        v = np.arange(rows.start, rows.stop, dtype=np.float64)[:, None]
+        _, label, head_x, head_y = scene.cast(u, v)
+        is_hair, is_teeth, is_gap = scene.head_regions(head_x, head_y)
+        is_skin = ((label == _HEAD) | (label == _NECK)) & ~(is_hair | is_teeth | is_gap)
+
+        chunk = photo[rows]
+        chunk[:] = _COLOURS["background"]
+        chunk[label == _TORSO] = _COLOURS["clothing"]
+        chunk[is_skin] = _COLOURS["skin"]
+        chunk[is_hair] = _COLOURS["hair"]
+        chunk[is_gap] = _COLOURS["mouth"]
+        chunk[is_teeth] = _COLOURS["teeth"]
+        teeth[rows][is_teeth] = 255
+        skin[rows][is_skin] = 255
+        hair[rows][is_hair] = 255
+
+    # Depth pixel centres map to photo pixels the way sample_depth_at_point
+    # maps them back: the first and last pixels of both grids coincide.
+    u = np.linspace(0, width - 1, depth_width)[None, :]
+    v = np.linspace(0, height - 1, DEPTH_MAP_HEIGHT)[:, None]
+    depth_mm = scene.cast(u, v)[0]
+    nearest_mm = float(depth_mm[np.isfinite(depth_mm)].min())
+    float_min = 1000.0 / subject.background_distance_mm
+    float_max = 1000.0 / (nearest_mm - 20.0)
+
+    upper_y = subject.mouth_y_mm - subject.incisal_gap_mm / 2
+    lower_y = subject.mouth_y_mm + subject.incisal_gap_mm / 2
+    upper_mm = (0.0, upper_y, subject.head_front_z_mm(upper_y))
+    lower_mm = (0.0, lower_y, subject.head_front_z_mm(lower_y))
+    truth = SyntheticGeometry(
+        subject=subject,
+        photo_size=(width, height),
+        depth_size=depth_size,
+        focal_length_px=focal_length_px,
+        float_min=float_min,
+        float_max=float_max,
+        neck_circumference_mm=subject.neck_circumference_mm,
+        upper_incisal_edge_mm=upper_mm,
+        lower_incisal_edge_mm=lower_mm,
+        upper_incisal_edge_px=_project(upper_mm, (width, height), focal_length_px),
+        lower_incisal_edge_px=_project(lower_mm, (width, height), focal_length_px),
+        incisal_gap_3d_mm=math.dist(upper_mm, lower_mm),
+    )
+    depth_raw = np.where(np.isfinite(depth_mm), truth.encode_depth(depth_mm), 0)
+
+    depthmap = Image.fromarray(depth_raw.astype(np.uint8), mode="L")
+    teethmap = Image.fromarray(teeth, mode="L")
+    teeth_results = (None, None, None, None)
+    if analyse_teeth:
+        teeth_results = _analyse_teethmap(
+            teethmap, depthmap, float_min, float_max, (width, height)
+        )
+    teeth_bbox, incisor_distance, incisor_distance_3d_mm, incisor_measurement = (
+        teeth_results
+    )
+    portrait = IOSPortrait(
+        photo=Image.fromarray(photo, mode="RGB"),
+        depthmap=depthmap,
+        teethmap=teethmap,
+        skinmap=Image.fromarray(skin, mode="L"),
+        hairmap=Image.fromarray(hair, mode="L"),
+        floatValueMin=float_min,
+        floatValueMax=float_max,
+        teeth_bbox=teeth_bbox,
+        incisor_distance=incisor_distance,
+        incisor_distance_3d_mm=incisor_distance_3d_mm,
+        incisor_measurement=incisor_measurement,
+    )
+    return portrait, truth
+
@@ -0,0 +1,99 @@
+"""Compare two pytest-benchmark JSON reports and flag regressions.
+
+Usage::
+
+    python tests/compare_benchmarks.py baseline.json current.json \
+        [--tolerance 0.10] [--stat median]
+
+A benchmark regresses when its statistic grows by more than *tolerance*
+(a fraction of the baseline value). Exits with status 1 if any benchmark
+regressed, so the command can gate CI.
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Comparison:
+    name: str
+    baseline: float | None
+    current: float | None
+    status: str  # ok, faster, REGRESSION, new or missing
+
+    @property
+    def change(self) -> float | None:
+        if self.baseline is None or self.current is None or not self.baseline:
+            return None
+        return self.current / self.baseline - 1
+
+
+def load_report(path, stat="median") -> dict[str, float]:
+    """Map each benchmark's full name to *stat* (seconds)."""
+    with open(path) as f:
+        report = json.load(f)
+    return {bench["fullname"]: bench["stats"][stat] for bench in report["benchmarks"]}
+
+
+def compare(
+    baseline: dict[str, float], current: dict[str, float], tolerance: float
+) -> list[Comparison]:
+    rows = []
+    for name in sorted(baseline.keys() | current.keys()):
+        before, after = baseline.get(name), current.get(name)
+        if before is None:
+            status = "new"
+        elif after is None:
+            status = "missing"
+        elif after > before * (1 + tolerance):
+            status = "REGRESSION"
+        elif after < before * (1 - tolerance):
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append(Comparison(name, before, after, status))
+    return rows
+
+
+def _ms(value):
+    return "-" if value is None else f"{value * 1000:.3f}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", help="pytest-benchmark JSON of the baseline run")
+    parser.add_argument("current", help="pytest-benchmark JSON of the run to check")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="allowed slowdown as a fraction of the baseline (default: 0.10)",
+    )
+    parser.add_argument(
+        "--stat",
+        default="median",
+        choices=["min", "max", "mean", "median"],
+        help="statistic to compare (default: median)",
+    )
+    args = parser.parse_args(argv)
+
+    rows = compare(
+        load_report(args.baseline, args.stat),
+        load_report(args.current, args.stat),
+        args.tolerance,
+    )
+    width = max([len(row.name) for row in rows] + [9])
+    print(f"{'benchmark':<{width}}  {'base ms':>10}  {'now ms':>10}  {'change':>8}  status")
+    for row in rows:
+        change = "-" if row.change is None else f"{row.change:+.1%}"
+        print(
+            f"{row.name:<{width}}  {_ms(row.baseline):>10}  {_ms(row.current):>10}"
+            f"  {change:>8}  {row.status}"
+        )
+    return 1 if any(row.status == "REGRESSION" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,9 @@ from pathlib import Path
 
 import pytest
 
+from portrait_analyser.pose import FaceMeshDebug, NeckMidpoint, PortraitPose
+from portrait_analyser.synthetic import generate_synthetic_portrait
+
 
 @pytest.fixture
 def heic_image_path():
@@ -21,3 +24,70 @@ def jpeg_no_depth_data_path():
 def jpeg_depth_data_path():
     return Path(__file__).parent / "jpeg_depth_data.jpg"
 
+
+@pytest.fixture(scope="module")
+def synthetic():
+    """1 MP generated portrait and its ground truth."""
+    return generate_synthetic_portrait(1)
+
+
+@pytest.fixture
+def detections(synthetic):
+    """detect_neck_midpoint() result placed on the synthetic subject."""
+    _, truth = synthetic
+    subject = truth.subject
+    chin = truth.project((0.0, -12.0, subject.distance_mm - 80))
+    nose = truth.project((0.0, -110.0, subject.distance_mm - 110))
+    neck = truth.project((0.0, 40.0, subject.distance_mm - subject.neck_radius_mm))
+    midpoint = NeckMidpoint(
+        nose=nose,
+        mouth_left=(nose[0] - 30, chin[1] - 60),
+        mouth_right=(nose[0] + 30, chin[1] - 60),
+        chin=chin,
+        neck_extended=False,
+        face_flatness_ratio=None,
+        pose=PortraitPose.OPEN_MOUTH,
+        mouth_open_ratio=0.5,
+        x=neck[0],
+        y=neck[1],
+    )
+    landmarks = [nose] * 478
+    landmarks[0] = truth.upper_incisal_edge_px
+    landmarks[17] = truth.lower_incisal_edge_px
+    landmarks[1] = truth.project((-60.0, -200.0, subject.distance_mm))
+    landmarks[2] = chin
+    return midpoint, None, FaceMeshDebug(landmarks)
+
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmarks",
+        action="store_true",
+        default=False,
+        help="run only the performance benchmarks (tests marked 'perf'); "
+        "requires pytest-benchmark",
+    )
+
+
+def pytest_configure(config):
+    if config.getoption("--benchmarks") and not config.pluginmanager.hasplugin(
+        "benchmark"
+    ):
+        raise pytest.UsageError(
+            "--benchmarks requires pytest-benchmark (uv sync --group benchmark)"
+        )
+
+
+def pytest_collection_modifyitems(config, items):
+    # Benchmarks and correctness tests never run together: the default run
+    # deselects the 'perf' suite and --benchmarks selects only it.
+    run_benchmarks = config.getoption("--benchmarks")
+    selected = []
+    deselected = []
+    for item in items:
+        is_benchmark = item.get_closest_marker("perf") is not None
+        (selected if is_benchmark == run_benchmarks else deselected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
@@ -0,0 +1,356 @@
+"""Tests for batch analysis and the ``analyse-portrait batch`` subcommand."""
+
+import csv
+import io
+import json
+import os
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import patch
+
+import pytest
+
+from portrait_analyser.__main__ import main
+from portrait_analyser.batch import (
+    BatchManifest,
+    BatchOptions,
+    _Progress,
+    analyse_file,
+    find_portraits,
+    run_batch,
+)
+
+
+@pytest.fixture
+def patched_pipeline(synthetic, detections):
+    portrait, _ = synthetic
+    with (
+        patch("portrait_analyser.batch.load_image", return_value=portrait),
+        patch(
+            "portrait_analyser.pipeline.detect_neck_midpoint", return_value=detections
+        ) as detect,
+    ):
+        yield detect
+
+
+class _CrashingPool:
+    """In-process stand-in for the worker process pool.
+
+    The worker "dies" on files named ``crash*``: their future fails with
+    BrokenProcessPool and the pool refuses any further work.
+    """
+
+    created = 0
+
+    def __init__(self, max_workers, **kwargs):
+        type(self).created += 1
+        self.broken = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, path, options):
+        if self.broken:
+            raise BrokenProcessPool("the pool is not running anymore")
+        future = Future()
+        if os.path.basename(path).startswith("crash"):
+            self.broken = True
+            future.set_exception(BrokenProcessPool("a worker process died"))
+        else:
+            future.set_result(fn(path, options))
+        return future
+
+
+class TestFindPortraits:
+    def test_directories_globs_and_files(self, tmp_path):
+        nested = tmp_path / "a" / "b"
+        nested.mkdir(parents=True)
+        for name in ("a/one.heic", "a/b/two.HEIF", "a/notes.txt", "three.heic"):
+            (tmp_path / name).touch()
+
+        found = find_portraits(
+            [tmp_path / "a", str(tmp_path / "*.heic"), str(tmp_path / "a/one.heic")]
+        )
+        assert found == sorted(
+            [
+                str(tmp_path / "a" / "b" / "two.HEIF"),
+                str(tmp_path / "a" / "one.heic"),
+                str(tmp_path / "three.heic"),
+            ]
+        )
+
+
+class TestBatchOptions:
+    def test_columns_follow_measurements(self):
+        options = BatchOptions(("mouth", "incisor", "mouth"))
+        assert options.measurements == ("mouth", "incisor")
+        assert options.columns[:2] == ("path", "status")
+        assert options.columns[-5:] == (
+            "mouth_distance_3d_mm",
+            "incisor_distance_3d_mm",
+            "incisor_pixel_distance_y",
+            "incisor_upper_distance_cm",
+            "incisor_lower_distance_cm",
+        )
+
+    def test_rejects_unknown_measurement(self):
+        with pytest.raises(ValueError, match="volume"):
+            BatchOptions(("volume",))
+
+    def test_preset_by_name(self):
+        assert BatchOptions(preset="fast").preset.name == "fast"
+
+
+class TestAnalyseFile:
+    def test_all_measurements(self, patched_pipeline, synthetic):
+        row = analyse_file("synthetic.heic")
+        _, truth = synthetic
+
+        assert row["status"] == "ok"
+        assert (row["photo_width"], row["photo_height"]) == truth.photo_size
+        assert row["tmd_mm"] > 0
+        assert row["mouth_distance_3d_mm"] > 0
+        assert row["neck_circumference_mm"] > 0
+        assert row["neck_midpoint_y"] == pytest.approx(
+            patched_pipeline.return_value[0].y
+        )
+        # Landmarks are detected once for neck, TMD and mouth together.
+        assert patched_pipeline.call_count == 1
+
+    def test_incisor_only_skips_landmarks(self, patched_pipeline):
+        row = analyse_file("synthetic.heic", BatchOptions(("incisor",)))
+        assert row["status"] == "ok"
+        assert "tmd_mm" not in row
+        patched_pipeline.assert_not_called()
+
+    def test_failed_measurement_keeps_the_others(self, patched_pipeline):
+        with patch(
+            "portrait_analyser.pipeline.compute_tmd_3d", side_effect=RuntimeError("boom")
+        ):
+            row = analyse_file("synthetic.heic")
+
+        assert (row["status"], row["error_stage"], row["error_type"]) == (
+            "error",
+            "tmd",
+            "RuntimeError",
+        )
+        assert row["error_message"] == "boom"
+        assert row["mouth_distance_3d_mm"] > 0
+
+    def test_failed_landmarks_keep_the_neck(self, patched_pipeline):
+        patched_pipeline.side_effect = ImportError("mediapipe is required")
+        row = analyse_file("synthetic.heic")
+
+        assert (row["status"], row["error_stage"]) == ("error", "landmarks")
+        assert row["neck_circumference_mm"] > 0
+        assert row["tmd_mm"] is None and row["mouth_distance_3d_mm"] is None
+
+    def test_load_failure(self, tmp_path):
+        row = analyse_file(str(tmp_path / "photo.jpg"))
+        assert (row["status"], row["error_stage"], row["error_type"]) == (
+            "error",
+            "load",
+            "UnknownExtension",
+        )
+        assert row["photo_width"] is None and row["elapsed_s"] >= 0
+
+
+class TestRunBatch:
+    @pytest.fixture
+    def bad_files(self, tmp_path):
+        paths = [tmp_path / "one.jpg", tmp_path / "two.jpg"]
+        for path in paths:
+            path.touch()
+        return [str(path) for path in paths]
+
+    def test_csv(self, bad_files, tmp_path):
+        output = tmp_path / "results.csv"
+        counts = run_batch(bad_files, output, ["incisor"], workers=1, progress=False)
+
+        assert counts == {"ok": 0, "error": 2, "skipped": 0}
+        with open(output, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["path"] for row in rows] == bad_files
+        assert {row["error_type"] for row in rows} == {"UnknownExtension"}
+        assert list(rows[0])[-1] == "incisor_lower_distance_cm"
+
+    def test_jsonl_on_a_process_pool(self, bad_files, tmp_path):
+        output = tmp_path / "results.jsonl"
+        run_batch(bad_files, output, ["incisor"], workers=2, progress=False)
+
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        assert sorted(row["path"] for row in rows) == bad_files
+        assert {row["status"] for row in rows} == {"error"}
+
+    def test_dead_worker_does_not_stop_the_batch(self, tmp_path):
+        paths = [
+            str(tmp_path / name)
+            for name in ("one.heic", "crash.heic", "two.heic", "three.heic")
+        ]
+        output = tmp_path / "results.jsonl"
+        _CrashingPool.created = 0
+        with (
+            patch("portrait_analyser.batch.ProcessPoolExecutor", _CrashingPool),
+            patch("portrait_analyser.batch.preload_models"),
+            patch(
+                "portrait_analyser.batch._analyse_in_worker",
+                side_effect=lambda path, options: {"path": path, "status": "ok"},
+            ),
+        ):
+            counts = run_batch(paths, output, ["incisor"], workers=2, progress=False)
+
+        assert counts == {"ok": 3, "error": 1, "skipped": 0}
+        rows = {
+            row["path"]: row
+            for row in map(json.loads, output.read_text().splitlines())
+        }
+        assert sorted(rows) == sorted(paths)
+        crashed = rows[paths[1]]
+        assert (crashed["error_stage"], crashed["error_type"]) == (
+            "worker",
+            "BrokenProcessPool",
+        )
+        # The first pool, the crashed file rerun on its own, then the rest.
+        assert _CrashingPool.created == 3
+
+    def test_parquet(self, bad_files, tmp_path):
+        parquet = pytest.importorskip("pyarrow.parquet")
+        output = tmp_path / "results.parquet"
+        run_batch(bad_files, output, ["neck"], workers=1, progress=False)
+
+        table = parquet.read_table(output)
+        assert table.num_rows == 2
+        assert str(table.schema.field("neck_circumference_mm").type) == "double"
+        assert str(table.schema.field("photo_width").type) == "int64"
+
+    def test_rejects_unknown_format(self, bad_files, tmp_path):
+        with pytest.raises(ValueError, match="xlsx"):
+            run_batch(bad_files, tmp_path / "out", output_format="xlsx")
+
+
+class TestManifest:
+    @pytest.fixture
+    def files(self, tmp_path):
+        paths = []
+        for name in ("one.heic", "two.heic"):
+            path = tmp_path / name
+            path.write_bytes(name.encode())
+            paths.append(str(path))
+        return paths
+
+    def _run(self, files, tmp_path, measurements=("incisor",)):
+        output = tmp_path / "results.jsonl"
+        counts = run_batch(
+            files,
+            output,
+            measurements,
+            workers=1,
+            progress=False,
+            manifest=tmp_path / "manifest.jsonl",
+        )
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        return counts, rows
+
+    def test_rerun_skips_completed_files(self, patched_pipeline, files, tmp_path):
+        counts, _ = self._run(files, tmp_path)
+        assert counts == {"ok": 2, "error": 0, "skipped": 0}
+
+        with patch("portrait_analyser.batch.load_image") as load:
+            counts, rows = self._run(files, tmp_path)
+        load.assert_not_called()
+        assert counts == {"ok": 0, "error": 0, "skipped": 2}
+        assert sorted(row["path"] for row in rows) == files
+        assert {row["photo_width"] for row in rows} == {866}
+
+    def test_retries_only_failures(self, synthetic, files, tmp_path):
+        portrait, _ = synthetic
+
+        def flaky(path, use_exif=True):
+            if path.endswith("two.heic"):
+                raise OSError("disk hiccup")
+            return portrait
+
+        with patch("portrait_analyser.batch.load_image", side_effect=flaky):
+            assert self._run(files, tmp_path)[0]["error"] == 1
+        with patch(
+            "portrait_analyser.batch.load_image", return_value=portrait
+        ) as load:
+            counts, _ = self._run(files, tmp_path)
+        assert [call.args[0] for call in load.call_args_list] == files[1:]
+        assert counts == {"ok": 1, "error": 0, "skipped": 1}
+
+    def test_recomputes_on_new_params_version_or_content(
+        self, patched_pipeline, files, tmp_path
+    ):
+        self._run(files, tmp_path)
+        assert self._run(files, tmp_path, ("incisor", "mouth"))[0]["ok"] == 2
+        with patch("portrait_analyser.batch.package_version", return_value="99.0"):
+            assert self._run(files, tmp_path)[0]["ok"] == 2
+        with open(files[0], "ab") as f:
+            f.write(b"edited")
+        assert self._run(files, tmp_path)[0] == {"ok": 1, "error": 0, "skipped": 1}
+
+    def test_torn_last_line_is_ignored(self, patched_pipeline, files, tmp_path):
+        self._run(files, tmp_path)
+        manifest_path = tmp_path / "manifest.jsonl"
+        with open(manifest_path, "a") as f:
+            f.write('{"path": "half a rec')
+
+        manifest = BatchManifest(manifest_path)
+        assert len(manifest) == 2
+        row = manifest.completed_row(
+            manifest.file_hash(files[0]), BatchOptions(("incisor",))
+        )
+        assert row["status"] == "ok"
+
+        # Records appended after the torn line stay readable.
+        self._run(files, tmp_path, ("mouth",))
+        assert len(BatchManifest(manifest_path)) == 4
+
+
+class TestProgress:
+    def test_reports_rate_and_eta(self):
+        stream = io.StringIO()
+        progress = _Progress(4, stream=stream, interval_s=0)
+        progress.update({"status": "ok"})
+        progress.update({"status": "error"})
+
+        last = stream.getvalue().splitlines()[-1]
+        assert last.startswith("2/4 files")
+        assert "files/s" in last and "ETA" in last
+        assert last.endswith("errors 1")
+
+
+class TestBatchCli:
+    def test_writes_results_and_summary(self, tmp_path, capsys):
+        (tmp_path / "photo.heic").write_bytes(b"not a heif file")
+        output = tmp_path / "results.jsonl"
+
+        status = main(
+            [
+                "batch",
+                str(tmp_path),
+                "-o",
+                str(output),
+                "--measurements",
+                "incisor",
+                "--workers",
+                "1",
+            ]
+        )
+
+        assert status == 0
+        (row,) = [json.loads(line) for line in output.read_text().splitlines()]
+        assert (row["status"], row["error_stage"]) == ("error", "load")
+        stderr = capsys.readouterr().err
+        assert "1/1 files" in stderr
+        assert "0 ok, 1 failed, 0 skipped" in stderr
+
+    def test_no_files_found(self, tmp_path, capsys):
+        with pytest.raises(SystemExit) as exc_info:
+            main(["batch", str(tmp_path)])
+        assert exc_info.value.code == 2
+        assert "no files found" in capsys.readouterr().err
@@ -0,0 +1,264 @@
+"""Performance benchmarks for the analysis hot paths.
+
+Marked ``perf`` and deselected by default; run them with pytest-benchmark
+installed (``uv sync --group benchmark``)::
+
+    uv run pytest --benchmarks --benchmark-json=baseline.json
+    # ... change the code ...
+    uv run pytest --benchmarks --benchmark-json=current.json
+    uv run python tests/compare_benchmarks.py baseline.json current.json
+
+Inputs come from the bundled HEIC fixtures where they carry the data, and
+from synthetic arrays otherwise. ``TestResolutionScaling`` times the same
+steps on generated portraits at 1, 12 and 48 MP. Calls that take seconds
+per round run a fixed three rounds instead of pytest-benchmark's
+calibration.
+"""
+
+import itertools
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from compare_benchmarks import compare, main as compare_main
+from portrait_analyser.depth_sampling import (
+    measure_filtered_surface_length,
+    median_filter_depthmap,
+)
+from portrait_analyser.extended_neck import _detect_from_mask
+from portrait_analyser.face import (
+    find_bounding_box_teeth,
+    find_incisor_centroids,
+    sample_depth_at_point,
+)
+from portrait_analyser.ios import _analyse_teethmap, load_image
+from portrait_analyser.local_surface import SurfaceFeature, score_local_surface_feature
+from portrait_analyser.neck import compute_neck_circumference
+from portrait_analyser.neck_session import NeckMeasurementSession
+from portrait_analyser.synthetic import generate_synthetic_portrait
+
+FIXTURES = Path(__file__).parent
+HEIC_FIXTURES = ["heic_depth_data.heic", "heic_face_data.heic"]
+# estimate_face_from_skinmap() output for heic_face_data.heic, fixed so the
+# neck benchmark measures the arc search rather than the face estimate.
+FACE_DATA_FACE_LOCATION = (559, 599, 1206, 859)
+SLOW_ROUNDS = 3
+MEGAPIXELS = [1, 12, 48]
+
+
+@pytest.fixture(scope="module")
+def portrait():
+    return load_image(str(FIXTURES / "heic_face_data.heic"))
+
+
+@pytest.fixture(scope="module", params=MEGAPIXELS)
+def synthetic(request):
+    return generate_synthetic_portrait(request.param)
+
+
+@pytest.fixture(scope="module")
+def teethmap():
+    """Quarter-resolution teeth matte with upper and lower incisor bands."""
+    arr = np.zeros((772, 580), dtype=np.uint8)
+    arr[380:470, 210:370] = 255
+    arr[520:620, 215:365] = 255
+    return Image.fromarray(arr)
+
+
+def _person_mask(h=3087, w=2320):
+    mask = np.zeros((h, w), dtype=bool)
+    cx = w // 2
+    mask[150:900, cx - 450 : cx + 450] = True  # head
+    mask[900:1400, cx - 230 : cx + 230] = True  # neck
+    mask[1400:, cx - 1000 : cx + 1000] = True  # torso
+    return mask
+
+
+@pytest.mark.perf
+class TestHotPaths:
+    @pytest.mark.parametrize("fixture_name", HEIC_FIXTURES)
+    def test_load_image(self, benchmark, fixture_name):
+        path = str(FIXTURES / fixture_name)
+        result = benchmark.pedantic(load_image, args=(path,), rounds=SLOW_ROUNDS)
+        assert result.depthmap is not None
+
+    def test_find_bounding_box_teeth(self, benchmark, teethmap):
+        bbox = benchmark.pedantic(
+            find_bounding_box_teeth, args=(teethmap,), rounds=SLOW_ROUNDS
+        )
+        assert bbox is not None
+
+    def test_find_incisor_centroids(self, benchmark, teethmap):
+        result = benchmark(find_incisor_centroids, teethmap, (200, 370, 180, 260))
+        assert result is not None
+
+    def test_sample_depth_at_point(self, benchmark, portrait):
+        width, height = portrait.photo.size
+        result = benchmark(
+            sample_depth_at_point,
+            portrait.depthmap,
+            width // 2,
+            height // 2,
+            width,
+            height,
+            support_mask=portrait.skinmap,
+        )
+        assert result is not None
+
+    def test_median_filter_depthmap(self, benchmark, portrait):
+        filtered = benchmark(median_filter_depthmap, portrait.depthmap)
+        assert filtered.size == portrait.depthmap.size
+
+    def test_measure_filtered_surface_length(self, benchmark, portrait):
+        width, height = portrait.photo.size
+        filtered = median_filter_depthmap(portrait.depthmap)
+        points = [(1000 + 4 * i, 1500 + 2 * i) for i in range(100)]
+        length = benchmark(
+            measure_filtered_surface_length,
+            filtered,
+            points,
+            width,
+            height,
+            portrait.floatValueMin,
+            portrait.floatValueMax,
+        )
+        assert length is not None
+
+    def test_compute_neck_circumference(self, benchmark, portrait):
+        width, height = portrait.photo.size
+        result = benchmark.pedantic(
+            compute_neck_circumference,
+            args=(
+                portrait.skinmap,
+                portrait.depthmap,
+                width,
+                height,
+                portrait.floatValueMin,
+                portrait.floatValueMax,
+            ),
+            kwargs={
+                "face_location": FACE_DATA_FACE_LOCATION,
+                "hairmap": portrait.hairmap,
+            },
+            rounds=SLOW_ROUNDS,
+        )
+        assert result is not None
+
+    def test_detect_from_mask(self, benchmark):
+        mask = _person_mask()
+        h, w = mask.shape
+        result, _ = benchmark(_detect_from_mask, mask, h, w)
+        assert result is not None
+
+    def test_score_local_surface_feature(self, benchmark):
+        coordinates = np.linspace(-1.0, 1.0, 101)
+        x, y = np.meshgrid(coordinates, coordinates)
+        z = 100.0 + 15.0 * x + 4.0 * y
+        z -= 8.0 * np.exp(-((x - 0.2) ** 2 + y**2) / 0.025)
+        result = benchmark(
+            score_local_surface_feature,
+            x,
+            y,
+            z,
+            np.ones(z.shape, dtype=bool),
+            feature=SurfaceFeature.PEAK,
+        )
+        assert result.score.shape == z.shape
+
+
+@pytest.mark.perf
+class TestResolutionScaling:
+    @pytest.mark.parametrize("megapixels", MEGAPIXELS)
+    def test_generate_synthetic_portrait(self, benchmark, megapixels):
+        portrait, _ = benchmark.pedantic(
+            generate_synthetic_portrait, args=(megapixels,), rounds=SLOW_ROUNDS
+        )
+        assert portrait.depthmap is not None
+
+    # The bounding box scan takes minutes per round at 48 MP.
+    @pytest.mark.parametrize("megapixels", MEGAPIXELS[:2])
+    def test_teeth_analysis(self, benchmark, megapixels):
+        portrait, truth = generate_synthetic_portrait(megapixels)
+
+        def analyse():
+            return _analyse_teethmap(
+                portrait.teethmap.copy(),
+                portrait.depthmap,
+                portrait.floatValueMin,
+                portrait.floatValueMax,
+                truth.photo_size,
+            )
+
+        benchmark.pedantic(analyse, rounds=SLOW_ROUNDS)
+
+    def test_compute_neck_circumference(self, benchmark, synthetic):
+        portrait, truth = synthetic
+        width, height = truth.photo_size
+        result = benchmark.pedantic(
+            compute_neck_circumference,
+            args=(
+                portrait.skinmap,
+                portrait.depthmap,
+                width,
+                height,
+                portrait.floatValueMin,
+                portrait.floatValueMax,
+            ),
+            kwargs={"face_location": truth.face_location, "hairmap": portrait.hairmap},
+            rounds=SLOW_ROUNDS,
+        )
+        assert result is not None
+
+    # Interactive re-measurement: only the arc stages rerun.
+    @pytest.mark.parametrize("change", [{"n_samples": 41}, {"arc_sag": 12}])
+    def test_neck_session_remeasure(self, benchmark, synthetic, change):
+        portrait, _ = synthetic
+        session = NeckMeasurementSession.from_portrait(portrait)
+        session.measure()
+        name, value = next(iter(change.items()))
+        values = itertools.cycle((value, session.parameters[name]))
+        result = benchmark(lambda: session.measure(**{name: next(values)}))
+        assert result is not None
+
+
+def _report(path, medians):
+    path.write_text(
+        json.dumps(
+            {
+                "benchmarks": [
+                    {"fullname": name, "stats": {"median": median, "mean": median}}
+                    for name, median in medians.items()
+                ]
+            }
+        )
+    )
+    return path
+
+
+class TestCompareBenchmarks:
+    def test_flags_only_regressions_beyond_tolerance(self):
+        rows = compare(
+            {"a": 1.0, "b": 1.0, "c": 1.0, "gone": 1.0},
+            {"a": 1.05, "b": 1.2, "c": 0.5, "new": 1.0},
+            tolerance=0.1,
+        )
+        status = {row.name: row.status for row in rows}
+        assert status == {
+            "a": "ok",
+            "b": "REGRESSION",
+            "c": "faster",
+            "gone": "missing",
+            "new": "new",
+        }
+
+    def test_exit_status(self, tmp_path, capsys):
+        baseline = _report(tmp_path / "baseline.json", {"a": 1.0})
+        slower = _report(tmp_path / "slower.json", {"a": 1.3})
+
+        assert compare_main([str(baseline), str(baseline)]) == 0
+        assert compare_main([str(baseline), str(slower)]) == 1
+        assert compare_main([str(baseline), str(slower), "--tolerance", "0.5"]) == 0
+        assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,212 @@
+"""Tests for the measurement result cache."""
+
+import functools
+import os
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+from portrait_analyser.cache import (
+    ResultCache,
+    deserialise_result,
+    serialise_result,
+)
+from portrait_analyser.diagnostics import DetectionDiagnostics
+from portrait_analyser.extended_neck import SegmentationDebug
+from portrait_analyser.face import IncisorMeasurement
+from portrait_analyser.landmarks import Landmarks
+from portrait_analyser.neck import compute_neck_circumference
+from portrait_analyser.pose import (
+    FaceMeshDebug,
+    MediaPipeDebug,
+    NeckMidpoint,
+    PortraitPose,
+)
+
+
+def _neck_args(synthetic):
+    portrait, truth = synthetic
+    width, height = truth.photo_size
+    return (
+        portrait.skinmap,
+        portrait.depthmap,
+        width,
+        height,
+        portrait.floatValueMin,
+        portrait.floatValueMax,
+    ), {"face_location": truth.face_location, "n_samples": 9}
+
+
+def counted(function):
+    """*function* with a ``calls`` counter; keeps its cache identity."""
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        wrapper.calls += 1
+        return function(*args, **kwargs)
+
+    wrapper.calls = 0
+    return wrapper
+
+
+class TestSerialisation:
+    def test_detection_results_round_trip(self):
+        midpoint = NeckMidpoint(
+            nose=(10.0, 20.0),
+            mouth_left=(8.0, 30.0),
+            mouth_right=(12.0, 30.0),
+            chin=(10.0, 40.5),
+            neck_extended=False,
+            face_flatness_ratio=0.9,
+            pose=PortraitPose.OPEN_MOUTH,
+            mouth_open_ratio=0.4,
+            x=10.0,
+            y=60.0,
+        )
+        rng = np.random.default_rng(0)
+        pose = MediaPipeDebug(
+            Landmarks(
+                rng.random((33, 2)) * 100, z=rng.random(33), visibility=rng.random(33)
+            )
+        )
+        mesh = FaceMeshDebug(Landmarks(rng.random((478, 2)) * 100, z=rng.random(478)))
+        result = (midpoint, pose, mesh)
+
+        decoded = deserialise_result(serialise_result(result))
+        assert decoded[0] == midpoint
+        assert decoded[0].pose is PortraitPose.OPEN_MOUTH
+        assert np.array_equal(
+            decoded[1].landmarks.visibility, pose.landmarks.visibility
+        )
+        assert np.array_equal(decoded[2].landmarks.z, mesh.landmarks.z)
+        assert decoded[2].landmarks == mesh.landmarks
+
+    def test_masks_are_bit_packed(self):
+        mask = np.zeros((301, 203), dtype=bool)
+        mask[50:250, 40:160] = True
+        debug = SegmentationDebug(
+            mask=mask,
+            width_profile=np.linspace(0, 1, 17),
+            roi_top=3,
+            neck_y=120,
+            chin_y=None,
+            midline_x=101.5,
+        )
+
+        data = serialise_result((None, debug))
+        assert len(data) < mask.size // 8
+        _, decoded = deserialise_result(data)
+        assert decoded.mask.dtype == bool
+        assert np.array_equal(decoded.mask, mask)
+        assert np.array_equal(decoded.width_profile, debug.width_profile)
+        assert decoded.chin_y is None
+
+    def test_measurements_round_trip(self, synthetic):
+        args, kwargs = _neck_args(synthetic)
+        neck = compute_neck_circumference(*args, **kwargs)
+        incisor = IncisorMeasurement(
+            (1.0, 2.0), (1.0, 9.0), 200, 190, 40.1, 41.2, 27.5, 7.0
+        )
+
+        assert deserialise_result(serialise_result(neck)) == neck
+        assert deserialise_result(serialise_result(incisor)) == incisor
+        assert deserialise_result(serialise_result(None)) is None
+
+
+class TestResultCache:
+    def test_memory_hits_share_positional_and_keyword_calls(self, synthetic):
+        cache = ResultCache()
+        neck = counted(compute_neck_circumference)
+        args, kwargs = _neck_args(synthetic)
+
+        first = cache.call(neck, *args, **kwargs)
+        again = cache.call(
+            neck, *args[:4], float_min=args[4], float_max=args[5], **kwargs
+        )
+
+        assert neck.calls == 1
+        assert again == first and again is not first
+        assert cache.stats["memory_hits"] == 1
+
+    def test_arguments_and_content_change_the_key(self, synthetic):
+        cache = ResultCache()
+        args, kwargs = _neck_args(synthetic)
+        key = cache.key(compute_neck_circumference, *args, **kwargs)
+
+        assert key == cache.key(compute_neck_circumference, *args, **kwargs)
+        denser = {**kwargs, "n_samples": 11}
+        assert key != cache.key(compute_neck_circumference, *args, **denser)
+        edited = args[0].copy()
+        edited.putpixel((0, 0), 255)
+        assert key != cache.key(
+            compute_neck_circumference, edited, *args[1:], **kwargs
+        )
+        with patch("portrait_analyser.cache.package_version", return_value="99.0"):
+            assert key != cache.key(compute_neck_circumference, *args, **kwargs)
+
+    def test_disk_tier_survives_a_new_cache(self, synthetic, tmp_path):
+        neck = counted(compute_neck_circumference)
+        args, kwargs = _neck_args(synthetic)
+        first = ResultCache(directory=tmp_path).call(neck, *args, **kwargs)
+
+        cache = ResultCache(directory=tmp_path)
+        assert cache.call(neck, *args, **kwargs) == first
+        assert neck.calls == 1
+        assert cache.stats["disk_hits"] == 1
+
+    def test_corrupt_disk_entry_is_recomputed(self, tmp_path):
+        @counted
+        def function(x):
+            return x * 2
+
+        ResultCache(directory=tmp_path).call(function, 21)
+        (entry,) = [
+            os.path.join(root, name)
+            for root, _, names in os.walk(tmp_path)
+            for name in names
+        ]
+        with open(entry, "wb") as f:
+            f.write(b"garbage")
+
+        assert ResultCache(directory=tmp_path).call(function, 21) == 42
+        assert function.calls == 2
+
+    def test_lru_evicts_oldest(self):
+        cache = ResultCache(max_entries=1)
+
+        @counted
+        def function(x):
+            return x + 1
+
+        cache.call(function, 1)
+        cache.call(function, 2)
+        cache.call(function, 1)
+        assert function.calls == 3
+
+    def test_diagnostics_bypass_and_session_is_ignored(self):
+        def detect(image, session=None, diagnostics=None):
+            if diagnostics is not None:
+                diagnostics.record("seen", size=image.size)
+            return image.size
+
+        cache = ResultCache()
+        image = Image.new("L", (4, 3))
+        assert cache.key(detect, image, session=object()) == cache.key(detect, image)
+
+        diagnostics = DetectionDiagnostics()
+        cache.call(detect, image)
+        cache.call(detect, image, diagnostics=diagnostics)
+        assert diagnostics.has_event("seen")
+        assert cache.stats["bypassed"] == 1
+
+    def test_wrap(self):
+        cache = ResultCache()
+
+        @counted
+        def function(x, y=1):
+            return x + y
+
+        wrapped = cache.wrap(function)
+        assert wrapped(1) == wrapped(1, y=1) == 2
+        assert function.calls == 1
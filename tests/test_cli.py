@@ -0,0 +1,71 @@
+"""Tests for the single-file inspection CLI."""
+
+from unittest.mock import patch
+
+import pyheif
+
+from portrait_analyser.__main__ import main
+
+
+def _inspect(*argv):
+    """Run the inspection CLI; returns the spy on pyheif.open_container."""
+    with patch("pyheif.open_container", wraps=pyheif.open_container) as spy:
+        main(list(argv))
+    return spy
+
+
+class TestInspect:
+    def test_container_is_opened_once(self, heic_image_path, capsys):
+        spy = _inspect(str(heic_image_path))
+        out = capsys.readouterr().out
+
+        assert spy.call_count == 1
+        assert "RAW HEIF CONTAINER INSPECTION" in out
+        assert "PROCESSED INSPECTION" in out
+        # The primary and depth planes decoded by load_image() are reported
+        # by the raw section without decoding them a second time.
+        assert "Data length: 21492480 bytes" in out
+        assert "Data length: 921600 bytes" in out
+        assert "Incisor distance" in out
+
+    def test_no_decode_reads_headers_only(self, heic_image_path, capsys):
+        with patch.object(
+            pyheif.UndecodedHeifImage, "load", side_effect=AssertionError
+        ) as load:
+            spy = _inspect(str(heic_image_path), "--no-decode")
+        out = capsys.readouterr().out
+
+        assert spy.call_count == 1 and load.call_count == 0
+        assert "PROCESSED INSPECTION" not in out
+        assert "Size: 2316 x 3088" in out
+        assert "Camera model: iPhone 14" in out
+        assert "FloatMaxValue: 3.767578" in out
+        assert "Data length: (not decoded)" in out
+        assert "bytes" not in out
+
+    def test_load_errors_are_reported(self, heic_image_path, tmp_path, capsys):
+        renamed = tmp_path / "portrait.jpg"
+        renamed.write_bytes(heic_image_path.read_bytes())
+        _inspect(str(renamed))
+        out = capsys.readouterr().out
+
+        assert "Mode: RGB" in out
+        assert "raised UnknownExtension" in out
+
+    def test_non_heif_file_reports_unknown_extension(
+        self, jpeg_no_depth_data_path, capsys
+    ):
+        _inspect(str(jpeg_no_depth_data_path))
+        out = capsys.readouterr().out
+
+        assert "Cannot open container" in out
+        assert "load_image() raised UnknownExtension" in out
+
+    def test_unreadable_heic_is_reported(self, tmp_path, capsys):
+        broken = tmp_path / "broken.heic"
+        broken.write_bytes(b"not a HEIF file")
+        _inspect(str(broken), "--no-decode")
+        out = capsys.readouterr().out
+
+        assert "Cannot open container" in out
+        assert "PROCESSED INSPECTION" not in out
@@ -0,0 +1,225 @@
+"""Tests for the on-disk store of MediaPipe detector outputs."""
+
+import os
+import sys
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from portrait_analyser.detector_store import DetectorOutputStore, StoredLandmark
+from portrait_analyser.extended_neck import _get_segmentation_mask
+from portrait_analyser.face import detect_eyes
+from portrait_analyser.pose import detect_neck_midpoint
+from portrait_analyser.session import PortraitInferenceSession
+
+
+def _landmarks(rng, n, visibility=False):
+    return [
+        SimpleNamespace(
+            x=float(x),
+            y=float(y),
+            z=float(z),
+            visibility=float(v) if visibility else None,
+        )
+        for x, y, z, v in rng.random((n, 4)).astype(np.float32)
+    ]
+
+
+def _mock_mediapipe():
+    rng = np.random.default_rng(7)
+    mock_mp = MagicMock()
+    mock_mp.ImageFormat.SRGB = "SRGB"
+    mock_mp.Image.side_effect = lambda image_format, data: SimpleNamespace(
+        numpy_view=lambda: data
+    )
+    vision = mock_mp.tasks.vision
+    vision.FaceDetector.create_from_options.return_value.detect.return_value = (
+        SimpleNamespace(
+            detections=[
+                SimpleNamespace(
+                    bounding_box=SimpleNamespace(
+                        origin_x=10, origin_y=12, width=30, height=32
+                    ),
+                    categories=[SimpleNamespace(score=0.875)],
+                    keypoints=[
+                        SimpleNamespace(x=0.25, y=0.375),
+                        SimpleNamespace(x=0.625, y=0.375),
+                    ],
+                )
+            ]
+        )
+    )
+    vision.PoseLandmarker.create_from_options.return_value.detect.return_value = (
+        SimpleNamespace(pose_landmarks=[_landmarks(rng, 33, visibility=True)])
+    )
+    vision.FaceLandmarker.create_from_options.return_value.detect.return_value = (
+        SimpleNamespace(face_landmarks=[_landmarks(rng, 478)])
+    )
+    return mock_mp
+
+
+@pytest.fixture
+def model_file(tmp_path):
+    path = tmp_path / "model.task"
+    path.write_bytes(b"weights v1")
+    return str(path)
+
+
+@contextmanager
+def _patched(mock_mp, model_file):
+    with (
+        patch("portrait_analyser.face._get_face_model_path", return_value=model_file),
+        patch("portrait_analyser.pose._get_model_path", return_value=model_file),
+        patch(
+            "portrait_analyser.pose._get_face_mesh_model_path",
+            return_value=model_file,
+        ),
+        patch(
+            "portrait_analyser.extended_neck._get_segmenter_model_path",
+            return_value=model_file,
+        ),
+        patch.dict(sys.modules, {"mediapipe": mock_mp}),
+    ):
+        yield
+
+
+def _created(mock_mp):
+    vision = mock_mp.tasks.vision
+    return (
+        vision.FaceDetector.create_from_options.call_count
+        + vision.FaceLandmarker.create_from_options.call_count
+        + vision.PoseLandmarker.create_from_options.call_count
+        + vision.ImageSegmenter.create_from_options.call_count
+    )
+
+
+class TestDetectorOutputStore:
+    def test_neck_midpoint_rerun_skips_model_load_and_inference(
+        self, tmp_path, model_file
+    ):
+        image = Image.new("RGB", (64, 48), (120, 90, 60))
+        store = DetectorOutputStore(tmp_path / "store")
+
+        mock_mp = _mock_mediapipe()
+        with _patched(mock_mp, model_file):
+            with PortraitInferenceSession(detector_store=store) as session:
+                first = detect_neck_midpoint(image, session=session)
+            assert _created(mock_mp) == 2
+
+            rerun_mp = _mock_mediapipe()
+            with (
+                patch.dict(sys.modules, {"mediapipe": rerun_mp}),
+                PortraitInferenceSession(
+                    detector_store=DetectorOutputStore(tmp_path / "store")
+                ) as session,
+            ):
+                again = detect_neck_midpoint(image, session=session)
+                assert session.detector_store.stats == {"hits": 2, "misses": 0}
+            assert _created(rerun_mp) == 0
+
+        assert again == first
+        assert np.array_equal(
+            again[1].landmarks.visibility, first[1].landmarks.visibility
+        )
+        assert np.array_equal(again[2].landmarks.z, first[2].landmarks.z)
+
+    def test_new_model_or_image_is_a_miss(self, tmp_path, model_file):
+        store = DetectorOutputStore(tmp_path)
+        mock_mp = _mock_mediapipe()
+        image = Image.new("RGB", (64, 48))
+        with _patched(mock_mp, model_file):
+            with PortraitInferenceSession(detector_store=store) as session:
+                detect_eyes(image, session=session)
+                detect_eyes(Image.new("RGB", (64, 48), "white"), session=session)
+            with open(model_file, "ab") as f:
+                f.write(b" retrained")
+            os.utime(model_file, ns=(1, 1))
+            with PortraitInferenceSession(detector_store=store) as session:
+                detect_eyes(image, session=session)
+
+        assert store.stats == {"hits": 0, "misses": 3}
+
+    def test_face_detections_round_trip(self, tmp_path, model_file):
+        mock_mp = _mock_mediapipe()
+        image = Image.new("RGB", (64, 48))
+        store = DetectorOutputStore(tmp_path)
+        with _patched(mock_mp, model_file):
+            with PortraitInferenceSession(detector_store=store) as session:
+                eyes = detect_eyes(image, session=session)
+                again = detect_eyes(image, session=session)
+                detector = session.face_detector(0.5)
+                stored = detector.detect(
+                    SimpleNamespace(numpy_view=lambda: np.asarray(image))
+                )
+
+        (detection,) = stored.detections
+        assert vars(detection.bounding_box) == {
+            "origin_x": 10,
+            "origin_y": 12,
+            "width": 30,
+            "height": 32,
+        }
+        assert detection.categories[0].score == 0.875
+        assert [(kp.x, kp.y) for kp in detection.keypoints] == [
+            (0.25, 0.375),
+            (0.625, 0.375),
+        ]
+        assert [(e.x, e.y, e.width, e.height) for e in again] == [
+            (e.x, e.y, e.width, e.height) for e in eyes
+        ]
+        assert len(eyes) == 2 and store.stats["hits"] == 2
+
+    def test_segmentation_mask_is_stored_bit_packed(self, tmp_path, model_file):
+        confidence = np.zeros((48, 64, 1), dtype=np.float32)
+        confidence[10:40, 20:44] = 0.9
+        mock_mp = _mock_mediapipe()
+        segmenter = mock_mp.tasks.vision.ImageSegmenter.create_from_options
+        segmenter.return_value.segment.return_value = SimpleNamespace(
+            confidence_masks=[SimpleNamespace(numpy_view=lambda: confidence)]
+        )
+        image = Image.new("RGB", (64, 48))
+        store = DetectorOutputStore(tmp_path)
+
+        with _patched(mock_mp, model_file):
+            with PortraitInferenceSession(detector_store=store) as session:
+                mask = _get_segmentation_mask(image, 0.5, session=session)
+                again = _get_segmentation_mask(image, 0.5, session=session)
+                _get_segmentation_mask(image, 0.95, session=session)
+
+        assert segmenter.return_value.segment.call_count == 2
+        assert again.dtype == bool and np.array_equal(again, mask)
+        assert mask[25, 32] and not mask[0, 0]
+        sizes = [
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(tmp_path)
+            for name in names
+            if name.endswith(".npz")
+        ]
+        assert len(sizes) == 2 and max(sizes) < mask.size
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        store = DetectorOutputStore(tmp_path)
+        key = "ab" * 32
+        store.save(key, {"values": np.arange(3)})
+        assert store.load(key)["values"].tolist() == [0, 1, 2]
+        with open(store._path(key), "wb") as f:
+            f.write(b"garbage")
+        assert store.load(key) is None
+        assert store.stats == {"hits": 1, "misses": 1}
+
+    def test_missing_z_and_visibility_stay_missing(self, tmp_path, model_file):
+        store = DetectorOutputStore(tmp_path)
+        real = MagicMock()
+        real.detect.return_value = SimpleNamespace(
+            pose_landmarks=[[SimpleNamespace(x=0.5, y=0.25, z=None, visibility=None)]]
+        )
+        detector = store.detector("pose_landmarker", (0.5,), [model_file], lambda: real)
+        pixels = SimpleNamespace(numpy_view=lambda: np.zeros((2, 2, 3), np.uint8))
+
+        detector.detect(pixels)
+        assert detector.detect(pixels).pose_landmarks == [[StoredLandmark(0.5, 0.25)]]
+        assert real.detect.call_count == 1
@@ -0,0 +1,93 @@
+"""Tests for structured detection diagnostics."""
+
+import logging
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy
+import pytest
+from PIL import Image
+
+from portrait_analyser import diagnostics as diagnostics_module
+from portrait_analyser.diagnostics import DetectionDiagnostics
+from portrait_analyser.extended_neck import _detect_from_mask
+from portrait_analyser.pose import detect_neck_midpoint
+
+
+def _landmark(x, y, visibility=0.99):
+    return SimpleNamespace(x=x, y=y, z=0.0, visibility=visibility)
+
+
+def _detect(**kwargs):
+    landmarks = [_landmark(0, 0) for _ in range(33)]
+    landmarks[0] = _landmark(0.5, 0.25)
+    landmarks[2] = _landmark(0.4, 0.20)
+    landmarks[5] = _landmark(0.6, 0.20)
+    landmarks[9] = _landmark(0.45, 0.30)
+    landmarks[10] = _landmark(0.55, 0.30)
+    landmarks[11] = _landmark(0.25, 0.75, visibility=0.8)
+    landmarks[12] = _landmark(0.75, 0.75, visibility=0.7)
+
+    mock_mp = MagicMock()
+    mock_mp.ImageFormat.SRGB = 1
+    landmarker = mock_mp.tasks.vision.PoseLandmarker.create_from_options.return_value
+    landmarker.detect.return_value = SimpleNamespace(pose_landmarks=[landmarks])
+    with (
+        patch("portrait_analyser.pose._get_model_path", return_value="/fake"),
+        patch("portrait_analyser.pose._detect_chin_via_face_mesh", return_value=None),
+        patch.dict(sys.modules, {"mediapipe": mock_mp}),
+    ):
+        return detect_neck_midpoint(Image.new("RGB", (200, 400)), **kwargs)
+
+
+class TestPoseDiagnostics:
+    def test_values_are_available_programmatically(self):
+        record = DetectionDiagnostics()
+        neck, _, _ = _detect(diagnostics=record)
+
+        assert record.values["ipd"] == pytest.approx(40.0)
+        assert record.values["face_flatness_ratio"] == neck.face_flatness_ratio
+        assert record.values["left_shoulder_visibility"] == pytest.approx(0.8)
+        assert record.values["right_shoulder_visibility"] == pytest.approx(0.7)
+        assert record.values["pose"] == neck.pose.value
+        assert record.has_event("face_mesh_failed")
+
+    def test_nothing_is_printed_or_formatted_when_disabled(self, capsys):
+        logging.getLogger("portrait_analyser").setLevel(logging.INFO)
+        try:
+            with patch.object(
+                diagnostics_module, "_format_value", side_effect=AssertionError
+            ):
+                _detect()
+        finally:
+            logging.getLogger("portrait_analyser").setLevel(logging.NOTSET)
+
+        assert capsys.readouterr().out == ""
+
+    def test_debug_logging_reports_values(self, caplog):
+        with caplog.at_level(logging.DEBUG, logger="portrait_analyser"):
+            _detect()
+
+        messages = [
+            record.getMessage()
+            for record in caplog.records
+            if record.name == "portrait_analyser.pose"
+        ]
+        assert any(m.startswith("face_flatness: face_flatness_ratio=") for m in messages)
+
+
+class TestSegmentationDiagnostics:
+    def test_mask_detection_records_result(self):
+        h, w = 400, 200
+        mask = numpy.zeros((h, w), dtype=numpy.float64)
+        mask[20:120, 50:150] = 1.0
+        mask[120:180, 80:120] = 1.0
+        mask[180:400, 10:190] = 1.0
+        record = DetectionDiagnostics()
+
+        neck, _ = _detect_from_mask(mask, h, w, diagnostics=record)
+
+        assert neck is not None
+        assert record.values["neck_y"] == neck.y
+        assert record.has_event("segmentation_result")
@@ -0,0 +1,119 @@
+"""Tests for the shared downscaled analysis frame."""
+
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy
+import pytest
+from PIL import Image
+
+from portrait_analyser.face import get_face_parameters
+from portrait_analyser.frame import AnalysisFrame
+from portrait_analyser.ios import IOSPortrait
+from portrait_analyser.pose import detect_neck_midpoint
+
+
+def _mock_mediapipe():
+    mock_mp = MagicMock()
+    mock_mp.ImageFormat.SRGB = "SRGB"
+    vision = mock_mp.tasks.vision
+    vision.PoseLandmarker.create_from_options.return_value.detect.return_value = (
+        SimpleNamespace(pose_landmarks=[])
+    )
+    vision.FaceDetector.create_from_options.return_value.detect.return_value = (
+        SimpleNamespace(
+            detections=[
+                SimpleNamespace(
+                    bounding_box=SimpleNamespace(
+                        origin_x=100, origin_y=150, width=200, height=250
+                    ),
+                    keypoints=[
+                        SimpleNamespace(x=0.4, y=0.3),
+                        SimpleNamespace(x=0.6, y=0.3),
+                    ],
+                )
+            ]
+        )
+    )
+    return mock_mp
+
+
+class TestAnalysisFrame:
+    def test_large_photo_is_downscaled_with_scale_factors(self):
+        frame = AnalysisFrame.from_image(Image.new("RGB", (4032, 3024)))
+
+        assert (frame.width, frame.height) == (1024, 768)
+        assert (frame.photo_width, frame.photo_height) == (4032, 3024)
+        assert frame.scale_x == pytest.approx(3.9375)
+        assert frame.to_photo(512, 384) == pytest.approx((2016, 1512))
+
+    def test_small_photo_keeps_resolution(self):
+        frame = AnalysisFrame.from_image(Image.new("RGB", (400, 600)))
+
+        assert frame.rgb.shape == (600, 400, 3)
+        assert frame.scale_x == frame.scale_y == 1.0
+
+    @pytest.mark.parametrize("mode", ["L", "RGBA"])
+    def test_non_rgb_input_is_converted(self, mode):
+        frame = AnalysisFrame.from_image(Image.new(mode, (2000, 1000)))
+
+        assert frame.rgb.shape == (512, 1024, 3)
+        assert frame.rgb.dtype == numpy.uint8
+
+    def test_rgb_is_read_only(self):
+        frame = AnalysisFrame.from_image(Image.new("RGB", (10, 10)))
+        with pytest.raises(ValueError):
+            frame.rgb[0, 0, 0] = 1
+
+    def test_with_max_dimension_keeps_photo_mapping(self):
+        frame = AnalysisFrame.from_image(Image.new("RGB", (2000, 1000)))
+        smaller = frame.with_max_dimension(256)
+
+        assert smaller.rgb.shape == (128, 256, 3)
+        assert smaller.to_photo(256, 128) == pytest.approx((2000, 1000))
+        assert frame.with_max_dimension(None) is frame
+
+    def test_portrait_caches_frame(self):
+        portrait = IOSPortrait(Image.new("RGB", (2000, 1000)))
+
+        assert portrait.analysis_frame() is portrait.analysis_frame()
+        assert portrait.analysis_frame(256) is not portrait.analysis_frame()
+
+
+class TestDetectorsShareFrame:
+    def test_face_box_is_mapped_back_to_photo_space(self):
+        photo = Image.new("RGB", (4096, 2048))
+        frame = AnalysisFrame.from_image(photo)
+        mock_mp = _mock_mediapipe()
+
+        with (
+            patch("portrait_analyser.face._get_face_model_path", return_value="/fake"),
+            patch.dict(sys.modules, {"mediapipe": mock_mp}),
+        ):
+            face = get_face_parameters(photo, frame=frame)
+
+        assert (face.x, face.y, face.width, face.height) == (400, 600, 800, 1000)
+        assert face.image is photo
+        # Normalised keypoints scale by the photo size.
+        left_eye = face.eyes[0]
+        assert face.x + left_eye.x + left_eye.width / 2 == pytest.approx(
+            0.4 * 4096, abs=1
+        )
+
+    def test_detectors_wrap_the_frame_once(self):
+        photo = Image.new("RGB", (4096, 2048))
+        frame = AnalysisFrame.from_image(photo)
+        mock_mp = _mock_mediapipe()
+
+        with (
+            patch("portrait_analyser.face._get_face_model_path", return_value="/fake"),
+            patch("portrait_analyser.pose._get_model_path", return_value="/fake"),
+            patch("portrait_analyser.pose._detect_chin_via_face_mesh", return_value=None),
+            patch.dict(sys.modules, {"mediapipe": mock_mp}),
+        ):
+            get_face_parameters(photo, frame=frame)
+            detect_neck_midpoint(photo, frame=frame)
+
+        mock_mp.Image.assert_called_once()
+        assert mock_mp.Image.call_args.kwargs["data"].shape == (512, 1024, 3)
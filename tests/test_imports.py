@@ -0,0 +1,68 @@
+"""Import-time budget of the package and its CLI."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import portrait_analyser
+
+# Cumulative ``import portrait_analyser`` time allowed by the budget test.
+# Lazily loaded it takes a couple of milliseconds; eager imports of the
+# whole API took ~200 ms.
+IMPORT_BUDGET_US = 50_000
+
+# Heavy dependencies that a bare import or the CLI's --help must not load.
+HEAVY_MODULES = ("numpy", "PIL", "pyheif", "piexif", "xml.etree", "mediapipe", "cv2")
+
+
+def _python(*args):
+    src = os.path.dirname(os.path.dirname(portrait_analyser.__file__))
+    env = {**os.environ, "PYTHONPATH": src}
+    return subprocess.run(
+        [sys.executable, *args], env=env, capture_output=True, text=True, check=True
+    )
+
+
+def _import_times(*args):
+    """Cumulative microseconds per module from ``python -X importtime``."""
+    stderr = _python("-X", "importtime", *args).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+class TestLazyImports:
+    def test_bare_import_is_within_budget(self):
+        times = _import_times("-c", "import portrait_analyser")
+        assert times["portrait_analyser"] < IMPORT_BUDGET_US
+        loaded = [m for m in times if m.split(".")[0] == "portrait_analyser"]
+        assert loaded == ["portrait_analyser"]
+        assert not [m for m in HEAVY_MODULES if m in times]
+
+    def test_cli_help_skips_heavy_dependencies(self):
+        times = _import_times("-m", "portrait_analyser", "--help")
+        assert not [m for m in HEAVY_MODULES if m in times]
+
+    def test_load_image_skips_detectors_and_batch(self):
+        times = _import_times("-c", "from portrait_analyser import load_image")
+        for module in ("batch", "pose", "neck", "uncertainty", "synthetic"):
+            assert f"portrait_analyser.{module}" not in times
+        assert "mediapipe" not in times
+
+    def test_every_public_name_resolves(self):
+        assert set(portrait_analyser.__all__) == set(portrait_analyser._LAZY_NAMES)
+        for name in portrait_analyser.__all__:
+            assert getattr(portrait_analyser, name) is not None
+        assert set(portrait_analyser.__all__) <= set(dir(portrait_analyser))
+        assert portrait_analyser.load_image.__module__ == "portrait_analyser.ios"
+
+    def test_submodules_and_unknown_names(self):
+        assert portrait_analyser.presets.ANALYSIS_PRESETS
+        with pytest.raises(AttributeError, match="no_such_name"):
+            portrait_analyser.no_such_name
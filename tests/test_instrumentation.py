@@ -0,0 +1,263 @@
+"""Tests for per-stage timing hooks."""
+
+import contextvars
+import json
+import sys
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy
+import pytest
+from PIL import Image
+
+from portrait_analyser import instrumentation
+from portrait_analyser.__main__ import main
+from portrait_analyser.instrumentation import (
+    ChromeTraceRecorder,
+    StageTimingAggregator,
+    chrome_trace,
+    stage,
+    stage_hooks,
+)
+from portrait_analyser.neck import compute_neck_circumference
+from portrait_analyser.pose import detect_neck_midpoint
+
+
+def _timing(name, wall, cpu=0.0, peak=None):
+    return instrumentation.StageTiming(
+        name=name,
+        start_s=0.0,
+        wall_time_s=wall,
+        cpu_time_s=cpu,
+        peak_alloc_bytes=peak,
+        parent=None,
+        depth=0,
+        thread_id=1,
+        process_id=1,
+    )
+
+
+class TestStageHooks:
+    def test_no_hook_returns_shared_noop(self):
+        assert stage("a") is stage("b")
+
+    def test_nested_stages_report_parent_and_depth(self):
+        timings = []
+        with stage_hooks(timings.append):
+            with stage("outer"):
+                with stage("inner"):
+                    pass
+
+        inner, outer = timings
+        assert (inner.name, inner.parent, inner.depth) == ("inner", "outer", 1)
+        assert (outer.name, outer.parent, outer.depth) == ("outer", None, 0)
+        assert outer.wall_time_s >= inner.wall_time_s >= 0
+        assert inner.peak_alloc_bytes is None
+        assert inner.thread_id == threading.get_ident()
+
+    def test_hooks_are_removed_after_block(self):
+        timings = []
+        with stage_hooks(timings.append):
+            pass
+        with stage("after"):
+            pass
+        assert timings == []
+
+    def test_hooks_are_context_local(self):
+        timings = []
+        with stage_hooks(timings.append):
+            thread = threading.Thread(target=lambda: stage("other").__enter__())
+            thread.start()
+            thread.join()
+        assert timings == []
+
+    def test_trace_memory_reports_nested_peaks(self):
+        timings = []
+        with stage_hooks(timings.append, trace_memory=True):
+            with stage("outer"):
+                with stage("inner"):
+                    block = numpy.ones(2**20, dtype=numpy.uint8)
+                    del block
+
+        inner, outer = timings
+        assert inner.peak_alloc_bytes >= 2**20
+        assert outer.peak_alloc_bytes >= inner.peak_alloc_bytes
+
+
+class TestStageTimingAggregator:
+    def test_percentiles_per_stage(self):
+        aggregator = StageTimingAggregator()
+        for wall in (0.1, 0.2, 0.3, 0.4, 0.5):
+            aggregator(_timing("pose", wall, cpu=wall / 2, peak=int(wall * 10)))
+        aggregator(_timing("face_mesh", 0.05))
+
+        summary = aggregator.summary(percentiles=(50, 100))
+        assert list(summary) == ["pose", "face_mesh"]
+        pose = summary["pose"]
+        assert pose.count == 5
+        assert pose.total_wall_time_s == pytest.approx(1.5)
+        assert pose.wall_time_s == pytest.approx({50: 0.3, 100: 0.5})
+        assert pose.cpu_time_s[50] == pytest.approx(0.15)
+        assert pose.max_peak_alloc_bytes == 5
+        assert summary["face_mesh"].max_peak_alloc_bytes is None
+
+    def test_format_summary(self):
+        aggregator = StageTimingAggregator()
+        aggregator(_timing("segmentation", 0.25))
+        lines = aggregator.format_summary(percentiles=(50,)).splitlines()
+
+        assert lines[0].split() == [
+            "stage", "count", "total", "ms", "wall", "p50", "cpu", "p50", "peak", "MiB"
+        ]
+        assert lines[1].split() == ["segmentation", "1", "250.0", "250.0", "0.0", "-"]
+
+    def test_reset(self):
+        aggregator = StageTimingAggregator()
+        aggregator(_timing("pose", 0.1))
+        aggregator.reset()
+        assert aggregator.summary() == {}
+
+
+class TestPipelineStages:
+    def test_neck_midpoint_stages(self):
+        landmarks = [SimpleNamespace(x=0.5, y=0.5, z=0.0, visibility=0.9)] * 33
+        mock_mp = MagicMock()
+        mock_mp.ImageFormat.SRGB = 1
+        landmarker = mock_mp.tasks.vision.PoseLandmarker.create_from_options.return_value
+        landmarker.detect.return_value = SimpleNamespace(pose_landmarks=[landmarks])
+        worker_threads = []
+
+        def face_mesh_stub(*args, **kwargs):
+            with stage("face_mesh"):
+                worker_threads.append(threading.get_ident())
+
+        aggregator = StageTimingAggregator()
+        with (
+            patch("portrait_analyser.pose._get_model_path", return_value="/fake"),
+            patch(
+                "portrait_analyser.pose._detect_chin_via_face_mesh",
+                side_effect=face_mesh_stub,
+            ),
+            patch.dict(sys.modules, {"mediapipe": mock_mp}),
+            stage_hooks(aggregator),
+        ):
+            detect_neck_midpoint(Image.new("RGB", (200, 400)), concurrent=True)
+
+        by_name = {t.name: t for t in aggregator.timings}
+        assert {"model_load", "face_mesh", "pose"} <= set(by_name)
+        # FaceMesh ran on the worker thread and was still reported.
+        assert by_name["face_mesh"].thread_id == worker_threads[0]
+        assert by_name["pose"].thread_id == threading.get_ident()
+
+    def test_neck_circumference_stages(self):
+        skin = numpy.zeros((600, 400), dtype=numpy.uint8)
+        skin[50:250, 100:300] = 255
+        for y in range(250, 350):
+            half = 40 + abs(y - 280) * 2
+            skin[y, 200 - half : 200 + half] = 255
+
+        aggregator = StageTimingAggregator()
+        with stage_hooks(aggregator):
+            result = compute_neck_circumference(
+                skinmap=Image.fromarray(skin),
+                depthmap=Image.new("L", (400, 600), 180),
+                photo_width=400,
+                photo_height=600,
+                float_min=0.5,
+                float_max=2.0,
+                face_location=(100, 50, 200, 200),
+                n_samples=10,
+            )
+
+        assert result is not None
+        assert [t.name for t in aggregator.timings] == [
+            "skin_preparation",
+            "arc_integration",
+            "compute_neck_circumference",
+        ]
+        assert {t.parent for t in aggregator.timings[:2]} == {
+            "compute_neck_circumference"
+        }
+
+
+class TestChromeTrace:
+    def test_nested_spans_with_process_and_thread_ids(self):
+        recorder = ChromeTraceRecorder()
+        with stage_hooks(recorder):
+            with stage("detector"):
+                with stage("model_load"):
+                    pass
+
+        metadata = [e for e in recorder.events if e["ph"] == "M"]
+        spans = {e["name"]: e for e in recorder.events if e["ph"] == "X"}
+        assert {e["name"] for e in metadata} == {"process_name", "thread_name"}
+        outer, inner = spans["detector"], spans["model_load"]
+        assert outer["pid"] == inner["pid"] == metadata[0]["pid"]
+        assert outer["tid"] == inner["tid"] == threading.get_ident()
+        assert outer["ts"] <= inner["ts"]
+        assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+        assert "cpu_time_ms" in inner["args"]
+
+    def test_worker_threads_get_their_own_track(self):
+        recorder = ChromeTraceRecorder()
+        with stage_hooks(recorder):
+            with stage("main"):
+                pass
+
+            def worker():
+                with stage("worker"):
+                    pass
+
+            thread = threading.Thread(
+                target=contextvars.copy_context().run, args=(worker,), name="face-mesh"
+            )
+            thread.start()
+            thread.join()
+
+        names = {
+            e["tid"]: e["args"]["name"]
+            for e in recorder.events
+            if e["name"] == "thread_name"
+        }
+        spans = {e["name"]: e for e in recorder.events if e["ph"] == "X"}
+        assert spans["main"]["tid"] != spans["worker"]["tid"]
+        assert names[spans["worker"]["tid"]] == "face-mesh"
+
+    def test_extend_merges_worker_events_once(self):
+        worker = ChromeTraceRecorder()
+        with stage_hooks(worker):
+            with stage("decode"):
+                pass
+        recorder = ChromeTraceRecorder()
+        recorder.extend(worker.events)
+        recorder.extend(worker.events)
+
+        assert sum(e["ph"] == "M" for e in recorder.events) == 2
+        assert sum(e["ph"] == "X" for e in recorder.events) == 2
+
+    def test_chrome_trace_writes_json(self, tmp_path):
+        path = tmp_path / "trace.json"
+        with chrome_trace(path):
+            with stage("decode"):
+                pass
+
+        trace = json.loads(path.read_text())
+        assert trace["displayTimeUnit"] == "ms"
+        assert [e["name"] for e in trace["traceEvents"] if e["ph"] == "X"] == [
+            "decode"
+        ]
+
+    def test_cli_trace_option(self, heic_image_path, tmp_path, capsys):
+        path = tmp_path / "trace.json"
+        argv = ["analyse-portrait", str(heic_image_path), "--trace", str(path)]
+        with patch.object(sys, "argv", argv):
+            main()
+
+        spans = {
+            e["name"]: e
+            for e in json.loads(path.read_text())["traceEvents"]
+            if e["ph"] == "X"
+        }
+        assert spans["decode"]["args"] and spans["load_image"]
+        assert spans["decode"]["ts"] >= spans["load_image"]["ts"]
@@ -0,0 +1,99 @@
+"""Tests for array-backed landmark containers."""
+
+from types import SimpleNamespace
+
+import numpy
+import pytest
+from PIL import Image
+
+from portrait_analyser.landmarks import Landmarks
+from portrait_analyser.mouth import compute_mouth_measurement_from_facemesh
+from portrait_analyser.neck import neck_search_bounds_from_face_landmarks
+from portrait_analyser.pose import FaceMeshDebug, MediaPipeDebug
+
+
+def _normalized(x, y, z=None, visibility=None):
+    return SimpleNamespace(x=x, y=y, z=z, visibility=visibility)
+
+
+class TestLandmarks:
+    def test_from_normalized_scales_to_pixels(self):
+        landmarks = Landmarks.from_normalized(
+            [
+                _normalized(0.5, 0.25, z=-0.1, visibility=0.9),
+                _normalized(1.0, 1.0, z=0.2, visibility=0.3),
+            ],
+            400,
+            800,
+            offset=(10.0, 20.0),
+        )
+
+        assert landmarks.xy.shape == (2, 2)
+        assert landmarks.xy.dtype == numpy.float32
+        assert landmarks[0] == (210.0, 220.0)
+        assert landmarks.z == pytest.approx([-0.1, 0.2])
+        assert landmarks.visibility == pytest.approx([0.9, 0.3])
+
+    def test_missing_z_and_visibility_stay_none(self):
+        landmarks = Landmarks.from_normalized([_normalized(0.1, 0.2)], 100, 100)
+        assert landmarks.z is None
+        assert landmarks.visibility is None
+
+    def test_behaves_like_tuple_of_tuples(self):
+        points = ((1.0, 2.0), (3.0, 4.0), (5.0, 6.0))
+        landmarks = Landmarks(points)
+
+        assert len(landmarks) == 3
+        assert landmarks[-1] == (5.0, 6.0)
+        assert isinstance(landmarks[1][0], float)
+        assert list(landmarks) == list(points)
+        assert landmarks == points
+        assert landmarks[1:] == points[1:]
+        assert bool(Landmarks(())) is False
+
+    def test_arrays_are_read_only(self):
+        landmarks = Landmarks([(1.0, 2.0)])
+        with pytest.raises(ValueError):
+            landmarks.xy[0, 0] = 5.0
+        with pytest.raises(AttributeError):
+            landmarks.xy = None
+
+    def test_asarray_does_not_copy(self):
+        landmarks = Landmarks([(1.0, 2.0), (3.0, 4.0)])
+        assert numpy.asarray(landmarks) is landmarks.xy
+
+    def test_debug_containers_accept_tuples(self):
+        face_mesh = FaceMeshDebug(landmarks=((1.0, 2.0),))
+        pose = MediaPipeDebug(landmarks=((1.0, 2.0),))
+
+        assert isinstance(face_mesh.landmarks, Landmarks)
+        assert face_mesh == FaceMeshDebug(landmarks=Landmarks([(1.0, 2.0)]))
+        assert hash(pose) == hash(MediaPipeDebug(landmarks=((1.0, 2.0),)))
+
+
+class TestConsumers:
+    def test_neck_search_bounds_match_tuple_input(self):
+        points = tuple((100.0 + i, 50.0 + i * 0.5) for i in range(478))
+        kwargs = dict(chin=(100.0, 280.0), nose=(100.0, 150.0), image_height=1000)
+
+        expected = neck_search_bounds_from_face_landmarks(
+            face_mesh_landmarks=points, **kwargs
+        )
+        assert (
+            neck_search_bounds_from_face_landmarks(
+                face_mesh_landmarks=Landmarks(points), **kwargs
+            )
+            == expected
+        )
+
+    def test_mouth_measurement_reads_indexed_points(self):
+        points = [(0.0, 0.0)] * 478
+        points[0] = (10.0, 20.0)
+        points[17] = (10.0, 40.0)
+
+        measurement = compute_mouth_measurement_from_facemesh(
+            Landmarks(points), Image.new("L", (100, 100), 120), 100, 100, None, None
+        )
+
+        assert measurement.upper_point == (10.0, 20.0)
+        assert measurement.lower_point == (10.0, 40.0)
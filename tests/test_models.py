@@ -0,0 +1,169 @@
+"""Tests for the verified, lock-protected model store."""
+
+import hashlib
+import io
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from portrait_analyser import models
+from portrait_analyser.__main__ import main
+from portrait_analyser.exceptions import ModelChecksumMismatch, ModelNotAvailable
+from portrait_analyser.models import fetch_model, model_directory, preload_models
+
+URL = "https://models.invalid/detector.task"
+PAYLOAD = b"model weights" * 1000
+
+
+@pytest.fixture(autouse=True)
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv(models.MODEL_DIR_ENV, str(tmp_path / "models"))
+    monkeypatch.delenv(models.OFFLINE_ENV, raising=False)
+    monkeypatch.setattr(models, "_verified", set())
+    # Every download serves PAYLOAD; tests pin digests explicitly.
+    monkeypatch.setattr(models, "_PINNED_SHA256", {})
+    return tmp_path / "models"
+
+
+@pytest.fixture
+def downloads():
+    """Patched urlopen serving PAYLOAD; records every requested URL."""
+    requested = []
+
+    def urlopen(url):
+        requested.append(url)
+        time.sleep(0.02)  # Widen the window for racing fetchers.
+        return io.BytesIO(PAYLOAD)
+
+    with patch("urllib.request.urlopen", urlopen):
+        yield requested
+
+
+class TestFetchModel:
+    def test_downloads_once_and_records_checksum(self, model_dir, downloads):
+        path = fetch_model(URL, "detector.task")
+        assert path == model_dir / "detector.task"
+        assert path.read_bytes() == PAYLOAD
+        checksum = (model_dir / "detector.task.sha256").read_text().split()[0]
+        assert checksum == hashlib.sha256(PAYLOAD).hexdigest()
+
+        models._verified.clear()
+        assert fetch_model(URL, "detector.task") == path
+        assert downloads == [URL]
+        assert sorted(p.name for p in model_dir.iterdir()) == [
+            "detector.task",
+            "detector.task.lock",
+            "detector.task.sha256",
+        ]
+
+    def test_concurrent_fetchers_download_once(self, downloads):
+        paths = []
+        threads = [
+            threading.Thread(
+                target=lambda: paths.append(fetch_model(URL, "detector.task"))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(set(paths)) == 1 and len(paths) == 8
+        assert downloads == [URL]
+
+    def test_corrupt_file_is_fetched_again(self, downloads):
+        path = fetch_model(URL, "detector.task")
+        path.write_bytes(b"truncated")
+
+        assert fetch_model(URL, "detector.task").read_bytes() == PAYLOAD
+        assert len(downloads) == 2
+
+    def test_file_without_checksum_is_adopted(self, model_dir, downloads):
+        model_dir.mkdir()
+        (model_dir / "detector.task").write_bytes(b"fetched by an old release")
+
+        fetch_model(URL, "detector.task")
+        assert downloads == []
+        assert (model_dir / "detector.task.sha256").exists()
+
+    def test_pinned_checksum_mismatch(self, model_dir, downloads):
+        with pytest.raises(ModelChecksumMismatch):
+            fetch_model(URL, "detector.task", sha256="0" * 64)
+        assert not (model_dir / "detector.task").exists()
+        assert [p.name for p in model_dir.iterdir()] == ["detector.task.lock"]
+
+        pinned = hashlib.sha256(PAYLOAD).hexdigest()
+        assert fetch_model(URL, "detector.task", sha256=pinned).exists()
+
+    def test_offline_never_downloads(self, monkeypatch, downloads):
+        monkeypatch.setenv(models.OFFLINE_ENV, "1")
+        with pytest.raises(ModelNotAvailable, match="models fetch"):
+            fetch_model(URL, "detector.task")
+        assert downloads == []
+
+    def test_default_directory(self, monkeypatch, tmp_path):
+        monkeypatch.delenv(models.MODEL_DIR_ENV)
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        assert model_directory() == tmp_path / "portrait-analyser"
+
+
+class TestPreloadModels:
+    def test_selected_models(self, model_dir, downloads):
+        paths = preload_models(["face_landmarker", "pose_landmarker_lite"])
+        assert list(paths) == ["face_landmarker", "pose_landmarker_lite"]
+        assert paths["pose_landmarker_lite"] == model_dir / "pose_landmarker_lite.task"
+        assert "pose_landmarker_lite/" in downloads[1]
+
+    def test_explicit_directory(self, tmp_path, downloads):
+        paths = preload_models(["face_detector"], directory=tmp_path / "bundle")
+        assert paths["face_detector"].parent == tmp_path / "bundle"
+
+    def test_unknown_model(self):
+        with pytest.raises(ValueError, match="volume"):
+            preload_models(["volume"])
+
+    def test_pinned_model_mismatch(self, model_dir, downloads):
+        models._PINNED_SHA256["face_landmarker.task"] = "0" * 64
+        assert models.available_models()["face_landmarker"].sha256 == "0" * 64
+
+        with pytest.raises(ModelChecksumMismatch):
+            preload_models(["face_landmarker"])
+        assert not (model_dir / "face_landmarker.task").exists()
+
+    def test_detectors_check_the_pinned_digest(self, model_dir, downloads):
+        from portrait_analyser.pose import _get_face_mesh_model_path
+
+        models._PINNED_SHA256["face_landmarker.task"] = "0" * 64
+        with pytest.raises(ModelChecksumMismatch):
+            _get_face_mesh_model_path()
+
+        models._PINNED_SHA256["face_landmarker.task"] = hashlib.sha256(
+            PAYLOAD
+        ).hexdigest()
+        assert _get_face_mesh_model_path() == str(model_dir / "face_landmarker.task")
+
+    def test_pose_model_path_uses_the_store(self, model_dir, downloads):
+        from portrait_analyser.pose import _get_model_path
+
+        assert _get_model_path("full") == str(model_dir / "pose_landmarker_full.task")
+
+
+class TestModelsCli:
+    def test_fetch_and_list(self, model_dir, downloads, capsys):
+        assert main(["models", "fetch", "selfie_segmenter"]) == 0
+        assert str(model_dir / "selfie_segmenter.tflite") in capsys.readouterr().out
+
+        assert main(["models", "list"]) == 0
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == len(models.available_models())
+        status = {line.split()[0]: line.split()[1] for line in lines}
+        assert status["selfie_segmenter"] == "present"
+        assert status["face_detector"] == "missing"
+
+    def test_fetch_failure_exits_nonzero(self, capsys):
+        with patch("urllib.request.urlopen", side_effect=OSError("offline")):
+            assert main(["models", "fetch", "face_detector"]) == 1
+        assert "offline" in capsys.readouterr().err
@@ -20,7 +20,9 @@ from portrait_analyser.neck import (
     estimate_face_from_skinmap,
     find_stable_depth_x_from_edge,
     neck_search_bounds_from_face_landmarks,
+    neck_search_kwargs_from_detection,
 )
+from portrait_analyser.pose import FaceMeshDebug, NeckMidpoint, PortraitPose
 
 
 def _make_tapered_skin_image(
@@ -217,6 +219,41 @@ class TestAnatomicalNeckSearch:
         assert end <= 420
         assert end < 800
 
+    def test_search_kwargs_from_detection(self):
+        landmarks = ((80.4, 100.0), (120.6, 300.2), (100.0, 220.0))
+        neck_midpoint = NeckMidpoint(
+            nose=(100.0, 180.0),
+            mouth_left=(90.0, 250.0),
+            mouth_right=(110.0, 250.0),
+            chin=(100.0, 290.0),
+            neck_extended=False,
+            face_flatness_ratio=None,
+            pose=PortraitPose.NEUTRAL_NECK,
+            mouth_open_ratio=0.0,
+            x=100.0,
+            y=380.0,
+        )
+
+        kwargs = neck_search_kwargs_from_detection(
+            neck_midpoint, FaceMeshDebug(landmarks), 1000
+        )
+
+        assert (kwargs["scan_start_y"], kwargs["scan_end_y"]) == (
+            neck_search_bounds_from_face_landmarks(
+                chin=(100.0, 290.0),
+                nose=(100.0, 180.0),
+                image_height=1000,
+                face_mesh_landmarks=landmarks,
+                pose_neck_y=380.0,
+            )
+        )
+        assert kwargs["neck_midpoint_y"] == 380.0
+        assert kwargs["face_location"] == (80, 100, 41, 200)
+        assert "face_location" not in neck_search_kwargs_from_detection(
+            neck_midpoint, None, 1000
+        )
+        assert neck_search_kwargs_from_detection(None, None, 1000) == {}
+
     def test_first_neck_basin_beats_later_narrow_shoulder_artifact(self):
         width, height = 220, 190
         skinmap = Image.new("L", (width, height), 0)
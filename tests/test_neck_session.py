@@ -0,0 +1,127 @@
+"""Tests for incremental neck re-measurement."""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from portrait_analyser.face import sample_depth_at_point
+from portrait_analyser.neck import (
+    _find_best_sag,
+    _find_best_sag_on_grid,
+    _median_depth_grid,
+    compute_neck_circumference,
+)
+from portrait_analyser.neck_session import NeckMeasurementSession
+
+
+@pytest.fixture
+def session(synthetic):
+    portrait, _ = synthetic
+    session = NeckMeasurementSession.from_portrait(portrait)
+    session.measure()
+    return session
+
+
+def _from_scratch(portrait, **params):
+    return compute_neck_circumference(
+        portrait.skinmap,
+        portrait.depthmap,
+        *portrait.photo.size,
+        portrait.floatValueMin,
+        portrait.floatValueMax,
+        hairmap=portrait.hairmap,
+        **params,
+    )
+
+
+class TestNeckMeasurementSession:
+    def test_matches_compute_neck_circumference(self, synthetic, session):
+        portrait, _ = synthetic
+        first = session.measure()
+        assert first.circumference_mm > 0
+        assert first == _from_scratch(portrait)
+
+        for change in (
+            {"n_samples": 41},
+            {"arc_sag": 12},
+            {"sag_step": 10, "arc_sag": None},
+            {"scan_start_y": first.neck_y - 60, "scan_end_y": first.neck_y + 60},
+            {"skin_threshold": 60},
+            {"circumference_multiplier": 3.2},
+        ):
+            measurement = session.measure(**change)
+            assert measurement == _from_scratch(portrait, **session.parameters)
+
+    @pytest.mark.parametrize(
+        "change, recomputed",
+        [
+            ({"arc_sag": 12}, ("amplitude", "arc", "measurement")),
+            ({"n_samples": 41}, ("sample_xs", "amplitude", "arc", "measurement")),
+            ({"circumference_multiplier": 3.2}, ("measurement",)),
+            (
+                {"scan_start_y": 500},
+                ("neck_row", "edges", "sample_xs", "amplitude", "arc", "measurement"),
+            ),
+            ({"n_samples": 25}, ()),
+        ],
+    )
+    def test_only_downstream_stages_rerun(self, session, change, recomputed):
+        assert session.update(**change) == recomputed
+        session.measure()
+        assert session.recomputed == recomputed
+
+    def test_skin_threshold_keeps_the_filtered_depthmap(self, session):
+        session.measure(skin_threshold=60)
+        assert "skinmap" in session.recomputed
+        assert "filtered_depthmap" not in session.recomputed
+
+    @pytest.mark.parametrize(
+        "change, recomputed",
+        [
+            ({"n_samples": 41}, ("sample_xs", "amplitude", "arc", "measurement")),
+            ({"arc_sag": 12}, ("amplitude", "arc", "measurement")),
+        ],
+    )
+    def test_repeated_remeasure_keeps_upstream_stages(
+        self, session, change, recomputed
+    ):
+        # Alternate between two values so every call is a real change.
+        name, value = next(iter(change.items()))
+        values = (value, session.parameters[name])
+        for i in range(4):
+            assert session.measure(**{name: values[i % 2]}) is not None
+            assert session.recomputed == recomputed
+
+    def test_unknown_parameter(self, session):
+        with pytest.raises(TypeError, match="skin_treshold"):
+            session.update(skin_treshold=40)
+
+    def test_preset_and_explicit_parameters(self, synthetic):
+        portrait, _ = synthetic
+        session = NeckMeasurementSession.from_portrait(
+            portrait, preset="fast", sag_step=2
+        )
+        assert session.parameters["n_samples"] == 15
+        assert session.parameters["sag_step"] == 2
+
+
+@pytest.mark.parametrize("n_samples, sag_step", [(25, 5), (41, 1), (7, 13)])
+def test_vectorised_sag_sweep_matches(synthetic, session, n_samples, sag_step):
+    portrait, _ = synthetic
+    neck = session.measure()
+    step = (neck.right_x - neck.left_x) / (n_samples - 1)
+    sample_xs = [round(neck.left_x + i * step) for i in range(n_samples)]
+    args = (sample_xs, neck.neck_y, neck.left_x, neck.right_x, *portrait.photo.size)
+
+    assert _find_best_sag_on_grid(
+        _median_depth_grid(portrait.depthmap), *args, sag_step=sag_step
+    ) == _find_best_sag(portrait.depthmap, *args, sag_step=sag_step)
+
+
+def test_median_depth_grid_matches_point_sampling():
+    depth = np.random.default_rng(0).integers(0, 256, (7, 5), dtype=np.uint8)
+    depthmap = Image.fromarray(depth)
+    grid = _median_depth_grid(depthmap)
+    for y in range(7):
+        for x in range(5):
+            assert grid[y, x] == sample_depth_at_point(depthmap, x, y, 5, 7)
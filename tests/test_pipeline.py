@@ -0,0 +1,141 @@
+"""Tests for the stage-graph orchestrator ``analyse_portrait``."""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from portrait_analyser.pipeline import MEASUREMENTS, analyse_portrait
+from portrait_analyser.pose import PortraitPose
+
+
+@pytest.fixture
+def person_mask(synthetic):
+    """Photo-resolution silhouette: everything with valid depth."""
+    portrait, _ = synthetic
+    return np.asarray(portrait.depthmap.resize(portrait.photo.size)) > 0
+
+
+@pytest.fixture
+def detectors(detections, person_mask):
+    """Patched Pose/FaceMesh and segmentation, for the stages and the router."""
+    landmarks = MagicMock(return_value=detections)
+    segmentation = MagicMock(return_value=person_mask)
+    with (
+        patch("portrait_analyser.pipeline.detect_neck_midpoint", landmarks),
+        patch("portrait_analyser.routing.detect_neck_midpoint", landmarks),
+        patch("portrait_analyser.pipeline._get_segmentation_mask", segmentation),
+        patch("portrait_analyser.routing._get_segmentation_mask", segmentation),
+    ):
+        yield landmarks, segmentation
+
+
+class TestAnalysePortrait:
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    def test_all_measurements_share_intermediates(
+        self, synthetic, detectors, max_workers
+    ):
+        portrait, _ = synthetic
+        report = analyse_portrait(portrait, max_workers=max_workers)
+
+        assert report.ok and report.measurements == MEASUREMENTS
+        assert report.incisor is portrait.incisor_measurement
+        assert report.neck_midpoint is detectors[0].return_value[0]
+        assert report.mouth.distance_3d_mm > 0
+        assert report.neck.circumference_mm > 0
+        assert report.tmd_mm > 0
+        assert report.segmentation_neck_midpoint.pose == PortraitPose.EXTENDED_NECK
+        assert report.dual_mask_neck_midpoint.y > report.dual_mask_neck_midpoint.chin[1]
+        assert report.neck_route.strategy == "dual_mask"
+        assert report.neck_route.neck_midpoint == report.dual_mask_neck_midpoint
+        # One landmark detection and one segmentation for all of them, the
+        # router included.
+        assert [d.call_count for d in detectors] == [1, 1]
+        assert set(report.stage_seconds) == {
+            "frame",
+            "landmarks",
+            "person_mask",
+            *MEASUREMENTS,
+        }
+
+    def test_sequential_and_concurrent_reports_match(self, synthetic, detectors):
+        portrait, _ = synthetic
+        sequential = analyse_portrait(portrait, max_workers=1)
+        concurrent = analyse_portrait(portrait, max_workers=4)
+        assert concurrent.neck.circumference_mm == sequential.neck.circumference_mm
+        assert concurrent.tmd_mm == sequential.tmd_mm
+        assert concurrent.dual_mask_neck_midpoint == sequential.dual_mask_neck_midpoint
+
+    def test_unneeded_stages_are_skipped(self, synthetic, detectors):
+        portrait, _ = synthetic
+        report = analyse_portrait(portrait, measurements=["incisor", "tmd"])
+
+        assert set(report.stage_seconds) == {
+            "incisor",
+            "frame",
+            "landmarks",
+            "neck_midpoint",
+            "tmd",
+        }
+        assert detectors[1].call_count == 0
+        assert report.neck is None and report.mouth is None
+
+    def test_independent_stages_run_concurrently(self, synthetic, detections):
+        portrait, _ = synthetic
+        both_running = threading.Barrier(2, timeout=5)
+
+        def landmarks(*args, **kwargs):
+            both_running.wait()
+            return detections
+
+        def segmentation(*args, **kwargs):
+            both_running.wait()
+            return None
+
+        with (
+            patch("portrait_analyser.pipeline.detect_neck_midpoint", landmarks),
+            patch("portrait_analyser.pipeline._get_segmentation_mask", segmentation),
+        ):
+            report = analyse_portrait(
+                portrait, measurements=["neck_midpoint", "segmentation_neck_midpoint"]
+            )
+
+        assert report.ok
+        assert report.neck_midpoint is detections[0]
+        assert report.segmentation_neck_midpoint is None
+
+    def test_failures_skip_dependants_only(self, synthetic, detectors):
+        portrait, _ = synthetic
+        detectors[0].side_effect = RuntimeError("no models")
+        report = analyse_portrait(portrait, measurements=["incisor", "neck", "tmd"])
+
+        assert not report.ok
+        assert list(report.errors) == ["landmarks"]
+        assert str(report.errors["landmarks"]) == "no models"
+        assert set(report.skipped) == {"neck_midpoint", "tmd"}
+        assert report.incisor is portrait.incisor_measurement
+        # The neck search falls back to the face estimated from the skin.
+        assert report.neck.circumference_mm > 0
+
+    @pytest.mark.parametrize("max_workers", [1, 4])
+    def test_failed_landmarks_keep_the_router_fallback(
+        self, synthetic, detectors, max_workers
+    ):
+        portrait, _ = synthetic
+        detectors[0].side_effect = RuntimeError("no pose model")
+        report = analyse_portrait(
+            portrait,
+            measurements=["neck_midpoint", "neck_route"],
+            max_workers=max_workers,
+        )
+
+        assert list(report.errors) == ["landmarks"]
+        assert report.skipped == ("neck_midpoint",)
+        assert report.neck_route.strategy == "dual_mask"
+        assert [d.call_count for d in detectors] == [1, 1]
+
+    def test_rejects_unknown_measurement(self, synthetic):
+        portrait, _ = synthetic
+        with pytest.raises(ValueError, match="volume"):
+            analyse_portrait(portrait, measurements=["volume"])
@@ -2,17 +2,24 @@
 
 from __future__ import annotations
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
 from PIL import Image
 
+from portrait_analyser.frame import AnalysisFrame
 from portrait_analyser.pose import (
     FACE_FLATNESS_THRESHOLD,
     FACE_FLATNESS_THRESHOLD_POSE,
+    FaceMeshAnalysis,
+    FaceMeshDebug,
     NeckMidpoint,
     PortraitPose,
+    _detect_chin_via_face_mesh,
     detect_neck_midpoint,
 )
 
@@ -423,6 +430,170 @@ class TestEdgeCases:
         assert neck.interpolation_ratio is None
 
 
+# ---------------------------------------------------------------------------
+# Concurrent FaceMesh + Pose inference
+# ---------------------------------------------------------------------------
+
+
+class TestConcurrentInference:
+    LANDMARKS = {
+        0: _make_landmark(0.5, 0.25),
+        2: _make_landmark(0.4, 0.20),
+        5: _make_landmark(0.6, 0.20),
+        9: _make_landmark(0.45, 0.30),
+        10: _make_landmark(0.55, 0.30),
+        11: _make_landmark(0.25, 0.75),
+        12: _make_landmark(0.75, 0.75),
+    }
+
+    def _run(self, threads=None, pose_error=None, **kwargs):
+        face_mesh = FaceMeshAnalysis(
+            chin=(100.0, 160.0),
+            mouth_open_ratio=0.1,
+            nose=(100.0, 100.0),
+            left_eye=(80.0, 80.0),
+            right_eye=(120.0, 80.0),
+            mouth_left=(90.0, 130.0),
+            mouth_right=(110.0, 130.0),
+            debug=FaceMeshDebug(landmarks=((100.0, 160.0),)),
+        )
+        threads = {} if threads is None else threads
+        pose_ran = threading.Event()
+
+        def face_mesh_stub(*args, **kw):
+            if pose_error is not None:
+                # Still running when Pose fails.
+                pose_ran.wait(timeout=5)
+                time.sleep(0.05)
+            threads["face_mesh"] = threading.get_ident()
+            return face_mesh
+
+        def pose_stub(mp_image):
+            threads["pose"] = threading.get_ident()
+            pose_ran.set()
+            if pose_error is not None:
+                raise pose_error
+            return _build_pose_result(self.LANDMARKS)
+
+        mock_mp = MagicMock()
+        mock_mp.ImageFormat.SRGB = 1
+        landmarker = mock_mp.tasks.vision.PoseLandmarker.create_from_options.return_value
+        landmarker.detect.side_effect = pose_stub
+
+        with (
+            patch("portrait_analyser.pose._get_model_path", return_value="/fake"),
+            patch(
+                "portrait_analyser.pose._detect_chin_via_face_mesh",
+                side_effect=face_mesh_stub,
+            ),
+            patch.dict("sys.modules", {"mediapipe": mock_mp}),
+        ):
+            result = detect_neck_midpoint(Image.new("RGB", (200, 400)), **kwargs)
+        return result, threads
+
+    def test_concurrent_result_matches_sequential(self):
+        sequential, sequential_threads = self._run()
+        concurrent, concurrent_threads = self._run(concurrent=True)
+
+        assert concurrent == sequential
+        assert sequential_threads["face_mesh"] == sequential_threads["pose"]
+        assert concurrent_threads["face_mesh"] != concurrent_threads["pose"]
+
+    def test_caller_executor_is_used(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            worker = executor.submit(threading.get_ident).result()
+            result, threads = self._run(executor=executor)
+
+        assert threads["face_mesh"] == worker
+        assert result[0] is not None
+
+    def test_pose_failure_waits_for_face_mesh(self):
+        threads = {}
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with pytest.raises(RuntimeError, match="pose failed"):
+                self._run(
+                    threads,
+                    pose_error=RuntimeError("pose failed"),
+                    executor=executor,
+                )
+            # FaceMesh finished before the error reached the caller.
+            assert "face_mesh" in threads
+
+
+# ---------------------------------------------------------------------------
+# Face-cropped Face Mesh
+# ---------------------------------------------------------------------------
+
+
+class TestFaceCroppedFaceMesh:
+    def _run(self, detections, color="black"):
+        mock_mp = MagicMock()
+        mock_mp.ImageFormat.SRGB = 1
+        mock_mp.Image.side_effect = lambda image_format, data: SimpleNamespace(
+            data=data
+        )
+        vision = mock_mp.tasks.vision
+        vision.FaceDetector.create_from_options.return_value.detect.return_value = (
+            SimpleNamespace(detections=detections)
+        )
+        landmarks = [_make_landmark(0.5, 0.5) for _ in range(478)]
+        landmarks[152] = _make_landmark(0.5, 1.0)  # chin at the crop's bottom edge
+        landmarker = vision.FaceLandmarker.create_from_options.return_value
+        landmarker.detect.return_value = SimpleNamespace(face_landmarks=[landmarks])
+
+        # 2048x1024 photo -> 1024x512 analysis frame (scale 2).
+        frame = AnalysisFrame.from_image(Image.new("RGB", (2048, 1024), color))
+        with (
+            patch("portrait_analyser.face._get_face_model_path", return_value="/fake"),
+            patch("portrait_analyser.pose._get_face_mesh_model_path", return_value="/fake"),
+            patch.dict("sys.modules", {"mediapipe": mock_mp}),
+        ):
+            analysis = _detect_chin_via_face_mesh(
+                frame.mp_image(), 2048, 1024, 0.5, frame=frame, face_crop=True
+            )
+        return analysis, landmarker.detect.call_args.args[0], frame
+
+    def test_landmarks_are_mapped_from_crop_to_photo(self):
+        face = SimpleNamespace(
+            bounding_box=SimpleNamespace(
+                origin_x=400, origin_y=100, width=200, height=200
+            )
+        )
+        analysis, landmarker_input, frame = self._run([face])
+
+        # Crop is 300x300 frame px centred on (500, 200): x 350-650, y 50-350.
+        assert landmarker_input.data.shape == (256, 256, 3)
+        assert analysis.nose == pytest.approx((1000.0, 400.0))
+        assert analysis.chin == pytest.approx((1000.0, 700.0))
+        assert len(analysis.debug.landmarks) == 478
+
+    def test_face_at_the_frame_edge_is_letterboxed_not_stretched(self):
+        face = SimpleNamespace(
+            bounding_box=SimpleNamespace(
+                origin_x=-20, origin_y=300, width=200, height=200
+            )
+        )
+        analysis, landmarker_input, frame = self._run([face], color="white")
+
+        # The 300x300 square centred on (80, 400) spans x -70-230 and y
+        # 250-550: 70 columns left of the frame and 38 rows below it are
+        # filled with black instead of stretching the white photo.
+        data = landmarker_input.data
+        assert data.shape == (256, 256, 3)
+        scale = 256 / 300
+        assert not data[:, : int(70 * scale) - 1].any()
+        assert not data[int(262 * scale) + 1 :].any()
+        assert (data[: int(262 * scale) - 1, int(70 * scale) + 1 :] == 255).all()
+        assert analysis.nose == pytest.approx((160.0, 800.0))
+        assert analysis.chin == pytest.approx((160.0, 1100.0))
+
+    def test_falls_back_to_whole_frame_without_face(self):
+        analysis, landmarker_input, frame = self._run([])
+
+        assert landmarker_input is frame.mp_image()
+        assert analysis.nose == pytest.approx((1024.0, 512.0))
+
+
 # ---------------------------------------------------------------------------
 # ImportError handling
 # ---------------------------------------------------------------------------
@@ -0,0 +1,156 @@
+"""Tests for pose model variants and speed/accuracy presets."""
+
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy
+import pytest
+from PIL import Image
+
+from portrait_analyser import neck
+from portrait_analyser.extended_neck import _get_segmentation_mask
+from portrait_analyser.neck import compute_neck_circumference
+from portrait_analyser.pose import PoseModelVariant, detect_neck_midpoint
+from portrait_analyser.presets import (
+    ANALYSIS_PRESETS,
+    AnalysisPreset,
+    get_analysis_preset,
+)
+from portrait_analyser.session import PortraitInferenceSession
+
+
+def _mock_pose_mediapipe():
+    mock_mp = MagicMock()
+    mock_mp.ImageFormat.SRGB = "SRGB"
+    vision = mock_mp.tasks.vision
+    vision.PoseLandmarker.create_from_options.side_effect = lambda options: MagicMock(
+        detect=MagicMock(return_value=SimpleNamespace(pose_landmarks=[]))
+    )
+    return mock_mp
+
+
+class TestAnalysisPresets:
+    def test_presets_trade_speed_for_accuracy(self):
+        fast = get_analysis_preset("fast")
+        balanced = get_analysis_preset("balanced")
+        accurate = get_analysis_preset("accurate")
+
+        assert fast.pose_model_variant is PoseModelVariant.LITE
+        assert balanced.pose_model_variant is PoseModelVariant.FULL
+        assert accurate.pose_model_variant is PoseModelVariant.HEAVY
+        assert fast.n_samples < balanced.n_samples < accurate.n_samples
+        assert fast.sag_step > balanced.sag_step > accurate.sag_step
+        assert accurate.segmentation_max_dimension is None
+
+    def test_unknown_preset_is_rejected(self):
+        with pytest.raises(ValueError, match="fast"):
+            get_analysis_preset("turbo")
+
+    def test_custom_preset_accepts_variant_value(self):
+        preset = AnalysisPreset(name="custom", pose_model_variant="full")
+        assert preset.pose_model_variant is PoseModelVariant.FULL
+        assert get_analysis_preset(preset) is preset
+
+    def test_invalid_parameters_are_rejected(self):
+        with pytest.raises(ValueError):
+            AnalysisPreset(name="bad", sag_step=0)
+        with pytest.raises(ValueError):
+            AnalysisPreset(name="bad", pose_model_variant="tiny")
+
+    def test_kwargs_match_entry_points(self):
+        preset = ANALYSIS_PRESETS["fast"]
+        assert preset.neck_midpoint_kwargs() == {
+            "model_variant": PoseModelVariant.LITE
+        }
+        assert preset.neck_circumference_kwargs() == {"n_samples": 15, "sag_step": 15}
+        assert preset.segmentation_kwargs() == {"max_dimension": 512}
+
+
+class TestPoseModelVariant:
+    def test_variant_selects_model_file(self):
+        mock_mp = _mock_pose_mediapipe()
+        with (
+            patch(
+                "portrait_analyser.pose._get_model_path", return_value="/fake"
+            ) as get_model_path,
+            patch("portrait_analyser.pose._detect_chin_via_face_mesh", return_value=None),
+            patch.dict(sys.modules, {"mediapipe": mock_mp}),
+        ):
+            detect_neck_midpoint(Image.new("RGB", (64, 64)), model_variant="lite")
+
+        get_model_path.assert_called_once_with(PoseModelVariant.LITE)
+
+    def test_session_keeps_one_landmarker_per_variant(self):
+        mock_mp = _mock_pose_mediapipe()
+        with (
+            patch("portrait_analyser.pose._get_model_path", return_value="/fake"),
+            patch.dict(sys.modules, {"mediapipe": mock_mp}),
+            PortraitInferenceSession() as session,
+        ):
+            heavy = session.pose_landmarker(0.5)
+            assert session.pose_landmarker(0.5, model_variant="heavy") is heavy
+            assert session.pose_landmarker(0.5, model_variant="lite") is not heavy
+
+    def test_model_urls_follow_variant(self):
+        with patch("portrait_analyser.pose._download_model") as download:
+            from portrait_analyser.pose import _get_model_path
+
+            _get_model_path(PoseModelVariant.FULL)
+
+        url, filename = download.call_args.args
+        assert filename == "pose_landmarker_full.task"
+        assert "pose_landmarker_full/" in url
+
+
+class TestSagStep:
+    def test_sag_step_is_passed_to_sweep(self):
+        width, height = 400, 600
+        skin = numpy.zeros((height, width), dtype=numpy.uint8)
+        skin[60:250, 100:300] = 255
+        skin[250:350, 160:240] = 255
+        skin[350:560, 60:340] = 255
+        depth = numpy.full((height, width), 180, dtype=numpy.uint8)
+
+        with patch.object(neck, "_find_best_sag", return_value=0) as find_best_sag:
+            compute_neck_circumference(
+                skinmap=Image.fromarray(skin, mode="L"),
+                depthmap=Image.fromarray(depth, mode="L"),
+                photo_width=width,
+                photo_height=height,
+                float_min=0.5,
+                float_max=2.0,
+                face_location=(100, 60, 200, 190),
+                sag_step=20,
+            )
+
+        assert find_best_sag.call_args.kwargs["sag_step"] == 20
+
+
+class TestSegmentationResolution:
+    def test_segmenter_sees_downscaled_image_and_mask_is_upsampled(self):
+        seen_shapes = []
+
+        def segment(mp_image):
+            height, width = seen_shapes[-1][:2]
+            confidence = numpy.zeros((height, width, 1), dtype=numpy.float32)
+            confidence[height // 4 :, width // 4 : 3 * width // 4] = 1.0
+            mask = MagicMock()
+            mask.numpy_view.return_value = confidence
+            return SimpleNamespace(confidence_masks=[mask])
+
+        mock_mp = MagicMock()
+        mock_mp.Image.side_effect = lambda image_format, data: seen_shapes.append(
+            data.shape
+        )
+        session = MagicMock(detector_store=None)
+        session.image_segmenter.return_value.segment.side_effect = segment
+
+        with patch.dict(sys.modules, {"mediapipe": mock_mp}):
+            mask = _get_segmentation_mask(
+                Image.new("RGB", (800, 400)), session=session, max_dimension=200
+            )
+
+        assert seen_shapes == [(100, 200, 3)]
+        assert mask.shape == (400, 800)
+        assert mask[300, 400] and not mask[50, 50]
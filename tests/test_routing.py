@@ -0,0 +1,133 @@
+"""Tests for cost-aware neck detector routing."""
+
+from dataclasses import replace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from portrait_analyser.pipeline import analyse_portrait
+from portrait_analyser.pose import PortraitPose
+from portrait_analyser.routing import NeckDetectorRouter, route_neck_midpoint
+
+
+@pytest.fixture
+def portrait(synthetic):
+    # A shallow copy, so tests may drop mattes without affecting the others.
+    portrait, _ = synthetic
+    copy = object.__new__(type(portrait))
+    copy.__dict__.update(portrait.__dict__)
+    return copy
+
+
+@pytest.fixture
+def detectors(synthetic, detections):
+    """Patched person segmentation and Pose/FaceMesh detection."""
+    portrait, _ = synthetic
+    mask = np.asarray(portrait.depthmap.resize(portrait.photo.size)) > 0
+    with (
+        patch(
+            "portrait_analyser.routing._get_segmentation_mask", return_value=mask
+        ) as segmentation,
+        patch(
+            "portrait_analyser.routing.detect_neck_midpoint", return_value=detections
+        ) as pose,
+    ):
+        yield segmentation, pose
+
+
+class TestPlan:
+    def test_truedepth_mattes_go_to_dual_mask_first(self, portrait):
+        router = NeckDetectorRouter()
+        assert router.plan(portrait) == ("dual_mask", "segmentation", "pose")
+        assert router.plan(portrait, preset="fast")[0] == "dual_mask"
+
+    def test_dual_mask_needs_skin_and_valid_depth(self, portrait):
+        router = NeckDetectorRouter()
+        portrait.skinmap = None
+        assert router.plan(portrait) == ("segmentation", "pose")
+
+    def test_cheap_pose_model_first_unless_neck_extended(self, portrait):
+        router = NeckDetectorRouter(costs={"pose_lite": 0.02})
+        assert router.plan(portrait, preset="fast")[0] == "pose"
+        assert router.plan(
+            portrait, preset="fast", pose_hint=PortraitPose.EXTENDED_NECK
+        ) == ("dual_mask", "segmentation", "pose")
+
+
+class TestRoute:
+    def test_early_exit_skips_the_pose_model(self, portrait, detectors):
+        router = NeckDetectorRouter()
+        route = router.route(portrait)
+
+        assert route.strategy == "dual_mask" and route.path == "dual_mask"
+        assert route.neck_midpoint.y > route.neck_midpoint.chin[1]
+        assert route.attempts[0].accepted and route.attempts[0].seconds > 0
+        assert detectors[1].call_count == 0
+        assert router.success_rate("dual_mask") > 0.85
+
+    def test_rejected_result_falls_through_sharing_the_mask(
+        self, portrait, detectors
+    ):
+        with patch(
+            "portrait_analyser.routing._detect_from_dual_mask",
+            return_value=(None, None),
+        ):
+            route = route_neck_midpoint(portrait)
+
+        assert route.path == "dual_mask -> segmentation"
+        assert route.attempts[0].reason == "no_result"
+        assert route.strategy == "segmentation"
+        assert detectors[0].call_count == 1
+
+    def test_implausible_results_and_errors_are_rejected(
+        self, portrait, detectors, detections
+    ):
+        above_chin = replace(detections[0], y=detections[0].chin[1] - 10)
+        detectors[0].side_effect = RuntimeError("segmenter unavailable")
+        detectors[1].return_value = (above_chin, None, None)
+
+        route = route_neck_midpoint(portrait)
+
+        assert route.neck_midpoint is None and route.strategy is None
+        assert [(a.strategy, a.reason) for a in route.attempts] == [
+            ("dual_mask", "RuntimeError: segmenter unavailable"),
+            ("segmentation", "RuntimeError: segmenter unavailable"),
+            ("pose", "neck_above_chin"),
+        ]
+
+    def test_precomputed_intermediates_are_reused(
+        self, portrait, detectors, detections
+    ):
+        route = route_neck_midpoint(portrait, person_mask=None, pose_result=detections)
+
+        assert route.path == "dual_mask -> segmentation -> pose"
+        assert route.attempts[0].reason == "no_person_mask"
+        assert route.neck_midpoint is detections[0]
+        assert [d.call_count for d in detectors] == [0, 0]
+
+    def test_router_learns_from_failures(self, portrait, detectors):
+        router = NeckDetectorRouter()
+        with patch(
+            "portrait_analyser.routing._detect_from_dual_mask",
+            return_value=(None, None),
+        ):
+            for _ in range(3):
+                router.route(portrait)
+
+        assert router.success_rate("dual_mask") < 0.85
+        assert router.plan(portrait)[0] == "segmentation"
+        assert router.route(portrait).path == "segmentation"
+
+    def test_pipeline_measurement(self, portrait, detectors):
+        segmentation, pose = detectors
+        with (
+            patch("portrait_analyser.pipeline._get_segmentation_mask", segmentation),
+            patch("portrait_analyser.pipeline.detect_neck_midpoint", pose),
+        ):
+            report = analyse_portrait(portrait, measurements=["neck_route"])
+        assert report.ok
+        assert report.neck_route.strategy == "dual_mask"
+        # The router segments on demand; dual_mask is accepted, so the pose
+        # model never runs.
+        assert [d.call_count for d in detectors] == [1, 0]
@@ -1,11 +1,16 @@
 """Tests for segmentation-based neck/chin detection."""
 
+from unittest.mock import patch
+
 import numpy as np
+from PIL import Image
 
+from portrait_analyser import extended_neck
 from portrait_analyser.pose import NeckMidpoint, PortraitPose
 from portrait_analyser.extended_neck import (
     _compute_width_profile,
     _detect_from_mask,
+    _WidthProfileCache,
 )
 
 
@@ -68,6 +73,67 @@ class TestComputeWidthProfile:
         assert np.all(lefts == 0)
         assert np.all(rights == 0)
 
+    def test_matches_per_row_scan(self):
+        rng = np.random.default_rng(0)
+        mask = rng.random((60, 45)) > 0.9
+        mask[10] = False
+
+        widths, lefts, rights = _compute_width_profile(mask)
+
+        for y in range(mask.shape[0]):
+            columns = np.flatnonzero(mask[y])
+            if len(columns) == 0:
+                assert widths[y] == lefts[y] == rights[y] == 0
+            else:
+                assert lefts[y] == columns[0]
+                assert rights[y] == columns[-1]
+                assert widths[y] == columns[-1] - columns[0]
+
+
+class TestWidthProfileCache:
+    def test_profile_is_computed_once_per_mask(self):
+        mask = _make_person_mask()
+        cache = _WidthProfileCache()
+
+        with patch.object(
+            extended_neck,
+            "_compute_width_profile",
+            wraps=extended_neck._compute_width_profile,
+        ) as compute:
+            first = cache.get(mask)
+            second = cache.get(mask)
+            cache.get(mask.copy())
+
+        assert first is second
+        assert compute.call_count == 2
+        assert not first[0].flags.writeable
+
+    def test_dual_mask_detection_profiles_each_mask_once(self):
+        seg_mask = _make_person_mask()
+        h, w = seg_mask.shape
+        skin = np.zeros((h, w), dtype=np.uint8)
+        skin[20:140, 110:190] = 255
+        depth = np.where(seg_mask, 200, 0).astype(np.uint8)
+        depth[60, 150] = 255  # chin: closest skin pixel
+
+        with (
+            patch.object(extended_neck, "_get_segmentation_mask", return_value=seg_mask),
+            patch.object(
+                extended_neck,
+                "_compute_width_profile",
+                wraps=extended_neck._compute_width_profile,
+            ) as compute,
+        ):
+            result, _ = extended_neck.detect_neck_midpoint_from_dual_mask(
+                Image.new("RGB", (w, h)),
+                Image.fromarray(skin, mode="L"),
+                Image.fromarray(depth, mode="L"),
+            )
+
+        assert result is not None
+        profiled = [id(call.args[0]) for call in compute.call_args_list]
+        assert len(profiled) == len(set(profiled))
+
 
 class TestDetectFromMask:
     def test_person_with_neck(self):
@@ -192,3 +258,43 @@ class TestDetectFromMask:
         assert result is not None
         assert result.face_flatness_ratio is None
         assert result.mouth_open_ratio is None
+
+
+class TestNativeResolutionDepth:
+    def test_chin_found_at_depth_resolution_is_mapped_to_photo_space(self):
+        skin = np.zeros((400, 300), dtype=bool)
+        skin[40:240, 90:210] = True
+        depth = np.full((100, 75), 120, dtype=np.uint8)
+        depth[45, 37] = 250  # closest depth pixel within the skin area
+
+        chin_y, chin_x = extended_neck._find_chin_from_depth(skin, depth)
+
+        assert chin_y == round(45 * 399 / 99)
+        assert chin_x == 37 * 299 / 74
+
+    def test_depth_body_mask_stays_at_depth_resolution(self):
+        depth = np.full((100, 75), 200, dtype=np.uint8)
+        hair = np.zeros((400, 300), dtype=np.uint8)
+        hair[:80] = 255
+
+        body = extended_neck._make_depth_body_mask(depth, hair_arr=hair)
+
+        assert body.shape == depth.shape
+        assert not body[:19].any()
+        assert body[21:].all()
+
+    def test_depth_profile_landmarks_are_returned_in_photo_space(self):
+        seg_mask = _make_person_mask(h=800, w=600, head_width=160, neck_width=80,
+                                     torso_width=400, head_top=40, head_bottom=200,
+                                     neck_bottom=280, torso_bottom=760)
+        depth = np.where(seg_mask, 200, 0).astype(np.uint8)[::4, ::4].copy()
+
+        ear_y, neck_y, shoulder_y, left_x, right_x = (
+            extended_neck._detect_landmarks_from_depth_profile(
+                depth, seg_mask, chin_y=120
+            )
+        )
+
+        assert 120 <= ear_y < neck_y < shoulder_y < 800
+        assert left_x is not None and right_x is not None
+        assert 0 < left_x < right_x < 600
@@ -0,0 +1,94 @@
+"""Tests for VIDEO running-mode neck midpoint detection over bursts."""
+
+import sys
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from PIL import Image
+
+from portrait_analyser.pose import detect_neck_midpoint
+from portrait_analyser.sequence import (
+    NeckMidpointTracker,
+    detect_neck_midpoint_sequence,
+)
+
+
+def _landmark(x, y, visibility=0.99):
+    return SimpleNamespace(x=x, y=y, z=0.0, visibility=visibility)
+
+
+def _pose_result():
+    landmarks = [_landmark(0, 0) for _ in range(33)]
+    landmarks[0] = _landmark(0.5, 0.25)
+    landmarks[2] = _landmark(0.4, 0.20)
+    landmarks[5] = _landmark(0.6, 0.20)
+    landmarks[9] = _landmark(0.45, 0.30)
+    landmarks[10] = _landmark(0.55, 0.30)
+    landmarks[11] = _landmark(0.25, 0.75)
+    landmarks[12] = _landmark(0.75, 0.75)
+    return SimpleNamespace(pose_landmarks=[landmarks])
+
+
+def _mock_mediapipe():
+    mock_mp = MagicMock()
+    mock_mp.ImageFormat.SRGB = "SRGB"
+    vision = mock_mp.tasks.vision
+    pose = vision.PoseLandmarker.create_from_options.return_value
+    pose.detect.return_value = _pose_result()
+    pose.detect_for_video.return_value = _pose_result()
+    face = vision.FaceLandmarker.create_from_options.return_value
+    face.detect.return_value = SimpleNamespace(face_landmarks=[])
+    face.detect_for_video.return_value = SimpleNamespace(face_landmarks=[])
+    return mock_mp
+
+
+@contextmanager
+def _patched(mock_mp):
+    with (
+        patch("portrait_analyser.pose._get_model_path", return_value="/fake"),
+        patch("portrait_analyser.pose._get_face_mesh_model_path", return_value="/fake"),
+        patch.dict(sys.modules, {"mediapipe": mock_mp}),
+    ):
+        yield
+
+
+class TestNeckMidpointSequence:
+    def test_frames_are_tracked_in_video_mode(self):
+        mock_mp = _mock_mediapipe()
+        images = [Image.new("RGB", (200, 400)) for _ in range(3)]
+        with _patched(mock_mp):
+            results = detect_neck_midpoint_sequence(images, timestamps_ms=[0, 40, 80])
+
+        vision = mock_mp.tasks.vision
+        assert vision.PoseLandmarker.create_from_options.call_count == 1
+        options = vision.PoseLandmarkerOptions.call_args.kwargs
+        assert options["running_mode"] is vision.RunningMode.VIDEO
+        pose = vision.PoseLandmarker.create_from_options.return_value
+        assert [c.args[1] for c in pose.detect_for_video.call_args_list] == [0, 40, 80]
+        pose.detect.assert_not_called()
+        pose.close.assert_called_once()
+        assert len(results) == 3
+
+    def test_result_matches_image_mode(self):
+        mock_mp = _mock_mediapipe()
+        image = Image.new("RGB", (200, 400))
+        with _patched(mock_mp):
+            expected = detect_neck_midpoint(image)
+            (tracked,) = detect_neck_midpoint_sequence([image])
+
+        assert tracked == expected
+        assert tracked[0].y == pytest.approx(230.0)
+
+    def test_timestamps_must_increase(self):
+        mock_mp = _mock_mediapipe()
+        image = Image.new("RGB", (200, 400))
+        with _patched(mock_mp), NeckMidpointTracker() as tracker:
+            tracker.detect(image, 10)
+            with pytest.raises(ValueError, match="increase"):
+                tracker.detect(image, 10)
+
+    def test_timestamp_count_must_match_images(self):
+        with pytest.raises(ValueError):
+            detect_neck_midpoint_sequence([Image.new("RGB", (8, 8))], [0, 1])
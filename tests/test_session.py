@@ -0,0 +1,93 @@
+"""Tests for the reusable MediaPipe inference session."""
+
+import sys
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from PIL import Image
+
+from portrait_analyser.face import detect_eyes
+from portrait_analyser.pose import detect_neck_midpoint
+from portrait_analyser.session import PortraitInferenceSession
+
+
+def _mock_mediapipe():
+    mock_mp = MagicMock()
+    mock_mp.ImageFormat.SRGB = "SRGB"
+    vision = mock_mp.tasks.vision
+    vision.FaceDetector.create_from_options.return_value.detect.return_value = (
+        SimpleNamespace(detections=[])
+    )
+    vision.PoseLandmarker.create_from_options.return_value.detect.return_value = (
+        SimpleNamespace(pose_landmarks=[])
+    )
+    vision.FaceLandmarker.create_from_options.return_value.detect.return_value = (
+        SimpleNamespace(face_landmarks=[])
+    )
+    return mock_mp
+
+
+@contextmanager
+def _patched(mock_mp):
+    with (
+        patch("portrait_analyser.face._get_face_model_path", return_value="/fake"),
+        patch("portrait_analyser.pose._get_model_path", return_value="/fake"),
+        patch("portrait_analyser.pose._get_face_mesh_model_path", return_value="/fake"),
+        patch.dict(sys.modules, {"mediapipe": mock_mp}),
+    ):
+        yield
+
+
+class TestPortraitInferenceSession:
+    def test_detector_is_created_once_and_reused(self):
+        mock_mp = _mock_mediapipe()
+        image = Image.new("RGB", (64, 64))
+        with _patched(mock_mp), PortraitInferenceSession() as session:
+            detect_eyes(image, session=session)
+            detect_eyes(image, session=session)
+            detector = mock_mp.tasks.vision.FaceDetector.create_from_options
+            assert detector.call_count == 1
+            detector.return_value.close.assert_not_called()
+
+        detector.return_value.close.assert_called_once()
+
+    def test_without_session_model_is_loaded_and_closed_per_call(self):
+        mock_mp = _mock_mediapipe()
+        image = Image.new("RGB", (64, 64))
+        with _patched(mock_mp):
+            detect_eyes(image)
+            detect_eyes(image)
+
+        detector = mock_mp.tasks.vision.FaceDetector.create_from_options
+        assert detector.call_count == 2
+        assert detector.return_value.close.call_count == 2
+
+    def test_neck_midpoint_reuses_pose_and_face_mesh_models(self):
+        mock_mp = _mock_mediapipe()
+        image = Image.new("RGB", (64, 64))
+        with _patched(mock_mp), PortraitInferenceSession() as session:
+            for _ in range(3):
+                neck, pose_debug, face_mesh_debug = detect_neck_midpoint(
+                    image, session=session
+                )
+                assert neck is None
+
+        vision = mock_mp.tasks.vision
+        assert vision.PoseLandmarker.create_from_options.call_count == 1
+        assert vision.FaceLandmarker.create_from_options.call_count == 1
+        assert vision.PoseLandmarker.create_from_options.return_value.detect.call_count == 3
+
+    def test_different_options_get_separate_instances(self):
+        mock_mp = _mock_mediapipe()
+        vision = mock_mp.tasks.vision
+        vision.PoseLandmarker.create_from_options.side_effect = (
+            lambda options: MagicMock()
+        )
+        with _patched(mock_mp):
+            session = PortraitInferenceSession()
+            first = session.pose_landmarker(0.5)
+            assert session.pose_landmarker(0.5) is first
+            assert session.pose_landmarker(0.7) is not first
+            session.close()
+            assert session.pose_landmarker(0.5) is not first
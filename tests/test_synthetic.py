@@ -0,0 +1,146 @@
+"""Tests for the synthetic portrait generator."""
+
+import math
+
+import numpy as np
+import pytest
+
+from portrait_analyser.incisor import depth_raw_to_distance_cm, pixel_to_mm
+from portrait_analyser.synthetic import (
+    DEPTH_MAP_HEIGHT,
+    REFERENCE_PHOTO_SIZE,
+    SyntheticSubject,
+    generate_synthetic_portrait,
+    photo_size_for_megapixels,
+)
+
+
+@pytest.fixture(scope="module")
+def small():
+    return generate_synthetic_portrait(1)
+
+
+class TestSizes:
+    @pytest.mark.parametrize(
+        "megapixels, size", [(1, (866, 1155)), (12, (3000, 4000)), (48, (6000, 8000))]
+    )
+    def test_photo_size_for_megapixels(self, megapixels, size):
+        assert photo_size_for_megapixels(megapixels) == size
+
+    def test_images_match_requested_size(self, small):
+        portrait, truth = small
+        assert portrait.photo.size == truth.photo_size == (866, 1155)
+        assert portrait.depthmap.size == truth.depth_size == (480, DEPTH_MAP_HEIGHT)
+        for matte in (portrait.teethmap, portrait.skinmap, portrait.hairmap):
+            assert matte.size == portrait.photo.size
+            assert set(np.unique(np.array(matte))) <= {0, 255}
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            photo_size_for_megapixels(0)
+        with pytest.raises(ValueError):
+            SyntheticSubject(distance_mm=1000)
+        with pytest.raises(ValueError):
+            SyntheticSubject(incisal_gap_mm=-1)
+
+
+class TestDeterminism:
+    def test_same_arguments_same_images(self, small):
+        portrait, truth = small
+        again, again_truth = generate_synthetic_portrait(1)
+        assert again_truth == truth
+        for name in ("photo", "depthmap", "teethmap", "skinmap", "hairmap"):
+            assert np.array_equal(
+                np.array(getattr(portrait, name)), np.array(getattr(again, name))
+            )
+
+
+class TestGroundTruth:
+    def test_depth_decodes_to_scene_distance(self, small):
+        portrait, truth = small
+        subject = truth.subject
+        # Depth pixel on the neck's front surface, below the chin.
+        y_mm = 40.0
+        z_mm = subject.distance_mm - subject.neck_radius_mm
+        x_px, y_px = truth.project((0.0, y_mm, z_mm))
+        width, height = truth.photo_size
+        depth_w, depth_h = truth.depth_size
+        j = round(x_px * (depth_w - 1) / (width - 1))
+        i = round(y_px * (depth_h - 1) / (height - 1))
+        raw = portrait.depthmap.getpixel((j, i))
+
+        assert raw == truth.encode_depth(z_mm)
+        distance_cm = depth_raw_to_distance_cm(
+            raw, portrait.floatValueMin, portrait.floatValueMax
+        )
+        assert distance_cm * 10 == pytest.approx(z_mm, rel=0.01)
+
+    def test_background_is_zero_disparity(self, small):
+        portrait, _ = small
+        assert portrait.depthmap.getpixel((0, 0)) == 0
+
+    def test_incisal_edges_bound_the_teeth_gap(self, small):
+        portrait, truth = small
+        teeth = np.array(portrait.teethmap) > 0
+        x = round(truth.upper_incisal_edge_px[0])
+        column = np.flatnonzero(teeth[:, x])
+        gap = np.flatnonzero(np.diff(column) > 1)
+        assert len(gap) == 1
+        upper_edge, lower_edge = column[gap[0]], column[gap[0] + 1]
+
+        assert upper_edge == pytest.approx(truth.upper_incisal_edge_px[1], abs=1)
+        assert lower_edge == pytest.approx(truth.lower_incisal_edge_px[1], abs=1)
+        assert truth.incisal_gap_3d_mm == pytest.approx(
+            math.dist(truth.upper_incisal_edge_mm, truth.lower_incisal_edge_mm)
+        )
+        assert truth.incisal_gap_3d_mm >= truth.subject.incisal_gap_mm
+
+    def test_mattes_are_disjoint(self, small):
+        portrait, _ = small
+        teeth, skin, hair = (
+            np.array(m) > 0 for m in (portrait.teethmap, portrait.skinmap, portrait.hairmap)
+        )
+        assert skin.any() and hair.any() and teeth.any()
+        assert not (skin & hair).any()
+        assert not (skin & teeth).any()
+
+    def test_neck_width_matches_cylinder(self, small):
+        portrait, truth = small
+        subject = truth.subject
+        _, y_px = truth.project((0.0, 40.0, subject.distance_mm))
+        row = np.array(portrait.skinmap)[round(y_px)] > 0
+        width_px = np.flatnonzero(row)[-1] - np.flatnonzero(row)[0] + 1
+        # Silhouette of a cylinder of radius r seen from distance D.
+        r, d = subject.neck_radius_mm, subject.distance_mm
+        half_angle = math.asin(r / d)
+        expected = 2 * truth.focal_length_px * math.tan(half_angle)
+        assert width_px == pytest.approx(expected, abs=2)
+
+    def test_face_location_frames_the_head(self, small):
+        portrait, truth = small
+        x, y, w, h = truth.face_location
+        head = (np.array(portrait.skinmap) > 0) | (np.array(portrait.hairmap) > 0)
+        columns = np.flatnonzero(head[: y + h].any(axis=0))
+        assert np.flatnonzero(head.any(axis=1))[0] == pytest.approx(y, abs=1)
+        assert (columns[0], columns[-1]) == pytest.approx((x, x + w - 1), abs=1)
+
+
+class TestReferenceResolution:
+    def test_library_calibration_recovers_scene_mm(self):
+        _, truth = generate_synthetic_portrait(photo_size=REFERENCE_PHOTO_SIZE)
+        width, _ = truth.photo_size
+        x_mm = 50.0
+        x_px, _ = truth.project((x_mm, 0.0, truth.subject.distance_mm))
+        measured = pixel_to_mm(x_px, truth.subject.distance_mm / 10, width)
+        assert measured == pytest.approx(x_mm, rel=0.01)
+
+    def test_analyse_teeth_measures_incisal_gap(self):
+        portrait, truth = generate_synthetic_portrait(
+            photo_size=REFERENCE_PHOTO_SIZE, analyse_teeth=True
+        )
+        assert portrait.teeth_bbox is not None
+        measurement = portrait.incisor_measurement
+        assert measurement is not None
+        assert measurement.distance_3d_mm == pytest.approx(
+            truth.incisal_gap_3d_mm, rel=0.05
+        )
@@ -0,0 +1,135 @@
+"""Tests for Monte Carlo measurement uncertainty estimation."""
+
+import time
+
+import numpy
+import pytest
+from PIL import Image
+
+from portrait_analyser.face import IncisorMeasurement
+from portrait_analyser.incisor import compute_incisor_distance_3d
+from portrait_analyser.neck import compute_neck_circumference
+from portrait_analyser.tmd import compute_tmd_3d
+from portrait_analyser.uncertainty import (
+    NoiseModel,
+    estimate_incisor_uncertainty,
+    estimate_neck_circumference_uncertainty,
+    estimate_tmd_uncertainty,
+)
+
+ZERO_NOISE = NoiseModel(landmark_sigma_px=0.0, depth_sigma_raw=0.0, sag_sigma_px=0.0)
+
+
+def _neck_setup(width=400, height=600):
+    skin = numpy.zeros((height, width), dtype=numpy.uint8)
+    skin[60:250, 100:300] = 255
+    skin[250:350, 160:240] = 255
+    skin[350:560, 60:340] = 255
+    xs = numpy.arange(width)
+    profile = 200 - 50 * numpy.abs(xs - width // 2) / (width // 2)
+    depth = numpy.tile(profile.astype(numpy.uint8), (height, 1))
+    skinmap = Image.fromarray(skin, mode="L")
+    depthmap = Image.fromarray(depth, mode="L")
+    measurement = compute_neck_circumference(
+        skinmap=skinmap,
+        depthmap=depthmap,
+        photo_width=width,
+        photo_height=height,
+        float_min=0.5,
+        float_max=2.0,
+        face_location=(100, 60, 200, 190),
+        arc_sag=10,
+    )
+    assert measurement is not None
+    return measurement, depthmap, width, height
+
+
+class TestNoiseModel:
+    def test_negative_sigma_is_rejected(self):
+        with pytest.raises(ValueError):
+            NoiseModel(depth_sigma_raw=-1.0)
+
+
+class TestTwoPointUncertainty:
+    def test_zero_noise_reproduces_tmd(self):
+        args = ((180.0, 250.0), (200.0, 420.0), 180, 170, 0.5, 2.0, 400, 600)
+        expected = compute_tmd_3d(*args)[0]
+
+        estimate = estimate_tmd_uncertainty(*args, noise=ZERO_NOISE, n_draws=50)
+
+        assert estimate.mean == pytest.approx(expected)
+        assert estimate.std == pytest.approx(0.0, abs=1e-9)
+        assert estimate.n_valid == 50
+
+    def test_noise_spreads_distribution_around_incisor_distance(self):
+        upper, lower = (200.0, 300.0), (200.0, 340.0)
+        expected = compute_incisor_distance_3d(
+            upper, lower, 180, 180, 0.5, 2.0, 400, 600
+        )[0]
+        measurement = IncisorMeasurement(
+            upper_centroid=upper,
+            lower_centroid=lower,
+            upper_depth_raw=180,
+            lower_depth_raw=180,
+            distance_3d_mm=expected,
+        )
+
+        estimate = estimate_incisor_uncertainty(
+            measurement, 0.5, 2.0, 400, 600, n_draws=400, seed=7
+        )
+
+        assert estimate.std > 0
+        assert estimate.percentiles[5.0] < expected < estimate.percentiles[95.0]
+        assert estimate.mean == pytest.approx(expected, rel=0.1)
+
+    def test_missing_depth_returns_none(self):
+        measurement = IncisorMeasurement((0.0, 0.0), (0.0, 10.0))
+        assert estimate_incisor_uncertainty(measurement, 0.5, 2.0, 400, 600) is None
+
+    def test_seed_makes_draws_reproducible(self):
+        args = ((180.0, 250.0), (200.0, 420.0), 180, 170, 0.5, 2.0, 400, 600)
+        first = estimate_tmd_uncertainty(*args, seed=3)
+        second = estimate_tmd_uncertainty(*args, seed=3)
+        assert first == second
+
+
+class TestNeckCircumferenceUncertainty:
+    def test_zero_noise_reproduces_circumference(self):
+        measurement, depthmap, width, height = _neck_setup()
+
+        estimate = estimate_neck_circumference_uncertainty(
+            measurement, depthmap, width, height, 0.5, 2.0,
+            noise=ZERO_NOISE, n_draws=20,
+        )
+
+        assert estimate.mean == pytest.approx(measurement.circumference_mm)
+        assert estimate.std == pytest.approx(0.0, abs=1e-9)
+
+    def test_several_hundred_draws_are_fast(self):
+        measurement, depthmap, width, height = _neck_setup()
+
+        started = time.perf_counter()
+        estimate = estimate_neck_circumference_uncertainty(
+            measurement, depthmap, width, height, 0.5, 2.0, n_draws=500, seed=1
+        )
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.5
+        assert estimate.n_draws == 500
+        assert estimate.n_valid == 500
+        assert estimate.std > 0
+        assert (
+            estimate.percentiles[5.0]
+            <= estimate.percentiles[50.0]
+            <= estimate.percentiles[95.0]
+        )
+
+    def test_invalid_depth_draws_are_not_counted(self):
+        measurement, _, width, height = _neck_setup()
+        empty_depth = Image.new("L", (width, height), 0)
+
+        estimate = estimate_neck_circumference_uncertainty(
+            measurement, empty_depth, width, height, 0.5, 2.0, n_draws=10
+        )
+
+        assert estimate is None